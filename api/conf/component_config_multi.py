@@ -324,13 +324,13 @@ class ComponentManager:
             'component_id': comp_config.id,
             'server_type': self.server_type,
             'request_params': request_params,
-            'file_timestamps': {}
+            'fingerprints': {}
         }
         
-        # 添加依赖的数据文件时间戳
-        for data_key in comp_config.source_data_keys:
-            if hasattr(self.server, 'data_cache') and hasattr(self.server.data_cache, 'timestamps'):
-                source_data['file_timestamps'][data_key] = self.server.data_cache.timestamps.get(data_key, 0)
+        # 添加依赖的数据文件指纹（不访问数据本身）
+        data_cache = getattr(self.server, 'data_cache', None)
+        if data_cache is not None and hasattr(data_cache, 'get_fingerprints'):
+            source_data['fingerprints'] = data_cache.get_fingerprints(list(comp_config.source_data_keys))
         
         return source_data
     
@@ -7,6 +7,8 @@ Date: 2025-07-23
 """
 from .processor_factory import ProcessorFactory, SimplifiedProcessorManager, create_processor_manager
 from .base_processor import BaseDataProcessor
+from .table_serializer import serialize_rows, serialize_table
+from .distribution_matrix import DistributionMatrix
 from .multiplate_processor import MultiPlateProcessor
 from .demo_processor import DemoProcessor
 
@@ -15,6 +17,9 @@ __all__ = [
     'SimplifiedProcessorManager', 
     'create_processor_manager',
     'BaseDataProcessor',
+    'serialize_rows',
+    'serialize_table',
+    'DistributionMatrix',
     'MultiPlateProcessor',
     'DemoProcessor',
     'StrongProcessor'
@@ -3,10 +3,17 @@
 提供通用的数据处理功能和接口规范
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence
+import hashlib
 import logging
 import time
-from flask import jsonify, request
+
+import numpy as np
+import pandas as pd
+from flask import jsonify, request, has_request_context
+
+from .concurrent_fetch import LoadSpec, fetch_all
+from .distribution_matrix import DistributionMatrix
 
 
 class BaseDataProcessor(ABC):
@@ -23,17 +30,130 @@ class BaseDataProcessor(ABC):
         self.data_cache = server_instance.data_cache
         self.response_cache = server_instance.response_cache
         self.logger = server_instance.logger
+        # 涨幅分布矩阵缓存: (数据键, 列名) -> (数据指纹, DistributionMatrix)
+        self._distribution_cache = {}
+        # 索引刷新键的内容摘要: 索引名 -> ((日期键, 获取版本), 摘要)
+        self._content_keys = {}
     
     def get_request_params(self) -> Dict[str, Any]:
         """获取请求参数"""
         return dict(request.args) if hasattr(request, 'args') else {}
     
     def build_cache_params(self, **kwargs) -> Dict[str, Any]:
-        """构建缓存参数"""
-        params = self.get_request_params()
+        """构建缓存参数：规范化后的请求参数（只保留组件声明的参数）加上调用方指定的参数"""
+        endpoint = request.path if has_request_context() else ''
+        params = self.response_cache.canonical_params(endpoint, self.get_request_params())
         params.update(kwargs)
         return params
     
+    def load_history(self, loader_cls, start_date=None, end_date=None, method: str = 'get_daily_data',
+                     date_column: str = 'trade_date', setup: Optional[str] = None):
+        """
+        通过服务器的数据访问层读取 stock_data 加载器的数据，加载器实例共用、结果按日期范围记忆
+        服务器没有数据访问层时直接新建加载器查询
+        """
+        data_access = getattr(self.server, 'data_access', None)
+        if data_access is not None:
+            return data_access.fetch(loader_cls, method, start_date, end_date, date_column, setup)
+        loader = loader_cls()
+        if setup:
+            getattr(loader, setup)()
+        kwargs = {key: value for key, value in (('start_date', start_date), ('end_date', end_date)) if value}
+        return getattr(loader, method)(**kwargs)
+    
+    def query_data(self, data_key: str, stock_ids=None, start=None, end=None):
+        """按股票id和时间列范围查询缓存数据（数据缓存的二级索引），代替 isin 和范围布尔筛选"""
+        return self.data_cache.query(data_key, stock_ids, start, end)
+    
+    def index_frame(self, frame, order_col=None, id_col='id'):
+        """
+        为按请求读取的长表建立二级索引，代替逐只股票的 df[df['id'] == stock_id] 扫描:
+            for stock_id, stock_data in self.index_frame(stock_df, 'time').groups(stock_list):
+        """
+        return self.data_cache.index_frame(frame, order_col, id_col)
+    
+    def load_panel(self, loader_cls, fields, start_date, end_date=None, stock_ids=None):
+        """
+        股票×交易日面板（服务器的日线面板存储，按需增量扩展），日期范围和股票为切片
+        按股票的 shift / diff / cumsum / rolling 使用面板的向量化运算
+        """
+        return self.server.daily_panels.get(loader_cls, fields, start_date, end_date, stock_ids)
+    
+    def fetch_concurrently(self, **loads: LoadSpec) -> Dict[str, Any]:
+        """
+        在共享I/O线程池中并发执行相互独立的数据加载，全部完成后返回 {名称: 结果}
+        加载项写作 名称=加载函数 或 名称=(加载函数, [依赖的加载项])，依赖的结果按顺序作为参数传入
+        """
+        start_time = time.time()
+        results = fetch_all(loads)
+        self.logger.debug(f"并发加载 {', '.join(loads)} 耗时 {time.time() - start_time:.2f}秒")
+        return results
+    
+    def get_data_fingerprints(self, *keys: str) -> Dict[str, Any]:
+        """获取数据文件指纹，用于构建缓存判断的源数据"""
+        return self.data_cache.get_fingerprints(list(keys))
+    
+    def get_affinity_sector_index(self):
+        """板块关联数据(affinity_df)的板块成员索引，数据文件变化时才重建"""
+        return self.server.sector_index.frame_index(
+            'affinity', self.data_cache.get_fingerprint('affinity_df'),
+            lambda: self.data_cache.load_data('affinity_df'), id_col='股票id', sector_col='板块')
+    
+    @staticmethod
+    def content_key(df, columns: Sequence[str]) -> str:
+        """指定列内容的摘要（与行顺序无关），用作索引的刷新键，成员变化而行数不变时同样变化"""
+        row_hashes = pd.util.hash_pandas_object(df[list(columns)], index=False).to_numpy()
+        return hashlib.md5(np.sort(row_hashes).tobytes()).hexdigest()
+    
+    def memoized_content_key(self, name: str, date_key: str, df, columns: Sequence[str]) -> str:
+        """
+        按数据获取版本记忆的内容摘要：df来自数据访问层（或由其筛选、变形得到）时，
+        同一获取版本和日期只计算一次 O(行数) 的摘要；没有获取版本时每次计算
+        """
+        data_access = getattr(self.server, 'data_access', None)
+        version = data_access.fetch_version(df) if data_access is not None else None
+        identity = (date_key, version)
+        cached = self._content_keys.get(name)
+        if version is not None and cached is not None and cached[0] == identity:
+            return cached[1]
+        key = self.content_key(df, columns)
+        if version is not None:
+            self._content_keys[name] = (identity, key)
+        return key
+    
+    def get_ths_concept_index(self, concept_df):
+        """同花顺概念成分股索引，concept_df为最新交易日的概念数据，成分股内容不变时只解析一次"""
+        date_key = str(concept_df['trade_date'].max())
+        refresh_key = (date_key, self.memoized_content_key('ths_concept', date_key, concept_df, ['concept_name', 'stocks']))
+        return self.server.sector_index.concept_index('ths_concept', refresh_key, concept_df)
+    
+    def get_kpl_concept_index(self, date_key: str, membership_df):
+        """开盘啦概念成员索引，membership_df为 (id, sector_name) 行数据，成员内容不变时只解析一次"""
+        refresh_key = (date_key, self.memoized_content_key('kpl_concept', date_key, membership_df, ['id', 'sector_name']))
+        return self.server.sector_index.frame_index('kpl_concept', refresh_key, membership_df,
+                                                    id_col='id', sector_col='sector_name')
+    
+    def get_distribution_matrix(self, df, data_key: str = 'plate_df', column: str = '涨幅分布') -> DistributionMatrix:
+        """
+        获取df中涨幅分布列的解析矩阵，整份数据文件每次加载只解析一次，df可以是其筛选后的子集
+        df在数据重新加载前读取时（行标签相同但内容不同），直接解析df本身
+        """
+        fingerprint = self.data_cache.get_fingerprint(data_key)
+        cached = self._distribution_cache.get((data_key, column))
+        if cached is None or cached[0] != fingerprint:
+            full_df = self.data_cache.load_data(data_key)
+            if column not in full_df.columns:
+                return DistributionMatrix(df[column])
+            cached = (self.data_cache.get_fingerprint(data_key), DistributionMatrix(full_df[column]), full_df[column])
+            self._distribution_cache[(data_key, column)] = cached
+        try:
+            matrix = cached[1].subset(df.index)
+        except KeyError:
+            return DistributionMatrix(df[column])
+        if not cached[2].loc[df.index].equals(df[column]):
+            return DistributionMatrix(df[column])
+        return matrix
+    
     def should_use_cache(self, endpoint: str, cache_params: Optional[Dict] = None, 
                         source_data: Optional[Dict] = None):
         """检查是否应该使用缓存"""
@@ -0,0 +1,95 @@
+"""
+并发加载 - 在共享的I/O线程池中并发执行端点内相互独立的数据加载
+Author: data_panel开发团队
+Date: 2025-08-12
+
+端点通常依次读取板块指数、分钟线、概念成分股等多份数据，响应时间是各次I/O之和。
+加载项声明依赖后，没有依赖或依赖已完成的加载项立即提交到线程池，全部完成后再进入pandas计算:
+    loads = {
+        'index': lambda: self.load_history(ThsConceptIndexData, start_date=start_date),
+        'concept': lambda: self.load_history(ThsConceptData, start_date=start_date),
+        'minute': (lambda index_df: load_minute(index_df), ['index']),
+    }
+线程池大小由环境变量 DATA_PANEL_IO_WORKERS 控制（默认8），为0时依次执行。
+"""
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# 共享I/O线程池大小
+DEFAULT_IO_WORKERS = int(os.environ.get('DATA_PANEL_IO_WORKERS', 8))
+
+LoadSpec = Union[Callable[..., Any], Tuple[Callable[..., Any], List[str]]]
+
+_executor_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_io_thread = threading.local()
+
+
+def get_io_executor() -> Optional[ThreadPoolExecutor]:
+    """进程内共享的I/O线程池，首次使用时创建"""
+    global _executor
+    if DEFAULT_IO_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_IO_WORKERS, thread_name_prefix='data-io')
+        return _executor
+
+
+def _parse_loads(loads: Dict[str, LoadSpec]) -> Dict[str, Tuple[Callable[..., Any], List[str]]]:
+    specs = {}
+    for name, spec in loads.items():
+        func, deps = (spec, []) if callable(spec) else (spec[0], list(spec[1]))
+        unknown = [dep for dep in deps if dep not in loads]
+        if unknown:
+            raise ValueError(f"加载项 {name} 依赖未声明的加载项: {', '.join(unknown)}")
+        specs[name] = (func, deps)
+    return specs
+
+
+def _run_in_io_thread(func: Callable[..., Any], args: List[Any]) -> Any:
+    _io_thread.active = True
+    try:
+        return func(*args)
+    finally:
+        _io_thread.active = False
+
+
+def fetch_all(loads: Dict[str, LoadSpec]) -> Dict[str, Any]:
+    """
+    执行加载项并返回 {名称: 结果}
+
+    Args:
+        loads: {名称: 加载函数} 或 {名称: (加载函数, [依赖的加载项])}，依赖的结果按顺序作为参数传入
+    """
+    specs = _parse_loads(loads)
+    executor = get_io_executor()
+    # 加载项内部再次并发加载时直接依次执行，避免线程池线程互相等待
+    sequential = executor is None or len(specs) <= 1 or getattr(_io_thread, 'active', False)
+
+    results: Dict[str, Any] = {}
+    pending = dict(specs)
+    running = {}
+    try:
+        while pending or running:
+            ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+            if not ready and not running:
+                raise ValueError(f"加载项存在循环依赖: {', '.join(pending)}")
+            for name in ready:
+                func, deps = pending.pop(name)
+                args = [results[dep] for dep in deps]
+                if sequential:
+                    results[name] = func(*args)
+                else:
+                    running[executor.submit(_run_in_io_thread, func, args)] = name
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+    except BaseException:
+        for future in running:
+            future.cancel()
+        raise
+    return results
@@ -95,7 +95,7 @@ class DemoProcessor(BaseDataProcessor):
             source_data = {
                 'data_time': str(latest_time),
                 'data_count': len(stock_df),
-                'file_timestamp': self.data_cache.timestamps.get('stock_df', 0)
+                'fingerprints': self.get_data_fingerprints('stock_df')
             }
             
             # 检查是否可以使用缓存
@@ -0,0 +1,87 @@
+"""
+涨幅分布矩阵 - 将"涨幅分布"列（如 "3-5-10-2-1"）一次性展开为二维NumPy数组，各指标按数组规约计算
+Author: data_panel开发团队
+Date: 2025-08-10
+
+与服务器中逐行计算的 _calculate_tail_ratio / _calculate_center_of_mass 结果一致：
+无法解析的行（非字符串、含非数字片段）各项指标均为0
+"""
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class DistributionMatrix:
+    """涨幅分布矩阵，每行为一个分布，按列左对齐，不足的位置补0"""
+
+    def __init__(self, values: Iterable, index=None):
+        """
+        Args:
+            values: 涨幅分布字符串序列
+            index: 行索引，默认沿用values的索引
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(list(values))
+        self.index = pd.Index(index if index is not None else series.index)
+
+        is_str = series.map(lambda x: isinstance(x, str)).to_numpy(dtype=bool)
+        parts = series.astype(object).where(is_str).str.split('-', expand=True)
+        if parts.shape[1] == 0:
+            parts = pd.DataFrame(index=series.index, columns=[0])
+        numbers = parts.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        present = parts.notna().to_numpy()
+
+        # 含非数字片段的行视为无法解析
+        self.valid = is_str & ~(present & np.isnan(numbers)).any(axis=1)
+        self.lengths = np.where(self.valid, present.sum(axis=1), 0)
+        self.values = np.where(present & self.valid[:, None], numbers, 0.0)
+        self._cumsum = np.cumsum(self.values, axis=1)
+        self.totals = self._cumsum[:, -1] if self.values.shape[1] else np.zeros(len(series))
+
+    def __len__(self):
+        return len(self.index)
+
+    def subset(self, labels) -> 'DistributionMatrix':
+        """按行索引标签取子集，标签不存在时抛出KeyError"""
+        positions = self.index.get_indexer(labels) if self.index.is_unique else np.full(len(labels), -1)
+        if (positions < 0).any():
+            raise KeyError("行索引不在分布矩阵中")
+        result = object.__new__(DistributionMatrix)
+        result.index = pd.Index(labels)
+        result.valid = self.valid[positions]
+        result.lengths = self.lengths[positions]
+        result.values = self.values[positions]
+        result._cumsum = self._cumsum[positions]
+        result.totals = self.totals[positions]
+        return result
+
+    def _ratio(self, numerator: np.ndarray) -> np.ndarray:
+        """numerator / totals，保留2位小数，合计为0时为0"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(self.totals != 0, numerator / self.totals, 0.0)
+        return np.round(ratio, 2)
+
+    def tail_ratio(self, n: int) -> np.ndarray:
+        """倒数后n个数的合计与总合计的比值"""
+        head_len = self.lengths - n
+        rows = np.arange(len(self.lengths))
+        head_sum = np.where(head_len > 0, self._cumsum[rows, np.clip(head_len - 1, 0, None)], 0.0) \
+            if self.values.shape[1] else np.zeros(len(rows))
+        return self._ratio(self.totals - head_sum)
+
+    def center_of_mass(self) -> np.ndarray:
+        """数字串的重心位置（位置从1开始）"""
+        positions = np.arange(1, self.values.shape[1] + 1)
+        return self._ratio(self.values @ positions)
+
+    def last_values(self, min_length: int = 2) -> np.ndarray:
+        """每行最后一个数，长度不足min_length的行为0（近似涨停数）"""
+        rows = np.arange(len(self.lengths))
+        if not self.values.shape[1]:
+            return np.zeros(len(rows), dtype=int)
+        last = self.values[rows, np.clip(self.lengths - 1, 0, None)]
+        return np.where(self.lengths >= min_length, last, 0).astype(int)
+
+    def series(self, values: np.ndarray, name=None) -> pd.Series:
+        """将计算结果包装为与行索引对齐的Series"""
+        return pd.Series(values, index=self.index, name=name)
@@ -7,6 +7,7 @@ Date: 2025-08-14 10:57:34
 
 from datetime import datetime
 from flask import jsonify
+import numpy as np
 import pandas as pd
 
 from stock_data.kaipanla.stock.daily import KplStockData
@@ -17,6 +18,7 @@ from stock_data.ths.concept_index import ThsConceptIndexData
 from stock_data.ths.concept_minute import ThsConceptMinuteData
 from utils.common import get_latest_stock_name_from_stock_id, get_trade_date_by_offset
 from .base_processor import BaseDataProcessor
+from .sector_matrix import SectorMembershipMatrix
 
 class MarketRealtimeProcessor(BaseDataProcessor):
     """
@@ -42,6 +44,66 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         latest_date = df['trade_date'].max()
         df = df[df['trade_date'] == latest_date]
         self.stock_name_df = df.copy()  # 保留最新日期的数据副本
+        # 股票×板块成员矩阵缓存，成员内容变化时重建
+        self._sector_membership = None
+        self._sector_membership_key = None
+        self._stock_name_map = None
+
+    def get_minute_cube(self):
+        """当日股票×分钟立方体，按需从实时分钟线增量刷新"""
+        def load(start_time):
+            loader = StockMinuteData()
+            return loader.get_realtime_data(start_time=start_time) if start_time else loader.get_realtime_data()
+        return self.server.minute_cube.get(load)
+
+    def get_stock_name_map(self):
+        """股票id→股票名称"""
+        if self._stock_name_map is None:
+            names = self.stock_name_df[['id', 'stock_name']].drop_duplicates('id')
+            self._stock_name_map = dict(zip(names['id'].tolist(), names['stock_name'].tolist()))
+        return self._stock_name_map
+
+    @staticmethod
+    def clamp_change_diff(change_diff):
+        """将在区间-2到2的change值设置为2或-2，change为正时则设为2，负时设为-2"""
+        inside = (change_diff >= -2) & (change_diff <= 2)
+        return np.where(inside, np.where(change_diff > 0, 2, -2), change_diff)
+
+    @staticmethod
+    def minute_factors(view, change, rows=None):
+        """
+        每分钟的市场因子，只包含有分钟线的时间点
+        factor_2: change大于2的个数减去小于-2的个数；factor_9_7: change大于9.7的个数
+        """
+        present = view.present if rows is None else view.present[rows]
+        active = present.any(axis=0)
+        factor_2 = view.count_by_minute(change > 2, rows) - view.count_by_minute(change < -2, rows)
+        factor_9_7 = view.count_by_minute(change > 9.7, rows)
+        labels = [label for label, keep in zip(view.labels, active) if keep]
+        return labels, factor_2[active].tolist(), factor_9_7[active].tolist()
+
+    def stock_minute_traces(self, view, values, sector_name, line_width=2, marker_size=3):
+        """板块内每只股票一条分钟折线，按切片的股票顺序，没有分钟线的股票跳过"""
+        names = self.get_stock_name_map()
+        chart_data = []
+        for row, stock_id in enumerate(view.ids.tolist()):
+            x_data, y_data = view.series(row, values)
+            if not x_data:
+                continue
+            stock_name = names.get(stock_id, stock_id)
+            chart_data.append({
+                "name": f'{stock_name}——{sector_name}',
+                "x": x_data,
+                "y": y_data,
+                "mode": "lines+markers+text",  # 添加 +text 模式
+                "line": {"width": line_width},
+                "marker": {"size": marker_size},
+                "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
+                "textposition": "middle right",
+                "textfont": {"size": 10, "color": "black"},
+                "showlegend": True
+            })
+        return chart_data
 
     def get_sector_rankings_by_period(self, df, latest_date_str, days_list=[5, 10, 20], top_n=10):
         """
@@ -159,15 +221,12 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         stock_df = stock_df[(stock_df['trade_date'] >= start_date_dt) & (stock_df['trade_date'] <= latest_date)]
         
         # 获取板块内股票列表
-        d = ThsConceptData()
-        concept_df = d.get_daily_data(start_date=start_date)
+        concept_df = self.load_history(ThsConceptData, start_date=start_date)
         # 获取最新交易日数据
         concept_latest_date = concept_df['trade_date'].max()
         concept_df = concept_df[concept_df['trade_date'] == concept_latest_date]
         # 获取股票列表
-        stock_list = concept_df[concept_df['concept_name'] == sector_name]['stocks'].values[0].split(',')
-        # 并变成整数型
-        stock_list = [int(stock) for stock in stock_list if stock.isdigit()]
+        stock_list = self.get_ths_concept_index(concept_df).get_ids(sector_name)
         # 获取stock_df中id在stock_list中的数据
         stock_df = stock_df[stock_df['id'].isin(stock_list)]
         # groupby id，计算change列的cumsum
@@ -180,37 +239,35 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         date_order = [date.strftime('%m/%d') for date in all_dates]
         
         chart_data = []
-        for stock_id in stock_list:
-            stock_data = stock_df[stock_df['id'] == stock_id]
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='trade_date')
-                # 获取股票名称 - 取第一行的值
-                stock_name = stock_data['stock_name'].iloc[0]
-                # 统计5日，10日，20日涨幅大于9.7的次数，分别用up_limit_count5, up_limit_count_10,up_limit_count20
-                x_data = stock_data['date_str'].tolist()
-                y_data = stock_data['change_cumsum'].tolist()
-                tmp_data = stock_data['change'].tolist()
-                up_limit_count_5 = sum(1 for change in tmp_data[-5:] if change > 9.7)
-                up_limit_count_10 = sum(1 for change in tmp_data[-10:] if change > 9.7)
-                up_limit_count_15 = sum(1 for change in tmp_data[-15:] if change > 9.7)
-                up_limit_count_20 = sum(1 for change in tmp_data[-20:] if change > 9.7)
-                up_limit_count_20 = up_limit_count_20-up_limit_count_15
-                up_limit_count_15 = up_limit_count_15-up_limit_count_10
-                up_limit_count_10 = up_limit_count_10-up_limit_count_5
+        # 按股票id建立一次索引，逐只股票取按时间排序的数据
+        for stock_id, stock_data in self.index_frame(stock_df, 'trade_date').groups(stock_list):
+            # 获取股票名称 - 取第一行的值
+            stock_name = stock_data['stock_name'].iloc[0]
+            # 统计5日，10日，20日涨幅大于9.7的次数，分别用up_limit_count5, up_limit_count_10,up_limit_count20
+            x_data = stock_data['date_str'].tolist()
+            y_data = stock_data['change_cumsum'].tolist()
+            tmp_data = stock_data['change'].tolist()
+            up_limit_count_5 = sum(1 for change in tmp_data[-5:] if change > 9.7)
+            up_limit_count_10 = sum(1 for change in tmp_data[-10:] if change > 9.7)
+            up_limit_count_15 = sum(1 for change in tmp_data[-15:] if change > 9.7)
+            up_limit_count_20 = sum(1 for change in tmp_data[-20:] if change > 9.7)
+            up_limit_count_20 = up_limit_count_20-up_limit_count_15
+            up_limit_count_15 = up_limit_count_15-up_limit_count_10
+            up_limit_count_10 = up_limit_count_10-up_limit_count_5
 
 
-                chart_data.append({
-                    "name": f'{stock_name}_{up_limit_count_20}-{up_limit_count_15}-{up_limit_count_10}-{up_limit_count_5}',
-                    "x": x_data,
-                    "y": y_data,
-                    "mode": "lines+markers+text",  # 添加 +text 模式
-                    "line": {"width": 2},
-                    "marker": {"size": 3},  # 设置圆点大小为3
-                    "text": [f'{stock_name}——{sector_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
-                    "textposition": "middle right",
-                    "textfont": {"size": 10, "color": "black"},
-                    "showlegend": True
-                })
+            chart_data.append({
+                "name": f'{stock_name}_{up_limit_count_20}-{up_limit_count_15}-{up_limit_count_10}-{up_limit_count_5}',
+                "x": x_data,
+                "y": y_data,
+                "mode": "lines+markers+text",  # 添加 +text 模式
+                "line": {"width": 2},
+                "marker": {"size": 3},  # 设置圆点大小为3
+                "text": [f'{stock_name}——{sector_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
+                "textposition": "middle right",
+                "textfont": {"size": 10, "color": "black"},
+                "showlegend": True
+            })
         
         return jsonify({
             "chartType": "line",
@@ -254,9 +311,13 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         # 将开始日期转换为datetime类型
         start_date_dt = pd.to_datetime(start_date, errors='coerce')
 
-        d = ThsConceptIndexData()
-        # 使用传入的开始日期获取数据
-        df = d.get_daily_data(start_date=start_date)
+        # 板块指数、分钟线、概念成分股相互独立，并发读取
+        loaded = self.fetch_concurrently(
+            index=lambda: ThsConceptIndexData().get_daily_data(start_date=start_date),  # 使用传入的开始日期获取数据
+            minute=self.get_minute_cube,  # 当日分钟立方体
+            concept=lambda: self.load_history(ThsConceptData, start_date=start_date),
+        )
+        df = loaded['index']
 
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -294,69 +355,19 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         # 去除重复的板块名称
         sector_names = list(set(sector_names))
 
-        # 获取分钟线股票数据 - 使用相同的日期范围
-        d = StockMinuteData()
-        stock_df = d.get_realtime_data() # 只取latest_date日的数据
-        stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
-        # time列应该已经包含日期和时间信息，确保其为datetime类型
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        
-        # 筛选股票数据到相同的日期范围
-        # stock_df = stock_df[(stock_df['trade_date'] >= start_date_dt) & (stock_df['trade_date'] <= latest_date)]
-        
         # 获取板块内股票列表
-        d = ThsConceptData()
-        concept_df = d.get_daily_data(start_date=start_date)
+        concept_df = loaded['concept']
         # 获取最新交易日数据
         concept_latest_date = concept_df['trade_date'].max()
         concept_df = concept_df[concept_df['trade_date'] == concept_latest_date]
         # 获取股票列表
-        stock_list = concept_df[concept_df['concept_name'] == sector_name]['stocks'].values[0].split(',')
-        # 并变成整数型
-        stock_list = [int(stock) for stock in stock_list if stock.isdigit()]
-        # 获取stock_df中id在stock_list中的数据
-        stock_df = stock_df[stock_df['id'].isin(stock_list)]
-        stock_df['change'] = ((stock_df['close']- stock_df['pre_close'])/ stock_df['pre_close'] *100).round(2) # 计算每分钟的涨幅
-        
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        # 去除09:30之前的数据
-        stock_df = stock_df[stock_df['time'].dt.strftime('%H:%M') >= '09:30']
-        stock_df['time_str'] = stock_df['time'].dt.strftime('%m%d_%H:%M')
-        # 如果pre_close列没有值或为0，填充pre_close列的值为1
-        stock_df['pre_close'] = stock_df['pre_close'].replace(0, 1)
-        
-        # stock_df = get_latest_stock_name_from_stock_id(stock_df)
-        # stock_df['date_str'] = stock_df['trade_date'].dt.strftime('%m/%d')
-        stock_df = stock_df.merge(self.stock_name_df[['id', 'stock_name']], on='id', how='left')
-        # 获取所有唯一的日期并按时间顺序排序，用于强制x轴顺序
-        all_dates = stock_df['time'].unique()
-        all_dates = sorted(pd.to_datetime(all_dates))
-        date_order = [date.strftime('%m%d_%H:%M') for date in all_dates]
+        stock_list = self.get_ths_concept_index(concept_df).get_ids(sector_name)
+        # 从分钟立方体切出板块内股票09:30之后的分钟线
+        view = loaded['minute'].slice(stock_list, start='09:30')
+        # 所有有数据的分钟，用于强制x轴顺序
+        date_order = view.active_labels()
         
-        chart_data = []
-        for stock_id in stock_list:
-            stock_data = stock_df[stock_df['id'] == stock_id]
-            
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='time')
-                # 获取股票名称 - 取第一行的值
-                stock_name = stock_data['stock_name'].iloc[0]
-                
-                x_data = stock_data['time_str'].tolist()
-                y_data = stock_data['change'].tolist()
-                
-                chart_data.append({
-                    "name": f'{stock_name}——{sector_name}',
-                    "x": x_data,
-                    "y": y_data,
-                    "mode": "lines+markers+text",  # 添加 +text 模式
-                    "line": {"width": 2},
-                    "marker": {"size": 3},  # 设置圆点大小为3
-                    "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
-                    "textposition": "middle right",
-                    "textfont": {"size": 10, "color": "black"},
-                    "showlegend": True
-                })
+        chart_data = self.stock_minute_traces(view, view.change, sector_name)
         
         return jsonify({
             "chartType": "line",
@@ -440,103 +451,35 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         # 去除重复的板块名称
         sector_names = list(set(sector_names))
 
-        # 获取分钟线股票数据 - 使用相同的日期范围
-        d = StockMinuteData()
-        stock_df = d.get_realtime_data() # 只取latest_date日的数据
-        stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
-        # time列应该已经包含日期和时间信息，确保其为datetime类型
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        # 去除09:25之前的数据
-        stock_df = stock_df[stock_df['time'].dt.strftime('%H:%M') >= '09:30']
-        # 筛选股票数据到相同的日期范围
-        # stock_df = stock_df[(stock_df['trade_date'] >= start_date_dt) & (stock_df['trade_date'] <= latest_date)]
-        
         # 获取板块内股票列表
-        d = ThsConceptData()
-        concept_df = d.get_daily_data(start_date=start_date)
+        concept_df = self.load_history(ThsConceptData, start_date=start_date)
         # 获取最新交易日数据
         concept_latest_date = concept_df['trade_date'].max()
         concept_df = concept_df[concept_df['trade_date'] == concept_latest_date]
         # 获取股票列表
-        stock_list = concept_df[concept_df['concept_name'] == sector_name]['stocks'].values[0].split(',')
-        # 并变成整数型
-        stock_list = [int(stock) for stock in stock_list if stock.isdigit()]
-        # 获取stock_df中id在stock_list中的数据
-        stock_df = stock_df[stock_df['id'].isin(stock_list)]
-        # groupby id，用（close-09：25分的close）/09：25分的close计算change列
-        stock_df['pre_close_0925'] = stock_df.groupby('id')['close'].transform(lambda x: x.iloc[0])  # 获取每只股票09:25分的收盘价
-        # 计算每分钟的涨幅
-        stock_df['change_diff'] = ((stock_df['close']- stock_df['pre_close_0925'])/ stock_df['pre_close_0925'] *100).round(2) # 计算每分钟的涨幅
+        stock_list = self.get_ths_concept_index(concept_df).get_ids(sector_name)
+        # 从分钟立方体切出板块内股票09:30之后的分钟线
+        view = self.get_minute_cube().slice(stock_list, start='09:30')
+        # 用（close-第一根分钟线的close）/第一根分钟线的close计算change_diff
+        change_diff = self.clamp_change_diff(view.change_from_first())
+        # 计算每分钟涨幅change，pre_close为0时按9999计算
+        change = view.change_vs(zero_pre_close=9999)
+        # 所有有数据的分钟，用于强制x轴顺序
+        date_order = view.active_labels()
         
-        # 如果pre_close列没有值或为0，填充pre_close列的值为0930开盘价的值
-        stock_df['pre_close'] = stock_df['pre_close'].replace(0, 9999)
+        chart_data = self.stock_minute_traces(view, change_diff, sector_name)
         
-        # 计算每分钟涨幅change
-        stock_df['change'] = ((stock_df['close']- stock_df['pre_close'])/ stock_df['pre_close'] *100).round(2) # 计算每分钟的涨幅
-        
-
-        # 将在区间-2到2的change值设置为2或-2，change为正时则设为2，负时设为-2
-        stock_df.loc[(stock_df['change_diff'] >= -2) & (stock_df['change_diff'] <= 2), 'change_diff'] = stock_df['change_diff'].apply(lambda x: 2 if x > 0 else -2)
-
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        
-        stock_df['time_str'] = stock_df['time'].dt.strftime('%m%d_%H:%M')
-        
-        # stock_df = get_latest_stock_name_from_stock_id(stock_df)
-        # stock_df['date_str'] = stock_df['trade_date'].dt.strftime('%m/%d')
-        stock_df = stock_df.merge(self.stock_name_df[['id', 'stock_name']], on='id', how='left')
-        # 获取所有唯一的日期并按时间顺序排序，用于强制x轴顺序
-        all_dates = stock_df['time'].unique()
-        all_dates = sorted(pd.to_datetime(all_dates))
-        date_order = [date.strftime('%m%d_%H:%M') for date in all_dates]
-        
-        chart_data = []
-        for stock_id in stock_list:
-            stock_data = stock_df[stock_df['id'] == stock_id]
-            
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='time')
-                # 获取股票名称 - 取第一行的值
-                stock_name = stock_data['stock_name'].iloc[0]
-                
-                x_data = stock_data['time_str'].tolist()
-                y_data = stock_data['change_diff'].tolist()
-                
-                chart_data.append({
-                    "name": f'{stock_name}——{sector_name}',
-                    "x": x_data,
-                    "y": y_data,
-                    "mode": "lines+markers+text",  # 添加 +text 模式
-                    "line": {"width": 2},
-                    "marker": {"size": 3},  # 设置圆点大小为3
-                    "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
-                    "textposition": "middle right",
-                    "textfont": {"size": 10, "color": "black"},
-                    "showlegend": True
-                })
-        
-        # 计算时间维度的因子 - 直接计算，无需合并回原数据
-        # 因子1: 每分钟change大于2的个数减去小于-2的个数
-        factor_2_df = stock_df.groupby('time_str')['change'].agg(
-            factor_2=lambda x: (x > 2).sum() - (x < -2).sum()
-        ).reset_index()
-        
-        # 因子2: 每分钟change大于9.7的个数
-        factor_9_7_df = stock_df.groupby('time_str')['change'].agg(
-            factor_9_7=lambda x: (x > 9.7).sum()
-        ).reset_index()
-        
-        # 合并两个因子数据并排序
-        factor_data = factor_2_df.merge(factor_9_7_df, on='time_str', how='outer').sort_values('time_str')
+        # 计算时间维度的因子 - 直接按分钟统计
+        factor_labels, factor_2, factor_9_7 = self.minute_factors(view, change)
         
         # 添加因子2的线条
         chart_data.append({
-            "x": factor_data['time_str'].tolist(),
-            "y": factor_data['factor_2'].tolist(),
+            "x": factor_labels,
+            "y": factor_2,
             "mode": "lines+markers+text",
             "line": {"width": 2, "color": "red"},
             "marker": {"size": 2},
-            "text": factor_data['factor_9_7'].tolist(),  # 在factor_2点上显示factor_9_7的值
+            "text": factor_9_7,  # 在factor_2点上显示factor_9_7的值
             "textposition": "top center",
             "textfont": {"size": 10, "color": "blue"},
             "name": "市场情绪因子(>2数量 - <-2数量)",
@@ -546,8 +489,8 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         
         # 添加因子9.7的线条
         chart_data.append({
-            "x": factor_data['time_str'].tolist(),
-            "y": factor_data['factor_9_7'].tolist(),
+            "x": factor_labels,
+            "y": factor_9_7,
             "mode": "lines+markers",
             "line": {"width": 2, "color": "orange"},
             "marker": {"size": 2},
@@ -702,125 +645,41 @@ class MarketRealtimeProcessor(BaseDataProcessor):
 
         chart_data = []
         
-        d = ThsConceptData()
-        concept_df = d.get_daily_data(start_date=start_date)
+        concept_df = self.load_history(ThsConceptData, start_date=start_date)
         # 获取最新交易日数据
         concept_latest_date = concept_df['trade_date'].max()
         concept_df = concept_df[concept_df['trade_date'] == concept_latest_date]
 
-        d = StockMinuteData()
-        stock_df = d.get_realtime_data() # 只取latest_date日的数据
-        stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
-        # time列应该已经包含日期和时间信息，确保其为datetime类型
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        # 去除09:25之前的数据
-        stock_df = stock_df[stock_df['time'].dt.strftime('%H:%M') >= '09:30']
-        # 筛选股票数据到相同的日期范围
-        # stock_df = stock_df[(stock_df['trade_date'] >= start_date_dt) & (stock_df['trade_date'] <= latest_date)]
-
-        # groupby id，用（close-09：25分的close）/09：25分的close计算change列
-        stock_df['pre_close_0925'] = stock_df.groupby('id')['close'].transform(lambda x: x.iloc[0])  # 获取每只股票09:25分的收盘价
-        # 计算每分钟的涨幅
-        stock_df['change_diff'] = ((stock_df['close']- stock_df['pre_close_0925'])/ stock_df['pre_close_0925'] *100).round(2) # 计算每分钟的涨幅
-        
-        # 如果pre_close列没有值或为0，填充pre_close列的值为0930开盘价的值
-        stock_df['pre_close'] = stock_df['pre_close'].replace(0, 9999)
-        
-        # 计算每分钟涨幅change
-        stock_df['change'] = ((stock_df['close']- stock_df['pre_close'])/ stock_df['pre_close'] *100).round(2) # 计算每分钟的涨幅
-        
-
-        # 将在区间-2到2的change值设置为2或-2，change为正时则设为2，负时设为-2
-        stock_df.loc[(stock_df['change_diff'] >= -2) & (stock_df['change_diff'] <= 2), 'change_diff'] = stock_df['change_diff'].apply(lambda x: 2 if x > 0 else -2)
-
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        
-        stock_df['time_str'] = stock_df['time'].dt.strftime('%m%d_%H:%M')
-        
-        # stock_df = get_latest_stock_name_from_stock_id(stock_df)
-        # stock_df['date_str'] = stock_df['trade_date'].dt.strftime('%m/%d')
-        stock_df = stock_df.merge(self.stock_name_df[['id', 'stock_name']], on='id', how='left')
-        # 获取所有唯一的日期并按时间顺序排序，用于强制x轴顺序
-        all_dates = stock_df['time'].unique()
-        all_dates = sorted(pd.to_datetime(all_dates))
-        date_order = [date.strftime('%m%d_%H:%M') for date in all_dates]
+        # 从分钟立方体切出全部股票09:30之后的分钟线
+        view = self.get_minute_cube().slice(start='09:30')
+        # 计算每分钟涨幅change，pre_close为0时按9999计算
+        change = view.change_vs(zero_pre_close=9999)
+        # 所有有数据的分钟，用于强制x轴顺序
+        date_order = view.active_labels()
         
+        concept_index = self.get_ths_concept_index(concept_df)
         for sector_name in sector_names:
             
-            # 获取股票列表
-            stock_list = concept_df[concept_df['concept_name'] == sector_name]['stocks'].values[0].split(',')
-            # 并变成整数型
-            stock_list = [int(stock) for stock in stock_list if stock.isdigit()]
-            # 获取stock_df中id在stock_list中的数据
-            temp_stock_df = stock_df[stock_df['id'].isin(stock_list)]
-            
+            # 板块内股票在切片中的行号
+            rows = view.rows_of(concept_index.get_ids(sector_name))
             
-            
-            # for stock_id in stock_list:
-            #     stock_data = stock_df[stock_df['id'] == stock_id]
-                
-            #     if not stock_data.empty:
-            #         stock_data = stock_data.sort_values(by='time')
-            #         # 获取股票名称 - 取第一行的值
-            #         stock_name = stock_data['stock_name'].iloc[0]
-                    
-            #         x_data = stock_data['time_str'].tolist()
-            #         y_data = stock_data['change_diff'].tolist()
-                    
-            #         chart_data.append({
-            #             "name": f'{stock_name}——{sector_name}',
-            #             "x": x_data,
-            #             "y": y_data,
-            #             "mode": "lines+markers+text",  # 添加 +text 模式
-            #             "line": {"width": 2},
-            #             "marker": {"size": 3},  # 设置圆点大小为3
-            #             "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
-            #             "textposition": "middle right",
-            #             "textfont": {"size": 10, "color": "black"},
-            #             "showlegend": True
-            #         })
-            
-            # 计算时间维度的因子 - 直接计算，无需合并回原数据
-            # 因子1: 每分钟change大于2的个数减去小于-2的个数
-            factor_2_df = temp_stock_df.groupby('time_str')['change'].agg(
-                factor_2=lambda x: (x > 2).sum() - (x < -2).sum()
-            ).reset_index()
-            
-            # 因子2: 每分钟change大于9.7的个数
-            factor_9_7_df = temp_stock_df.groupby('time_str')['change'].agg(
-                factor_9_7=lambda x: (x > 9.7).sum()
-            ).reset_index()
-            
-            # 合并两个因子数据并排序
-            factor_data = factor_2_df.merge(factor_9_7_df, on='time_str', how='outer').sort_values('time_str')
+            # 计算时间维度的因子 - 直接按分钟统计
+            factor_labels, factor_2, factor_9_7 = self.minute_factors(view, change, rows)
             
             # 添加因子2的线条
             chart_data.append({
-                "x": factor_data['time_str'].tolist(),
-                "y": factor_data['factor_2'].tolist(),
+                "x": factor_labels,
+                "y": factor_2,
                 "mode": "lines+markers+text",
                 "line": {"width": 2},
                 "marker": {"size": 2},
-                "text": factor_data['factor_9_7'].tolist(),  # 在factor_2点上显示factor_9_7的值
+                "text": factor_9_7,  # 在factor_2点上显示factor_9_7的值
                 "textposition": "top center",
                 "textfont": {"size": 10, "color": "blue"},
                 "name": f"{sector_name}",
                 # "yaxis": "y2",  # 使用右侧Y轴
                 "showlegend": True
             })
-            
-            
-            # # 添加因子9.7的线条
-            # chart_data.append({
-            #     "x": factor_data['time_str'].tolist(),
-            #     "y": factor_data['factor_9_7'].tolist(),
-            #     "mode": "lines+markers",
-            #     "line": {"width": 2, "color": "orange"},
-            #     "marker": {"size": 2},
-            #     "name": "强势股因子(>9.7%数量)",
-            #     # "yaxis": "y2",  # 使用右侧Y轴
-            #     "showlegend": True
-            # })
         
             
         return jsonify({
@@ -893,9 +752,12 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         # 将开始日期转换为datetime类型
         start_date_dt = pd.to_datetime(start_date, errors='coerce')
 
-        d = KplStockData()
-        # 使用传入的开始日期获取数据
-        df = d.get_daily_data(start_date=start_date)
+        # 开盘啦板块数据和当日分钟立方体相互独立，并发读取
+        loaded = self.fetch_concurrently(
+            kpl=lambda: self.load_history(KplStockData, start_date=start_date),  # 使用传入的开始日期获取数据
+            minute=self.get_minute_cube,  # 当日分钟立方体
+        )
+        df = loaded['kpl']
 
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -928,8 +790,8 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         
         # 获取ranking_results的列表，并在df中筛选出这些板块
         sector_names = temp_df['sector_name'].unique().tolist()
-        # 获取每个sector_name所对应的id列表，用字典形式保存
-        sector_id_map = temp_df.groupby('sector_name')['id'].apply(list).to_dict()
+        # 获取每个sector_name所对应的id列表，用字典形式保存（同一交易日只构建一次）
+        sector_id_map = self.get_kpl_concept_index(latest_date_str, temp_df).sector_id_map()
 
         # 如果没有指定板块，使用默认的第一个板块
         if selected_sector is None :
@@ -942,101 +804,31 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         # 去除重复的板块名称
         sector_names = list(set(sector_names))
 
-        # 获取分钟线股票数据 - 使用相同的日期范围
-        d = StockMinuteData()
-        stock_df = d.get_realtime_data(start_time = datetime.now().strftime("%Y-%m-%d") + " 09:30:00") # 只取latest_date日的数据
-        stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
-        # time列应该已经包含日期和时间信息，确保其为datetime类型
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        # 去除09:25之前的数据
-        # stock_df = stock_df[stock_df['time'].dt.strftime('%H:%M') >= '09:30']
-        # 筛选股票数据到相同的日期范围
-        # stock_df = stock_df[(stock_df['trade_date'] >= start_date_dt) & (stock_df['trade_date'] <= latest_date)]
-        
-        # 获取板块内股票列表
-        # d = ThsConceptData()
-        # concept_df = d.get_daily_data(start_date=start_date)
-        # # 获取最新交易日数据
-        # concept_latest_date = concept_df['trade_date'].max()
-        # concept_df = concept_df[concept_df['trade_date'] == concept_latest_date]
-        # # 获取股票列表
-        # stock_list = concept_df[concept_df['concept_name'] == sector_name]['stocks'].values[0].split(',')
         stock_list = sector_id_map.get(sector_name, [])
         # 并变成整数型
         stock_list = [int(stock) for stock in stock_list]
-        # 获取stock_df中id在stock_list中的数据
-        stock_df = stock_df[stock_df['id'].isin(stock_list)]
-        # groupby id，用（close-09：25分的close）/09：25分的close计算change列
-        stock_df['pre_close_0925'] = stock_df.groupby('id')['close'].transform(lambda x: x.iloc[0])  # 获取每只股票09:25分的收盘价
-        # 计算每分钟的涨幅
-        stock_df['change_diff'] = ((stock_df['close']- stock_df['pre_close_0925'])/ stock_df['pre_close_0925'] *100).round(2) # 计算每分钟的涨幅
-        
+        # 从分钟立方体切出板块内股票09:30之后的分钟线
+        view = loaded['minute'].slice(stock_list, start='09:30')
+        # 用（close-第一根分钟线的close）/第一根分钟线的close计算change_diff
+        change_diff = self.clamp_change_diff(view.change_from_first())
         # 计算每分钟涨幅change
-        stock_df['change'] = ((stock_df['close']- stock_df['pre_close'])/ stock_df['pre_close'] *100).round(2) # 计算每分钟的涨幅
-
-        # 将在区间-2到2的change值设置为2或-2，change为正时则设为2，负时设为-2
-        stock_df.loc[(stock_df['change_diff'] >= -2) & (stock_df['change_diff'] <= 2), 'change_diff'] = stock_df['change_diff'].apply(lambda x: 2 if x > 0 else -2)
-
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        
-        stock_df['time_str'] = stock_df['time'].dt.strftime('%m%d_%H:%M')
+        change = view.change
+        # 所有有数据的分钟，用于强制x轴顺序
+        date_order = view.active_labels()
         
-        # stock_df = get_latest_stock_name_from_stock_id(stock_df)
-        stock_df = stock_df.merge(self.stock_name_df[['id', 'stock_name']], on='id', how='left')
-        # stock_df['date_str'] = stock_df['trade_date'].dt.strftime('%m/%d')
+        chart_data = self.stock_minute_traces(view, change_diff, sector_name, line_width=1, marker_size=1)
         
-        # 获取所有唯一的日期并按时间顺序排序，用于强制x轴顺序
-        all_dates = stock_df['time'].unique()
-        all_dates = sorted(pd.to_datetime(all_dates))
-        date_order = [date.strftime('%m%d_%H:%M') for date in all_dates]
-        
-        chart_data = []
-        for stock_id in stock_list:
-            stock_data = stock_df[stock_df['id'] == stock_id]
-            
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='time')
-                # 获取股票名称 - 取第一行的值
-                stock_name = stock_data['stock_name'].iloc[0]
-                
-                x_data = stock_data['time_str'].tolist()
-                y_data = stock_data['change_diff'].tolist()
-                
-                chart_data.append({
-                    "name": f'{stock_name}——{sector_name}',
-                    "x": x_data,
-                    "y": y_data,
-                    "mode": "lines+markers+text",  # 添加 +text 模式
-                    "line": {"width": 1},
-                    "marker": {"size": 1},  # 设置圆点大小为3
-                    "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
-                    "textposition": "middle right",
-                    "textfont": {"size": 10, "color": "black"},
-                    "showlegend": True
-                })
-        
-        # 计算时间维度的因子 - 直接计算，无需合并回原数据
-        # 因子1: 每分钟change大于2的个数减去小于-2的个数
-        factor_2_df = stock_df.groupby('time_str')['change'].agg(
-            factor_2=lambda x: (x > 2).sum() - (x < -2).sum()
-        ).reset_index()
-        
-        # 因子2: 每分钟change大于9.7的个数
-        factor_9_7_df = stock_df.groupby('time_str')['change'].agg(
-            factor_9_7=lambda x: (x > 9.7).sum()
-        ).reset_index()
-        
-        # 合并两个因子数据并排序
-        factor_data = factor_2_df.merge(factor_9_7_df, on='time_str', how='outer').sort_values('time_str')
+        # 计算时间维度的因子 - 直接按分钟统计
+        factor_labels, factor_2, factor_9_7 = self.minute_factors(view, change)
         
         # 添加因子2的线条
         chart_data.append({
-            "x": factor_data['time_str'].tolist(),
-            "y": factor_data['factor_2'].tolist(),
+            "x": factor_labels,
+            "y": factor_2,
             "mode": "lines+markers+text",
             "line": {"width": 2, "color": "red"},
             "marker": {"size": 2},
-            "text": factor_data['factor_9_7'].tolist(),  # 在factor_2点上显示factor_9_7的值
+            "text": factor_9_7,  # 在factor_2点上显示factor_9_7的值
             "textposition": "top center",
             "textfont": {"size": 10, "color": "blue"},
             "name": "市场情绪因子(>2数量 - <-2数量)",
@@ -1046,8 +838,8 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         
         # 添加因子9.7的线条
         chart_data.append({
-            "x": factor_data['time_str'].tolist(),
-            "y": factor_data['factor_9_7'].tolist(),
+            "x": factor_labels,
+            "y": factor_9_7,
             "mode": "lines+markers",
             "line": {"width": 2, "color": "orange"},
             "marker": {"size": 2},
@@ -1091,6 +883,15 @@ class MarketRealtimeProcessor(BaseDataProcessor):
             }
         })
     
+    def _get_sector_membership(self, date_key, membership_df):
+        """获取股票×板块成员矩阵，成员内容不变时只构建一次（盘中成员变化而行数不变时同样重建）"""
+        cache_key = (date_key, self.memoized_content_key('kpl_membership', date_key, membership_df, ['id', 'sector_name']))
+        if self._sector_membership is None or self._sector_membership_key != cache_key:
+            self._sector_membership = SectorMembershipMatrix(membership_df, 'id', 'sector_name')
+            self._sector_membership_key = cache_key
+            self.logger.info(f"重建板块成员矩阵: {self._sector_membership.shape}")
+        return self._sector_membership
+    
     def process_kpl_2sector_custom_change_view(self):
         """各板块股票涨幅 - 支持动态板块选择和日期范围选择"""
         # 从请求参数中获取选中的板块名称和日期范围
@@ -1118,9 +919,8 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         # 将开始日期转换为datetime类型
         start_date_dt = pd.to_datetime(start_date, errors='coerce')
 
-        d = KplStockData()
         # 使用传入的开始日期获取数据
-        df = d.get_daily_data(start_date=start_date)
+        df = self.load_history(KplStockData, start_date=start_date)
 
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -1153,8 +953,6 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         
         # 获取ranking_results的列表，并在df中筛选出这些板块
         sector_names = temp_df['sector_name'].unique().tolist()
-        # 获取每个sector_name所对应的id列表，用字典形式保存
-        sector_id_map = temp_df.groupby('sector_name')['id'].apply(list).to_dict()
 
         # 如果没有指定板块，使用默认的第一个板块
         if selected_sector is None :
@@ -1167,34 +965,14 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         # 去除重复的板块名称
         sector_names = list(set(sector_names))
 
-        # 获取分钟线股票数据 - 使用相同的日期范围
-        d = StockMinuteData()
-        stock_df = d.get_realtime_data(start_time = datetime.now().strftime("%Y-%m-%d") + " 09:30:00") # 只取latest_date日的数据
-        # stock_df = d.get_realtime_data(start_time = "2025-08-14" + " 09:30:00") # chen for test
-        stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
-        # time列应该已经包含日期和时间信息，确保其为datetime类型
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-       
-        # 计算每分钟涨幅change
-        stock_df['change'] = ((stock_df['close']- stock_df['pre_close'])/ stock_df['pre_close'] *100).round(2) # 计算每分钟的涨幅
-        # 获取change大于change_value的行
-        stock_df = stock_df[stock_df['change'] > change_value]
-
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        stock_df['time_str'] = stock_df['time'].dt.strftime('%m%d_%H:%M')
-        
-        # 对每分钟groupby, 获取每分钟对应的id list,做成一个时间，id list的map
-        time_id_map = stock_df.groupby('time_str')['id'].apply(list).to_dict()
-        # 运用sector_id_map，获取每分钟对应的板块名称出现的次数
-        sector_count_map = {}
-        for time_str, id_list in time_id_map.items():
-            sector_count_map[time_str] = {}
-            for sector_name, sector_ids in sector_id_map.items():
-                count = len(set(id_list) & set(sector_ids))
-                sector_count_map[time_str][sector_name] = count
-        # 将sector_count_map转换为DataFrame
-        sector_count_df = pd.DataFrame.from_dict(sector_count_map, orient='index').reset_index()
-        sector_count_df.columns = ['time_str'] + list(sector_count_df.columns[1:])
+        # 从分钟立方体切出全部股票09:30之后的分钟线，取change大于change_value的单元格
+        view = self.get_minute_cube().slice(start='09:30')
+        hit_rows, hit_cols = np.nonzero(view.change > change_value)
+        
+        # 分钟×股票的突破矩阵与股票×板块成员矩阵相乘，得到每分钟各板块的突破股票数
+        membership = self._get_sector_membership(latest_date_str, temp_df)
+        sector_count_df = membership.count_by_group([view.labels[col] for col in hit_cols.tolist()], view.ids[hit_rows])
+        sector_count_df = sector_count_df.rename_axis('time_str').reset_index()
 
         # 只对数值列进行过滤，排除time_str列
         numeric_columns = [col for col in sector_count_df.columns if col != 'time_str']
@@ -1279,9 +1057,8 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         # 将开始日期转换为datetime类型
         start_date_dt = pd.to_datetime(start_date, errors='coerce')
 
-        d = KplStockData()
         # 使用传入的开始日期获取数据
-        df = d.get_daily_data(start_date=start_date)
+        df = self.load_history(KplStockData, start_date=start_date)
 
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -1314,8 +1091,8 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         
         # 获取ranking_results的列表，并在df中筛选出这些板块
         sector_names = temp_df['sector_name'].unique().tolist()
-        # 获取每个sector_name所对应的id列表，用字典形式保存
-        sector_id_map = temp_df.groupby('sector_name')['id'].apply(list).to_dict()
+        # 获取每个sector_name所对应的id列表，用字典形式保存（同一交易日只构建一次）
+        sector_id_map = self.get_kpl_concept_index(latest_date_str, temp_df).sector_id_map()
 
         # 如果没有指定板块，使用默认的第一个板块
         if selected_sector is None :
@@ -1328,129 +1105,43 @@ class MarketRealtimeProcessor(BaseDataProcessor):
         # 去除重复的板块名称
         sector_names = list(set(sector_names))
 
-        d = StockMinuteData()
-        stock_df = d.get_realtime_data(start_time = datetime.now().strftime("%Y-%m-%d") + " 09:30:00") # 只取latest_date日的数据
-        stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
-        # time列应该已经包含日期和时间信息，确保其为datetime类型
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        # 去除09:25之前的数据
-        # stock_df = stock_df[stock_df['time'].dt.strftime('%H:%M') >= '09:30']
-        # 筛选股票数据到相同的日期范围
-        # stock_df = stock_df[(stock_df['trade_date'] >= start_date_dt) & (stock_df['trade_date'] <= latest_date)]
-        
-        # 获取板块内股票列表
-        # d = ThsConceptData()
-        # concept_df = d.get_daily_data(start_date=start_date)
-        # # 获取最新交易日数据
-        # concept_latest_date = concept_df['trade_date'].max()
-        # concept_df = concept_df[concept_df['trade_date'] == concept_latest_date]
-        # # 获取股票列表
-        # stock_list = concept_df[concept_df['concept_name'] == sector_name]['stocks'].values[0].split(',')
-      
-        # groupby id，用（close-09：25分的close）/09：25分的close计算change列
-        stock_df['pre_close_0925'] = stock_df.groupby('id')['close'].transform(lambda x: x.iloc[0])  # 获取每只股票09:25分的收盘价
-        # 计算每分钟的涨幅
-        stock_df['change_diff'] = ((stock_df['close']- stock_df['pre_close_0925'])/ stock_df['pre_close_0925'] *100).round(2) # 计算每分钟的涨幅
-        
+        # 从分钟立方体切出全部股票09:30之后的分钟线
+        view = self.get_minute_cube().slice(start='09:30')
         # 计算每分钟涨幅change
-        stock_df['change'] = ((stock_df['close']- stock_df['pre_close'])/ stock_df['pre_close'] *100).round(2) # 计算每分钟的涨幅
-
-        # 将在区间-2到2的change值设置为2或-2，change为正时则设为2，负时设为-2
-        stock_df.loc[(stock_df['change_diff'] >= -2) & (stock_df['change_diff'] <= 2), 'change_diff'] = stock_df['change_diff'].apply(lambda x: 2 if x > 0 else -2)
-
-        stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
-        
-        stock_df['time_str'] = stock_df['time'].dt.strftime('%m%d_%H:%M')
-        
-        # stock_df = get_latest_stock_name_from_stock_id(stock_df)
-        stock_df = stock_df.merge(self.stock_name_df[['id', 'stock_name']], on='id', how='left')
-        # stock_df['date_str'] = stock_df['trade_date'].dt.strftime('%m/%d')
-        
-        # 获取所有唯一的日期并按时间顺序排序，用于强制x轴顺序
-        all_dates = stock_df['time'].unique()
-        all_dates = sorted(pd.to_datetime(all_dates))
-        date_order = [date.strftime('%m%d_%H:%M') for date in all_dates]
-
-        # 一次性计算所有股票的因子标记，避免重复计算
-        # 为每只股票标记是否满足因子条件
-        stock_df['is_factor_2_positive'] = stock_df['change'] > 2
-        stock_df['is_factor_2_negative'] = stock_df['change'] < -2
-        stock_df['is_factor_9_7'] = stock_df['change'] > 9.7
-        
-        # 创建股票到板块的映射展开表
-        stock_sector_list = []
-        for sector_name, stock_ids in sector_id_map.items():
-            for stock_id in stock_ids:
-                stock_sector_list.append({'id': stock_id, 'sector_name': sector_name})
-        
-        stock_sector_df = pd.DataFrame(stock_sector_list)
-        
-        # 将股票数据与板块信息合并
-        stock_with_sector = stock_df.merge(stock_sector_df, on='id', how='inner')
-        
-        # 一次性按时间和板块聚合所有因子
-        sector_time_factors = stock_with_sector.groupby(['sector_name', 'time_str']).agg({
-            'is_factor_2_positive': 'sum',
-            'is_factor_2_negative': 'sum', 
-            'is_factor_9_7': 'sum',
-            'id': 'count'  # 统计该板块在该时间点的股票数量
-        }).reset_index()
-        
-        # 计算factor_2 = positive - negative
-        sector_time_factors['factor_2'] = sector_time_factors['is_factor_2_positive'] - sector_time_factors['is_factor_2_negative']
-        # 取factor_2的5均值
-        # sector_time_factors['factor_2'] = sector_time_factors.groupby('sector_name')['factor_2'].transform(lambda x: x.rolling(window=5, min_periods=1).mean())
-        sector_time_factors['factor_9_7'] = sector_time_factors['is_factor_9_7']
-        
-        # 为每个板块计算最大factor_2值
-        sector_max_factors = sector_time_factors.groupby('sector_name')['factor_2'].max().to_dict()
+        change = view.change
+        # 所有有数据的分钟，用于强制x轴顺序
+        date_order = view.active_labels()
         
         chart_data = []
         
-        # 现在循环中只进行判断和数据组装
+        # 循环中按板块成分股的行号切片统计因子，只进行判断和数据组装
         for sector_name in sector_names:
             
+            rows = view.rows_of(sector_id_map.get(sector_name, []))
             # 检查该板块是否有因子数据
-            if sector_name not in sector_max_factors:
+            if not len(rows) or not view.present[rows].any():
                 continue
+            
+            factor_labels, factor_2, factor_9_7 = self.minute_factors(view, change, rows)
                 
             # 如果所有的change都小于等于10，则不绘制该板块的因子线条
-            if sector_max_factors[sector_name] <= 10:
-                continue
-                
-            # 获取该板块的时间序列因子数据
-            sector_data = sector_time_factors[sector_time_factors['sector_name'] == sector_name].sort_values('time_str')
-            
-            if sector_data.empty:
+            if max(factor_2) <= 10:
                 continue
             
             # 添加因子2的线条
             chart_data.append({
-                "x": sector_data['time_str'].tolist(),
-                "y": sector_data['factor_2'].tolist(),
+                "x": factor_labels,
+                "y": factor_2,
                 "mode": "lines+markers+text",
                 "line": {"width": 2},
                 "marker": {"size": 2},
-                "text": sector_data['factor_9_7'].tolist(),  # 在factor_2点上显示factor_9_7的值
+                "text": factor_9_7,  # 在factor_2点上显示factor_9_7的值
                 "textposition": "top center",
                 "textfont": {"size": 10, "color": "blue"},
                 "name": f"{sector_name}",
                 # "yaxis": "y2",  # 使用右侧Y轴
                 "showlegend": True
             })
-            
-            
-            # # 添加因子9.7的线条
-            # chart_data.append({
-            #     "x": factor_data['time_str'].tolist(),
-            #     "y": factor_data['factor_9_7'].tolist(),
-            #     "mode": "lines+markers",
-            #     "line": {"width": 2, "color": "orange"},
-            #     "marker": {"size": 2},
-            #     "name": "强势股因子(>9.7%数量)",
-            #     # "yaxis": "y2",  # 使用右侧Y轴
-            #     "showlegend": True
-            # })
         
             
         return jsonify({
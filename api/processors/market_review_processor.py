@@ -18,6 +18,7 @@ from stock_data.ths.concept_data import ThsConceptData
 from stock_data.ths.concept_index import ThsConceptIndexData
 from utils.common import get_latest_stock_name_from_stock_id, get_trade_date_by_offset, get_trade_date_list, get_stock_name_code_list
 from .base_processor import BaseDataProcessor
+from .table_serializer import serialize_rows, serialize_table
 from flask import jsonify, request
 import pandas as pd
 import numpy as np
@@ -33,8 +34,7 @@ class MarketReviewProcessor(BaseDataProcessor):
     
     def _original_market_sentiment_daily(self):
         """市场情绪日数据的主板，创业板，科创版，ST板成交额"""
-        d = FactorIndexDailyData()
-        df = d.get_daily_data(start_date='2025-03-01')
+        df = self.load_history(FactorIndexDailyData, start_date='2025-03-01')
         # 成交额amount变为以亿为单位，并保留2位小数
         df['amount'] = df['amount'] / 1e8
         df['amount'] = df['amount'].round(2)
@@ -80,8 +80,7 @@ class MarketReviewProcessor(BaseDataProcessor):
     
     def _original_market_change_daily(self):
         """市场情绪日数据的主板，创业板，科创版，ST板成交额"""
-        d = FactorIndexDailyData()
-        df = d.get_daily_data(start_date='2025-03-01')
+        df = self.load_history(FactorIndexDailyData, start_date='2025-03-01')
         # 成交额amount变为以亿为单位，并保留2位小数
        
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
@@ -137,9 +136,8 @@ class MarketReviewProcessor(BaseDataProcessor):
     def _original_plate_stocks_change_daily(self, selected_sector=None, start_date='2025-07-01', end_date=None):
         """各板块股票涨幅 - 支持动态板块选择和具体日期范围选择"""
         
-        d = ThsConceptIndexData()
         # 使用传入的开始日期获取数据
-        df = d.get_daily_data(start_date=start_date)
+        df = self.load_history(ThsConceptIndexData, start_date=start_date)
 
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -178,46 +176,32 @@ class MarketReviewProcessor(BaseDataProcessor):
         # 去除重复的板块名称
         sector_names = list(set(sector_names))
 
-        # 获取日线股票数据 - 使用相同的日期范围
-        d = StockDailyData()
-        stock_df = d.get_daily_data(start_date=start_date)
-        stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
-        
-        # 筛选股票数据到相同的日期范围
-        stock_df = stock_df[(stock_df['trade_date'] >= start_date_dt) & (stock_df['trade_date'] <= latest_date)]
-        
         # 获取板块内股票列表
-        d = ThsConceptData()
-        concept_df = d.get_daily_data(start_date=start_date)
+        concept_df = self.load_history(ThsConceptData, start_date=start_date)
         # 获取最新交易日数据
         concept_latest_date = concept_df['trade_date'].max()
         concept_df = concept_df[concept_df['trade_date'] == concept_latest_date]
         # 获取股票列表
-        stock_list = concept_df[concept_df['concept_name'] == sector_name]['stocks'].values[0].split(',')
-        # 并变成整数型
-        stock_list = [int(stock) for stock in stock_list if stock.isdigit()]
-        # 获取stock_df中id在stock_list中的数据
-        stock_df = stock_df[stock_df['id'].isin(stock_list)]
-        # groupby id，计算change列的cumsum
-        stock_df['change_cumsum'] = stock_df.groupby('id')['change'].cumsum()
-        stock_df['date_str'] = stock_df['trade_date'].dt.strftime('%m/%d')
+        stock_list = self.get_ths_concept_index(concept_df).get_ids(sector_name)
+        # 板块内股票在相同日期范围内的日线面板，按股票计算change列的cumsum
+        panel = self.load_panel(StockDailyData, ['change', 'stock_name'], start_date, latest_date, stock_list)
+        stock_change = panel.values['change']
+        change_cumsum = panel.cumsum('change')
+        stock_names = panel.first_value('stock_name')
         
-        # 获取所有唯一的日期并按时间顺序排序，用于强制x轴顺序
-        all_dates = stock_df['trade_date'].unique()
-        all_dates = sorted(pd.to_datetime(all_dates))
-        date_order = [date.strftime('%m/%d') for date in all_dates]
+        # 有数据的日期按时间顺序排列，用于强制x轴顺序
+        date_labels = panel.date_labels('%m/%d')
+        date_order = [label for label, active in zip(date_labels, panel.active_columns()) if active]
         
         chart_data = []
-        for stock_id in stock_list:
-            stock_data = stock_df[stock_df['id'] == stock_id]
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='trade_date')
+        for row in range(len(panel.ids)):
+            columns, y_data = panel.series(row, change_cumsum)
+            if len(columns):
                 # 获取股票名称 - 取第一行的值
-                stock_name = stock_data['stock_name'].iloc[0]
+                stock_name = stock_names[row]
                 # 统计5日，10日，20日涨幅大于9.7的次数，分别用up_limit_count5, up_limit_count_10,up_limit_count20
-                x_data = stock_data['date_str'].tolist()
-                y_data = stock_data['change_cumsum'].tolist()
-                tmp_data = stock_data['change'].tolist()
+                x_data = [date_labels[col] for col in columns]
+                tmp_data = stock_change[row, columns].tolist()
                 up_limit_count_5 = sum(1 for change in tmp_data[-5:] if change > 9.7)
                 up_limit_count_10 = sum(1 for change in tmp_data[-10:] if change > 9.7)
                 up_limit_count_15 = sum(1 for change in tmp_data[-15:] if change > 9.7)
@@ -281,9 +265,23 @@ class MarketReviewProcessor(BaseDataProcessor):
         # 将开始日期转换为datetime类型
         start_date_dt = pd.to_datetime(start_date, errors='coerce')
 
-        d = ThsConceptIndexData()
-        # 使用传入的开始日期获取数据
-        df = d.get_daily_data(start_date=start_date)
+        def load_minute(index_df):
+            # 分钟线只取板块指数最新交易日（不超过结束日期）的数据
+            trade_dates = pd.to_datetime(index_df['trade_date'], errors='coerce')
+            minute_date = trade_dates.max()
+            if end_date is not None and minute_date >= pd.to_datetime(end_date, errors='coerce'):
+                minute_date = min(pd.to_datetime(end_date, errors='coerce'), minute_date)
+            minute_date_str = minute_date.strftime('%Y%m%d')
+            return self.load_history(StockMinuteData, start_date=minute_date_str, end_date=minute_date_str,
+                                     method='get_minute_data_by_date', setup='set_table_name')
+
+        # 概念成分股与板块指数并发读取，分钟线在板块指数读取完成后立即开始
+        loaded = self.fetch_concurrently(
+            index=lambda: self.load_history(ThsConceptIndexData, start_date=start_date),  # 使用传入的开始日期获取数据
+            concept=lambda: self.load_history(ThsConceptData, start_date=start_date),
+            minute=(load_minute, ['index']),
+        )
+        df = loaded['index']
 
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -322,9 +320,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         sector_names = list(set(sector_names))
 
         # 获取分钟线股票数据 - 使用相同的日期范围
-        d = StockMinuteData()
-        d.set_table_name()  # 设置表名
-        stock_df = d.get_minute_data_by_date(start_date=latest_date_str, end_date=latest_date_str) # 只取latest_date日的数据
+        stock_df = loaded['minute']  # 只取latest_date日的数据
         stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
         # time列应该已经包含日期和时间信息，确保其为datetime类型
         stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
@@ -333,15 +329,12 @@ class MarketReviewProcessor(BaseDataProcessor):
         # stock_df = stock_df[(stock_df['trade_date'] >= start_date_dt) & (stock_df['trade_date'] <= latest_date)]
         
         # 获取板块内股票列表
-        d = ThsConceptData()
-        concept_df = d.get_daily_data(start_date=start_date)
+        concept_df = loaded['concept']
         # 获取最新交易日数据
         concept_latest_date = concept_df['trade_date'].max()
         concept_df = concept_df[concept_df['trade_date'] == concept_latest_date]
         # 获取股票列表
-        stock_list = concept_df[concept_df['concept_name'] == sector_name]['stocks'].values[0].split(',')
-        # 并变成整数型
-        stock_list = [int(stock) for stock in stock_list if stock.isdigit()]
+        stock_list = self.get_ths_concept_index(concept_df).get_ids(sector_name)
         # 获取stock_df中id在stock_list中的数据
         stock_df = stock_df[stock_df['id'].isin(stock_list)]
         stock_df['change'] = ((stock_df['close']- stock_df['pre_close'])/ stock_df['pre_close'] *100).round(2) # 计算每分钟的涨幅
@@ -362,28 +355,25 @@ class MarketReviewProcessor(BaseDataProcessor):
         date_order = [date.strftime('%m%d_%H:%M') for date in all_dates]
         
         chart_data = []
-        for stock_id in stock_list:
-            stock_data = stock_df[stock_df['id'] == stock_id]
-            
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='time')
-                # 获取股票名称 - 取第一行的值
-                stock_name = stock_data['stock_name'].iloc[0]
-                
-                x_data = stock_data['time_str'].tolist()
-                y_data = stock_data['change'].tolist()
-                
-                chart_data.append({
-                    "name": f'{stock_name}——{sector_name}',
-                    "x": x_data,
-                    "y": y_data,
-                    "mode": "lines+markers+text",  # 添加 +text 模式
-                    "line": {"width": 2},
-                    "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
-                    "textposition": "middle right",
-                    "textfont": {"size": 10, "color": "black"},
-                    "showlegend": True
-                })
+        # 按股票id建立一次索引，逐只股票取按时间排序的数据
+        for stock_id, stock_data in self.index_frame(stock_df, 'time').groups(stock_list):
+            # 获取股票名称 - 取第一行的值
+            stock_name = stock_data['stock_name'].iloc[0]
+            
+            x_data = stock_data['time_str'].tolist()
+            y_data = stock_data['change'].tolist()
+            
+            chart_data.append({
+                "name": f'{stock_name}——{sector_name}',
+                "x": x_data,
+                "y": y_data,
+                "mode": "lines+markers+text",  # 添加 +text 模式
+                "line": {"width": 2},
+                "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
+                "textposition": "middle right",
+                "textfont": {"size": 10, "color": "black"},
+                "showlegend": True
+            })
         
         return jsonify({
             "chartType": "line",
@@ -427,9 +417,8 @@ class MarketReviewProcessor(BaseDataProcessor):
         # 将开始日期转换为datetime类型
         start_date_dt = pd.to_datetime(start_date, errors='coerce')
 
-        d = KplStockData()
         # 使用传入的开始日期获取数据
-        df = d.get_daily_data(start_date=start_date)
+        df = self.load_history(KplStockData, start_date=start_date)
 
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -462,8 +451,8 @@ class MarketReviewProcessor(BaseDataProcessor):
         
         # 获取ranking_results的列表，并在df中筛选出这些板块
         sector_names = temp_df['sector_name'].unique().tolist()
-        # 获取每个sector_name所对应的id列表，用字典形式保存
-        sector_id_map = temp_df.groupby('sector_name')['id'].apply(list).to_dict()
+        # 获取每个sector_name所对应的id列表，用字典形式保存（同一交易日只构建一次）
+        sector_id_map = self.get_kpl_concept_index(latest_date_str, temp_df).sector_id_map()
 
         # 如果没有指定板块，使用默认的第一个板块
         if selected_sector is None :
@@ -476,9 +465,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         sector_names = list(set(sector_names))
 
         # 获取分钟线股票数据 - 使用相同的日期范围
-        d = StockMinuteData()
-        d.set_table_name()  # 设置表名
-        stock_df = d.get_minute_data_by_date(start_date=latest_date_str, end_date=latest_date_str) # 只取latest_date日的数据
+        stock_df = self.load_history(StockMinuteData, start_date=latest_date_str, end_date=latest_date_str, method='get_minute_data_by_date', setup='set_table_name') # 只取latest_date日的数据
         stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
         # time列应该已经包含日期和时间信息，确保其为datetime类型
         stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
@@ -524,28 +511,25 @@ class MarketReviewProcessor(BaseDataProcessor):
         date_order = [date.strftime('%m%d_%H:%M') for date in all_dates]
         
         chart_data = []
-        for stock_id in stock_list:
-            stock_data = stock_df[stock_df['id'] == stock_id]
-            
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='time')
-                # 获取股票名称 - 取第一行的值
-                stock_name = stock_data['stock_name'].iloc[0]
-                
-                x_data = stock_data['time_str'].tolist()
-                y_data = stock_data['change_diff'].tolist()
-                
-                chart_data.append({
-                    "name": f'{stock_name}——{sector_name}',
-                    "x": x_data,
-                    "y": y_data,
-                    "mode": "lines+markers+text",  # 添加 +text 模式
-                    "line": {"width": 2},
-                    "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
-                    "textposition": "middle right",
-                    "textfont": {"size": 10, "color": "black"},
-                    "showlegend": True
-                })
+        # 按股票id建立一次索引，逐只股票取按时间排序的数据
+        for stock_id, stock_data in self.index_frame(stock_df, 'time').groups(stock_list):
+            # 获取股票名称 - 取第一行的值
+            stock_name = stock_data['stock_name'].iloc[0]
+            
+            x_data = stock_data['time_str'].tolist()
+            y_data = stock_data['change_diff'].tolist()
+            
+            chart_data.append({
+                "name": f'{stock_name}——{sector_name}',
+                "x": x_data,
+                "y": y_data,
+                "mode": "lines+markers+text",  # 添加 +text 模式
+                "line": {"width": 2},
+                "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
+                "textposition": "middle right",
+                "textfont": {"size": 10, "color": "black"},
+                "showlegend": True
+            })
         
         # 计算时间维度的因子 - 直接计算，无需合并回原数据
         # 因子1: 每分钟change大于2的个数减去小于-2的个数
@@ -635,9 +619,8 @@ class MarketReviewProcessor(BaseDataProcessor):
         # 将开始日期转换为datetime类型
         start_date_dt = pd.to_datetime(start_date, errors='coerce')
 
-        d = ThsConceptIndexData()
         # 使用传入的开始日期获取数据
-        df = d.get_daily_data(start_date=start_date)
+        df = self.load_history(ThsConceptIndexData, start_date=start_date)
 
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -676,9 +659,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         sector_names = list(set(sector_names))
 
         # 获取分钟线股票数据 - 使用相同的日期范围
-        d = StockMinuteData()
-        d.set_table_name()  # 设置表名
-        stock_df = d.get_minute_data_by_date(start_date=latest_date_str, end_date=latest_date_str) # 只取latest_date日的数据
+        stock_df = self.load_history(StockMinuteData, start_date=latest_date_str, end_date=latest_date_str, method='get_minute_data_by_date', setup='set_table_name') # 只取latest_date日的数据
         stock_df['trade_date'] = pd.to_datetime(stock_df['trade_date'], errors='coerce')
         # time列应该已经包含日期和时间信息，确保其为datetime类型
         stock_df['time'] = pd.to_datetime(stock_df['time'], errors='coerce')
@@ -688,15 +669,12 @@ class MarketReviewProcessor(BaseDataProcessor):
         # stock_df = stock_df[(stock_df['trade_date'] >= start_date_dt) & (stock_df['trade_date'] <= latest_date)]
         
         # 获取板块内股票列表
-        d = ThsConceptData()
-        concept_df = d.get_daily_data(start_date=start_date)
+        concept_df = self.load_history(ThsConceptData, start_date=start_date)
         # 获取最新交易日数据
         concept_latest_date = concept_df['trade_date'].max()
         concept_df = concept_df[concept_df['trade_date'] == concept_latest_date]
         # 获取股票列表
-        stock_list = concept_df[concept_df['concept_name'] == sector_name]['stocks'].values[0].split(',')
-        # 并变成整数型
-        stock_list = [int(stock) for stock in stock_list if stock.isdigit()]
+        stock_list = self.get_ths_concept_index(concept_df).get_ids(sector_name)
         # 获取stock_df中id在stock_list中的数据
         stock_df = stock_df[stock_df['id'].isin(stock_list)]
         # groupby id，用（close-09：25分的close）/09：25分的close计算change列
@@ -723,28 +701,25 @@ class MarketReviewProcessor(BaseDataProcessor):
         date_order = [date.strftime('%m%d_%H:%M') for date in all_dates]
         
         chart_data = []
-        for stock_id in stock_list:
-            stock_data = stock_df[stock_df['id'] == stock_id]
-            
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='time')
-                # 获取股票名称 - 取第一行的值
-                stock_name = stock_data['stock_name'].iloc[0]
-                
-                x_data = stock_data['time_str'].tolist()
-                y_data = stock_data['change_diff'].tolist()
-                
-                chart_data.append({
-                    "name": f'{stock_name}——{sector_name}',
-                    "x": x_data,
-                    "y": y_data,
-                    "mode": "lines+markers+text",  # 添加 +text 模式
-                    "line": {"width": 2},
-                    "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
-                    "textposition": "middle right",
-                    "textfont": {"size": 10, "color": "black"},
-                    "showlegend": True
-                })
+        # 按股票id建立一次索引，逐只股票取按时间排序的数据
+        for stock_id, stock_data in self.index_frame(stock_df, 'time').groups(stock_list):
+            # 获取股票名称 - 取第一行的值
+            stock_name = stock_data['stock_name'].iloc[0]
+            
+            x_data = stock_data['time_str'].tolist()
+            y_data = stock_data['change_diff'].tolist()
+            
+            chart_data.append({
+                "name": f'{stock_name}——{sector_name}',
+                "x": x_data,
+                "y": y_data,
+                "mode": "lines+markers+text",  # 添加 +text 模式
+                "line": {"width": 2},
+                "text": [f'{stock_name}' if i == len(x_data)-1 else '' for i in range(len(x_data))],
+                "textposition": "middle right",
+                "textfont": {"size": 10, "color": "black"},
+                "showlegend": True
+            })
         
         # 计算时间维度的因子 - 直接计算，无需合并回原数据
         # 因子1: 每分钟change大于2的个数减去小于-2的个数
@@ -837,8 +812,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         
         # 将开始日期转换为datetime类型
         start_date_dt = pd.to_datetime(start_date, errors='coerce')
-        d = NightFactorData()
-        df = d.get_daily_data(start_date=start_date)
+        df = self.load_history(NightFactorData, start_date=start_date)
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
 
         # 确定结束日期
@@ -944,8 +918,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         # 将开始日期转换为datetime类型
         start_date_dt = pd.to_datetime(start_date, errors='coerce')
         # d = NightFactorData()
-        d = KplUpLimitData()
-        df = d.get_daily_data(start_date=start_date)
+        df = self.load_history(KplUpLimitData, start_date=start_date)
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
 
         # 确定结束日期
@@ -1234,8 +1207,7 @@ class MarketReviewProcessor(BaseDataProcessor):
 
     def _original_plate_change_daily(self):
         """市场情绪日数据的主板，创业板，科创版，ST板成交额"""
-        d = ThsConceptIndexData()
-        df = d.get_daily_data(start_date='2025-07-01')
+        df = self.load_history(ThsConceptIndexData, start_date='2025-07-01')
 
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -1353,12 +1325,11 @@ class MarketReviewProcessor(BaseDataProcessor):
 
     def _original_market_stocks_change_daily(self):
         """市场情绪日数据的主板，创业板，科创版，ST板成交额"""
-        d = StockMinuteData()
         # 获取最新交易日数据
         trade_date_list = get_trade_date_list()
         latest_date = trade_date_list[-1] 
         latest_date = '20250807' # chen for test
-        df = d.get_minute_data_by_date(start_date=latest_date)
+        df = self.load_history(StockMinuteData, start_date=latest_date, method='get_minute_data_by_date')
 
         df['time'] = pd.to_datetime(df['time'], errors='coerce')
         # 去除09:30之前的数据
@@ -1380,26 +1351,23 @@ class MarketReviewProcessor(BaseDataProcessor):
         # 合并两个列表
         all_stocks = list(set(top_stocks + bottom_stocks))
         chart_data = []
-        for stock in all_stocks:
-            stock_data = df[df['id'] == stock]
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='time')
-                
-                # 获取x轴和y轴数据
-                x_data = stock_data['time_str'].tolist()
-                y_data = stock_data['change'].tolist()
-                
-                # 添加完整的日期信息以确保排序正确
-                date_info = stock_data[['time_str', 'trade_date']].to_dict('records')
-                
-                # 方案2：只显示有数据的日期（真实数据，不填充）
-                chart_data.append({
-                    "name": f'{stock}涨幅',
-                    "x": x_data,
-                    "y": y_data,
-                    "dates": [d['time_str'] for d in date_info],  # 添加完整日期用于排序
-                    "mode": "lines+markers"  # 明确指定线条模式
-                })
+        # 按股票id建立一次索引，逐只股票取按时间排序的数据
+        for stock, stock_data in self.index_frame(df, 'time').groups(all_stocks):
+            # 获取x轴和y轴数据
+            x_data = stock_data['time_str'].tolist()
+            y_data = stock_data['change'].tolist()
+            
+            # 添加完整的日期信息以确保排序正确
+            date_info = stock_data[['time_str', 'trade_date']].to_dict('records')
+            
+            # 方案2：只显示有数据的日期（真实数据，不填充）
+            chart_data.append({
+                "name": f'{stock}涨幅',
+                "x": x_data,
+                "y": y_data,
+                "dates": [d['time_str'] for d in date_info],  # 添加完整日期用于排序
+                "mode": "lines+markers"  # 明确指定线条模式
+            })
         
         # 获取完整的日期范围用于调试
         all_dates = sorted(df['time_str'].unique())
@@ -1431,12 +1399,11 @@ class MarketReviewProcessor(BaseDataProcessor):
 
     def _original_market_stocks_change_daily_uplimit(self):
         """市场情绪日数据的主板，创业板，科创版，ST板成交额"""
-        d = StockMinuteData()
         # 获取最新交易日数据
         trade_date_list = get_trade_date_list()
         latest_date = trade_date_list[-1] 
         latest_date = '20250807' # chen for test
-        df = d.get_minute_data_by_date(start_date=latest_date)
+        df = self.load_history(StockMinuteData, start_date=latest_date, method='get_minute_data_by_date')
 
         df['time'] = pd.to_datetime(df['time'], errors='coerce')
         # 去除09:30之前的数据
@@ -1458,26 +1425,23 @@ class MarketReviewProcessor(BaseDataProcessor):
         # 合并两个列表
         all_stocks = list(set(top_stocks + bottom_stocks))
         chart_data = []
-        for stock in all_stocks:
-            stock_data = df[df['id'] == stock]
-            if not stock_data.empty:
-                stock_data = stock_data.sort_values(by='time')
-                
-                # 获取x轴和y轴数据
-                x_data = stock_data['time_str'].tolist()
-                y_data = stock_data['change'].tolist()
-                
-                # 添加完整的日期信息以确保排序正确
-                date_info = stock_data[['time_str', 'trade_date']].to_dict('records')
-                
-                # 方案2：只显示有数据的日期（真实数据，不填充）
-                chart_data.append({
-                    "name": f'{stock}涨幅',
-                    "x": x_data,
-                    "y": y_data,
-                    "dates": [d['time_str'] for d in date_info],  # 添加完整日期用于排序
-                    "mode": "lines+markers"  # 明确指定线条模式
-                })
+        # 按股票id建立一次索引，逐只股票取按时间排序的数据
+        for stock, stock_data in self.index_frame(df, 'time').groups(all_stocks):
+            # 获取x轴和y轴数据
+            x_data = stock_data['time_str'].tolist()
+            y_data = stock_data['change'].tolist()
+            
+            # 添加完整的日期信息以确保排序正确
+            date_info = stock_data[['time_str', 'trade_date']].to_dict('records')
+            
+            # 方案2：只显示有数据的日期（真实数据，不填充）
+            chart_data.append({
+                "name": f'{stock}涨幅',
+                "x": x_data,
+                "y": y_data,
+                "dates": [d['time_str'] for d in date_info],  # 添加完整日期用于排序
+                "mode": "lines+markers"  # 明确指定线条模式
+            })
         
         # 获取完整的日期范围用于调试
         all_dates = sorted(df['time_str'].unique())
@@ -1509,60 +1473,52 @@ class MarketReviewProcessor(BaseDataProcessor):
 
     def _original_market_stocks_change_daily_speed(self):
         """市场情绪日数据的主板，创业板，科创版，ST板成交额"""
-        d = StockMinuteData()
         # 获取最新交易日数据
         trade_date_list = get_trade_date_list()
         latest_date = trade_date_list[-1] 
         latest_date = '20250807' # chen for test
-        df = d.get_minute_data_by_date(start_date=latest_date)
+        df = self.load_history(StockMinuteData, start_date=latest_date, method='get_minute_data_by_date')
 
         df['time'] = pd.to_datetime(df['time'], errors='coerce')
         # 去除09:30之前的数据
         df = df[df['time'].dt.strftime('%H:%M') >= '09:30']
-        df['time_str'] = df['time'].dt.strftime('%H:%M')
         # 如果pre_close列没有值或为0，填充pre_close列的值为1
         df['pre_close'] = df['pre_close'].replace(0, 1)
         # fillna pre_close with 1 if it is NaN
         df['pre_close'] = df['pre_close'].fillna(1)
         # 按id groupby,新增列change，计算close列对pre_close列的百分比变化，并乘以100后保留2位小数
         df['change'] = ((df['close'] - df['pre_close']) / df['pre_close'] * 100).round(2)
+        # 当日的股票×分钟面板，时间标签每列只格式化一次
+        panel = self.server.daily_panels.build(df, ['change'], date_col='time')
+        change = panel.values['change']
+        time_labels = panel.date_labels('%H:%M')
         # 获取5分涨速
-        df['speed5'] = df.groupby('id')['change'].diff(5).fillna(0)
-        # 选出15:00时刻的change列涨幅大于5的id的list，并去重
-        tempdf = df.copy()
-        # 去除change<-31,>31的数据
-        tempdf = tempdf[(tempdf['change'] > -31) & (tempdf['change'] < 31)]
-        top_stocks = tempdf[tempdf['speed5'] > 5]['id'].unique().tolist()
-        # 选出change列涨幅小于-4的id的list，并去重
-       
-        all_stocks = list(set(top_stocks))
+        speed5 = np.where(panel.present, np.nan_to_num(panel.diff('change', 5)), np.nan)
+        # 去除change<-31,>31的数据后，选出5分涨速大于5的股票
+        in_range = (change > -31) & (change < 31)
+        top_rows = np.flatnonzero((in_range & (speed5 > 5)).any(axis=1))
+        
         chart_data = []
-        for stock in all_stocks:
-            stock_data = df[df['id'] == stock]
+        for row in top_rows.tolist():
             # 过滤掉异常数据点，但保留正常数据
-            stock_data = stock_data[(stock_data['change'] >= -31) & (stock_data['change'] <= 31)]
+            mask = (change[row] >= -31) & (change[row] <= 31)
             
-            if not stock_data.empty:  # 如果过滤后还有数据
-                stock_data = stock_data.sort_values(by='time')
-                
+            if mask.any():  # 如果过滤后还有数据
                 # 获取x轴和y轴数据
-                x_data = stock_data['time_str'].tolist()
-                y_data = stock_data['change'].tolist()
-                
-                # 添加完整的日期信息以确保排序正确
-                date_info = stock_data[['time_str', 'trade_date']].to_dict('records')
+                x_data = [label for label, keep in zip(time_labels, mask) if keep]
+                y_data = change[row, mask].tolist()
                 
                 # 方案2：只显示有数据的日期（真实数据，不填充）
                 chart_data.append({
-                    "name": f'{stock}涨幅',
+                    "name": f'{panel.ids[row]}涨幅',
                     "x": x_data,
                     "y": y_data,
-                    "dates": [d['time_str'] for d in date_info],  # 添加完整日期用于排序
+                    "dates": x_data,  # 添加完整日期用于排序
                     "mode": "lines+markers"  # 明确指定线条模式
                 })
         
         # 获取完整的日期范围用于调试
-        all_dates = sorted(df['time_str'].unique())
+        all_dates = sorted(set(time_labels))
         return jsonify({
             "chartType": "line",
             "data": chart_data,
@@ -1590,9 +1546,8 @@ class MarketReviewProcessor(BaseDataProcessor):
     
     def _original_shizhiyu_change_daily(self):
         """各市值域情绪日数据的平均涨幅"""
-        d = StockDailyData()
 
-        df = d.get_daily_data(start_date='2025-07-01')
+        df = self.load_history(StockDailyData, start_date='2025-07-01')
        
         df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
         df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -1635,35 +1590,24 @@ class MarketReviewProcessor(BaseDataProcessor):
     
     def _original_lianban_jiji_rate(self):
         """连板晋级率"""
-        d = StockDailyData()
 
-        df = d.get_daily_data(start_date='2025-03-01')
-       
-        df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
-        df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
-        # 新建一列‘市值域’，按照total_mv列的值进行分类，分类规则为
-        # 0-20亿：微盘 20-50亿：小盘 50-100亿：中盘 100亿-300亿：中大盘，300亿以上：大盘
-        df['next_day_change'] = df.groupby('id')['change'].shift(-1)  # 获取下一天的涨跌幅
-        # 因为shift了-1，所以需要groupby后去掉最后一行
-        df = df[df['next_day_change'].notna()]
-        df = df[df['change']>=9.7]
+        panel = self.load_panel(StockDailyData, ['change'], '2025-03-01')
+        change = panel.values['change']
+        next_day_change = panel.shift('change', -1)  # 获取下一天的涨跌幅
+        # 涨停且有下一天数据（每只股票的最后一天没有）
+        limit_up = (change >= 9.7) & ~np.isnan(next_day_change)
         
         # 先计算每个交易日的涨停晋级率
-        daily_stats = df.groupby('trade_date')['next_day_change'].agg([
-            ('total_count', 'count'),
-            ('upgrade_count', lambda x: (x >= 9.7).sum())
-        ]).reset_index()
-        daily_stats['涨停晋级率'] = daily_stats['upgrade_count'] / daily_stats['total_count']
-        
-        # 添加date_str列
-        daily_stats['date_str'] = pd.to_datetime(daily_stats['trade_date']).dt.strftime('%m/%d')
+        total_count = limit_up.sum(axis=0)
+        upgrade_count = (limit_up & (next_day_change >= 9.7)).sum(axis=0)
+        days = np.flatnonzero(total_count > 0)
+        date_labels = panel.date_labels('%m/%d')
         
-        df = daily_stats[['trade_date', 'date_str', '涨停晋级率']]
         chart_data = []
         chart_data.append({
             "name": f'涨停晋级率',
-            "x": df['date_str'].tolist(),
-            "y": df['涨停晋级率'].tolist()
+            "x": [date_labels[day] for day in days.tolist()],
+            "y": (upgrade_count[days] / total_count[days]).tolist()
         })
         
         return jsonify({
@@ -1821,11 +1765,7 @@ class MarketReviewProcessor(BaseDataProcessor):
                 'top_sectors': sorted(top_sectors[:10]),  # 只取前10个用于哈希，避免数据量过大
                 'stock_data_time': str(latest_time),
                 'stock_minute_count': len(stock_minute_df),
-                'file_timestamps': {
-                    'stock_df': self.data_cache.timestamps.get('stock_df', 0),
-                    'stock_minute_df': self.data_cache.timestamps.get('stock_minute_df', 0),
-                    'affinity_df': self.data_cache.timestamps.get('affinity_df', 0)
-                }
+                'fingerprints': self.get_data_fingerprints('stock_df', 'stock_minute_df', 'affinity_df')
             }
             
             # 检查是否可以使用缓存
@@ -1841,7 +1781,6 @@ class MarketReviewProcessor(BaseDataProcessor):
             
             # 数据清理和预处理
             stock_df = stock_df.replace([np.inf, -np.inf], 0).fillna(0)
-            stock_minute_df = stock_minute_df.replace([np.inf, -np.inf], 0).fillna(0)
             
             stock_df['Sector'] = stock_df['Sector'].astype(str)
             stock_df['id'] = stock_df['id'].astype(int)
@@ -1865,24 +1804,23 @@ class MarketReviewProcessor(BaseDataProcessor):
             process_sectors = top_sectors[:20]  # 只处理前20个板块，提升性能
             self.logger.info(f"实际处理板块数量: {len(process_sectors)}")
             
+            affinity_index = self.get_affinity_sector_index()
             for sector_name in process_sectors:
                 # 模糊匹配板块
-                sector_affinity_df = affinity_df[
-                    affinity_df['板块'].str.contains(sector_name, na=False, case=False) |
-                    affinity_df['板块'].apply(lambda x: sector_name in str(x) if pd.notna(x) else False)
-                ]
+                stock_ids = affinity_index.search_ids(sector_name)
                 
-                if sector_affinity_df.empty:
+                if not stock_ids:
                     continue
                 
-                stock_ids = list(set(sector_affinity_df['股票id'].tolist()))
                 stock_count = len(stock_ids)
                 
                 # 过滤股票ID
                 stock_ids = [id for id in stock_ids if id < 680000 and (id < 400000 or id > 600000)]
                 filtered_count = len(stock_ids)
                 
-                stock_minute_df_temp = stock_minute_df[stock_minute_df['id'].isin(stock_ids)]
+                # 通过数据缓存的id索引只取板块内股票的分钟线，再做数据清理
+                stock_minute_df_temp = self.query_data('stock_minute_df', stock_ids)
+                stock_minute_df_temp = stock_minute_df_temp.replace([np.inf, -np.inf], 0).fillna(0)
                 stock_minute_df_temp = stock_minute_df_temp[stock_minute_df_temp['change'] > 2]
                 
                 if stock_minute_df_temp.empty:
@@ -1957,7 +1895,7 @@ class MarketReviewProcessor(BaseDataProcessor):
                 'data_count': len(sector_df),
                 'sector_names': sorted(sector_names),  # 排序确保一致性
                 'dynamic_titles': self.server.dynamic_titles.copy(),
-                'file_timestamp': self.data_cache.timestamps.get('plate_df', 0)  # 添加文件时间戳
+                'fingerprints': self.get_data_fingerprints('plate_df')  # 数据文件指纹
             }
             
             # 检查是否可以使用缓存
@@ -1970,9 +1908,7 @@ class MarketReviewProcessor(BaseDataProcessor):
             
             # 需要重新计算，继续执行原有逻辑
             # 添加近似涨停数列
-            sector_df['近似涨停数'] = sector_df['涨幅分布'].apply(
-                lambda x: int(x.split('-')[-1]) if '-' in x else 0
-            )
+            sector_df['近似涨停数'] = self.get_distribution_matrix(sector_df).last_values()
             
             chart_data = []
             latest_time = sector_df['时间'].max()
@@ -2035,7 +1971,7 @@ class MarketReviewProcessor(BaseDataProcessor):
                 'data_count': len(sector_df),
                 'sector_names': sorted(sector_names),  # 排序确保一致性
                 'dynamic_titles': self.server.dynamic_titles.copy(),
-                'file_timestamp': self.data_cache.timestamps.get('plate_df', 0)  # 添加文件时间戳
+                'fingerprints': self.get_data_fingerprints('plate_df')  # 数据文件指纹
             }
             
             # 检查是否可以使用缓存
@@ -2047,7 +1983,7 @@ class MarketReviewProcessor(BaseDataProcessor):
                 return cached_response
             
             # 需要重新计算，继续执行原有逻辑
-            sector_df['uprate'] = sector_df['涨幅分布'].apply(lambda x: self.server._calculate_tail_ratio(x, n=6))
+            sector_df['uprate'] = self.get_distribution_matrix(sector_df).tail_ratio(6)
             
             chart_data = []
             latest_time = sector_df['时间'].max()
@@ -2102,7 +2038,7 @@ class MarketReviewProcessor(BaseDataProcessor):
             
             sector_df['时间'] = pd.to_datetime(sector_df['时间'])
             sector_df = sector_df[sector_df['时间'].dt.date == sector_df['时间'].dt.date.max()]
-            sector_df['uprate5'] = sector_df['涨幅分布'].apply(lambda x: self.server._calculate_tail_ratio(x, n=3))
+            sector_df['uprate5'] = self.get_distribution_matrix(sector_df).tail_ratio(3)
             
             chart_data = []
             latest_time = sector_df['时间'].max()
@@ -2160,14 +2096,12 @@ class MarketReviewProcessor(BaseDataProcessor):
             latest_data = sector_df[sector_df['时间'] == sector_df['时间'].max()]
             
             # 构建表格数据
-            table_data = []
-            for _, row in latest_data.iterrows():
-                table_data.append({
-                    "板块名": row['板块名'],
-                    "板块涨幅": f"{row['板块涨幅']:.2f}%",
-                    "板块5分涨速": f"{row['板块5分涨速']:.2f}%",
-                    "涨幅分布": row['涨幅分布']
-                })
+            table_data = serialize_rows(latest_data, [
+                {"field": "板块名"},
+                {"field": "板块涨幅", "format": "{:.2f}%"},
+                {"field": "板块5分涨速", "format": "{:.2f}%"},
+                {"field": "涨幅分布"},
+            ])
             
             return jsonify({
                 "columns": ["板块名", "板块涨幅", "板块5分涨速", "涨幅分布"],
@@ -2195,14 +2129,12 @@ class MarketReviewProcessor(BaseDataProcessor):
             # 简化版处理
             latest_data = stock_df.head(100)  # 限制数据量
             
-            table_data = []
-            for _, row in latest_data.iterrows():
-                table_data.append({
-                    "股票代码": row.get('id', ''),
-                    "股票名称": row.get('name', ''),
-                    "涨跌幅": f"{row.get('change', 0):.2f}%",
-                    "板块": row.get('Sector', '')
-                })
+            table_data = serialize_rows(latest_data, [
+                {"field": "股票代码", "source": "id", "default": ""},
+                {"field": "股票名称", "source": "name", "default": ""},
+                {"field": "涨跌幅", "source": "change", "format": "{:.2f}%", "default": 0},
+                {"field": "板块", "source": "Sector", "default": ""},
+            ])
             
             return jsonify({
                 "columns": ["股票代码", "股票名称", "涨跌幅", "板块"],
@@ -2304,27 +2236,11 @@ class MarketReviewProcessor(BaseDataProcessor):
                 {"field": "大盘涨速分布", "header": "大盘涨速分布"},
             ]
             
-            valid_columns = [col for col in columns if col["field"] in plate_df.columns]
-            
-            rows = []
-            for _, row_data in plate_df.iterrows():
-                row = {}
-                for col in valid_columns:
-                    field = col["field"]
-                    value = row_data[field]
-                    
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    
-                    row[field] = value
-                
-                rows.append(row)
+            # 只输出数据中存在的列
+            table = serialize_table(plate_df, columns)
             
             # 构建响应数据
-            response_data = jsonify({
-                "columns": valid_columns,
-                "rows": rows
-            })
+            response_data = jsonify(table)
             
             # 存储到缓存
             self.store_cache(cache_endpoint, cache_params, source_data, response_data)
@@ -2358,21 +2274,10 @@ class MarketReviewProcessor(BaseDataProcessor):
                 {"field": "speed_change_1min", "header": "1分钟涨速", "backgroundColor": "redGreen"}
             ]
             
-            rows = []
-            for _, row in stock_df.head(100).iterrows():  # 限制返回数量
-                row_data = {}
-                for col in columns:
-                    field = col["field"]
-                    value = row.get(field, '')
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    row_data[field] = value
-                rows.append(row_data)
+            # 缺失的列使用空字符串，限制返回数量
+            table = serialize_table(stock_df, [{**col, "default": ""} for col in columns], limit=100)
             
-            return jsonify({
-                "columns": columns,
-                "rows": rows
-            })
+            return jsonify(table)
         
         except Exception as e:
             return self.error_response(f"获取股票数据失败: {e}")
@@ -2426,28 +2331,9 @@ class MarketReviewProcessor(BaseDataProcessor):
             ]
             
             # 确保所有列都存在于CSV文件中
-            valid_columns = [col for col in columns if col["field"] in up_limit_df.columns]
-            
-            # 转换DataFrame为所需格式
-            rows = []
-            for _, row_data in up_limit_df.iterrows():
-                row = {}
-                for col in valid_columns:
-                    field = col["field"]
-                    value = row_data[field]
-                    
-                    # 处理数值格式（保留两位小数）
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    
-                    row[field] = value
-                
-                rows.append(row)
+            table = serialize_table(up_limit_df, columns)
             
-            return jsonify({
-                "columns": valid_columns,
-                "rows": rows
-            })
+            return jsonify(table)
         
         except Exception as e:
             import traceback
@@ -2509,8 +2395,7 @@ class MarketReviewProcessor(BaseDataProcessor):
             # 构建用于哈希比较的源数据
             source_data = {
                 'data_count': len(up_limit_df),
-                'file_timestamp': self.data_cache.timestamps.get('up_limit_df', 0),
-                'data_sample': up_limit_df.head(5).to_dict('records') if not up_limit_df.empty else []
+                'fingerprints': self.get_data_fingerprints('up_limit_df')
             }
             
             # 检查是否可以使用缓存
@@ -2536,27 +2421,11 @@ class MarketReviewProcessor(BaseDataProcessor):
                 {"field": "股票ID", "header": "股票ID", "visible": False},
             ]
             
-            valid_columns = [col for col in columns if col["field"] in up_limit_df.columns]
-            
-            rows = []
-            for _, row_data in up_limit_df.iterrows():
-                row = {}
-                for col in valid_columns:
-                    field = col["field"]
-                    value = row_data[field]
-                    
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    
-                    row[field] = value
-                
-                rows.append(row)
+            # 只输出数据中存在的列
+            table = serialize_table(up_limit_df, columns)
             
             # 构建响应数据
-            response_data = jsonify({
-                "columns": valid_columns,
-                "rows": rows
-            })
+            response_data = jsonify(table)
             
             # 存储到缓存
             self.store_cache(cache_endpoint, None, source_data, response_data)
@@ -2578,8 +2447,7 @@ class MarketReviewProcessor(BaseDataProcessor):
             from flask import request
             selected_date = request.args.get('date', '2025-07-25')  # 期望格式：YYYY-MM-DD
             
-            d = KplUpLimitData()
-            up_limit_df = d.get_daily_data(start_date='2025-07-01')
+            up_limit_df = self.load_history(KplUpLimitData, start_date='2025-07-01')
             
             if up_limit_df.empty:
                 return jsonify({
@@ -2626,27 +2494,11 @@ class MarketReviewProcessor(BaseDataProcessor):
                 {"field": "id", "header": "股票ID", "visible": False},
             ]
             
-            valid_columns = [col for col in columns if col["field"] in up_limit_df.columns]
-            
-            rows = []
-            for _, row_data in up_limit_df.iterrows():
-                row = {}
-                for col in valid_columns:
-                    field = col["field"]
-                    value = row_data[field]
-                    
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    
-                    row[field] = value
-                
-                rows.append(row)
+            # 只输出数据中存在的列
+            table = serialize_table(up_limit_df, columns)
             
             # 构建响应数据
-            response_data = jsonify({
-                "columns": valid_columns,
-                "rows": rows
-            })
+            response_data = jsonify(table)
             
             return response_data
         
@@ -2661,8 +2513,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         """返回涨停数据表"""
         
         try:
-            d = KplUpLimitData()
-            up_limit_df = d.get_daily_data(start_date='2025-07-01')
+            up_limit_df = self.load_history(KplUpLimitData, start_date='2025-07-01')
             
             if up_limit_df.empty:
                 return jsonify({
@@ -2757,30 +2608,11 @@ class MarketReviewProcessor(BaseDataProcessor):
             else:
                 sector_pivot_df_with_names = pd.DataFrame()
             
-            valid_columns = [col for col in sector_columns if col["field"] in sector_pivot_df_with_names.columns]
-            
-            rows = []
-            for _, row_data in sector_pivot_df_with_names.iterrows():
-                row = {}
-                for col in valid_columns:
-                    field = col["field"]
-                    value = row_data[field]
-                    
-                    # 处理不同数据类型的JSON序列化
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    elif isinstance(value, (int, np.int64, np.int32)):
-                        value = int(value)  # 转换为Python原生int类型
-                    
-                    row[field] = value
-                
-                rows.append(row)
+            # 只输出数据中存在的列
+            table = serialize_table(sector_pivot_df_with_names, sector_columns)
             
             # 构建响应数据
-            response_data = jsonify({
-                "columns": valid_columns,
-                "rows": rows
-            })
+            response_data = jsonify(table)
             
             return response_data
         
@@ -2803,14 +2635,12 @@ class MarketReviewProcessor(BaseDataProcessor):
                 })
             
             # 简化版处理
-            table_data = []
-            for _, row in up_limit_df.iterrows():
-                table_data.append({
-                    "股票名称": row.get('name', ''),
-                    "连板数": row.get('连板数', 0),
-                    "板块": row.get('Sector', ''),
-                    "涨停时间": row.get('涨停时间', '')
-                })
+            table_data = serialize_rows(up_limit_df, [
+                {"field": "股票名称", "source": "name", "default": ""},
+                {"field": "连板数", "default": 0},
+                {"field": "板块", "source": "Sector", "default": ""},
+                {"field": "涨停时间", "default": ""},
+            ])
             
             return jsonify({
                 "columns": ["股票名称", "连板数", "板块", "涨停时间"],
@@ -2909,8 +2739,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         获取全市场日线级别各涨幅分布的股票数
         """
         try:
-            d = MarketSentimentDailyData()
-            df = d.get_daily_data(start_date='2025-03-01')
+            df = self.load_history(MarketSentimentDailyData, start_date='2025-03-01')
             
             df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
             df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -2967,8 +2796,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         按照y轴从高到低的累计顺序显示：微盘, 小盘, 中盘, 中大盘, 大盘
         """
         try:
-            d = StockDailyData()
-            df = d.get_daily_data(start_date='2025-03-01')
+            df = self.load_history(StockDailyData, start_date='2025-03-01')
             
             df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
             df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -3029,8 +2857,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         按照y轴从高到低的累计顺序显示：主板, 创业板, 科创版, 北交所+新三板
         """
         try:
-            d = StockDailyData()
-            df = d.get_daily_data(start_date='2025-03-01')
+            df = self.load_history(StockDailyData, start_date='2025-03-01')
             
             df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
             df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -3105,8 +2932,7 @@ class MarketReviewProcessor(BaseDataProcessor):
             sector_ids = all_sectors_stock_df[all_sectors_stock_df['Sector'].str.contains(sector_name, na=False)]['id'].tolist()
             
             # 读取股票日线数据
-            d = StockDailyData()
-            df = d.get_daily_data(start_date='2025-03-01')
+            df = self.load_history(StockDailyData, start_date='2025-03-01')
             
             df = df[df['id'].isin(sector_ids)]
 
@@ -3169,33 +2995,26 @@ class MarketReviewProcessor(BaseDataProcessor):
         按照y轴从高到低的累计顺序显示：主板, 创业板, 科创版, 北交所+新三板
         """
         try:
-            d = StockDailyData()
-            df = d.get_daily_data(start_date='2025-03-01')
-            
-            df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
-            df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
-            df['next_day_change'] = df.groupby('id')['change'].shift(-1)  # 获取下一天的涨跌幅
-            # 因为shift了-1，所以需要groupby后去掉最后一行
-            df = df[df['next_day_change'].notna()]
-            df = df[df['change']>=9.7] 
-            # 去除open， close, high, low为相同值的行
-            df = df[(df['open'] != df['close']) | (df['open'] != df['high']) | (df['open'] != df['low'])]
-            
-            df['涨幅域'] = pd.cut(df['next_day_change'], bins=[float('-inf'), -9.7, -5, -2, 0, 2, 5, 9.7, float('inf')],
-                           labels=['c_inf_c-10', 'c-10_c-5', 'c-5_c-2', 'c-2_c0', 'c0_c2', 'c2_c5', 'c5_c10', 'c10_c_inf'])
-           
-            # 按trade_date和市值域分组，计算个数
-            df['day_count'] = df.groupby(['trade_date', '涨幅域'])['change'].transform('count')
-
-            # 每天的涨幅域各取1个，去掉重复的涨幅域
-            df_temp = df.drop_duplicates(subset=['trade_date', '涨幅域'])
-
-            # 将涨幅域列内的值作为列名，pivot表格
-            df_pivot = df_temp.pivot(index='date_str', columns='涨幅域', values='day_count').fillna(0).reset_index()
-            # 将'主板', '创业板', '科创版', '新三板+北交所'各列的值变为百分比，分母为每行的总和
-            df_pivot['总数'] = df_pivot[['c_inf_c-10', 'c-10_c-5', 'c-5_c-2', 'c-2_c0', 'c0_c2', 'c2_c5', 'c5_c10', 'c10_c_inf']].sum(axis=1)
-            df_pivot[['c_inf_c-10', 'c-10_c-5', 'c-5_c-2', 'c-2_c0', 'c0_c2', 'c2_c5', 'c5_c10', 'c10_c_inf']] = df_pivot[['c_inf_c-10', 'c-10_c-5', 'c-5_c-2', 'c-2_c0', 'c0_c2', 'c2_c5', 'c5_c10', 'c10_c_inf']].div(df_pivot['总数'], axis=0) * 100
-            df_pivot = df_pivot.drop(columns=['总数'])
+            panel = self.load_panel(StockDailyData, ['change', 'open', 'close', 'high', 'low'], '2025-03-01')
+            values = panel.values
+            next_day_change = panel.shift('change', -1)  # 获取下一天的涨跌幅
+            # 涨停且有下一天数据，去除open， close, high, low为相同值的一字板
+            limit_up = ((values['change'] >= 9.7) & ~np.isnan(next_day_change)
+                        & ((values['open'] != values['close']) | (values['open'] != values['high'])
+                           | (values['open'] != values['low'])))
+            
+            # 涨幅域区间与 pd.cut 相同（左开右闭）
+            range_labels = ['c_inf_c-10', 'c-10_c-5', 'c-5_c-2', 'c-2_c0', 'c0_c2', 'c2_c5', 'c5_c10', 'c10_c_inf']
+            buckets = np.digitize(next_day_change, [-9.7, -5, -2, 0, 2, 5, 9.7], right=True)
+            # 日期×涨幅域的个数
+            counts = np.stack([(limit_up & (buckets == k)).sum(axis=0) for k in range(len(range_labels))], axis=1)
+            total = counts.sum(axis=1)
+            days = np.flatnonzero(total > 0)
+            
+            # 各涨幅域的值变为百分比，分母为每天的总数
+            date_labels = panel.date_labels('%m/%d')
+            df_pivot = pd.DataFrame(counts[days] / total[days, None] * 100, columns=range_labels)
+            df_pivot.insert(0, 'date_str', [date_labels[day] for day in days.tolist()])
             
         
             # 定义数据列配置（按照从下到上的堆叠顺序）
@@ -3238,8 +3057,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         获取创业板日线级别各涨幅分布的股票数
         """
         try:
-            d = MarketSentimentDailyData()
-            df = d.get_daily_data(start_date='2025-03-01')
+            df = self.load_history(MarketSentimentDailyData, start_date='2025-03-01')
             
             df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
             df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -3293,8 +3111,7 @@ class MarketReviewProcessor(BaseDataProcessor):
         获取ST股票日线级别各涨幅分布的股票数
         """
         try:
-            d = MarketSentimentDailyData()
-            df = d.get_daily_data(start_date='2025-03-01')
+            df = self.load_history(MarketSentimentDailyData, start_date='2025-03-01')
             
             df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
             df['date_str'] = df['trade_date'].dt.strftime('%m/%d')
@@ -3361,8 +3178,7 @@ class MarketReviewProcessor(BaseDataProcessor):
             # 获取时间参数，默认为今天
             from flask import request
             selected_date = request.args.get('date','2025-07-25')  # 期望格式：YYYY-MM-DD
-            d= NightFactorData()
-            stock_all_level_df = d.get_daily_data()
+            stock_all_level_df = self.load_history(NightFactorData)
             
             if stock_all_level_df.empty:
                 return self.error_response("股票连板数据文件读取失败")
@@ -13,8 +13,10 @@ from flask import jsonify, request
 # 处理相对导入问题
 try:
     from .base_processor import BaseDataProcessor
+    from .table_serializer import serialize_rows, serialize_table
 except ImportError:
     from base_processor import BaseDataProcessor
+    from table_serializer import serialize_rows, serialize_table
 
 
 class MultiPlateProcessor(BaseDataProcessor):
@@ -113,11 +115,7 @@ class MultiPlateProcessor(BaseDataProcessor):
                 'top_sectors': sorted(top_sectors[:10]),  # 只取前10个用于哈希，避免数据量过大
                 'stock_data_time': str(latest_time),
                 'stock_minute_count': len(stock_minute_df),
-                'file_timestamps': {
-                    'stock_df': self.data_cache.timestamps.get('stock_df', 0),
-                    'stock_minute_df': self.data_cache.timestamps.get('stock_minute_df', 0),
-                    'affinity_df': self.data_cache.timestamps.get('affinity_df', 0)
-                }
+                'fingerprints': self.get_data_fingerprints('stock_df', 'stock_minute_df', 'affinity_df')
             }
             
             # 检查是否可以使用缓存
@@ -133,7 +131,6 @@ class MultiPlateProcessor(BaseDataProcessor):
             
             # 数据清理和预处理
             stock_df = stock_df.replace([np.inf, -np.inf], 0).fillna(0)
-            stock_minute_df = stock_minute_df.replace([np.inf, -np.inf], 0).fillna(0)
             
             stock_df['Sector'] = stock_df['Sector'].astype(str)
             stock_df['id'] = stock_df['id'].astype(int)
@@ -157,24 +154,23 @@ class MultiPlateProcessor(BaseDataProcessor):
             process_sectors = top_sectors[:20]  # 只处理前20个板块，提升性能
             self.logger.info(f"实际处理板块数量: {len(process_sectors)}")
             
+            affinity_index = self.get_affinity_sector_index()
             for sector_name in process_sectors:
                 # 模糊匹配板块
-                sector_affinity_df = affinity_df[
-                    affinity_df['板块'].str.contains(sector_name, na=False, case=False) |
-                    affinity_df['板块'].apply(lambda x: sector_name in str(x) if pd.notna(x) else False)
-                ]
+                stock_ids = affinity_index.search_ids(sector_name)
                 
-                if sector_affinity_df.empty:
+                if not stock_ids:
                     continue
                 
-                stock_ids = list(set(sector_affinity_df['股票id'].tolist()))
                 stock_count = len(stock_ids)
                 
                 # 过滤股票ID
                 stock_ids = [id for id in stock_ids if id < 680000 and (id < 400000 or id > 600000)]
                 filtered_count = len(stock_ids)
                 
-                stock_minute_df_temp = stock_minute_df[stock_minute_df['id'].isin(stock_ids)]
+                # 通过数据缓存的id索引只取板块内股票的分钟线，再做数据清理
+                stock_minute_df_temp = self.query_data('stock_minute_df', stock_ids)
+                stock_minute_df_temp = stock_minute_df_temp.replace([np.inf, -np.inf], 0).fillna(0)
                 stock_minute_df_temp = stock_minute_df_temp[stock_minute_df_temp['change'] > 2]
                 
                 if stock_minute_df_temp.empty:
@@ -245,7 +241,7 @@ class MultiPlateProcessor(BaseDataProcessor):
                 'data_count': len(sector_df),
                 'sector_names': sorted(sector_names),  # 排序确保一致性
                 'dynamic_titles': self.server.dynamic_titles.copy(),
-                'file_timestamp': self.data_cache.timestamps.get('plate_df', 0)  # 添加文件时间戳
+                'fingerprints': self.get_data_fingerprints('plate_df')  # 数据文件指纹
             }
             
             # 检查是否可以使用缓存
@@ -258,9 +254,7 @@ class MultiPlateProcessor(BaseDataProcessor):
             
             # 需要重新计算，继续执行原有逻辑
             # 添加近似涨停数列
-            sector_df['近似涨停数'] = sector_df['涨幅分布'].apply(
-                lambda x: int(x.split('-')[-1]) if '-' in x else 0
-            )
+            sector_df['近似涨停数'] = self.get_distribution_matrix(sector_df).last_values()
             
             chart_data = []
             latest_time = sector_df['时间'].max()
@@ -319,7 +313,7 @@ class MultiPlateProcessor(BaseDataProcessor):
                 'data_count': len(sector_df),
                 'sector_names': sorted(sector_names),  # 排序确保一致性
                 'dynamic_titles': self.server.dynamic_titles.copy(),
-                'file_timestamp': self.data_cache.timestamps.get('plate_df', 0)  # 添加文件时间戳
+                'fingerprints': self.get_data_fingerprints('plate_df')  # 数据文件指纹
             }
             
             # 检查是否可以使用缓存
@@ -331,7 +325,7 @@ class MultiPlateProcessor(BaseDataProcessor):
                 return cached_response
             
             # 需要重新计算，继续执行原有逻辑
-            sector_df['uprate'] = sector_df['涨幅分布'].apply(lambda x: self.server._calculate_tail_ratio(x, n=6))
+            sector_df['uprate'] = self.get_distribution_matrix(sector_df).tail_ratio(6)
             
             chart_data = []
             latest_time = sector_df['时间'].max()
@@ -382,7 +376,7 @@ class MultiPlateProcessor(BaseDataProcessor):
             
             sector_df['时间'] = pd.to_datetime(sector_df['时间'])
             sector_df = sector_df[sector_df['时间'].dt.date == sector_df['时间'].dt.date.max()]
-            sector_df['uprate5'] = sector_df['涨幅分布'].apply(lambda x: self.server._calculate_tail_ratio(x, n=3))
+            sector_df['uprate5'] = self.get_distribution_matrix(sector_df).tail_ratio(3)
             
             chart_data = []
             latest_time = sector_df['时间'].max()
@@ -436,14 +430,12 @@ class MultiPlateProcessor(BaseDataProcessor):
             latest_data = sector_df[sector_df['时间'] == sector_df['时间'].max()]
             
             # 构建表格数据
-            table_data = []
-            for _, row in latest_data.iterrows():
-                table_data.append({
-                    "板块名": row['板块名'],
-                    "板块涨幅": f"{row['板块涨幅']:.2f}%",
-                    "板块5分涨速": f"{row['板块5分涨速']:.2f}%",
-                    "涨幅分布": row['涨幅分布']
-                })
+            table_data = serialize_rows(latest_data, [
+                {"field": "板块名"},
+                {"field": "板块涨幅", "format": "{:.2f}%"},
+                {"field": "板块5分涨速", "format": "{:.2f}%"},
+                {"field": "涨幅分布"},
+            ])
             
             return jsonify({
                 "columns": ["板块名", "板块涨幅", "板块5分涨速", "涨幅分布"],
@@ -467,14 +459,12 @@ class MultiPlateProcessor(BaseDataProcessor):
             # 简化版处理
             latest_data = stock_df.head(100)  # 限制数据量
             
-            table_data = []
-            for _, row in latest_data.iterrows():
-                table_data.append({
-                    "股票代码": row.get('id', ''),
-                    "股票名称": row.get('name', ''),
-                    "涨跌幅": f"{row.get('change', 0):.2f}%",
-                    "板块": row.get('Sector', '')
-                })
+            table_data = serialize_rows(latest_data, [
+                {"field": "股票代码", "source": "id", "default": ""},
+                {"field": "股票名称", "source": "name", "default": ""},
+                {"field": "涨跌幅", "source": "change", "format": "{:.2f}%", "default": 0},
+                {"field": "板块", "source": "Sector", "default": ""},
+            ])
             
             return jsonify({
                 "columns": ["股票代码", "股票名称", "涨跌幅", "板块"],
@@ -572,27 +562,11 @@ class MultiPlateProcessor(BaseDataProcessor):
                 {"field": "大盘涨速分布", "header": "大盘涨速分布"},
             ]
             
-            valid_columns = [col for col in columns if col["field"] in plate_df.columns]
-            
-            rows = []
-            for _, row_data in plate_df.iterrows():
-                row = {}
-                for col in valid_columns:
-                    field = col["field"]
-                    value = row_data[field]
-                    
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    
-                    row[field] = value
-                
-                rows.append(row)
+            # 只输出数据中存在的列
+            table = serialize_table(plate_df, columns)
             
             # 构建响应数据
-            response_data = jsonify({
-                "columns": valid_columns,
-                "rows": rows
-            })
+            response_data = jsonify(table)
             
             # 存储到缓存
             self.store_cache(cache_endpoint, cache_params, source_data, response_data)
@@ -622,21 +596,10 @@ class MultiPlateProcessor(BaseDataProcessor):
                 {"field": "speed_change_1min", "header": "1分钟涨速", "backgroundColor": "redGreen"}
             ]
             
-            rows = []
-            for _, row in stock_df.head(100).iterrows():  # 限制返回数量
-                row_data = {}
-                for col in columns:
-                    field = col["field"]
-                    value = row.get(field, '')
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    row_data[field] = value
-                rows.append(row_data)
+            # 缺失的列使用空字符串，限制返回数量
+            table = serialize_table(stock_df, [{**col, "default": ""} for col in columns], limit=100)
             
-            return jsonify({
-                "columns": columns,
-                "rows": rows
-            })
+            return jsonify(table)
         
         except Exception as e:
             return self.error_response(f"获取股票数据失败: {e}")
@@ -686,28 +649,9 @@ class MultiPlateProcessor(BaseDataProcessor):
             ]
             
             # 确保所有列都存在于CSV文件中
-            valid_columns = [col for col in columns if col["field"] in up_limit_df.columns]
-            
-            # 转换DataFrame为所需格式
-            rows = []
-            for _, row_data in up_limit_df.iterrows():
-                row = {}
-                for col in valid_columns:
-                    field = col["field"]
-                    value = row_data[field]
-                    
-                    # 处理数值格式（保留两位小数）
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    
-                    row[field] = value
-                
-                rows.append(row)
+            table = serialize_table(up_limit_df, columns)
             
-            return jsonify({
-                "columns": valid_columns,
-                "rows": rows
-            })
+            return jsonify(table)
         
         except Exception as e:
             import traceback
@@ -765,8 +709,7 @@ class MultiPlateProcessor(BaseDataProcessor):
             # 构建用于哈希比较的源数据
             source_data = {
                 'data_count': len(up_limit_df),
-                'file_timestamp': self.data_cache.timestamps.get('up_limit_df', 0),
-                'data_sample': up_limit_df.head(5).to_dict('records') if not up_limit_df.empty else []
+                'fingerprints': self.get_data_fingerprints('up_limit_df')
             }
             
             # 检查是否可以使用缓存
@@ -792,27 +735,11 @@ class MultiPlateProcessor(BaseDataProcessor):
                 {"field": "股票ID", "header": "股票ID", "visible": False},
             ]
             
-            valid_columns = [col for col in columns if col["field"] in up_limit_df.columns]
-            
-            rows = []
-            for _, row_data in up_limit_df.iterrows():
-                row = {}
-                for col in valid_columns:
-                    field = col["field"]
-                    value = row_data[field]
-                    
-                    if isinstance(value, (float, np.float64, np.float32)):
-                        value = round(value, 2)
-                    
-                    row[field] = value
-                
-                rows.append(row)
+            # 只输出数据中存在的列
+            table = serialize_table(up_limit_df, columns)
             
             # 构建响应数据
-            response_data = jsonify({
-                "columns": valid_columns,
-                "rows": rows
-            })
+            response_data = jsonify(table)
             
             # 存储到缓存
             self.store_cache(cache_endpoint, None, source_data, response_data)
@@ -834,14 +761,12 @@ class MultiPlateProcessor(BaseDataProcessor):
                 })
             
             # 简化版处理
-            table_data = []
-            for _, row in up_limit_df.iterrows():
-                table_data.append({
-                    "股票名称": row.get('name', ''),
-                    "连板数": row.get('连板数', 0),
-                    "板块": row.get('Sector', ''),
-                    "涨停时间": row.get('涨停时间', '')
-                })
+            table_data = serialize_rows(up_limit_df, [
+                {"field": "股票名称", "source": "name", "default": ""},
+                {"field": "连板数", "default": 0},
+                {"field": "板块", "source": "Sector", "default": ""},
+                {"field": "涨停时间", "default": ""},
+            ])
             
             return jsonify({
                 "columns": ["股票名称", "连板数", "板块", "涨停时间"],
@@ -0,0 +1,168 @@
+"""
+进程池执行模式 - 将CPU密集的处理器方法分派到工作进程执行，绕开GIL让多个重型面板并行计算
+Author: data_panel开发团队
+Date: 2025-08-10
+
+在 components_config.json 中为组件配置:
+    "execution": {"mode": "process_pool"}
+即可启用。生产模式（单个gevent进程）下未配置 execution.mode 的组件默认启用，
+startup_once 缓存的组件（只计算一次，结果保存在服务进程）和配置了 "mode": "local" 的组件除外。工作进程在启动时创建自己的处理器实例和数据缓存（常驻、按文件时间戳刷新），
+请求参数通过模拟的请求上下文传入，结果以 (body, status, mimetype) 的序列化形式返回。
+
+注意：工作进程中的服务器对象只提供 data_cache / response_cache / sector_index / data_access / daily_panels / minute_cube / logger
+以及 get_worker_attributes() 导出的属性，依赖其他服务器方法的处理器不应启用此模式。
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from flask import Flask, Response
+
+# 工作进程数，默认不超过4个
+DEFAULT_MAX_WORKERS = int(os.environ.get('DATA_PANEL_PROCESS_WORKERS', min(4, os.cpu_count() or 1)))
+
+# 组件 execution.mode 的取值：在进程池中执行 / 在服务进程中执行
+PROCESS_POOL_MODE = 'process_pool'
+LOCAL_MODE = 'local'
+
+# 工作进程内的全局状态
+_worker_app = None
+_worker_processor = None
+
+
+class WorkerServerContext:
+    """工作进程中的轻量服务器上下文，提供处理器所需的缓存和资源"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec['name']
+        self.logger = logging.getLogger(spec['logger_name'])
+        self.data_cache = spec['data_cache_class'](*spec['data_cache_args'])
+        self.response_cache = spec['response_cache_class']()
+        if spec.get('param_normalizer') is not None:
+            self.response_cache.param_normalizer = spec['param_normalizer']
+        self.sector_index = spec['sector_index_class']()
+        if spec.get('data_access_class') is not None:
+            self.data_access = spec['data_access_class'](**spec['data_access_config'], logger=self.logger)
+            if spec.get('daily_panel_class') is not None:
+                self.daily_panels = spec['daily_panel_class'](
+                    self.data_access, **spec['daily_panel_config'], logger=self.logger)
+        if spec.get('minute_cube_class') is not None:
+            self.minute_cube = spec['minute_cube_class'](**spec['minute_cube_config'], logger=self.logger)
+        for name, value in spec.get('attributes', {}).items():
+            setattr(self, name, value)
+
+
+def _init_worker(spec: Dict[str, Any]):
+    """工作进程初始化：应用与服务进程相同的pandas模式，创建常驻的处理器实例"""
+    global _worker_app, _worker_processor
+    if spec.get('pandas_mode_setup') is not None:
+        spec['pandas_mode_setup']()
+    _worker_app = Flask(f"{spec['name']}_worker")
+    _worker_processor = spec['processor_class'](WorkerServerContext(spec))
+
+
+def _to_payload(result) -> Dict[str, Any]:
+    """将处理器返回值转换为可跨进程传输的形式"""
+    status = None
+    if isinstance(result, tuple):
+        result, status = result[0], result[1]
+    if isinstance(result, Response):
+        return {'body': result.get_data(), 'status': status or result.status_code, 'mimetype': result.mimetype}
+    return {'value': result, 'status': status}
+
+
+def _run_in_worker(data_type: str, request_spec: Dict[str, Any]) -> Dict[str, Any]:
+    """在工作进程中执行 process_{data_type}"""
+    method = getattr(_worker_processor, f"process_{data_type}")
+    with _worker_app.test_request_context(**request_spec):
+        return _to_payload(method())
+
+
+def _from_payload(payload: Dict[str, Any]):
+    """还原工作进程返回的结果"""
+    if 'body' in payload:
+        return Response(payload['body'], status=payload['status'], mimetype=payload['mimetype'])
+    if payload.get('status') is not None:
+        return payload['value'], payload['status']
+    return payload['value']
+
+
+class ProcessorPool:
+    """处理器进程池，按需启动工作进程"""
+
+    def __init__(self, server_instance, processor_class, max_workers: Optional[int] = None):
+        self.server = server_instance
+        self.processor_class = processor_class
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self._executor = None
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0}
+
+    def _build_worker_spec(self) -> Dict[str, Any]:
+        """构建工作进程初始化参数，只包含可序列化的类和数据"""
+        data_cache = self.server.data_cache
+        data_access = getattr(self.server, 'data_access', None)
+        daily_panels = getattr(self.server, 'daily_panels', None)
+        minute_cube = getattr(self.server, 'minute_cube', None)
+        get_attributes = getattr(self.server, 'get_worker_attributes', None)
+        return {
+            'name': getattr(self.server, 'name', 'data_panel'),
+            'logger_name': self.server.logger.name,
+            'processor_class': self.processor_class,
+            'data_cache_class': type(data_cache),
+            'data_cache_args': (dict(data_cache.file_paths), data_cache.snapshot_store,
+                                sorted(data_cache.incremental_keys), dict(data_cache.index_specs)),
+            'response_cache_class': type(self.server.response_cache),
+            'param_normalizer': getattr(self.server.response_cache, 'param_normalizer', None),
+            'sector_index_class': type(self.server.sector_index),
+            'data_access_class': type(data_access) if data_access is not None else None,
+            'data_access_config': data_access.get_config() if data_access is not None else {},
+            'daily_panel_class': type(daily_panels) if daily_panels is not None else None,
+            'daily_panel_config': daily_panels.get_config() if daily_panels is not None else {},
+            'minute_cube_class': type(minute_cube) if minute_cube is not None else None,
+            'minute_cube_config': minute_cube.get_config() if minute_cube is not None else {},
+            'attributes': get_attributes() if get_attributes else {},
+            'pandas_mode_setup': self.server.get_pandas_mode_setup() if hasattr(self.server, 'get_pandas_mode_setup') else None,
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 使用spawn避免在多线程的服务进程中fork
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self._build_worker_spec(),)
+            )
+            atexit.register(self.shutdown)
+            print(f"🧮 已启动处理器进程池: {self.max_workers} 个工作进程")
+        return self._executor
+
+    def run(self, data_type: str, request_spec: Dict[str, Any]):
+        """
+        在工作进程中执行处理方法并等待结果
+
+        Args:
+            data_type: 数据类型，对应 process_{data_type}
+            request_spec: 请求上下文参数（path、method、environ_overrides中的查询串、data、content_type）
+        """
+        self.stats['submitted'] += 1
+        try:
+            payload = self._get_executor().submit(_run_in_worker, data_type, request_spec).result()
+        except Exception:
+            self.stats['failed'] += 1
+            raise
+        self.stats['completed'] += 1
+        return _from_payload(payload)
+
+    def shutdown(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取进程池统计信息"""
+        return {**self.stats, 'max_workers': self.max_workers, 'started': self._executor is not None}
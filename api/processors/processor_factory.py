@@ -8,6 +8,9 @@ import os
 import importlib
 import json
 from pathlib import Path
+from flask import request, has_request_context
+
+from .process_pool import ProcessorPool, PROCESS_POOL_MODE, LOCAL_MODE
 
 # try:
 #     # 自动生成的导入语句
@@ -180,6 +183,12 @@ class SimplifiedProcessorManager:
             server_type, server_instance, data_cache, logger
         )
         
+        # 配置了进程池执行模式的数据类型，首次请求时从组件配置读取
+        self.process_pool = None
+        self._process_pool_types = None
+        # 数据类型 -> 组件配置，首次请求时从组件管理器读取
+        self._component_configs = None
+        
         if self.processor:
             self.logger.info(f"✅ 处理器管理器初始化成功: {server_type}")
         else:
@@ -204,7 +213,19 @@ class SimplifiedProcessorManager:
             method_name = f"process_{data_type}"
             if hasattr(self.processor, method_name):
                 method = getattr(self.processor, method_name)
-                return method(**kwargs)
+                if not kwargs and self._uses_process_pool(data_type):
+                    method = self._make_pool_call(data_type, method)
+                if hasattr(self.server, 'coalesce') and not kwargs:
+                    # 相同端点+参数的并发请求共享同一次计算的已编码结果，各自构建响应对象
+                    compute = lambda: self.server.coalesce(self._single_flight_key(data_type), method)
+                    respond = self.server.respond
+                else:
+                    compute = lambda: method(**kwargs)
+                    respond = lambda result: result
+                param_cache_policy = None if kwargs else self._param_cache_policy(data_type)
+                if param_cache_policy is not None:
+                    return self._process_with_param_cache(data_type, param_cache_policy, compute, respond)
+                return respond(compute())
             else:
                 self.logger.warning(f"处理器 {self.server_type} 不支持数据类型: {data_type}")
                 return {"error": f"不支持的数据类型: {data_type}"}
@@ -212,6 +233,138 @@ class SimplifiedProcessorManager:
         except Exception as e:
             self.logger.error(f"处理数据时出错 {data_type}: {e}")
             return {"error": f"处理失败: {str(e)}"}
+    
+    def _uses_process_pool(self, data_type: str) -> bool:
+        """
+        组件配置中 execution.mode 为 process_pool 的数据类型在工作进程中执行；
+        未配置时使用服务器的默认执行方式（生产模式为进程池），startup_once 缓存的组件仍在服务进程中计算
+        """
+        if self._process_pool_types is None:
+            pool_types = set()
+            get_default_mode = getattr(self.server, 'get_default_execution_mode', None)
+            default_mode = get_default_mode() if get_default_mode else LOCAL_MODE
+            component_manager = getattr(self.server, 'component_manager', None)
+            components = getattr(component_manager, 'components', {}) if component_manager else {}
+            for component_config in components.values():
+                extra_config = getattr(component_config, 'extra_config', {})
+                api_path = getattr(component_config, 'api_path', '')
+                mode = extra_config.get('execution', {}).get('mode')
+                if mode is None and extra_config.get('cache', {}).get('strategy') != 'startup_once':
+                    mode = default_mode
+                if mode == PROCESS_POOL_MODE and api_path:
+                    pool_types.add(api_path[5:] if api_path.startswith('/api/') else api_path)
+            self._process_pool_types = pool_types
+            if pool_types:
+                self.logger.info(f"进程池执行的数据类型: {sorted(pool_types)}")
+        return data_type in self._process_pool_types
+    
+    def _component_config(self, data_type: str):
+        """按数据类型（api_path去掉 /api/ 前缀）查找组件配置，多个组件共用端点时取第一个"""
+        if self._component_configs is None:
+            configs = {}
+            component_manager = getattr(self.server, 'component_manager', None)
+            components = getattr(component_manager, 'components', {}) if component_manager else {}
+            for component_config in components.values():
+                api_path = getattr(component_config, 'api_path', '')
+                if api_path:
+                    configs.setdefault(api_path[5:] if api_path.startswith('/api/') else api_path, component_config)
+            self._component_configs = configs
+        return self._component_configs.get(data_type)
+    
+    def _param_cache_policy(self, data_type: str):
+        """组件配置中 cache.strategy 为 param_lru 时返回缓存策略，否则返回None"""
+        component_config = self._component_config(data_type)
+        if component_config is None:
+            return None
+        cache_config = getattr(component_config, 'extra_config', {}).get('cache', {})
+        if cache_config.get('strategy') != 'param_lru':
+            return None
+        return {**cache_config, 'source_data_keys': getattr(component_config, 'source_data_keys', [])}
+    
+    def _process_with_param_cache(self, data_type: str, policy: dict, compute, respond):
+        """
+        按 端点 + 规范化参数 + 源数据版本 缓存响应，切换回已查看过的板块/日期时直接返回
+        缓存的是 compute() 的共享结果（未按请求协商压缩/304），respond() 只在返回时为当前请求构建响应
+        """
+        param_cache = getattr(self.server, 'param_cache', None)
+        if param_cache is None or not has_request_context():
+            return respond(compute())
+        endpoint = f"/api/{data_type}"
+        params = self._canonical_params(endpoint)
+        version = self.server.get_param_cache_version(policy.get('source_data_keys'))
+        
+        payload = param_cache.get(endpoint, params, version, policy.get('ttl', 0))
+        if payload is not None:
+            self.logger.info(f"🔒 使用参数化缓存: {endpoint} {params}")
+            return payload.to_response()
+        
+        revalidator = getattr(self.server, 'revalidator', None)
+        if policy.get('stale_while_revalidate') and revalidator is not None:
+            stale = param_cache.get_stale(endpoint, params)
+            if stale is not None:
+                # 先返回上一份响应，后台重新计算（相同请求只提交一次）
+                request_spec = self._request_spec(data_type)
+                
+                def revalidate():
+                    with self.server.app.test_request_context(**request_spec):
+                        param_cache.put(endpoint, params, version, compute())
+                
+                revalidator.submit(self._single_flight_key(data_type), revalidate)
+                self.logger.info(f"♻️ 返回过期缓存并在后台重新计算: {endpoint} {params}")
+                return stale.to_response()
+        
+        shared = compute()
+        param_cache.put(endpoint, params, version, shared)
+        return respond(shared)
+    
+    def _request_spec(self, data_type: str) -> dict:
+        """当前请求的可序列化描述，用于在其他线程/进程中重建请求上下文"""
+        if not has_request_context():
+            return {'path': f"/api/{data_type}"}
+        return {
+            'path': request.path,
+            'method': request.method,
+            # 原样保留WSGI查询串（未转义的中文参数按latin-1传递），test_request_context 不接受bytes
+            'environ_overrides': {'QUERY_STRING': request.environ.get('QUERY_STRING', '')},
+            'data': request.get_data(),
+            'content_type': request.content_type,
+        }
+    
+    def _make_pool_call(self, data_type: str, local_method):
+        """构建在进程池中执行的调用，进程池不可用时回退到当前线程执行"""
+        request_spec = self._request_spec(data_type)
+        
+        def pool_call():
+            if self.process_pool is None:
+                self.process_pool = ProcessorPool(self.server, type(self.processor))
+            try:
+                return self.process_pool.run(data_type, request_spec)
+            except Exception as e:
+                self.logger.warning(f"进程池执行失败，回退到本地执行 {data_type}: {e}")
+                return local_method()
+        
+        return pool_call
+    
+    def get_process_pool_stats(self):
+        """获取进程池统计信息"""
+        return self.process_pool.get_stats() if self.process_pool else {'started': False}
+    
+    def _canonical_params(self, endpoint: str) -> dict:
+        """当前请求规范化后的缓存参数"""
+        params = dict(request.args) if has_request_context() else {}
+        response_cache = getattr(self.server, 'response_cache', None)
+        if response_cache is not None and hasattr(response_cache, 'canonical_params'):
+            return response_cache.canonical_params(endpoint, params)
+        return params
+    
+    def _single_flight_key(self, data_type: str) -> str:
+        """请求合并键，与响应缓存键保持一致"""
+        endpoint = f"/api/{data_type}"
+        params = self._canonical_params(endpoint)
+        response_cache = getattr(self.server, 'response_cache', None)
+        if response_cache is not None:
+            return response_cache._generate_cache_key(endpoint, params)
+        return f"{endpoint}:{json.dumps(params, sort_keys=True)}"
 
 
 def create_processor_manager(server_type: str, server_instance, data_cache, logger):
@@ -0,0 +1,75 @@
+"""
+板块成员矩阵 - 股票×板块的成员关系矩阵，用矩阵乘法批量统计各板块的股票个数
+Author: data_panel开发团队
+Date: 2025-08-10
+
+安装了 scipy 时使用稀疏矩阵(CSR)，否则回退到 NumPy 稠密矩阵
+"""
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy import sparse
+    HAS_SCIPY = True
+except ImportError:
+    sparse = None
+    HAS_SCIPY = False
+
+
+class SectorMembershipMatrix:
+    """股票→板块成员矩阵，每次概念数据刷新时构建一次"""
+
+    def __init__(self, membership_df: pd.DataFrame, id_col: str = 'id', sector_col: str = 'sector_name'):
+        """
+        Args:
+            membership_df: 每行一个 (股票id, 板块名) 对应关系
+            id_col: 股票id列名
+            sector_col: 板块名列名
+        """
+        pairs = membership_df[[id_col, sector_col]].dropna().drop_duplicates()
+        stock_codes, self.stock_ids = pd.factorize(pairs[id_col])
+        sector_codes, sectors = pd.factorize(pairs[sector_col], sort=True)
+        self.sectors = list(sectors)
+        self.stock_index = pd.Index(self.stock_ids)
+        self.shape = (len(self.stock_ids), len(self.sectors))
+
+        if HAS_SCIPY:
+            self.matrix = sparse.csr_matrix(
+                (np.ones(len(pairs), dtype=np.int32), (stock_codes, sector_codes)), shape=self.shape
+            )
+        else:
+            self.matrix = np.zeros(self.shape, dtype=np.int32)
+            self.matrix[stock_codes, sector_codes] = 1
+
+    def count_by_group(self, group_keys: Iterable, stock_ids: Iterable) -> pd.DataFrame:
+        """
+        按分组(如分钟)统计每个板块内出现的不同股票个数
+
+        Args:
+            group_keys: 每行的分组键，如分钟时间字符串
+            stock_ids: 每行的股票id，与group_keys一一对应
+
+        Returns:
+            DataFrame: 行为排序后的分组键，列为板块名，值为股票个数
+        """
+        group_codes, groups = pd.factorize(pd.Series(group_keys), sort=True)
+        stock_positions = self.stock_index.get_indexer(pd.Series(stock_ids))
+        mask = stock_positions >= 0
+        group_codes, stock_positions = group_codes[mask], stock_positions[mask]
+        shape = (len(groups), self.shape[0])
+
+        if HAS_SCIPY:
+            hits = sparse.csr_matrix(
+                (np.ones(len(group_codes), dtype=np.int32), (group_codes, stock_positions)), shape=shape
+            )
+            # 同一分组内同一股票只计一次
+            hits.data[:] = 1
+            counts = (hits @ self.matrix).toarray()
+        else:
+            hits = np.zeros(shape, dtype=np.int32)
+            hits[group_codes, stock_positions] = 1
+            counts = hits @ self.matrix
+
+        return pd.DataFrame(counts, index=list(groups), columns=self.sectors)
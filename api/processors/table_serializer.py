@@ -0,0 +1,83 @@
+"""
+表格序列化工具 - 按列批量转换DataFrame为前端表格所需的 {columns, rows} 格式
+Author: data_panel开发团队
+Date: 2025-08-10
+
+列定义沿用前端表格的格式，另外支持以下仅用于序列化的键（不会输出给前端）：
+- source:  数据来源列名，默认与 field 相同
+- round:   浮点数保留的小数位数，默认2位
+- format:  格式化字符串，如 "{:.2f}%"
+- default: 数据列不存在时使用的默认值；未设置时该列被丢弃
+"""
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# 仅用于序列化的列定义键
+SERIALIZER_KEYS = ('source', 'round', 'format', 'default')
+
+
+def _column_values(df: pd.DataFrame, spec: Dict[str, Any], default_round: int) -> List[Any]:
+    """将一整列转换为可JSON序列化的Python值列表"""
+    source = spec.get('source', spec['field'])
+    fmt = spec.get('format')
+    if source not in df.columns:
+        value = spec.get('default', '')
+        return [fmt.format(value) if fmt else value] * len(df)
+
+    series = df[source]
+    if fmt:
+        if 'default' in spec:
+            series = series.fillna(spec['default'])
+        return [fmt.format(value) for value in series.tolist()]
+
+    if pd.api.types.is_float_dtype(series.dtype):
+        return series.round(spec.get('round', default_round)).tolist()
+    if series.dtype == object:
+        # 混合类型列中的浮点数同样保留小数位
+        digits = spec.get('round', default_round)
+        return [round(value, digits) if isinstance(value, float) else value for value in series.tolist()]
+    return series.tolist()
+
+
+def available_columns(df: pd.DataFrame, columns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """筛选数据中存在（或设置了默认值）的列"""
+    return [col for col in columns
+            if col.get('source', col['field']) in df.columns or 'default' in col]
+
+
+def serialize_rows(df: pd.DataFrame, columns: List[Dict[str, Any]], limit: Optional[int] = None,
+                   default_round: int = 2) -> List[Dict[str, Any]]:
+    """
+    按列批量构建表格行，替代逐行 iterrows
+
+    Args:
+        df: 数据DataFrame
+        columns: 列定义列表
+        limit: 最多返回的行数
+        default_round: 浮点数默认保留的小数位数
+
+    Returns:
+        list: [{field: value, ...}, ...]
+    """
+    if limit is not None:
+        df = df.head(limit)
+    columns = available_columns(df, columns)
+    if not columns or df.empty:
+        return []
+
+    fields = [col['field'] for col in columns]
+    values = [_column_values(df, col, default_round) for col in columns]
+    return [dict(zip(fields, row)) for row in zip(*values)]
+
+
+def serialize_table(df: pd.DataFrame, columns: List[Dict[str, Any]], limit: Optional[int] = None,
+                    default_round: int = 2) -> Dict[str, Any]:
+    """
+    构建 {columns, rows} 表格数据，columns 中只包含数据中存在的列，并去掉序列化专用键
+    """
+    valid_columns = available_columns(df, columns)
+    return {
+        "columns": [{k: v for k, v in col.items() if k not in SERIALIZER_KEYS} for col in valid_columns],
+        "rows": serialize_rows(df, valid_columns, limit, default_round)
+    }
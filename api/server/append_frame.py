@@ -0,0 +1,70 @@
+"""
+只追加数据帧 - 增量读取的分钟线按列预留容量追加新行，不再每次把整张表重新拼接
+Author: data_panel开发团队
+Date: 2025-08-12
+
+增量读取原先每次追加都执行 pd.concat([cached, new_rows])，复制全部已有行，
+盘中每个tick都是 O(总行数)。AppendableFrame 为每列保存一个预留了容量的数组:
+- 追加时把新行写入已发布长度之后的空位，容量不足时按倍数扩容（均摊 O(新增行数)）
+- frame() 返回各列前 n 行切片组成的DataFrame（零拷贝），已发布的行之后不会再被写入，
+  之前返回的DataFrame始终不变
+新行的列或dtype与已有数据不一致（如整数列出现空值变为浮点）时 append 返回False，由调用方全量拼接重建。
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray
+
+
+class AppendableFrame:
+    """按列预留容量、只在末尾追加的数据帧"""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.columns = list(frame.columns)
+        self.dtypes = [frame[column].dtype for column in self.columns]
+        self._arrays: Dict[str, ExtensionArray] = {column: frame[column].array for column in self.columns}
+        self._length = len(frame)
+        self._capacity = len(frame)
+        self._frame = frame
+
+    def __len__(self):
+        return self._length
+
+    def frame(self) -> pd.DataFrame:
+        """当前全部行组成的DataFrame（各列数组的切片，不复制）"""
+        return self._frame
+
+    def compatible(self, rows: pd.DataFrame) -> bool:
+        """新行的列名、顺序和dtype是否与已有数据一致"""
+        return list(rows.columns) == self.columns and all(
+            rows[column].dtype == dtype for column, dtype in zip(self.columns, self.dtypes))
+
+    def append(self, rows: pd.DataFrame) -> bool:
+        """追加新行，返回是否成功；列或dtype不一致时不做任何修改并返回False"""
+        if rows.empty:
+            return True
+        if not self.compatible(rows):
+            return False
+
+        start, end = self._length, self._length + len(rows)
+        if end > self._capacity:
+            self._grow(rows, max(end, self._capacity * 2))
+        else:
+            for column in self.columns:
+                self._arrays[column][start:end] = rows[column].array
+        self._length = end
+        self._frame = pd.DataFrame({column: self._arrays[column][:end] for column in self.columns},
+                                   columns=self.columns, copy=False)
+        return True
+
+    def _grow(self, rows: pd.DataFrame, capacity: int):
+        """扩容到 capacity 并写入新行；空位用新行首个值占位，发布前总会被覆盖"""
+        padding = np.zeros(capacity - self._length - len(rows), dtype=np.intp)
+        for column in self.columns:
+            array, new = self._arrays[column], rows[column].array
+            parts = [array[:self._length], new]
+            if len(padding):
+                parts.append(new.take(padding))
+            self._arrays[column] = type(array)._concat_same_type(parts)
+        self._capacity = capacity
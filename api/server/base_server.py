@@ -7,7 +7,7 @@ Base Stock Dashboard Server - 可重用的服务器框架
 Author: chenlei
 """
 
-from flask import Flask, jsonify, request, Response, send_from_directory
+from flask import Flask, jsonify, request, Response, send_from_directory, g, has_request_context
 from flask_cors import CORS
 import logging
 import json
@@ -19,25 +19,91 @@ import time
 import threading
 import queue
 import hashlib
+import io
 from datetime import datetime, timedelta
 import random
 import sys
 import os
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 
 # 导入启动缓存
 from startup_cache import StartupOnceCache
+# 导入预编码响应
+from encoded_payload import EncodedPayload
+# 导入持久化预热缓存
+from warm_cache import WarmStartCache, resolve_warm_cache_path
+# 导入参数化结果缓存
+from param_cache import ParamLRUCache, DEFAULT_MAX_ENTRIES as PARAM_CACHE_MAX_ENTRIES
+# 导入缓存参数规范化
+from cache_params import CacheParamNormalizer
+# 导入后台重新验证
+from revalidator import BackgroundRevalidator, DEFAULT_REVALIDATE_WORKERS
+# 导入pandas写时复制模式
+from pandas_mode import copy_on_write_active, enable_copy_on_write
+# 导入记忆查询结果的数据访问层
+from data_access import MemoizedDataAccess
+# 导入数据帧二级索引
+from frame_index import FrameIndex
+# 导入只追加数据帧
+from append_frame import AppendableFrame
+# 导入日线面板存储
+from daily_panel import DailyPanelStore, DEFAULT_PANEL_REFRESH_INTERVAL
+# 导入当日分钟数据立方体
+from minute_cube import IntradayCubeService, DEFAULT_REFRESH_INTERVAL
+# 导入启动缓存预热调度器
+from warmup_scheduler import WarmupScheduler, DEFAULT_PRIORITY, DEFAULT_WARMUP_WORKERS, SKIPPED
+# 导入列式快照存储
+from snapshot_store import BaseSnapshotStore, create_snapshot_store
+# 导入请求合并
+from single_flight import SingleFlight
+# 导入板块成员索引
+from sector_index import SectorIndex, SectorIndexService
+# 导入SSE广播中心
+from sse_hub import BroadcastHub, DEFAULT_RING_SIZE, DEFAULT_MAX_PENDING, encode_sse
+# 导入服务运行模式
+from serving import (DEV_MODE, PRODUCTION_MODE, PRODUCTION_MAX_CLIENTS, prepare_serve_mode,
+                     run_production_server)
+
+
+# 持久化缓存指纹中加载器版本覆盖的最近天数
+LOADER_VERSION_DAYS = 30
 
 
 class BaseDataCache:
     """基础数据缓存类 - 用于数据文件的缓存管理"""
     
-    def __init__(self, file_paths: Optional[Dict[str, str]] = None):
+    # 增量读取时用于识别文件被重写的头部字节数，以及上次偏移之前的尾部签名字节数
+    TAIL_HEAD_BYTES = 4096
+    TAIL_SIGNATURE_BYTES = 4096
+    
+    def __init__(self, file_paths: Optional[Dict[str, str]] = None,
+                 snapshot_store: Optional[BaseSnapshotStore] = None,
+                 incremental_keys: Optional[List[str]] = None,
+                 index_specs: Optional[Dict[str, Dict[str, Any]]] = None):
         self.cache = {}
         self.timestamps = {}
+        self.versions = {}  # 每次重新加载/更新时递增的版本号
+        self.update_counts = {}  # update_data 直接写入的次数（数据指纹使用，与加载无关）
         self.file_paths = file_paths or {}
+        self.snapshot_store = snapshot_store  # 为None时直接解析CSV
+        # 只追加写入的文件（如分钟线），增量解析新追加的行
+        self.incremental_keys = set(incremental_keys or [])
+        self.tail_states = {}
+        self.tail_stats = {'full_loads': 0, 'incremental_loads': 0, 'appended_rows': 0}
+        # 每个数据键一把锁，检查-读取-写入缓存整个过程串行，避免并发重载重复推进增量偏移
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+        # 声明了二级索引的数据键 {键: {'id_col': ..., 'order_col': ...}}，索引按版本号重建，增量追加后扩展
+        self.index_specs = dict(index_specs or {})
+        self.indexes = {}
+        self.index_stats = {'builds': 0, 'extends': 0, 'hits': 0}
         
+    @property
+    def copy_on_read(self) -> bool:
+        """写时复制未启用时每次读取都深拷贝，避免调用方修改污染缓存（按当前模式判断，不在导入时固定）"""
+        return not copy_on_write_active()
+    
     def get_file_path(self, file_key: str) -> Optional[str]:
         """获取文件路径"""
         return self.file_paths.get(file_key)
@@ -61,17 +127,46 @@ class BaseDataCache:
         return current_timestamp > cached_timestamp
         
     def load_data(self, key: str):
-        """加载数据，支持从文件路径自动加载"""
+        """加载数据，支持从文件路径自动加载
+        
+        返回缓存DataFrame的写时复制视图（零拷贝），调用方的修改不会影响缓存；
+        需要独立可写副本时使用 load_data_mutable
+        """
         # 如果有配置的文件路径，使用文件加载逻辑
         if key in self.file_paths:
-            return self._load_from_file(key)
+            return self._view(self._load_from_file(key))
         
         # 否则返回缓存中的数据
-        return self.cache.get(key, pd.DataFrame())
+        return self._view(self.cache.get(key, pd.DataFrame()))
+    
+    def load_data_mutable(self, key: str):
+        """加载数据的独立深拷贝，用于需要原地修改底层数组的场景"""
+        data = self.load_data(key)
+        return data.copy(deep=True) if isinstance(data, pd.DataFrame) else data
+    
+    def _view(self, data: Any):
+        """返回缓存数据的只读视图"""
+        if not isinstance(data, pd.DataFrame):
+            return data
+        if self.copy_on_read:
+            return data.copy()
+        return data.copy(deep=False)
+    
+    def _key_lock(self, file_key: str) -> threading.Lock:
+        """获取数据键的加载锁"""
+        with self._key_locks_guard:
+            lock = self._key_locks.get(file_key)
+            if lock is None:
+                lock = self._key_locks[file_key] = threading.Lock()
+            return lock
     
     def _load_from_file(self, file_key: str):
-        """从文件加载数据"""
-        if file_key not in self.cache or self.should_reload(file_key):
+        """从文件加载数据，返回缓存中的DataFrame本身（由load_data负责生成视图）"""
+        with self._key_lock(file_key):
+            if file_key in self.cache and not self.should_reload(file_key):
+                print(f"使用缓存数据: {file_key}")
+                return self.cache[file_key]
+            
             file_path = self.get_file_path(file_key)
             if not file_path or not os.path.exists(file_path):
                 print(f"警告: 文件不存在 {file_path}")
@@ -79,26 +174,182 @@ class BaseDataCache:
                 
             try:
                 print(f"重新加载文件: {file_path}")
-                df = pd.read_csv(file_path)
+                # 读取前记录mtime，读取期间文件再次变化时下次仍会重新加载
+                timestamp = self.get_file_timestamp(file_path)
+                df = self._read_source(file_key, file_path)
+                if df is not self.cache.get(file_key):
+                    self.versions[file_key] = self.versions.get(file_key, 0) + 1
                 self.cache[file_key] = df
-                self.timestamps[file_key] = self.get_file_timestamp(file_path)
-                return df.copy()
+                self.timestamps[file_key] = timestamp
+                return df
             except Exception as e:
                 print(f"加载文件失败 {file_path}: {e}")
                 return pd.DataFrame()
-        else:
-            print(f"使用缓存数据: {file_key}")
-            return self.cache[file_key].copy()
+    
+    def _read_source(self, file_key: str, file_path: str) -> pd.DataFrame:
+        """读取数据源，配置了快照存储时优先读取列式快照"""
+        if file_key in self.incremental_keys:
+            return self._read_incremental(file_key, file_path)
+        if self.snapshot_store is not None:
+            return self.snapshot_store.load(file_key, file_path)
+        return pd.read_csv(file_path)
+    
+    def _read_incremental(self, file_key: str, file_path: str) -> pd.DataFrame:
+        """增量读取只追加的CSV：只解析上次偏移之后的完整行，文件被重写时全量重载"""
+        state = self.tail_states.get(file_key)
+        stat = os.stat(file_path)
+        
+        if state and self.cache.get(file_key) is state['frame'].frame():
+            with open(file_path, 'rb') as f:
+                if not self._is_rewritten(state, stat, f):
+                    f.seek(state['offset'])
+                    chunk = f.read(stat.st_size - state['offset'])
+                    return self._append_chunk(file_key, state, chunk)
+            print(f"文件已被重写，全量重新加载: {file_path}")
+        
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        header_end = raw.find(b'\n')
+        if header_end < 0:
+            self.tail_states.pop(file_key, None)
+            return pd.read_csv(io.BytesIO(raw)) if raw.strip() else pd.DataFrame()
+        
+        # 只解析到最后一个完整行，未写完的行留到下次
+        consumed = raw[:raw.rfind(b'\n') + 1]
+        df = pd.read_csv(io.BytesIO(consumed))
+        self.tail_states[file_key] = {
+            'file_id': (stat.st_dev, stat.st_ino),
+            'offset': len(consumed),
+            'header': raw[:header_end + 1],
+            'head': consumed[:self.TAIL_HEAD_BYTES],
+            'signature': consumed[-self.TAIL_SIGNATURE_BYTES:],
+            'frame': AppendableFrame(df),
+        }
+        self.tail_stats['full_loads'] += 1
+        return df
+    
+    def _is_rewritten(self, state: Dict[str, Any], stat: os.stat_result, f) -> bool:
+        """
+        判断文件是否被重写而不是追加：换了文件（inode不同）、变短、开头字节或上次偏移之前的尾部字节不同
+        只比较开头时，保留表头和开头若干行的重写（如按日重新生成）会被误当作追加
+        """
+        if (stat.st_dev, stat.st_ino) != state['file_id'] or stat.st_size < state['offset']:
+            return True
+        if f.read(len(state['head'])) != state['head']:
+            return True
+        signature = state['signature']
+        f.seek(state['offset'] - len(signature))
+        return f.read(len(signature)) != signature
+    
+    def _append_chunk(self, file_key: str, state: Dict[str, Any], chunk: bytes) -> pd.DataFrame:
+        """解析新追加的字节并写入只追加数据帧，不复制已有的行"""
+        frame = state['frame']
+        line_end = chunk.rfind(b'\n')
+        if line_end < 0:
+            return frame.frame()
+        
+        chunk = chunk[:line_end + 1]
+        new_rows = pd.read_csv(io.BytesIO(state['header'] + chunk))
+        state['offset'] += len(chunk)
+        if len(state['head']) < self.TAIL_HEAD_BYTES:
+            state['head'] = (state['head'] + chunk)[:self.TAIL_HEAD_BYTES]
+        state['signature'] = (state['signature'] + chunk)[-self.TAIL_SIGNATURE_BYTES:]
+        self.tail_stats['incremental_loads'] += 1
+        self.tail_stats['appended_rows'] += len(new_rows)
+        
+        if new_rows.empty:
+            return frame.frame()
+        print(f"增量追加 {len(new_rows)} 行: {file_key}")
+        if not frame.append(new_rows):
+            # 新行的dtype与已有数据不一致（如整数列出现空值），拼接后重建
+            frame = state['frame'] = AppendableFrame(pd.concat([frame.frame(), new_rows], ignore_index=True))
+        return frame.frame()
+    
+    @staticmethod
+    def index_frame(frame: pd.DataFrame, order_col: Optional[str] = None, id_col: str = 'id') -> FrameIndex:
+        """为任意长表建立一次性的二级索引（不缓存），如按请求读取的分钟线"""
+        return FrameIndex(frame, id_col, order_col)
+    
+    def get_index(self, key: str) -> FrameIndex:
+        """
+        获取数据键的二级索引，数据重新加载或更新后重建；未声明的键按 id 建立索引
+        在数据键的加载锁内建立，并发请求不会重复建立；增量追加的数据只把新行归并进已有索引
+        """
+        if key in self.file_paths:
+            self._load_from_file(key)
+        with self._key_lock(key):
+            data = self.cache.get(key, pd.DataFrame())
+            version = self.versions.get(key, 0)
+            cached = self.indexes.get(key)
+            if cached is not None and cached[0] == version and cached[1].frame is data:
+                self.index_stats['hits'] += 1
+                return cached[1]
+            
+            lineage = self._append_lineage(key, data)
+            if cached is not None and lineage is not None and cached[2] is lineage and len(data) > len(cached[1]):
+                index = cached[1].extended(data)
+                self.index_stats['extends'] += 1
+            else:
+                spec = self.index_specs.get(key, {})
+                index = FrameIndex(data, spec.get('id_col', 'id'), spec.get('order_col'))
+                self.index_stats['builds'] += 1
+            self.indexes[key] = (version, index, lineage)
+            return index
+    
+    def _append_lineage(self, key: str, data: Any) -> Optional[AppendableFrame]:
+        """data 是增量读取的只追加数据帧时返回该数据帧（它之前返回的数据都是 data 的前若干行），否则返回None"""
+        state = self.tail_states.get(key)
+        if state is not None and state['frame'].frame() is data:
+            return state['frame']
+        return None
+    
+    def query(self, key: str, stock_ids: Optional[Iterable[Any]] = None, start: Any = None,
+              end: Any = None) -> pd.DataFrame:
+        """
+        按股票id和时间列范围 [start, end] 查询缓存数据，返回新的DataFrame
+        等同于对 load_data(key) 做 isin 和范围布尔筛选，但只访问命中的行
+        """
+        return self.get_index(key).rows(stock_ids, start, end)
+    
+    def get_snapshot_stats(self) -> Optional[Dict[str, Any]]:
+        """获取快照存储统计信息"""
+        return self.snapshot_store.get_stats() if self.snapshot_store is not None else None
+    
+    def get_fingerprint(self, key: str) -> Tuple[int, float, int]:
+        """
+        获取数据指纹 (update_data次数, mtime, 文件大小)，只读取文件元信息，不访问数据本身
+        不包含内存中的加载版本和行数：文件变化后第一个请求（尚未重新加载）与之后的请求得到相同指纹
+        """
+        mtime, size = self.get_file_stat(key)
+        return (self.update_counts.get(key, 0), mtime, size)
+    
+    def get_file_stat(self, key: str) -> Tuple[float, int]:
+        """获取数据文件的 (mtime, 文件大小)，与进程无关，可用于持久化缓存的指纹"""
+        file_path = self.get_file_path(key)
+        try:
+            stat = os.stat(file_path) if file_path else None
+        except OSError:
+            stat = None
+        return (stat.st_mtime, stat.st_size) if stat else (0.0, 0)
+    
+    def get_fingerprints(self, keys: List[str]) -> Dict[str, Tuple[int, float, int]]:
+        """批量获取数据指纹"""
+        return {key: self.get_fingerprint(key) for key in keys}
     
     def update_data(self, key: str, data: Any):
         """更新缓存数据"""
         self.cache[key] = data
         self.timestamps[key] = time.time()
+        self.versions[key] = self.versions.get(key, 0) + 1
+        self.update_counts[key] = self.update_counts.get(key, 0) + 1
         
     def clear_cache(self):
         """清空缓存"""
         self.cache.clear()
         self.timestamps.clear()
+        self.tail_states.clear()
+        self.indexes.clear()
+        # 版本号不清零，保证清空后重新加载的数据指纹不会与旧指纹相同
     
     def add_file_path(self, key: str, path: str):
         """添加文件路径映射"""
@@ -110,13 +361,21 @@ class BaseDataCache:
 
 
 class BaseResponseCache:
-    """基础响应缓存类 - 用于缓存API响应数据"""
+    """基础响应缓存类 - 用于缓存API响应数据，响应以预编码（含压缩版本）的不可变字节保存"""
     
     def __init__(self, max_cache_size=100):
-        self.cache = {}  # 存储实际响应数据
+        self.cache = {}  # 存储已编码的响应（EncodedPayload），无法编码的响应原样保存
         self.hash_cache = {}  # 存储数据哈希值
         self.access_times = {}  # 存储访问时间，用于LRU清理
         self.max_cache_size = max_cache_size
+        # 缓存参数规范化，服务器会替换为按组件声明参数的规范化器
+        self.param_normalizer = CacheParamNormalizer()
+        # 标记为过期的响应，数据变化后重新计算完成前返回
+        self.stale_cache = {}
+        
+    def canonical_params(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
+        """请求参数规范化为只包含影响结果的参数，用于生成缓存键"""
+        return self.param_normalizer.normalize(endpoint, params)
         
     def _generate_cache_key(self, endpoint: str, params: Optional[Dict] = None) -> str:
         """生成缓存键"""
@@ -147,6 +406,7 @@ class BaseResponseCache:
         
         for key in keys_to_remove:
             self.cache.pop(key, None)
+            self.stale_cache.pop(key, None)
             self.hash_cache.pop(key, None)
             self.access_times.pop(key, None)
             
@@ -163,7 +423,7 @@ class BaseResponseCache:
         # 如果没有提供当前数据，无法比较，使用缓存
         if current_data is None:
             self.access_times[cache_key] = time.time()
-            return True, self.cache[cache_key]
+            return True, self._to_response(self.cache[cache_key])
             
         # 计算当前数据的哈希值
         current_hash = self._calculate_data_hash(current_data)
@@ -173,7 +433,7 @@ class BaseResponseCache:
         if current_hash == cached_hash:
             print(f"数据未变化，使用缓存响应: {endpoint}")
             self.access_times[cache_key] = time.time()
-            return True, self.cache[cache_key]
+            return True, self._to_response(self.cache[cache_key])
         else:
             print(f"数据已变化，需要重新计算: {endpoint}")
             return False, None
@@ -189,8 +449,13 @@ class BaseResponseCache:
             self.hash_cache[cache_key] = data_hash
             
         if response_data is not None:
-            # 存储响应数据
-            self.cache[cache_key] = response_data
+            # 存储响应数据（只编码、压缩一次）
+            if isinstance(response_data, EncodedPayload):
+                payload = response_data
+            else:
+                payload = EncodedPayload.from_response(response_data)
+            self.cache[cache_key] = payload or response_data
+            self.stale_cache.pop(cache_key, None)
             self.access_times[cache_key] = time.time()
             
             # 清理缓存
@@ -198,16 +463,46 @@ class BaseResponseCache:
             
             print(f"响应已缓存: {endpoint}")
             
+    @staticmethod
+    def _to_response(cached):
+        """已编码的响应按 Accept-Encoding 直接返回字节"""
+        return cached.to_response() if isinstance(cached, EncodedPayload) else cached
+    
+    def get_response(self, endpoint: str, params: Optional[Dict] = None):
+        """获取缓存的响应，不存在时返回None"""
+        cache_key = self._generate_cache_key(endpoint, params)
+        if cache_key not in self.cache:
+            return None
+        self.access_times[cache_key] = time.time()
+        return self._to_response(self.cache[cache_key])
+    
+    def get_stale_response(self, endpoint: str, params: Optional[Dict] = None):
+        """获取上一份已编码的响应（不检查源数据），metadata 中标记 stale，不存在时返回None"""
+        cache_key = self._generate_cache_key(endpoint, params)
+        cached = self.cache.get(cache_key)
+        if not isinstance(cached, EncodedPayload):
+            return None
+        stale = self.stale_cache.get(cache_key)
+        if stale is None:
+            stale = cached.mark_stale(self.access_times.get(cache_key, time.time()))
+            self.stale_cache[cache_key] = stale
+        return stale.to_response()
+    
     def clear_cache(self):
         """清空所有缓存"""
         self.cache.clear()
+        self.stale_cache.clear()
         self.hash_cache.clear()
         self.access_times.clear()
         
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
+        payloads = [value for value in self.cache.values() if isinstance(value, EncodedPayload)]
         return {
             "cache_size": len(self.cache),
+            "encoded_entries": len(payloads),
+            "encoded_bytes": sum(len(p.body) for p in payloads),
+            "gzip_bytes": sum(len(p.gzip_body or p.body) for p in payloads),
             "hash_cache_size": len(self.hash_cache),
             "max_cache_size": self.max_cache_size,
             "oldest_access": min(self.access_times.values()) if self.access_times else None,
@@ -222,7 +517,8 @@ class BaseStockServer(ABC):
         self.name = name
         self.port = port
         self.app = Flask(__name__)
-        CORS(self.app)
+        # 暴露ETag并缓存预检结果，前端条件请求携带 If-None-Match 时无需每次预检
+        CORS(self.app, expose_headers=['ETag'], max_age=600)
         
         # 配置日志
         logging.basicConfig(level=logging.INFO)
@@ -238,17 +534,63 @@ class BaseStockServer(ABC):
             'heartbeat_interval': 30   # 心跳间隔（秒）
         }
         
+        # pandas写时复制只在配置 copy_on_write 为 true 时由 run() 开启（进程级设置）
+        self.copy_on_write = bool(self.auto_update_config.get('copy_on_write', False))
+        # 运行模式，由 run() 设置；生产模式下未配置执行方式的组件默认在处理器进程池中计算
+        self.serve_mode = DEV_MODE
+        
         # 初始化缓存系统
-        self.data_cache = BaseDataCache(self.get_data_cache_file_paths())
+        self.data_cache = BaseDataCache(self.get_data_cache_file_paths(), self.get_snapshot_store(),
+                                        self.get_incremental_data_keys(), self.get_data_index_specs())
         self.response_cache = BaseResponseCache()
+        # 缓存键只包含组件声明的参数（components_config.json 中的 params）
+        self.response_cache.param_normalizer = CacheParamNormalizer(
+            components_loader=lambda: getattr(getattr(self, 'component_manager', None), 'components', None))
         
         # 初始化启动缓存
         self.startup_cache = StartupOnceCache()
+        # 启动缓存的持久化层，重启后指纹未变化的端点直接恢复
+        self.warm_cache = WarmStartCache(self.get_warm_cache_path(), namespace=f"{type(self).__name__}:{self.name}")
+        # 按优先级并行预热启动缓存端点
+        self.warmup_scheduler = WarmupScheduler(
+            self.auto_update_config.get('warmup_workers', DEFAULT_WARMUP_WORKERS), self.logger)
+        
+        # stock_data 加载器实例和按日期范围记忆的查询结果
+        self.data_access = MemoizedDataAccess(**self.auto_update_config.get('data_access', {}), logger=self.logger)
+        # 股票×交易日面板，建立在数据访问层之上并增量扩展
+        self.daily_panels = DailyPanelStore(
+            self.data_access, self.auto_update_config.get('daily_panel_interval', DEFAULT_PANEL_REFRESH_INTERVAL),
+            self.logger)
+        
+        # 板块/日期范围等带参数端点的结果缓存
+        self.param_cache = ParamLRUCache(self.auto_update_config.get('param_cache_entries', PARAM_CACHE_MAX_ENTRIES))
+        
+        # 相同缓存键的并发请求合并为一次计算
+        self.single_flight = SingleFlight()
         
-        # SSE相关
-        self.sse_clients = []
+        # stale-while-revalidate：数据变化后先返回上一份响应，后台重新计算
+        self.stale_while_revalidate = self.auto_update_config.get('stale_while_revalidate', True)
+        self.revalidator = BackgroundRevalidator(
+            self.auto_update_config.get('revalidate_workers', DEFAULT_REVALIDATE_WORKERS), self.logger)
+        
+        # 板块成员索引，数据刷新时才重建
+        self.sector_index = SectorIndexService()
+        
+        # 当日股票×分钟立方体，分钟线端点共用，按需增量刷新
+        self.minute_cube = IntradayCubeService(
+            self.auto_update_config.get('minute_cube_interval', DEFAULT_REFRESH_INTERVAL), self.logger)
+        
+        # SSE相关：事件只编码一次，保存在有界环形缓冲区中，订阅者按游标读取
+        self.sse_hub = BroadcastHub(
+            ring_size=self.auto_update_config.get('sse_ring_size', DEFAULT_RING_SIZE),
+            max_pending=self.auto_update_config.get('sse_max_pending', DEFAULT_MAX_PENDING)
+        )
         self.latest_update = {"componentId": None, "params": {}}
         
+        # 组件数据版本（源数据指纹的哈希），用于SSE事件和 If-None-Match 条件请求
+        self._versioned_components = None
+        self.version_stats = {'versioned': 0, 'not_modified': 0}
+        
         # 注册通用路由
         self._register_routes()
         
@@ -267,6 +609,52 @@ class BaseStockServer(ABC):
         """获取数据缓存文件路径配置 - 子类可以重写此方法"""
         return {}
     
+    def get_incremental_data_keys(self) -> List[str]:
+        """获取只追加写入、可增量读取的数据文件键 - 子类可以重写此方法"""
+        return ['stock_minute_df']
+    
+    def get_data_index_specs(self) -> Dict[str, Dict[str, Any]]:
+        """获取建立二级索引的数据键及其id列、时间列 - 子类可以重写此方法"""
+        return {'stock_minute_df': {'id_col': 'id', 'order_col': 'time'}}
+    
+    def get_worker_attributes(self) -> Dict[str, Any]:
+        """获取复制到进程池工作进程中的服务器属性（须可序列化） - 子类可以重写此方法"""
+        attributes = {}
+        if hasattr(self, 'dynamic_titles'):
+            attributes['dynamic_titles'] = self.dynamic_titles.copy()
+        return attributes
+    
+    def get_default_execution_mode(self) -> str:
+        """
+        组件未配置 execution.mode 时的执行方式
+        生产模式只有一个gevent进程，CPU密集的pandas计算不会让出执行权，期间所有请求和SSE连接都被阻塞，
+        因此默认在处理器进程池中计算（自动更新配置 production_process_pool 为 false 时关闭）
+        """
+        if self.serve_mode == PRODUCTION_MODE and self.auto_update_config.get('production_process_pool', True):
+            return 'process_pool'
+        return 'local'
+    
+    def apply_pandas_mode(self) -> bool:
+        """按配置开启pandas写时复制（进程级设置，在 run() 中调用一次），返回当前是否启用"""
+        if self.copy_on_write:
+            if enable_copy_on_write():
+                self.logger.info("已启用pandas写时复制，数据缓存读取返回零拷贝视图")
+            else:
+                self.logger.warning("当前pandas版本无法启用写时复制，数据缓存读取使用深拷贝")
+        return copy_on_write_active()
+    
+    def get_pandas_mode_setup(self) -> Optional[callable]:
+        """工作进程初始化时调用的pandas模式设置函数（须可序列化），未配置写时复制时为None"""
+        return enable_copy_on_write if self.copy_on_write else None
+    
+    def get_warm_cache_path(self) -> Optional[str]:
+        """获取持久化预热缓存文件路径 - 子类可以重写此方法，返回None则禁用"""
+        return resolve_warm_cache_path(self.auto_update_config.get('warm_cache_path'))
+    
+    def get_snapshot_store(self) -> Optional[BaseSnapshotStore]:
+        """获取数据文件的列式快照存储 - 子类可以重写此方法，返回None则直接解析CSV"""
+        return create_snapshot_store()
+    
     def _register_routes(self):
         """注册所有路由"""
         # 通用路由
@@ -281,6 +669,7 @@ class BaseStockServer(ABC):
         # SSE路由
         self.app.add_url_rule('/api/dashboard/update', 'update_dashboard', self.update_dashboard, methods=['POST'])
         self.app.add_url_rule('/api/dashboard/updates', 'dashboard_updates', self.dashboard_updates, methods=['GET'])
+        self.app.add_url_rule('/api/dashboard/subscribe', 'update_dashboard_subscription', self.update_dashboard_subscription, methods=['POST'])
         
         # 缓存管理路由
         self.app.add_url_rule('/api/cache/status', 'get_cache_status', self.get_cache_status, methods=['GET'])
@@ -301,6 +690,10 @@ class BaseStockServer(ABC):
         self.app.add_url_rule('/config', 'config_page', self.serve_config_page, methods=['GET'])
         self.app.add_url_rule('/static/<path:filename>', 'static_files', self.serve_static_files, methods=['GET'])
         
+        # 组件数据的条件请求：版本未变化时返回304
+        self.app.before_request(self._check_not_modified)
+        self.app.after_request(self._add_version_header)
+        
         # 允许子类注册自定义路由
         self.register_custom_routes()
         
@@ -313,6 +706,8 @@ class BaseStockServer(ABC):
         import threading
         
         def warmup_startup_cache():
+            # 持久化缓存只读取已编码的字节（和加载器版本），不依赖处理器，立即恢复
+            self._restore_warm_start_cache()
             time.sleep(5)  # 增加等待时间，确保所有初始化完成
             self._warmup_startup_cache()
         
@@ -346,14 +741,9 @@ class BaseStockServer(ABC):
                 self.logger.info("没有配置启动缓存端点")
                 return
             
-            for endpoint_config in startup_endpoints:
-                try:
-                    self._warmup_single_endpoint(endpoint_config)
-                except Exception as e:
-                    self.logger.warning(f"预热端点失败 {endpoint_config.get('endpoint', 'unknown')}: {e}")
-            
-            stats = self.startup_cache.get_startup_cache_stats()
-            self.logger.info(f"🚀 启动缓存预热完成: {stats['cached_endpoints']} 个端点")
+            # 先加载共用输入，再按优先级并行预热各端点
+            self.warmup_scheduler.run(startup_endpoints, self._warmup_and_persist_endpoint,
+                                      self.get_warmup_shared_inputs(startup_endpoints))
             
         except Exception as e:
             self.logger.error(f"启动缓存预热失败: {e}")
@@ -383,6 +773,9 @@ class BaseStockServer(ABC):
                             endpoint_config = {
                                 'endpoint': api_path,
                                 'params': cache_config.get('params'),
+                                'source_data_keys': [key for key in getattr(component_config, 'source_data_keys', []) if key],
+                                'source_loaders': cache_config.get('source_loaders', []),
+                                'priority': cache_config.get('priority', DEFAULT_PRIORITY),
                                 'description': f"{component_id} - {getattr(component_config, 'title', '未知组件')}"
                             }
                             startup_endpoints.append(endpoint_config)
@@ -402,6 +795,109 @@ class BaseStockServer(ABC):
             self.logger.warning(f"获取启动缓存端点配置失败: {e}")
             return []
     
+    def get_warmup_shared_inputs(self, endpoint_configs: list) -> Dict[str, callable]:
+        """
+        获取预热时多个端点共用的输入数据加载函数 {名称: 加载函数}，在端点预热之前并行加载
+        默认加载端点声明的源数据键。子类可以重写此方法添加其他共用数据
+        """
+        keys = sorted({key for config in endpoint_configs for key in config.get('source_data_keys', [])})
+        return {f"data_cache:{key}": (lambda key=key: self.data_cache.load_data(key)) for key in keys}
+    
+    def _warmup_and_persist_endpoint(self, endpoint_config: dict) -> Optional[str]:
+        """预热单个端点并写入持久化缓存，已缓存（如从持久化缓存恢复）的端点跳过"""
+        if self.startup_cache.is_startup_cached(endpoint_config['endpoint']):
+            return SKIPPED
+        fingerprint = self.get_warm_start_fingerprint(endpoint_config)
+        if not self._warmup_single_endpoint(endpoint_config):
+            raise RuntimeError("端点预热请求失败")
+        if fingerprint is not None:
+            self._persist_warm_endpoint(endpoint_config, fingerprint)
+        return None
+    
+    def get_param_cache_version(self, source_data_keys: Optional[List[str]] = None) -> str:
+        """参数化结果缓存的源数据版本：声明了源数据键时为数据指纹，否则为当前交易日（配合TTL失效）"""
+        keys = [key for key in (source_data_keys or []) if key]
+        if keys:
+            source_data = {'fingerprints': self.data_cache.get_fingerprints(keys)}
+        else:
+            source_data = {'trade_date': datetime.now().strftime('%Y-%m-%d')}
+        return self.response_cache._calculate_data_hash(source_data)
+    
+    def get_warm_start_fingerprint(self, endpoint_config: dict) -> Optional[str]:
+        """
+        持久化缓存的源数据指纹：依赖的数据文件(mtime, 大小) + 加载器版本 + 交易日 + 参数
+        端点须在缓存配置中声明输入（source_data_keys 数据文件、source_loaders 加载器类名），
+        未声明输入或加载器无法计算版本时返回None，该端点不持久化（重启后重新计算）
+        """
+        keys = endpoint_config.get('source_data_keys') or []
+        loader_names = endpoint_config.get('source_loaders') or []
+        if not keys and not loader_names:
+            return None
+        loaders = self.get_warm_start_loaders()
+        loader_versions = {}
+        for name in sorted(loader_names):
+            version = self.get_loader_version(loaders[name]) if name in loaders else None
+            if version is None:
+                return None
+            loader_versions[name] = version
+        source_data = {
+            'endpoint': endpoint_config['endpoint'],
+            'params': endpoint_config.get('params'),
+            'trade_date': datetime.now().strftime('%Y-%m-%d'),
+            'files': {key: self.data_cache.get_file_stat(key) for key in sorted(keys)},
+            'loaders': loader_versions
+        }
+        return self.response_cache._calculate_data_hash(source_data)
+    
+    def get_warm_start_loaders(self) -> Dict[str, type]:
+        """
+        可以计算版本的 stock_data 日线类加载器 {类名: 类}，供端点的 source_loaders 引用
+        子类可以重写此方法，未列出的加载器视为无法计算版本
+        """
+        return {}
+    
+    def get_loader_version(self, loader_cls: type) -> Optional[List]:
+        """
+        加载器数据的版本：最近 LOADER_VERSION_DAYS 天内的最新交易日和行数（经数据访问层查询）
+        新交易日入库或近期数据补录时版本变化，查询失败或没有交易日列时返回None
+        """
+        start_date = (datetime.now() - timedelta(days=LOADER_VERSION_DAYS)).strftime('%Y%m%d')
+        try:
+            frame = self.data_access.get_daily_data(loader_cls, start_date=start_date)
+        except Exception as e:
+            self.logger.warning(f"获取加载器版本失败 {loader_cls.__name__}: {e}")
+            return None
+        if 'trade_date' not in frame.columns:
+            return None
+        latest = frame['trade_date'].max() if len(frame) else None
+        return [None if latest is None or pd.isna(latest) else str(latest), len(frame)]
+    
+    def _restore_warm_start_cache(self) -> int:
+        """从持久化缓存恢复指纹仍然一致的启动缓存端点，返回恢复的数量"""
+        if not self.warm_cache.enabled:
+            return 0
+        restored = 0
+        for endpoint_config in self._get_startup_cache_endpoints():
+            endpoint = endpoint_config['endpoint']
+            if self.startup_cache.is_startup_cached(endpoint):
+                continue
+            fingerprint = self.get_warm_start_fingerprint(endpoint_config)
+            if fingerprint is None:
+                continue
+            payload = self.warm_cache.load(endpoint, endpoint_config.get('params'), fingerprint)
+            if payload is not None:
+                self.startup_cache.restore_startup_cache(endpoint, None, payload)
+                restored += 1
+        if restored:
+            self.logger.info(f"♻️ 从持久化缓存恢复 {restored} 个启动缓存端点")
+        return restored
+    
+    def _persist_warm_endpoint(self, endpoint_config: dict, fingerprint: str):
+        """将预热完成的端点写入持久化缓存（指纹在计算前获取，计算期间数据变化时下次重启会重新计算）"""
+        payload = self.startup_cache.get_payload(endpoint_config['endpoint'])
+        if payload is not None:
+            self.warm_cache.save(endpoint_config['endpoint'], endpoint_config.get('params'), fingerprint, payload)
+    
     def get_default_startup_cache_endpoints(self) -> list:
         """
         获取默认的启动缓存端点配置
@@ -409,8 +905,8 @@ class BaseStockServer(ABC):
         """
         return []
     
-    def _warmup_single_endpoint(self, endpoint_config: dict):
-        """预热单个端点"""
+    def _warmup_single_endpoint(self, endpoint_config: dict) -> bool:
+        """预热单个端点，返回是否成功"""
         endpoint = endpoint_config['endpoint']
         params = endpoint_config.get('params')
         
@@ -419,7 +915,7 @@ class BaseStockServer(ABC):
         # 检查处理器管理器是否已初始化
         if hasattr(self, 'processor_manager') and self.processor_manager is None:
             self.logger.warning(f"处理器管理器尚未初始化，跳过预热: {endpoint}")
-            return
+            return False
         
         # 模拟请求以触发缓存
         with self.app.test_client() as client:
@@ -433,8 +929,9 @@ class BaseStockServer(ABC):
             response = client.get(url)
             if response.status_code == 200:
                 self.logger.info(f"✅ 预热成功: {endpoint}")
-            else:
-                self.logger.warning(f"❌ 预热失败: {endpoint} - {response.status_code}")
+                return True
+            self.logger.warning(f"❌ 预热失败: {endpoint} - {response.status_code}")
+            return False
     
     def register_custom_routes(self):
         """子类可以重写此方法注册自定义路由"""
@@ -479,7 +976,8 @@ class BaseStockServer(ABC):
     
     def with_cache_protection(self, endpoint: str, handler_func: callable, 
                              source_data_func: Optional[callable] = None,
-                             params_extractor: Optional[callable] = None):
+                             params_extractor: Optional[callable] = None,
+                             stale_while_revalidate: Optional[bool] = None):
         """
         通用的缓存保护装饰器方法
         
@@ -488,7 +986,11 @@ class BaseStockServer(ABC):
             handler_func: 实际的处理函数
             source_data_func: 获取源数据的函数（用于哈希比较）
             params_extractor: 从request中提取参数的函数
+            stale_while_revalidate: 源数据变化时先返回上一份响应并在后台重新计算，默认使用服务器配置
         """
+        if stale_while_revalidate is None:
+            stale_while_revalidate = self.stale_while_revalidate
+        
         def wrapper(*args, **kwargs):
             try:
                 # 提取参数
@@ -496,9 +998,9 @@ class BaseStockServer(ABC):
                 if params_extractor:
                     params = params_extractor()
                 else:
-                    # 默认参数提取
+                    # 默认参数提取（规范化为影响结果的参数）
                     if hasattr(request, 'args'):
-                        params = dict(request.args)
+                        params = self.response_cache.canonical_params(endpoint, dict(request.args))
                 
                 # 获取源数据
                 source_data = None
@@ -514,14 +1016,22 @@ class BaseStockServer(ABC):
                     self.logger.info(f"使用缓存响应: {endpoint}")
                     return cached_response
                 
-                # 执行实际处理
+                cache_key = self.response_cache._generate_cache_key(endpoint, params)
+                if stale_while_revalidate:
+                    stale_response = self.response_cache.get_stale_response(endpoint, params)
+                    if stale_response is not None:
+                        self._revalidate_in_background(cache_key, endpoint, params, source_data,
+                                                       handler_func, *args, **kwargs)
+                        return stale_response
+                
+                # 执行实际处理（相同缓存键的并发请求只计算一次，共享已编码的结果）
                 self.logger.info(f"执行数据处理: {endpoint}")
-                response_data = handler_func(*args, **kwargs)
+                shared = self.coalesce(cache_key, handler_func, *args, **kwargs)
                 
                 # 存储到缓存
-                self.response_cache.store_response(endpoint, params, source_data, response_data)
+                self.response_cache.store_response(endpoint, params, source_data, shared)
                 
-                return response_data
+                return self.respond(shared)
                 
             except Exception as e:
                 self.logger.error(f"缓存保护装饰器失败 {endpoint}: {e}")
@@ -530,14 +1040,135 @@ class BaseStockServer(ABC):
         
         return wrapper
     
+    def coalesce(self, key: str, func: callable, *args, **kwargs):
+        """
+        相同键的并发请求只计算一次，返回可共享的结果（EncodedPayload 或原始返回值）
+        领头请求在不带 Accept-Encoding / If-None-Match 的请求上下文中执行，结果不依赖某个请求的请求头；
+        每个请求再用 respond() 构建自己的响应对象
+        """
+        return self.single_flight.do(key, self._compute_shareable, func, *args, **kwargs)
+    
+    def _compute_shareable(self, func: callable, *args, **kwargs):
+        if has_request_context():
+            request_spec = {'path': request.path, 'method': request.method,
+                            'environ_overrides': {'QUERY_STRING': request.environ.get('QUERY_STRING', '')},
+                            'data': request.get_data(), 'content_type': request.content_type}
+            with self.app.test_request_context(**request_spec):
+                return EncodedPayload.shareable(func(*args, **kwargs))
+        return EncodedPayload.shareable(func(*args, **kwargs))
+    
+    @staticmethod
+    def respond(shared):
+        """为当前请求构建新的响应对象（按其 Accept-Encoding / If-None-Match）"""
+        return shared.to_response() if isinstance(shared, EncodedPayload) else shared
+    
+    def _revalidate_in_background(self, cache_key: str, endpoint: str, params: Optional[Dict],
+                                  source_data: Any, handler_func: callable, *args, **kwargs):
+        """在后台线程中重新计算并更新响应缓存，相同缓存键同时只有一个任务"""
+        request_spec = ({'path': request.path,
+                         'environ_overrides': {'QUERY_STRING': request.environ.get('QUERY_STRING', '')}}
+                        if has_request_context() else {})
+        
+        def revalidate():
+            with self.app.test_request_context(**request_spec):
+                shared = self.coalesce(cache_key, handler_func, *args, **kwargs)
+                self.response_cache.store_response(endpoint, params, source_data, shared)
+        
+        self.logger.info(f"♻️ 返回过期缓存并在后台重新计算: {endpoint}")
+        self.revalidator.submit(cache_key, revalidate)
+    
+    # === 组件数据版本 ===
+    
+    def _get_versioned_component(self, api_path: str):
+        """获取可计算版本的组件配置：声明了源数据键或源数据逻辑的组件"""
+        if self._versioned_components is None:
+            component_manager = getattr(self, 'component_manager', None)
+            if component_manager is None:
+                return None
+            self._versioned_components = {
+                comp_config.api_path: comp_config
+                for comp_config in component_manager.components.values()
+                if comp_config.api_path and (any(comp_config.source_data_keys) or comp_config.source_data_logic)
+            }
+        return self._versioned_components.get(api_path)
+    
+    def get_component_version(self, api_path: str, params: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        计算组件数据版本：与响应缓存相同的源数据哈希，只读取数据文件元信息
+        
+        Returns:
+            版本号，组件没有声明源数据时返回None（无法判断内容是否变化）
+        """
+        if self._get_versioned_component(api_path) is None:
+            return None
+        try:
+            params = self.response_cache.canonical_params(api_path, params)
+            source_data = self.component_manager.get_source_data_logic(api_path, params)
+            return self.response_cache._calculate_data_hash(source_data) if source_data else None
+        except Exception as e:
+            self.logger.warning(f"计算组件数据版本失败 {api_path}: {e}")
+            return None
+    
+    def get_component_version_by_id(self, component_id: str) -> Optional[str]:
+        """按组件ID计算默认参数（前端只携带 componentId）下的数据版本"""
+        component_manager = getattr(self, 'component_manager', None)
+        comp_config = component_manager.components.get(component_id) if component_manager else None
+        if comp_config is None:
+            return None
+        return self.get_component_version(comp_config.api_path, {'componentId': component_id})
+    
+    def _check_not_modified(self):
+        """请求携带的 If-None-Match 与当前数据版本一致时直接返回304，不执行处理器"""
+        if request.method != 'GET' or self._get_versioned_component(request.path) is None:
+            return None
+        version = self.get_component_version(request.path, request.args.to_dict())
+        g.component_version = version
+        if version and version in request.if_none_match:
+            self.version_stats['not_modified'] += 1
+            response = Response(status=304)
+            response.set_etag(version)
+            return response
+        return None
+    
+    def _add_version_header(self, response):
+        """为组件数据响应添加ETag，过期响应（后台重新计算中）不带数据版本"""
+        version = g.pop('component_version', None)
+        if (version and response.status_code == 200 and 'Warning' not in response.headers
+                and not self._is_error_payload(response)):
+            response.set_etag(version)
+            self.version_stats['versioned'] += 1
+        return response
+    
+    @staticmethod
+    def _is_error_payload(response) -> bool:
+        """处理器以200返回的错误信息（{"error": ...}）不应被客户端按版本缓存"""
+        if response.is_streamed or (response.content_length or 0) > 4096:
+            return False
+        return b'"error"' in response.get_data()
+    
     def get_cache_status(self):
         """获取缓存状态信息"""
         try:
             cache_stats = self.response_cache.get_cache_stats()
             data_cache_info = {
                 "data_cache_size": len(self.data_cache.cache),
-                "data_timestamps": len(self.data_cache.timestamps)
+                "data_timestamps": len(self.data_cache.timestamps),
+                "snapshot": self.data_cache.get_snapshot_stats(),
+                "incremental": self.data_cache.tail_stats,
+                "indexes": {**self.data_cache.index_stats, "keys": sorted(self.data_cache.indexes)}
             }
+            cache_stats["single_flight"] = self.single_flight.get_stats()
+            cache_stats["sse"] = self.sse_hub.get_stats()
+            cache_stats["versions"] = dict(self.version_stats)
+            cache_stats["param_cache"] = self.param_cache.get_stats()
+            cache_stats["revalidation"] = self.revalidator.get_stats()
+            data_cache_info["data_access"] = self.data_access.get_stats()
+            data_cache_info["daily_panels"] = self.daily_panels.get_stats()
+            data_cache_info["sector_index"] = self.sector_index.get_stats()
+            data_cache_info["minute_cube"] = self.minute_cube.get_stats()
+            processor_manager = getattr(self, 'processor_manager', None)
+            if hasattr(processor_manager, 'get_process_pool_stats'):
+                cache_stats["process_pool"] = processor_manager.get_process_pool_stats()
             
             return jsonify({
                 "status": "success",
@@ -563,7 +1194,14 @@ class BaseStockServer(ABC):
             data_initial_size = len(self.data_cache.cache)
             self.data_cache.clear_cache()
             
-            message = f"缓存已清理，移除响应缓存 {response_initial_size} 个条目，数据缓存 {data_initial_size} 个条目"
+            # 清理参数化结果缓存、数据访问层记忆的数据、日线面板和分钟立方体
+            param_initial_size = self.param_cache.clear()
+            self.data_access.invalidate()
+            self.daily_panels.invalidate()
+            self.minute_cube.invalidate()
+            
+            message = (f"缓存已清理，移除响应缓存 {response_initial_size} 个条目，数据缓存 {data_initial_size} 个条目，"
+                       f"参数化缓存 {param_initial_size} 个条目")
             self.logger.info(message)
             return jsonify({
                 "status": "success", 
@@ -585,6 +1223,8 @@ class BaseStockServer(ABC):
                 }), 404
             
             stats = self.startup_cache.get_startup_cache_stats()
+            stats['warm_cache'] = self.warm_cache.get_stats()
+            stats['warmup'] = self.warmup_scheduler.get_progress()
             return jsonify({
                 "status": "success",
                 "data": stats,
@@ -607,7 +1247,9 @@ class BaseStockServer(ABC):
                 }), 404
             
             cleared_count = self.startup_cache.clear_startup_cache()
-            message = f"已清除 {cleared_count} 个启动缓存项"
+            # 同时清除持久化条目，避免重启后恢复旧数据
+            persisted_count = self.warm_cache.clear()
+            message = f"已清除 {cleared_count} 个启动缓存项，{persisted_count} 个持久化缓存项"
             self.logger.info(message)
             
             return jsonify({
@@ -729,20 +1371,19 @@ class BaseStockServer(ABC):
             self.logger.error(f"切换自动更新状态失败: {e}")
             return jsonify({"error": str(e)}), 500
     
+    @property
+    def sse_clients(self):
+        """当前SSE订阅者列表（副本）"""
+        return self.sse_hub.subscribers()
+    
     def _cleanup_sse_clients(self):
         """清理无效的SSE客户端连接"""
         try:
-            initial_count = len(self.sse_clients)
-            # 这里可以添加更复杂的客户端有效性检查逻辑
-            # 目前简单地假设所有客户端都有效，但在实际应用中可能需要ping检查
-            
-            # 如果客户端数量过多，移除一些较旧的连接
-            if len(self.sse_clients) > self.auto_update_config['max_clients']:
-                remove_count = len(self.sse_clients) - self.auto_update_config['max_clients']
-                self.sse_clients = self.sse_clients[remove_count:]
+            # 如果客户端数量过多，关闭最早连接的订阅者，其事件流随之结束
+            remove_count = self.sse_hub.trim_subscribers(self.auto_update_config['max_clients'])
+            if remove_count:
                 self.logger.info(f"清理了 {remove_count} 个SSE客户端连接")
-            
-            return initial_count - len(self.sse_clients)
+            return remove_count
         except Exception as e:
             self.logger.error(f"清理SSE客户端失败: {e}")
             return 0
@@ -1032,22 +1673,15 @@ class BaseStockServer(ABC):
     # === SSE相关方法 ===
     
     def send_update_to_clients(self, data: Dict[str, Any]):
-        """向所有客户端发送更新"""
-        message = f"data: {json.dumps(data)}\n\n"
-        clients_to_remove = []
-        
-        for client in list(self.sse_clients):
-            try:
-                client.put(message)
-            except Exception as e:
-                self.logger.error(f"发送更新失败: {e}")
-                clients_to_remove.append(client)
-        
-        for client in clients_to_remove:
-            try:
-                self.sse_clients.remove(client)
-            except ValueError:
-                pass
+        """向所有客户端发送更新（只序列化一次）"""
+        try:
+            self.sse_hub.publish(data)
+        except Exception as e:
+            self.logger.error(f"发送更新失败: {e}")
+    
+    def _send_update_to_clients(self, data: Dict[str, Any]):
+        """发送更新到所有SSE客户端（兼容子类调用）"""
+        self.send_update_to_clients(data)
     
     def update_dashboard(self):
         """接收仪表盘更新请求"""
@@ -1072,32 +1706,93 @@ class BaseStockServer(ABC):
             self.logger.error(f"处理更新请求失败: {e}")
             return jsonify({"error": str(e)}), 500
     
+    @staticmethod
+    def _parse_component_ids(value) -> List[str]:
+        """解析组件ID列表，支持逗号分隔的字符串或列表"""
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.split(',')
+        return [str(item).strip() for item in value if str(item).strip()]
+    
+    def update_dashboard_subscription(self):
+        """修改SSE连接订阅的组件 {client_id, components, mode: set|add|remove}"""
+        try:
+            data = request.json or {}
+            client_id = data.get('client_id')
+            mode = data.get('mode', 'set')
+            if not client_id:
+                return jsonify({"error": "缺少 client_id"}), 400
+            if mode not in ('set', 'add', 'remove'):
+                return jsonify({"error": f"不支持的订阅模式: {mode}"}), 400
+            
+            subscriber = self.sse_hub.update_subscription(
+                client_id, self._parse_component_ids(data.get('components')), mode)
+            if subscriber is None:
+                return jsonify({"error": f"SSE客户端不存在: {client_id}"}), 404
+            
+            components = sorted(subscriber.components) if subscriber.components is not None else None
+            self.logger.info(f"SSE客户端订阅更新: {client_id} -> {components or '全部组件'}")
+            return jsonify({"status": "success", "client_id": client_id, "components": components})
+            
+        except Exception as e:
+            self.logger.error(f"更新SSE订阅失败: {e}")
+            return jsonify({"error": str(e)}), 500
+    
     def dashboard_updates(self):
-        """SSE端点，向前端推送实时更新"""
+        """SSE端点，向前端推送实时更新，支持 Last-Event-ID 断线续传和 ?components= 按组件订阅"""
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+        components = self._parse_component_ids(request.args.get('components'))
+        heartbeat_interval = self.auto_update_config.get('heartbeat_interval', 30)
+        
         def event_stream():
-            client_queue = queue.Queue()
-            self.sse_clients.append(client_queue)
+            subscriber = self.sse_hub.subscribe(last_event_id, components=components)
+            client_id = subscriber.client_id
+            self.logger.info(f"SSE客户端连接: {client_id}，订阅组件: {components or '全部'}，"
+                             f"当前总连接数: {self.sse_hub.subscriber_count()}")
             
             try:
-                if self.latest_update["componentId"]:
-                    yield f"data: {json.dumps(self.latest_update)}\n\n"
+                yield encode_sse({
+                    "type": "connection_established",
+                    "client_id": client_id,
+                    "components": components or None,
+                    "timestamp": time.time(),
+                    "server_status": "online"
+                })
                 
-                while True:
-                    try:
-                        message = client_queue.get(block=True, timeout=30)
-                        yield message
-                    except queue.Empty:
-                        yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': int(time.time() * 1000)})}\n\n"
+                while not subscriber.closed:
+                    messages = self.sse_hub.wait(subscriber, timeout=heartbeat_interval)
+                    if messages:
+                        yield ''.join(messages)
+                    elif not subscriber.closed:
+                        yield encode_sse({
+                            "type": "heartbeat",
+                            "client_id": client_id,
+                            "timestamp": time.time(),
+                            "server_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                            "active_connections": self.sse_hub.subscriber_count()
+                        })
                         
+            except GeneratorExit:
+                self.logger.info(f"SSE客户端主动断开: {client_id}")
             except Exception as e:
-                self.logger.error(f"SSE连接错误: {e}")
+                self.logger.error(f"SSE连接错误 {client_id}: {e}")
             finally:
-                try:
-                    self.sse_clients.remove(client_queue)
-                except ValueError:
-                    pass
+                self.sse_hub.unsubscribe(subscriber)
+                self.logger.info(f"SSE客户端清理: {client_id}，剩余连接数: {self.sse_hub.subscriber_count()}")
         
-        return Response(event_stream(), mimetype='text/event-stream')
+        response = Response(event_stream(), mimetype='text/event-stream')
+        response.headers.update({
+            'Cache-Control': 'no-cache, no-store, must-revalidate',
+            'Pragma': 'no-cache',
+            'Expires': '0',
+            'X-Accel-Buffering': 'no',
+            'Connection': 'keep-alive',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Cache-Control, Last-Event-ID',
+            'Keep-Alive': 'timeout=30, max=1000'
+        })
+        return response
     
     def health_check(self):
         """健康检查端点"""
@@ -1126,6 +1821,7 @@ class BaseStockServer(ABC):
                 "table-data": "/api/table-data/<data_type>",
                 "chart-data": "/api/chart-data/<chart_type>",
                 "dashboard-updates": "/api/dashboard/updates",
+                "dashboard-subscribe": "/api/dashboard/subscribe",
                 "health": "/health"
             }
         })
@@ -1164,6 +1860,13 @@ class BaseStockServer(ABC):
                     self.logger.warning("自动更新组件列表为空")
                     continue
                 
+                # 只更新至少有一个客户端订阅的组件
+                interested = self.sse_hub.interested_components()
+                if interested is not None:
+                    components = [comp_id for comp_id in components if comp_id in interested]
+                    if not components:
+                        continue
+                
                 # 根据配置选择组件
                 if self.auto_update_config['random_selection']:
                     selected_component = random.choice(components)
@@ -1176,6 +1879,8 @@ class BaseStockServer(ABC):
                 update_data = {
                     "componentId": selected_component,
                     "params": {"auto_refresh": True},
+                    # 数据版本未变化时前端无需重新请求
+                    "version": self.get_component_version_by_id(selected_component),
                     "timestamp": int(time.time() * 1000),
                     "type": "auto_update",
                     "server_config": {
@@ -1207,9 +1912,23 @@ class BaseStockServer(ABC):
                 continue
         raise RuntimeError("无法找到可用端口")
     
-    def run(self, debug: bool = True, host: str = '0.0.0.0'):
-        """启动服务器"""
-        self.logger.info(f"启动{self.name}，端口: {self.port}")
+    def run(self, debug: bool = True, host: str = '0.0.0.0', serve_mode: str = DEV_MODE):
+        """
+        启动服务器
+        
+        Args:
+            debug: 是否开启调试模式（生产模式下忽略）
+            host: 监听地址
+            serve_mode: 运行模式，dev 使用Flask多线程开发服务器，production 使用gevent协程服务器
+        """
+        self.logger.info(f"启动{self.name}，端口: {self.port}，运行模式: {serve_mode}")
+        self.apply_pandas_mode()
+        self.serve_mode = serve_mode
+        if serve_mode == PRODUCTION_MODE:
+            debug = False
+            # 协程模式下SSE连接不再占用线程，放宽客户端数限制
+            self.auto_update_config['max_clients'] = max(self.auto_update_config['max_clients'],
+                                                         PRODUCTION_MAX_CLIENTS)
         
         try:
             # 检查端口是否可用
@@ -1231,6 +1950,10 @@ class BaseStockServer(ABC):
                 PROPAGATE_EXCEPTIONS=True
             )
             
+            # 生产模式：gevent协程WSGI服务器，未安装gevent时回退到多线程服务器
+            if serve_mode == PRODUCTION_MODE and run_production_server(self.app, host, self.port, self.logger):
+                return
+            
             # 启动服务器
             self.app.run(
                 debug=debug, 
@@ -1258,9 +1981,11 @@ def parse_command_line_args() -> int:
     """解析命令行参数获取端口"""
     port = 5004  # 默认端口
     
-    if len(sys.argv) > 1:
+    # 跳过 --production 等选项参数
+    positional_args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if positional_args:
         try:
-            port = int(sys.argv[1])
+            port = int(positional_args[0])
         except ValueError:
             print("❌ 端口参数必须是数字")
             sys.exit(1)
@@ -0,0 +1,147 @@
+"""
+缓存参数规范化 - 按组件声明的相关参数生成规范的缓存参数，所有缓存键只由这些参数决定
+Author: data_panel开发团队
+Date: 2025-08-12
+
+请求中的防缓存时间戳、componentId、自动刷新标记以及参数顺序都会让同一份结果产生不同的缓存键。
+组件在 components_config.json 中声明影响输出的参数及类型、默认值:
+    "params": {
+        "sector": "str",
+        "startDate": {"type": "date", "default": "2025-07-01"},
+        "endDate": "date"
+    }
+声明了参数的端点只按这些参数（类型转换、填充默认值后）生成缓存键；
+未声明的端点沿用全部请求参数，只去掉 VOLATILE_PARAMS。
+
+支持的类型: str（去除首尾空白）、date（统一为YYYYMMDD）、int、float、bool
+"""
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional
+
+# 不影响响应内容的请求参数（防缓存时间戳、自动刷新标记）
+VOLATILE_PARAMS = ('_t', '_refresh', 'auto_refresh')
+
+DATE_FORMATS = ('%Y%m%d', '%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S')
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def normalize_date(value: Any) -> str:
+    """日期统一为YYYYMMDD，无法解析时抛出ValueError"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y%m%d')
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y%m%d')
+        except ValueError:
+            continue
+    raise ValueError(f"无法解析日期: {value}")
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"无法解析布尔值: {value}")
+
+
+PARAM_TYPES: Dict[str, Callable[[Any], Any]] = {
+    'str': lambda value: str(value).strip(),
+    'date': normalize_date,
+    'int': lambda value: int(str(value).strip()),
+    'float': lambda value: float(str(value).strip()),
+    'bool': _to_bool,
+}
+
+
+def parse_param_schema(raw: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    解析组件的参数声明，返回 {参数名: {'type': 类型, 'default': 默认值}}
+
+    支持 {"sector": "str", "startDate": {"type": "date", "default": "2025-07-01"}} 或参数名列表
+    """
+    if isinstance(raw, (list, tuple)):
+        raw = {name: 'str' for name in raw}
+    schema = {}
+    for name, spec in (raw or {}).items():
+        if not isinstance(spec, dict):
+            spec = {'type': spec or 'str'}
+        param_type = spec.get('type', 'str')
+        if param_type not in PARAM_TYPES:
+            raise ValueError(f"参数 {name} 的类型 {param_type} 不受支持，可选: {', '.join(PARAM_TYPES)}")
+        schema[name] = {'type': param_type, 'default': spec.get('default')}
+    return schema
+
+
+def coerce_param(spec: Dict[str, Any], value: Any) -> Any:
+    """按声明转换参数值，缺失或为空时使用默认值，转换失败时保留去除空白后的原值"""
+    if isinstance(value, str) and not value.strip():
+        value = None
+    if value is None:
+        value = spec.get('default')
+    if value is None:
+        return None
+    try:
+        return PARAM_TYPES[spec['type']](value)
+    except (TypeError, ValueError):
+        return str(value).strip()
+
+
+class CacheParamNormalizer:
+    """按端点声明的参数规范化缓存参数"""
+
+    def __init__(self, schemas: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+                 components_loader: Optional[Callable[[], Optional[Dict[str, Any]]]] = None):
+        """
+        Args:
+            schemas: {端点: 参数声明}
+            components_loader: 返回组件配置字典的函数，首次使用时从组件的 params 配置构建参数声明
+        """
+        self._schemas = schemas
+        self._components_loader = components_loader
+
+    @staticmethod
+    def schemas_from_components(components: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """从组件配置收集参数声明，多个组件共用端点时取第一个声明"""
+        schemas = {}
+        for comp_config in components.values():
+            api_path = getattr(comp_config, 'api_path', '')
+            raw = getattr(comp_config, 'extra_config', {}).get('params')
+            if api_path and raw is not None and api_path not in schemas:
+                schemas[api_path] = parse_param_schema(raw)
+        return schemas
+
+    @property
+    def schemas(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        if self._schemas is None:
+            components = self._components_loader() if self._components_loader else {}
+            if components is None:
+                # 组件配置尚未加载，下次再读取
+                return {}
+            self._schemas = self.schemas_from_components(components)
+        return self._schemas
+
+    def get_schema(self, endpoint: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self.schemas.get(endpoint)
+
+    def normalize(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """返回规范的缓存参数：声明了参数的端点只保留声明的参数（值为None的省略）"""
+        params = params or {}
+        schema = self.get_schema(endpoint)
+        if schema is None:
+            return {name: value for name, value in params.items() if name not in VOLATILE_PARAMS}
+        canonical = {}
+        for name, spec in schema.items():
+            value = coerce_param(spec, params.get(name))
+            if value is not None:
+                canonical[name] = value
+        return canonical
+
+    def __getstate__(self):
+        # 传给工作进程时只保留已解析的参数声明
+        return {'_schemas': self.schemas, '_components_loader': None}
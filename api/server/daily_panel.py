@@ -0,0 +1,330 @@
+"""
+日线面板 - 股票×交易日的二维数组，按股票的窗口运算变为沿日期轴的向量化运算
+Author: data_panel开发团队
+Date: 2025-08-12
+
+复盘端点在长表上反复执行 groupby('id')['change'].cumsum()、.shift(-1)、.diff(5) 等按股票的窗口运算，
+日期范围筛选也是对整表的布尔扫描。StockPanel 把长表转换为:
+- 行为股票id（id→行号索引），列为排序后的交易日（日期索引，范围筛选用 searchsorted 切片）
+- 每个字段一个二维数组（数值字段为float，文本字段为object），present 标记有数据的单元格
+shift / diff / rolling 只在每只股票有数据的单元格之间移动，与 groupby('id') 的结果一致。
+
+DailyPanelStore 在数据访问层之上为每个加载器维护一个面板，按需补充更早的日期、新的字段，
+并定期从最后一个交易日开始增量扩展。每个加载器一把锁，读取数据期间不阻塞其他加载器的面板。
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from cache_params import normalize_date
+
+# 从数据源扩展最新交易日的最小间隔（秒）
+DEFAULT_PANEL_REFRESH_INTERVAL = 60.0
+
+
+def _day_before(date_key: str) -> str:
+    return (pd.Timestamp(date_key) - pd.Timedelta(days=1)).strftime('%Y%m%d')
+
+
+class StockPanel:
+    """股票×交易日的二维数组面板"""
+
+    def __init__(self, id_col: str = 'id', date_col: str = 'trade_date'):
+        self.id_col = id_col
+        self.date_col = date_col
+        self.ids: List[Any] = []
+        self._row_of: Dict[Any, int] = {}
+        self.dates = pd.DatetimeIndex([])
+        self.values: Dict[str, np.ndarray] = {}
+        self.present = np.zeros((0, 0), dtype=bool)
+
+    # ===== 构建 =====
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, fields: Sequence[str], id_col: str = 'id',
+                   date_col: str = 'trade_date') -> 'StockPanel':
+        """从长表构建面板，date_col 也可以是分钟时间列"""
+        panel = cls(id_col, date_col)
+        panel.extend(frame, fields)
+        return panel
+
+    def extend(self, frame: pd.DataFrame, fields: Sequence[str]) -> int:
+        """
+        写入长表数据，加入新的日期列和股票行，相同 (股票, 日期) 的单元格被覆盖，返回写入的行数
+
+        Args:
+            frame: 含 id_col、date_col 和字段列的长表
+            fields: 写入的字段，面板中还没有的字段新建
+        """
+        if frame is None or frame.empty:
+            return 0
+        dates = frame[self.date_col]
+        if pd.api.types.is_integer_dtype(dates):
+            # 20250701 形式的整数日期
+            dates = dates.astype(str)
+        dates = pd.to_datetime(dates, errors='coerce', format='mixed')
+        keep = dates.notna().to_numpy()
+        frame, dates = frame[keep], pd.DatetimeIndex(dates[keep])
+        self._add_dates(dates.unique())
+        self._add_ids(pd.unique(frame[self.id_col]))
+
+        rows = np.fromiter((self._row_of[stock_id] for stock_id in frame[self.id_col].tolist()),
+                           dtype=np.int64, count=len(frame))
+        cols = self.dates.get_indexer(dates)
+        for field in fields:
+            if field not in frame.columns:
+                continue
+            column = frame[field]
+            if field not in self.values:
+                kind = float if pd.api.types.is_numeric_dtype(column) else object
+                self.values[field] = np.full(self.present.shape, np.nan if kind is float else None, dtype=kind)
+            target = self.values[field]
+            target[rows, cols] = (pd.to_numeric(column, errors='coerce').to_numpy(float)
+                                  if target.dtype.kind == 'f' else column.to_numpy(object))
+        self.present[rows, cols] = True
+        return len(frame)
+
+    def _add_dates(self, dates: pd.DatetimeIndex):
+        new = dates.difference(self.dates)
+        if not len(new):
+            return
+        merged = self.dates.union(new).sort_values()
+        old_positions = merged.get_indexer(self.dates)
+        for field, array in list(self.values.items()):
+            grown = np.full((array.shape[0], len(merged)), np.nan if array.dtype.kind == 'f' else None,
+                            dtype=array.dtype)
+            grown[:, old_positions] = array
+            self.values[field] = grown
+        present = np.zeros((self.present.shape[0], len(merged)), dtype=bool)
+        present[:, old_positions] = self.present
+        self.present = present
+        self.dates = merged
+
+    def _add_ids(self, ids: Iterable[Any]):
+        new = [stock_id for stock_id in ids if stock_id not in self._row_of]
+        if not new:
+            return
+        for stock_id in new:
+            self._row_of[stock_id] = len(self.ids)
+            self.ids.append(stock_id)
+        shape = (len(new), len(self.dates))
+        for field, array in list(self.values.items()):
+            fill = np.full(shape, np.nan if array.dtype.kind == 'f' else None, dtype=array.dtype)
+            self.values[field] = np.vstack([array, fill])
+        self.present = np.vstack([self.present, np.zeros(shape, dtype=bool)])
+
+    # ===== 切片 =====
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.values)
+
+    @property
+    def shape(self):
+        return self.present.shape
+
+    def rows_of(self, stock_ids: Iterable[Any]) -> np.ndarray:
+        """股票id对应的行号（按给定顺序，面板中没有的忽略）"""
+        return np.array([self._row_of[s] for s in dict.fromkeys(stock_ids) if s in self._row_of], dtype=np.int64)
+
+    def date_slice(self, start: Any = None, end: Any = None) -> slice:
+        """日期范围 [start, end] 对应的列切片"""
+        lo = 0 if start is None else int(self.dates.searchsorted(pd.Timestamp(start), 'left'))
+        hi = len(self.dates) if end is None else int(self.dates.searchsorted(pd.Timestamp(end), 'right'))
+        return slice(lo, hi)
+
+    def slice(self, stock_ids: Optional[Iterable[Any]] = None, start: Any = None, end: Any = None,
+              fields: Optional[Sequence[str]] = None) -> 'StockPanel':
+        """取选定股票、日期范围和字段的子面板（数组副本），面板中还没有写入过的字段为全NaN"""
+        rows = np.arange(len(self.ids)) if stock_ids is None else self.rows_of(stock_ids)
+        cols = self.date_slice(start, end)
+        sub = StockPanel(self.id_col, self.date_col)
+        sub.ids = [self.ids[row] for row in rows.tolist()]
+        sub._row_of = {stock_id: row for row, stock_id in enumerate(sub.ids)}
+        sub.dates = self.dates[cols]
+        sub.present = self.present[rows, cols]
+        sub.values = {field: self.values[field][rows, cols] if field in self.values
+                      else np.full(sub.present.shape, np.nan) for field in (fields or self.values)}
+        return sub
+
+    def date_labels(self, fmt: str = '%m/%d') -> List[str]:
+        """日期轴标签"""
+        return list(self.dates.strftime(fmt))
+
+    def active_columns(self) -> np.ndarray:
+        """至少有一只股票有数据的列"""
+        return self.present.any(axis=0)
+
+    def series(self, row: int, values: np.ndarray):
+        """一只股票有数据的列位置和对应的值"""
+        mask = self.present[row]
+        return np.flatnonzero(mask), values[row, mask].tolist()
+
+    def first_value(self, field: str) -> np.ndarray:
+        """每只股票第一个有数据的单元格的值"""
+        array = self.values[field]
+        missing = None if array.dtype.kind == 'O' else np.nan
+        if not array.shape[1]:
+            return np.full(len(self.ids), missing, dtype=array.dtype)
+        values = array[np.arange(len(self.ids)), self.present.argmax(axis=1)]
+        return np.where(self.present.any(axis=1), values, missing)
+
+    # ===== 按股票的窗口运算 =====
+
+    def _compact(self, values: np.ndarray):
+        """每行有数据的单元格按日期顺序移到左侧，返回 (压缩后的数组, 列顺序, 每行的数据个数)"""
+        order = np.argsort(~self.present, axis=1, kind='stable')
+        return np.take_along_axis(values, order, axis=1), order, self.present.sum(axis=1)
+
+    def _expand(self, compact: np.ndarray, order: np.ndarray) -> np.ndarray:
+        """把压缩后的结果放回原来的列，没有数据的单元格为NaN"""
+        result = np.full(compact.shape, np.nan)
+        np.put_along_axis(result, order, compact, axis=1)
+        result[~self.present] = np.nan
+        return result
+
+    def shift(self, field: str, periods: int = 1) -> np.ndarray:
+        """每只股票按自己的数据行移动，等价于 groupby('id')[field].shift(periods)"""
+        compact, order, counts = self._compact(self.values[field].astype(float))
+        positions = np.arange(compact.shape[1]) - periods
+        valid = (positions >= 0) & (positions < counts[:, None])
+        shifted = compact[:, np.clip(positions, 0, max(compact.shape[1] - 1, 0))]
+        return self._expand(np.where(valid, shifted, np.nan), order)
+
+    def diff(self, field: str, periods: int = 1) -> np.ndarray:
+        """等价于 groupby('id')[field].diff(periods)"""
+        return self.values[field].astype(float) - self.shift(field, periods)
+
+    def cumsum(self, field: str) -> np.ndarray:
+        """等价于 groupby('id')[field].cumsum()，NaN跳过"""
+        values = self.values[field].astype(float)
+        return np.where(np.isnan(values), np.nan, np.nancumsum(values, axis=1))
+
+    def rolling(self, field: str, window: int, min_periods: int = 1, how: str = 'mean') -> np.ndarray:
+        """等价于 groupby('id')[field].rolling(window, min_periods).mean()/sum()"""
+        compact, order, _ = self._compact(self.values[field].astype(float))
+        filled = np.nan_to_num(compact)
+        valid = (~np.isnan(compact)).astype(float)
+        pad = np.zeros((compact.shape[0], 1))
+        sums = np.cumsum(np.hstack([pad, filled]), axis=1)
+        counts = np.cumsum(np.hstack([pad, valid]), axis=1)
+        end = np.arange(1, compact.shape[1] + 1)
+        begin = np.maximum(end - window, 0)
+        window_sum = sums[:, end] - sums[:, begin]
+        window_count = counts[:, end] - counts[:, begin]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = window_sum / window_count if how == 'mean' else window_sum
+        return self._expand(np.where(window_count >= min_periods, result, np.nan), order)
+
+
+class DailyPanelStore:
+    """在数据访问层之上为每个加载器维护日线面板"""
+
+    def __init__(self, data_access, refresh_interval: float = DEFAULT_PANEL_REFRESH_INTERVAL, logger=None):
+        """
+        Args:
+            data_access: MemoizedDataAccess，面板数据从这里读取
+            refresh_interval: 从最后一个交易日开始扩展面板的最小间隔（秒）
+        """
+        self.data_access = data_access
+        self.refresh_interval = refresh_interval
+        self.logger = logger
+        self._lock = threading.Lock()  # 只保护 _panels 字典，数据读取在加载器自己的锁内进行
+        self._panels: Dict[type, Dict[str, Any]] = {}
+        self.stats = {'builds': 0, 'extensions': 0, 'hits': 0}
+
+    def get_config(self) -> Dict[str, Any]:
+        """构造参数，用于在工作进程中创建相同配置的实例"""
+        return {'refresh_interval': self.refresh_interval}
+
+    def get(self, loader_cls: type, fields: Sequence[str], start_date: Any, end_date: Any = None,
+            stock_ids: Optional[Iterable[Any]] = None) -> StockPanel:
+        """
+        获取 [start_date, end_date] 范围内指定字段（和股票）的子面板
+
+        Args:
+            loader_cls: stock_data 日线加载器类
+            fields: 需要的字段
+            start_date, end_date: 日期范围，end_date为None表示到最新交易日
+            stock_ids: 只取这些股票，None表示全部
+
+        Raises:
+            KeyError: 加载器的数据中没有请求的字段
+        """
+        start = normalize_date(start_date)
+        end = normalize_date(end_date) if end_date else None
+        state = self._state(loader_cls)
+        with state['lock']:
+            panel = self._ensure(loader_cls, state, fields, start)
+            unavailable = [field for field in fields if field in state['unavailable']]
+            if unavailable:
+                raise KeyError(f"{loader_cls.__name__} 的数据中没有字段: {', '.join(unavailable)}")
+            return panel.slice(stock_ids, start, end, fields)
+
+    def _state(self, loader_cls: type) -> Dict[str, Any]:
+        """获取加载器的面板状态（含加载器自己的锁），不存在时创建"""
+        with self._lock:
+            state = self._panels.get(loader_cls)
+            if state is None:
+                state = self._panels[loader_cls] = {'lock': threading.Lock(), 'panel': None, 'start': None,
+                                                    'refreshed_at': 0.0, 'unavailable': set()}
+            return state
+
+    @staticmethod
+    def _extend(state: Dict[str, Any], frame: pd.DataFrame, fields: Sequence[str]):
+        """写入读取的数据，记录数据中不存在的字段（之后的请求不再为它们重新读取）"""
+        if frame is not None and not frame.empty:
+            state['unavailable'].update(field for field in fields if field not in frame.columns)
+        state['panel'].extend(frame, fields)
+
+    def _ensure(self, loader_cls: type, state: Dict[str, Any], fields: Sequence[str], start: str) -> StockPanel:
+        """构建或扩展加载器的面板，使其覆盖 start 之后的日期并包含指定字段（调用方持有加载器的锁）"""
+        if state['panel'] is None:
+            frame = self.data_access.fetch(loader_cls, start_date=start)
+            state['panel'] = StockPanel()
+            self._extend(state, frame, fields)
+            state.update(start=start, refreshed_at=time.time())
+            self.stats['builds'] += 1
+            return state['panel']
+
+        panel = state['panel']
+        missing = [field for field in fields if field not in panel.values and field not in state['unavailable']]
+        if missing:
+            self._extend(state, self.data_access.fetch(loader_cls, start_date=state['start']), missing)
+            self.stats['extensions'] += 1
+        if start < state['start']:
+            # 补充更早的日期
+            older = self.data_access.fetch(loader_cls, start_date=start, end_date=_day_before(state['start']))
+            self._extend(state, older, panel.fields)
+            state['start'] = start
+            self.stats['extensions'] += 1
+        if time.time() - state['refreshed_at'] >= self.refresh_interval and len(panel.dates):
+            # 从最后一个交易日开始扩展，覆盖当天可能更新的数据
+            last_date = panel.dates[-1].strftime('%Y%m%d')
+            self._extend(state, self.data_access.fetch(loader_cls, start_date=last_date), panel.fields)
+            state['refreshed_at'] = time.time()
+            self.stats['extensions'] += 1
+        else:
+            self.stats['hits'] += 1
+        return panel
+
+    @staticmethod
+    def build(frame: pd.DataFrame, fields: Sequence[str], id_col: str = 'id',
+              date_col: str = 'trade_date') -> StockPanel:
+        """从已读取的长表直接构建面板（不缓存），如单个交易日的分钟线按 time 列构建"""
+        return StockPanel.from_frame(frame, fields, id_col, date_col)
+
+    def invalidate(self):
+        """丢弃所有面板"""
+        with self._lock:
+            self._panels.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            panels = {loader_cls.__name__: {'start': state['start'], 'shape': state['panel'].shape,
+                                            'fields': state['panel'].fields}
+                      for loader_cls, state in self._panels.items() if state['panel'] is not None}
+        return {**self.stats, 'refresh_interval': self.refresh_interval, 'panels': panels}
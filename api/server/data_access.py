@@ -0,0 +1,258 @@
+"""
+数据访问层 - 服务器级的 stock_data 加载器实例和按日期范围记忆的查询结果
+Author: data_panel开发团队
+Date: 2025-08-12
+
+处理器每次请求都新建 ThsConceptIndexData()、StockDailyData() 等加载器并重新读取整段历史。
+这里每个加载器类只保留一个实例，查询结果按 (加载器, 方法) 记忆已覆盖的日期范围:
+- 请求的范围在已缓存范围内时直接按日期切片返回
+- 请求更早或更晚的日期时只查询缺少的部分，与已缓存数据拼接
+- 到期（ttl秒或每天的 refresh_at 时刻）后只重新查询最后一个交易日及之后的数据
+返回的数据在 attrs 中带有获取版本（缓存数据每次变化时递增，全局唯一），筛选、变形后的结果通常保留该属性，
+处理器据此判断数据是否变化，不必每次对内容求摘要。
+加载器实例在请求线程和I/O线程池之间共享，且 setup（如 set_table_name）会修改实例状态，
+因此同一实例上的 setup 和查询在该实例的锁内串行执行。
+
+配置（自动更新配置中的 data_access）:
+    {"ttl": 600, "refresh_at": ["09:25", "15:05"]}
+"""
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from cache_params import normalize_date
+from pandas_mode import copy_on_write_active
+
+DEFAULT_TTL = 600
+DEFAULT_DATE_COLUMN = 'trade_date'
+# 返回数据的 attrs 中获取版本的键
+FETCH_VERSION_ATTR = 'data_access_version'
+
+_fetch_versions = itertools.count(1)
+
+
+def _day_before(date_key: str) -> str:
+    return (datetime.strptime(date_key, '%Y%m%d') - timedelta(days=1)).strftime('%Y%m%d')
+
+
+def _day_after(date_key: str) -> str:
+    return (datetime.strptime(date_key, '%Y%m%d') + timedelta(days=1)).strftime('%Y%m%d')
+
+
+class _RangeEntry:
+    """一个 (加载器, 方法) 已缓存的数据和覆盖的日期范围，start/end 为None表示不限"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frame: Optional[pd.DataFrame] = None
+        self.date_keys: Optional[pd.Series] = None  # 日期列规范化为YYYYMMDD，用于切片
+        self.start: Optional[str] = None
+        self.end: Optional[str] = None
+        self.fetched_at = 0.0
+        self.version = 0  # 缓存数据每次变化时取新的全局版本号
+
+    def covers(self, start: Optional[str], end: Optional[str]) -> bool:
+        return (self.frame is not None
+                and (self.start is None or (start is not None and start >= self.start))
+                and (self.end is None or (end is not None and end <= self.end)))
+
+
+class MemoizedDataAccess:
+    """记忆查询结果的数据访问层"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, refresh_at: Optional[List[str]] = None, logger=None):
+        """
+        Args:
+            ttl: 开放区间（查询到最新日期）的数据缓存秒数，0表示只按 refresh_at 失效
+            refresh_at: 每天的刷新时刻（HH:MM），在此之前获取的数据失效
+        """
+        self.ttl = ttl
+        self.refresh_at = list(refresh_at or [])
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._loaders: Dict[type, Any] = {}
+        self._loader_locks: Dict[type, threading.Lock] = {}
+        self._entries: Dict[tuple, _RangeEntry] = {}
+        self.stats = {'hits': 0, 'fetches': 0, 'extensions': 0, 'refreshes': 0, 'rows_fetched': 0}
+
+    def get_config(self) -> Dict[str, Any]:
+        """构造参数，用于在工作进程中创建相同配置的实例"""
+        return {'ttl': self.ttl, 'refresh_at': self.refresh_at}
+
+    def loader(self, loader_cls: type):
+        """获取加载器实例，每个类只创建一次"""
+        with self._lock:
+            instance = self._loaders.get(loader_cls)
+            if instance is None:
+                instance = loader_cls()
+                self._loaders[loader_cls] = instance
+                self._loader_locks[loader_cls] = threading.Lock()
+            return instance
+
+    def _call(self, loader_cls: type, method: str, setup: Optional[str], **kwargs) -> pd.DataFrame:
+        """在加载器实例的锁内执行 setup 和查询，避免其他线程在两者之间修改实例状态"""
+        loader = self.loader(loader_cls)
+        with self._loader_locks[loader_cls]:
+            if setup:
+                getattr(loader, setup)()
+            return getattr(loader, method)(**kwargs)
+
+    def get_daily_data(self, loader_cls: type, start_date: Any = None, end_date: Any = None,
+                       date_column: str = DEFAULT_DATE_COLUMN) -> pd.DataFrame:
+        """按日期范围获取日线类数据（loader.get_daily_data）"""
+        return self.fetch(loader_cls, 'get_daily_data', start_date, end_date, date_column)
+
+    def fetch(self, loader_cls: type, method: str = 'get_daily_data', start_date: Any = None,
+              end_date: Any = None, date_column: str = DEFAULT_DATE_COLUMN,
+              setup: Optional[str] = None) -> pd.DataFrame:
+        """
+        按日期范围获取数据，结果按 (加载器, 方法) 记忆
+
+        Args:
+            loader_cls: stock_data 加载器类
+            method: 加载方法名，须支持 start_date / end_date 参数
+            start_date, end_date: 日期范围（任意常见日期格式），None表示不限
+            date_column: 数据中的日期列，用于切片和拼接
+            setup: 每次查询前在加载器上调用的无参方法名（如 set_table_name）
+        """
+        try:
+            start = normalize_date(start_date) if start_date else None
+            end = normalize_date(end_date) if end_date else None
+        except ValueError:
+            # 无法识别的日期交给加载器自行处理，不做记忆
+            return self._call(loader_cls, method, setup, start_date=start_date, end_date=end_date)
+        with self._lock:
+            entry = self._entries.setdefault((loader_cls, method, date_column, setup), _RangeEntry())
+
+        with entry.lock:
+            if entry.frame is not None and self._expired(entry):
+                self._refresh_tail(entry, loader_cls, method, date_column, setup)
+            if entry.covers(start, end):
+                self.stats['hits'] += 1
+            elif entry.frame is None or entry.date_keys is None:
+                self.stats['fetches'] += 1
+                self._store(entry, self._query(loader_cls, method, start, end, setup), date_column, start, end)
+            else:
+                self._extend(entry, loader_cls, method, date_column, setup, start, end)
+            return self._slice(entry, start, end)
+
+    def _query(self, loader_cls: type, method: str, start: Optional[str], end: Optional[str],
+               setup: Optional[str]) -> pd.DataFrame:
+        """调用加载器查询 [start, end]"""
+        kwargs = {}
+        if start is not None:
+            kwargs['start_date'] = start
+        if end is not None:
+            kwargs['end_date'] = end
+        frame = self._call(loader_cls, method, setup, **kwargs)
+        self.stats['rows_fetched'] += len(frame)
+        return frame
+
+    @staticmethod
+    def _date_keys(frame: pd.DataFrame, date_column: str) -> Optional[pd.Series]:
+        if date_column not in frame.columns:
+            return None
+        dates = pd.to_datetime(frame[date_column].astype(str), errors='coerce', format='mixed')
+        return dates.dt.strftime('%Y%m%d')
+
+    def _store(self, entry: _RangeEntry, frame: pd.DataFrame, date_column: str,
+               start: Optional[str], end: Optional[str]):
+        entry.frame = frame.reset_index(drop=True)
+        entry.date_keys = self._date_keys(entry.frame, date_column)
+        entry.start, entry.end = start, end
+        entry.fetched_at = time.time()
+        entry.version = next(_fetch_versions)
+
+    def _extend(self, entry: _RangeEntry, loader_cls: type, method: str, date_column: str,
+                setup: Optional[str], start: Optional[str], end: Optional[str]):
+        """只查询已缓存范围之外的日期并拼接"""
+        pieces = []
+        new_start, new_end = entry.start, entry.end
+        if entry.start is not None and (start is None or start < entry.start):
+            pieces.append(self._query(loader_cls, method, start, _day_before(entry.start), setup))
+            new_start = start
+        pieces.append(entry.frame)
+        if entry.end is not None and (end is None or end > entry.end):
+            pieces.append(self._query(loader_cls, method, _day_after(entry.end), end, setup))
+            new_end = end
+        self.stats['extensions'] += 1
+        fetched_at = entry.fetched_at
+        self._store(entry, pd.concat([piece for piece in pieces if len(piece)] or [entry.frame],
+                                     ignore_index=True), date_column, new_start, new_end)
+        entry.fetched_at = fetched_at
+
+    def _expired(self, entry: _RangeEntry) -> bool:
+        """包含今天（或不限结束日期）的数据超过ttl或跨过刷新时刻后失效，已结束的历史区间不失效"""
+        if entry.end is not None and entry.end < datetime.now().strftime('%Y%m%d'):
+            return False
+        now = time.time()
+        if self.ttl and now - entry.fetched_at > self.ttl:
+            return True
+        fetched = datetime.fromtimestamp(entry.fetched_at)
+        current = datetime.fromtimestamp(now)
+        for refresh_time in self.refresh_at:
+            hour, minute = (int(part) for part in refresh_time.split(':'))
+            scheduled = current.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if scheduled > current:
+                scheduled -= timedelta(days=1)
+            if fetched < scheduled:
+                return True
+        return False
+
+    def _refresh_tail(self, entry: _RangeEntry, loader_cls: type, method: str, date_column: str,
+                      setup: Optional[str]):
+        """只重新查询最后一个日期及之后的数据，替换缓存中对应的行"""
+        self.stats['refreshes'] += 1
+        if entry.date_keys is None or entry.date_keys.dropna().empty:
+            self._store(entry, self._query(loader_cls, method, entry.start, entry.end, setup),
+                        date_column, entry.start, entry.end)
+            return
+        last_date = entry.date_keys.max()
+        tail = self._query(loader_cls, method, last_date, entry.end, setup)
+        kept = entry.frame[entry.date_keys < last_date]
+        self._store(entry, pd.concat([kept, tail], ignore_index=True), date_column, entry.start, entry.end)
+
+    @staticmethod
+    def _slice(entry: _RangeEntry, start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+        """按日期范围切片，调用方修改返回值不影响缓存"""
+        frame = entry.frame
+        if entry.date_keys is not None and (start is not None or end is not None):
+            mask = pd.Series(True, index=frame.index)
+            if start is not None:
+                mask &= entry.date_keys >= start
+            if end is not None:
+                mask &= entry.date_keys <= end
+            frame = frame[mask]
+        # 写时复制开启时返回浅拷贝即可保证调用方修改不影响缓存（按当前模式判断）
+        result = frame.copy(deep=not copy_on_write_active())
+        result.attrs = {**frame.attrs, FETCH_VERSION_ATTR: entry.version}
+        return result
+    
+    @staticmethod
+    def fetch_version(frame: pd.DataFrame) -> Optional[int]:
+        """数据（或由其筛选、变形得到的数据）的获取版本，不是数据访问层返回的数据时为None"""
+        return getattr(frame, 'attrs', {}).get(FETCH_VERSION_ATTR)
+
+    def invalidate(self, loader_cls: Optional[type] = None) -> int:
+        """清除记忆的数据（指定加载器或全部），返回清除的条目数"""
+        with self._lock:
+            keys = [key for key in self._entries if loader_cls is None or key[0] is loader_cls]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取数据访问层统计信息"""
+        with self._lock:
+            entries = [
+                {'loader': key[0].__name__, 'method': key[1], 'start': entry.start, 'end': entry.end,
+                 'rows': len(entry.frame) if entry.frame is not None else 0,
+                 'fetched_at': entry.fetched_at}
+                for key, entry in self._entries.items()
+            ]
+        return {**self.stats, 'ttl': self.ttl, 'refresh_at': self.refresh_at,
+                'loaders': len(self._loaders), 'entries': entries}
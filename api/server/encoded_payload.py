@@ -0,0 +1,169 @@
+"""
+预编码响应 - 缓存中保存不可变的响应字节及其压缩版本
+Author: data_panel开发团队
+Date: 2025-08-12
+
+- 存入缓存时只序列化/压缩一次，命中时直接返回字节，不再解析和重新序列化JSON
+- 根据请求的 Accept-Encoding 返回 br / gzip / 原始字节，并设置 Content-Encoding
+- ETag 为响应字节的摘要，If-None-Match 命中时返回304
+"""
+import gzip
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from flask import Response, current_app, has_app_context, has_request_context, request
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# 小于该字节数的响应不压缩
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# 过期响应（stale-while-revalidate）的 Warning 头
+STALE_WARNING = '110 - "Response is Stale"'
+
+
+class EncodedPayload:
+    """不可变的已编码响应"""
+
+    __slots__ = ('body', 'gzip_body', 'br_body', 'etag', 'mimetype', 'status', 'headers')
+
+    def __init__(self, body: bytes, mimetype: str = 'application/json', status: int = 200,
+                 headers: Optional[Dict[str, str]] = None):
+        self.body = body
+        self.mimetype = mimetype
+        self.status = status
+        self.headers = headers or {}
+        self.etag = hashlib.md5(body).hexdigest()
+        self.gzip_body = None
+        self.br_body = None
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.gzip_body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            if HAS_BROTLI:
+                self.br_body = brotli.compress(body, quality=BROTLI_QUALITY)
+
+    @classmethod
+    def from_response(cls, response_data: Any) -> Optional['EncodedPayload']:
+        """
+        从处理函数的返回值（Response、dict、str、(body, status)等）构建
+
+        Returns:
+            非200、流式或已压缩的响应返回None，由调用方按原样处理
+        """
+        if not isinstance(response_data, Response):
+            if not has_app_context():
+                return None
+            try:
+                response_data = current_app.make_response(response_data)
+            except Exception:
+                return None
+        if (response_data.status_code != 200 or response_data.is_streamed
+                or response_data.headers.get('Content-Encoding')):
+            return None
+        headers = {key: value for key, value in response_data.headers.items()
+                   if key not in ('Content-Type', 'Content-Length', 'ETag')}
+        return cls(response_data.get_data(), response_data.mimetype, response_data.status_code, headers)
+
+    @classmethod
+    def shareable(cls, response_data: Any) -> Any:
+        """
+        转换为可在多个请求间共享的不可变结果（请求合并使用）：非流式、未压缩的Response（含非200）
+        编码为字节，每个请求再用 to_response() 按自己的请求头构建响应；其他返回值原样返回
+        """
+        if isinstance(response_data, tuple) and has_app_context():
+            response_data = current_app.make_response(response_data)
+        if isinstance(response_data, Response):
+            if response_data.is_streamed or response_data.headers.get('Content-Encoding'):
+                return response_data
+            headers = {key: value for key, value in response_data.headers.items()
+                       if key not in ('Content-Type', 'Content-Length', 'ETag')}
+            return cls(response_data.get_data(), response_data.mimetype, response_data.status_code, headers)
+        return response_data
+
+    @classmethod
+    def from_parts(cls, body: bytes, gzip_body: Optional[bytes], br_body: Optional[bytes], etag: str,
+                   mimetype: str = 'application/json', status: int = 200,
+                   headers: Optional[Dict[str, str]] = None) -> 'EncodedPayload':
+        """从已保存的各编码字节恢复（如持久化缓存），不重新压缩"""
+        payload = cls.__new__(cls)
+        payload.body = body
+        payload.gzip_body = gzip_body
+        payload.br_body = br_body
+        payload.etag = etag
+        payload.mimetype = mimetype
+        payload.status = status
+        payload.headers = headers or {}
+        return payload
+
+    @classmethod
+    def from_json(cls, data: Any) -> Optional['EncodedPayload']:
+        """从JSON数据构建（使用应用的JSON序列化配置）"""
+        if not has_app_context():
+            return None
+        return cls.from_response(current_app.json.response(data))
+
+    def with_metadata(self, **fields) -> 'EncodedPayload':
+        """返回在JSON对象响应的 metadata 中添加字段后的新响应（重新编码），其他响应原样返回"""
+        if self.mimetype != 'application/json':
+            return self
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            return self
+        if not isinstance(data, dict) or not isinstance(data.get('metadata', {}), dict):
+            return self
+        data['metadata'] = {**data.get('metadata', {}), **fields}
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return type(self)(body, self.mimetype, self.status, dict(self.headers))
+
+    def mark_stale(self, cached_at: float) -> 'EncodedPayload':
+        """返回标记为过期的响应：metadata.stale 为 true，并带 Warning: 110 头"""
+        stale = self.with_metadata(cached=True, stale=True,
+                                   cached_at=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(cached_at)))
+        if stale is self:
+            stale = self.from_parts(self.body, self.gzip_body, self.br_body, self.etag,
+                                    self.mimetype, self.status, dict(self.headers))
+        stale.headers['Warning'] = STALE_WARNING
+        return stale
+
+    def size_info(self) -> Dict[str, Optional[int]]:
+        """各编码的字节数"""
+        return {
+            'identity': len(self.body),
+            'gzip': len(self.gzip_body) if self.gzip_body is not None else None,
+            'br': len(self.br_body) if self.br_body is not None else None,
+        }
+
+    def _negotiate(self):
+        """根据 Accept-Encoding 选择编码"""
+        if not has_request_context():
+            return None, self.body
+        accept = request.accept_encodings
+        if self.br_body is not None and accept.quality('br') > 0:
+            return 'br', self.br_body
+        if self.gzip_body is not None and accept.quality('gzip') > 0:
+            return 'gzip', self.gzip_body
+        return None, self.body
+
+    def to_response(self) -> Response:
+        """构建响应：不复制字节，只设置头部"""
+        if self.status == 200 and has_request_context() and self.etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(self.etag)
+            return response
+
+        encoding, body = self._negotiate()
+        response = Response(body, status=self.status, mimetype=self.mimetype, headers=self.headers)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if self.gzip_body is not None:
+            response.vary.add('Accept-Encoding')
+        if self.status == 200:
+            response.set_etag(self.etag)
+        return response
@@ -0,0 +1,158 @@
+"""
+数据帧二级索引 - 按股票id和时间列查询缓存的长表，不再逐只股票做整表布尔扫描
+Author: data_panel开发团队
+Date: 2025-08-12
+
+处理器常见的写法:
+    for stock_id in stock_list:
+        stock_data = stock_df[stock_df['id'] == stock_id].sort_values(by='time')
+每只股票都扫描整张表（股票数×行数），日期范围筛选 df[(df['trade_date'] >= start) & (df['trade_date'] <= end)]
+同样是整表扫描。FrameIndex 对长表建立一次索引:
+- 按 (id, 时间列) 稳定排序后的行位置，每个id对应其中连续的一段
+- 时间列排序后的值和行位置，范围查询用 searchsorted 二分查找
+查询结果按原表的行顺序返回（与布尔筛选相同），group() 返回按时间列排序的单只股票数据。
+BaseDataCache 为声明了索引的数据键保存索引，数据重新加载后按版本号重建；
+只追加的数据（增量读取的分钟线）用 extended() 把新行归并进已有索引，不重新排序全部行。
+"""
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class FrameIndex:
+    """长表的股票id索引和时间列范围索引"""
+
+    def __init__(self, frame: pd.DataFrame, id_col: str = 'id', order_col: Optional[str] = None):
+        """
+        Args:
+            frame: 长表
+            id_col: 股票id列
+            order_col: 时间列（trade_date / time），None表示不建立范围索引
+        """
+        self.frame = frame
+        self.id_col = id_col
+        self.order_col = order_col if order_col in frame.columns else None
+
+        codes, uniques = pd.factorize(frame[id_col])
+        self._code_of = {stock_id: code for code, stock_id in enumerate(list(uniques))}
+        if self.order_col is not None:
+            order_values = frame[self.order_col].to_numpy()
+            self._value_order = np.argsort(order_values, kind='stable')
+            self._sorted_values = order_values[self._value_order]
+            # 先按id、再按时间列的名次排序（lexsort稳定）
+            ranks = np.empty(len(frame), dtype=np.int64)
+            ranks[self._value_order] = np.arange(len(frame))
+            self._order = np.lexsort((ranks, codes))
+        else:
+            self._order = np.argsort(codes, kind='stable')
+        # 第 code 个id的行位置为 _order[_bounds[code]:_bounds[code + 1]]，id为空的行（code=-1）排在最前
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self._bounds = np.concatenate([[0], np.cumsum(counts)]) + int((codes < 0).sum())
+
+    def __len__(self):
+        return len(self.frame)
+
+    def extended(self, frame: pd.DataFrame) -> 'FrameIndex':
+        """
+        为在末尾追加了行的新表返回扩展后的索引，结果与 FrameIndex(frame, ...) 相同
+        self.frame 必须是 frame 的前 len(self) 行；只对新行排序（O(k log k)），
+        再按位置归并进已有数组（O(N) 复制，不做 O(N log N) 的全表排序）。原索引不变，可继续被并发请求使用
+        """
+        old_rows, rows = len(self.frame), len(frame)
+        positions = np.arange(old_rows, rows)
+        index = object.__new__(FrameIndex)
+        index.frame, index.id_col, index.order_col = frame, self.id_col, self.order_col
+
+        # 新出现的id按出现顺序编号，与对整表 factorize 的编号一致
+        local_codes, uniques = pd.factorize(frame[self.id_col].iloc[old_rows:])
+        index._code_of = dict(self._code_of)
+        mapping = [index._code_of.setdefault(stock_id, len(index._code_of)) for stock_id in list(uniques)]
+        codes = np.append(np.asarray(mapping, dtype=np.int64), -1)[local_codes]
+
+        if self.order_col is not None:
+            values = frame[self.order_col].to_numpy()[old_rows:]
+            local = np.argsort(values, kind='stable')
+            # 相同的值排在已有行之后，与整表稳定排序的结果一致
+            at = np.searchsorted(self._sorted_values, values[local], 'right')
+            index._sorted_values = np.insert(self._sorted_values, at, values[local])
+            index._value_order = np.insert(self._value_order, at, positions[local])
+            ranks = np.empty(rows, dtype=np.int64)
+            ranks[index._value_order] = np.arange(rows)
+        else:
+            ranks = np.arange(rows)
+
+        # 已有行在 _order 中按 (id编号, 名次) 有序，新行按同样的键排序后归并
+        segments = np.diff(np.concatenate([[0], self._bounds]))
+        order_codes = np.repeat(np.arange(-1, len(segments) - 1), segments)
+        old_keys = (order_codes + 1) * (rows + 1) + ranks[self._order]
+        new_keys = (codes + 1) * (rows + 1) + ranks[positions]
+        local = np.argsort(new_keys, kind='stable')
+        index._order = np.insert(self._order, np.searchsorted(old_keys, new_keys[local]), positions[local])
+
+        counts = np.zeros(len(index._code_of), dtype=np.int64)
+        counts[:len(segments) - 1] = segments[1:]
+        counts += np.bincount(codes[codes >= 0], minlength=len(index._code_of))
+        index._bounds = np.concatenate([[0], np.cumsum(counts)]) + int(segments[0] + (codes < 0).sum())
+        return index
+
+    def __contains__(self, stock_id: Any) -> bool:
+        return stock_id in self._code_of
+
+    # ===== 行位置 =====
+
+    def _group_positions(self, stock_id: Any) -> np.ndarray:
+        """一只股票的行位置，按时间列排序"""
+        code = self._code_of.get(stock_id)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self._order[self._bounds[code]:self._bounds[code + 1]]
+
+    def positions(self, stock_ids: Optional[Iterable[Any]] = None, start: Any = None, end: Any = None) -> np.ndarray:
+        """满足条件的行位置（原表顺序），stock_ids / start / end 为None表示不限"""
+        if stock_ids is not None:
+            parts = [self._group_positions(stock_id) for stock_id in dict.fromkeys(stock_ids)]
+            positions = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            if start is None and end is None:
+                return positions
+            values = self.frame[self._require_order_col()].to_numpy()[positions]
+            keep = np.ones(len(positions), dtype=bool)
+            if start is not None:
+                keep &= values >= start
+            if end is not None:
+                keep &= values <= end
+            return positions[keep]
+        if start is None and end is None:
+            return np.arange(len(self.frame))
+        self._require_order_col()
+        lo = 0 if start is None else int(np.searchsorted(self._sorted_values, start, 'left'))
+        hi = len(self._sorted_values) if end is None else int(np.searchsorted(self._sorted_values, end, 'right'))
+        return np.sort(self._value_order[lo:hi])
+
+    def _require_order_col(self) -> str:
+        if self.order_col is None:
+            raise ValueError("索引没有时间列，不能按范围查询")
+        return self.order_col
+
+    # ===== 查询 =====
+
+    def rows(self, stock_ids: Optional[Iterable[Any]] = None, start: Any = None, end: Any = None) -> pd.DataFrame:
+        """
+        按股票id和时间列范围 [start, end] 取行，等同于
+        df[df[id_col].isin(stock_ids) & (df[order_col] >= start) & (df[order_col] <= end)]
+        """
+        return self.frame.take(self.positions(stock_ids, start, end))
+
+    def between(self, start: Any = None, end: Any = None) -> pd.DataFrame:
+        """时间列范围 [start, end] 内的行"""
+        return self.rows(None, start, end)
+
+    def group(self, stock_id: Any) -> pd.DataFrame:
+        """一只股票的数据，按时间列排序，没有时为空表"""
+        return self.frame.take(self._group_positions(stock_id))
+
+    def groups(self, stock_ids: Optional[Iterable[Any]] = None) -> Iterator[Tuple[Any, pd.DataFrame]]:
+        """按给定顺序逐只股票返回 (股票id, 按时间列排序的数据)，没有数据的股票跳过"""
+        for stock_id in (self._code_of if stock_ids is None else dict.fromkeys(stock_ids)):
+            if stock_id in self._code_of:
+                yield stock_id, self.group(stock_id)
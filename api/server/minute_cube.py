@@ -0,0 +1,279 @@
+"""
+当日分钟数据立方体 - 股票×分钟的稠密数组，所有分钟线端点共用并按需增量更新
+Author: data_panel开发团队
+Date: 2025-08-12
+
+分钟线端点原来每次请求都重新读取当天的长表分钟线，逐行计算涨幅、
+groupby('id') 取开盘基准价、对每一行 dt.strftime 生成时间标签。
+这里服务器维护一个当日立方体:
+- 行为股票id（id→行号索引），列为当日分钟（分钟序号和 '%m%d_%H:%M' 标签表只计算一次）
+- close / pre_close / volume / change 各为一个二维 NumPy 数组，缺失的分钟为NaN
+- 刷新时只查询最后一分钟及之后的数据写入对应单元格，新交易日的数据到达时重建
+端点通过 slice() 取得所需股票和时间区间的数组副本（MinuteSlice），用数组运算代替长表处理。
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 立方体保存的字段，change 由 close / pre_close 计算
+CUBE_FIELDS = ('close', 'pre_close', 'volume')
+
+# 连续刷新的最小间隔（秒），同一时间段内的请求共用一次查询
+DEFAULT_REFRESH_INTERVAL = 3.0
+
+
+def minute_of_day(hhmm: Optional[str]) -> Optional[int]:
+    """'HH:MM' 转换为当天的分钟序号"""
+    if hhmm is None:
+        return None
+    hour, minute = (int(part) for part in str(hhmm).split(':')[:2])
+    return hour * 60 + minute
+
+
+def pct_change(close: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """(close - base) / base * 100，保留两位小数，与 Series.round(2) 相同"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.round((close - base) / base * 100, 2)
+
+
+class MinuteSlice:
+    """立方体中选定股票×时间区间的数组副本，行顺序与请求的股票顺序一致"""
+
+    def __init__(self, ids: np.ndarray, labels: List[str], arrays: Dict[str, np.ndarray]):
+        self.ids = ids
+        self.labels = labels
+        self.close = arrays['close']
+        self.pre_close = arrays['pre_close']
+        self.volume = arrays['volume']
+        self.change = arrays['change']
+        # 有分钟线的单元格
+        self.present = ~np.isnan(self.close)
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    def change_vs(self, zero_pre_close: Optional[float] = None) -> np.ndarray:
+        """按昨收计算的涨幅，zero_pre_close 不为None时昨收为0的单元格用该值代替"""
+        if zero_pre_close is None:
+            return self.change
+        pre_close = np.where(self.pre_close == 0, zero_pre_close, self.pre_close)
+        return pct_change(self.close, pre_close)
+
+    def first_close(self) -> np.ndarray:
+        """每只股票区间内第一根分钟线的收盘价，没有数据时为NaN"""
+        if not self.close.size:
+            return np.full(len(self.ids), np.nan)
+        first = self.present.argmax(axis=1)
+        values = self.close[np.arange(len(self.ids)), first]
+        return np.where(self.present.any(axis=1), values, np.nan)
+
+    def change_from_first(self) -> np.ndarray:
+        """相对区间内第一根分钟线收盘价的涨幅"""
+        return pct_change(self.close, self.first_close()[:, None])
+
+    def active_columns(self) -> np.ndarray:
+        """至少有一只股票有分钟线的列"""
+        return self.present.any(axis=0)
+
+    def active_labels(self) -> List[str]:
+        """有数据的分钟标签，按时间排序"""
+        return [label for label, active in zip(self.labels, self.active_columns()) if active]
+
+    def series(self, row: int, values: np.ndarray):
+        """一只股票有数据的分钟标签和对应的值，用于绘制折线"""
+        mask = self.present[row]
+        return [label for label, keep in zip(self.labels, mask) if keep], values[row, mask].tolist()
+
+    @staticmethod
+    def count_by_minute(condition: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """统计每分钟满足条件（布尔数组，NaN比较结果为False）的股票个数，rows 指定参与统计的行"""
+        if rows is not None:
+            condition = condition[rows]
+        return condition.sum(axis=0)
+
+    def rows_of(self, stock_ids: Iterable[Any]) -> np.ndarray:
+        """股票id对应的行号，切片中没有的忽略"""
+        positions = pd.Index(self.ids).get_indexer(list(stock_ids))
+        return positions[positions >= 0]
+
+
+class IntradayMinuteCube:
+    """当日股票×分钟的稠密数组"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset(None)
+
+    def _reset(self, trade_date):
+        self.trade_date = trade_date
+        self._ids: List[Any] = []
+        self._row_of: Dict[Any, int] = {}
+        self._minutes = np.empty(0, dtype=np.int64)
+        self._labels: List[str] = []
+        self._arrays = {field: np.empty((0, 0)) for field in CUBE_FIELDS + ('change',)}
+        self.version = 0
+
+    # ===== 更新 =====
+
+    def update(self, frame: pd.DataFrame) -> int:
+        """
+        写入长表分钟线（id, time, close, pre_close[, volume]），返回写入的行数
+        数据中出现更晚的交易日时丢弃旧数据重建，早于当前交易日的行忽略
+        """
+        if frame is None or frame.empty:
+            return 0
+        times = pd.to_datetime(frame['time'], errors='coerce')
+        dates = times.dt.normalize()
+        latest = dates.max()
+        if pd.isna(latest):
+            return 0
+        with self._lock:
+            if self.trade_date is None or latest > self.trade_date:
+                self._reset(latest)
+            keep = (dates == self.trade_date).to_numpy()
+            if not keep.any():
+                return 0
+            times = times[keep]
+            frame = frame[keep]
+            minutes = (times.dt.hour * 60 + times.dt.minute).to_numpy(dtype=np.int64)
+            self._add_minutes(np.unique(minutes))
+            self._add_ids(pd.unique(frame['id']))
+
+            rows = np.fromiter((self._row_of[stock_id] for stock_id in frame['id'].tolist()),
+                               dtype=np.int64, count=len(frame))
+            cols = np.searchsorted(self._minutes, minutes)
+            for field in CUBE_FIELDS:
+                if field in frame.columns:
+                    self._arrays[field][rows, cols] = pd.to_numeric(frame[field], errors='coerce').to_numpy(float)
+            self._arrays['change'][rows, cols] = pct_change(
+                self._arrays['close'][rows, cols], self._arrays['pre_close'][rows, cols])
+            self.version += 1
+            return len(frame)
+
+    def _add_minutes(self, minutes: np.ndarray):
+        """加入新的分钟列，通常追加在末尾"""
+        new = np.setdiff1d(minutes, self._minutes, assume_unique=True)
+        if not len(new):
+            return
+        merged = np.union1d(self._minutes, new)
+        old_positions = np.searchsorted(merged, self._minutes)
+        prefix = self.trade_date.strftime('%m%d')
+        for field, array in self._arrays.items():
+            grown = np.full((array.shape[0], len(merged)), np.nan)
+            grown[:, old_positions] = array
+            self._arrays[field] = grown
+        self._minutes = merged
+        # 时间轴标签表，每列只格式化一次
+        self._labels = [f"{prefix}_{minute // 60:02d}:{minute % 60:02d}" for minute in merged.tolist()]
+
+    def _add_ids(self, ids: Iterable[Any]):
+        """加入新的股票行"""
+        new = [stock_id for stock_id in ids if stock_id not in self._row_of]
+        if not new:
+            return
+        for stock_id in new:
+            self._row_of[stock_id] = len(self._ids)
+            self._ids.append(stock_id)
+        for field, array in self._arrays.items():
+            extra = np.full((len(new), len(self._minutes)), np.nan)
+            self._arrays[field] = np.vstack([array, extra])
+
+    # ===== 查询 =====
+
+    @property
+    def last_time(self) -> Optional[pd.Timestamp]:
+        """已写入的最后一分钟"""
+        if self.trade_date is None or not len(self._minutes):
+            return None
+        return self.trade_date + pd.Timedelta(minutes=int(self._minutes[-1]))
+
+    @property
+    def stock_ids(self) -> List[Any]:
+        return list(self._ids)
+
+    def slice(self, stock_ids: Optional[Iterable[Any]] = None, start: Optional[str] = None,
+              end: Optional[str] = None) -> MinuteSlice:
+        """
+        取选定股票和时间区间的数组副本
+
+        Args:
+            stock_ids: 股票id（按给定顺序，立方体中没有的忽略），None表示全部
+            start, end: 'HH:MM' 时间区间（含两端），None表示不限
+        """
+        with self._lock:
+            lo = 0 if start is None else int(np.searchsorted(self._minutes, minute_of_day(start), 'left'))
+            hi = len(self._minutes) if end is None else int(np.searchsorted(self._minutes, minute_of_day(end), 'right'))
+            if stock_ids is None:
+                rows = np.arange(len(self._ids))
+            else:
+                rows = np.array([self._row_of[s] for s in dict.fromkeys(stock_ids) if s in self._row_of],
+                                dtype=np.int64)
+            arrays = {field: array[rows, lo:hi] for field, array in self._arrays.items()}
+            return MinuteSlice(np.array([self._ids[row] for row in rows.tolist()], dtype=object),
+                               self._labels[lo:hi], arrays)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'trade_date': self.trade_date.strftime('%Y-%m-%d') if self.trade_date is not None else None,
+                'stocks': len(self._ids),
+                'minutes': len(self._minutes),
+                'last_minute': self._labels[-1] if self._labels else None,
+                'version': self.version,
+            }
+
+
+class IntradayCubeService:
+    """维护服务器的当日分钟立方体，按需从数据源增量刷新"""
+
+    def __init__(self, refresh_interval: float = DEFAULT_REFRESH_INTERVAL, logger=None):
+        """
+        Args:
+            refresh_interval: 两次刷新之间的最小间隔（秒）
+        """
+        self.refresh_interval = refresh_interval
+        self.logger = logger
+        self.cube = IntradayMinuteCube()
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self.stats = {'full_loads': 0, 'incremental_loads': 0, 'skipped': 0, 'rows_applied': 0}
+
+    def get_config(self) -> Dict[str, Any]:
+        """构造参数，用于在工作进程中创建相同配置的实例"""
+        return {'refresh_interval': self.refresh_interval}
+
+    def get(self, loader: Callable[[Optional[str]], pd.DataFrame]) -> IntradayMinuteCube:
+        """
+        刷新并返回立方体
+
+        Args:
+            loader: 查询分钟线的函数，参数为起始时间（'%Y-%m-%d %H:%M:%S'），None表示查询全部
+        """
+        with self._refresh_lock:
+            if time.time() - self._refreshed_at < self.refresh_interval:
+                self.stats['skipped'] += 1
+                return self.cube
+            last_time = self.cube.last_time
+            if last_time is None:
+                frame = loader(None)
+                self.stats['full_loads'] += 1
+            else:
+                # 从最后一分钟开始查询，覆盖仍在变化的最后一根分钟线
+                frame = loader(last_time.strftime('%Y-%m-%d %H:%M:%S'))
+                self.stats['incremental_loads'] += 1
+            self.stats['rows_applied'] += self.cube.update(frame)
+            self._refreshed_at = time.time()
+        return self.cube
+
+    def invalidate(self):
+        """丢弃立方体，下次使用时重新全量加载"""
+        with self._refresh_lock:
+            self.cube = IntradayMinuteCube()
+            self._refreshed_at = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, **self.cube.get_stats(), 'refresh_interval': self.refresh_interval}
@@ -5,6 +5,10 @@ Description: 多板块股票仪表盘股票仪表盘服务 - 基于新框架重
 功能: 提供多板块股票仪表盘、股票数据展示、实时涨幅分析、涨停监控等功能
 """
 
+# 生产模式的gevent monkey patch 必须在导入 queue/socket/flask 等模块之前执行
+from . import serving
+serving.patch_for_serve_mode()
+
 import time
 import pandas as pd
 import numpy as np
@@ -22,7 +26,7 @@ from flask import request, Response, jsonify
 from flask_cors import CORS
 
 # 导入新框架基类
-from .base_server import BaseStockServer
+from .base_server import BaseStockServer, prepare_serve_mode, PRODUCTION_MODE
 from ..conf.server_config import get_server_config, create_auto_update_config
 from ..processors.processor_factory import create_processor_manager
 
@@ -91,7 +95,6 @@ class MultiplateStockServer(BaseStockServer, SourceDataLogicMixin):
             "componentId": "chart2", 
             "timestamp": time.time()
         }
-        self.sse_clients = []
         self.message_queue = queue.Queue()
         
         # 初始化股票数据
@@ -315,66 +318,6 @@ class MultiplateStockServer(BaseStockServer, SourceDataLogicMixin):
             "updated_titles": self.dynamic_titles
         })
 
-    def dashboard_updates(self):
-        """SSE事件流"""
-        def event_stream():
-            client_queue = queue.Queue()
-            client_id = f"client_{len(self.sse_clients)}_{time.time()}"
-            
-            try:
-                self.sse_clients.append(client_queue)
-                self.logger.info(f"SSE客户端连接: {client_id}，当前总连接数: {len(self.sse_clients)}")
-                
-                connection_info = {
-                    "type": "connection_established",
-                    "client_id": client_id,
-                    "timestamp": time.time(),
-                    "server_status": "online"
-                }
-                yield f"data: {json.dumps(connection_info)}\\n\\n"
-                
-                # 不再自动发送latest_update，避免无差别刷新
-                # 只在有实际更新时才发送
-                # yield f"data: {json.dumps(self.latest_update)}\\n\\n"
-                
-                while True:
-                    try:
-                        message = client_queue.get(block=True, timeout=10)
-                        yield message
-                    except queue.Empty:
-                        heartbeat = {
-                            "type": "heartbeat",
-                            "client_id": client_id,
-                            "timestamp": time.time(),
-                            "server_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "active_connections": len(self.sse_clients)
-                        }
-                        yield f"data: {json.dumps(heartbeat)}\\n\\n"
-                        continue
-                    except GeneratorExit:
-                        self.logger.info(f"SSE客户端主动断开: {client_id}")
-                        break
-                        
-            except Exception as e:
-                self.logger.error(f"SSE连接异常 {client_id}: {e}")
-            finally:
-                if client_queue in self.sse_clients:
-                    self.sse_clients.remove(client_queue)
-                    self.logger.info(f"SSE客户端清理: {client_id}，剩余连接数: {len(self.sse_clients)}")
-        
-        response = Response(event_stream(), mimetype="text/event-stream")
-        response.headers.update({
-            'Cache-Control': 'no-cache, no-store, must-revalidate',
-            'Pragma': 'no-cache',
-            'Expires': '0',
-            'X-Accel-Buffering': 'no',
-            'Connection': 'keep-alive',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Cache-Control',
-            'Keep-Alive': 'timeout=30, max=1000'
-        })
-        return response
-
     def notify_update(self):
         """接收更新通知并通过SSE广播"""
         data = request.json
@@ -415,14 +358,6 @@ class MultiplateStockServer(BaseStockServer, SourceDataLogicMixin):
 
     # ===== 辅助方法 =====
     
-    def _send_update_to_clients(self, data):
-        """发送更新到所有SSE客户端"""
-        for client in list(self.sse_clients):
-            try:
-                client.put(f"data: {json.dumps(data)}\\n\\n")
-            except:
-                self.sse_clients.remove(client)
-
     def _get_dynamic_titles_list(self):
         """获取动态标题列表"""
         return list(self.dynamic_titles.values())
@@ -514,6 +449,8 @@ class MultiplateStockServer(BaseStockServer, SourceDataLogicMixin):
 
 def main():
     """主函数"""
+    # 生产模式(--production)的协程运行时已在模块开头启用，这里只解析运行模式
+    serve_mode = prepare_serve_mode()
     print("🚀 启动多板块股票仪表盘股票仪表盘服务器...")
     
     # 简单配置：禁用自动更新
@@ -537,7 +474,7 @@ def main():
     except Exception as e:
         print(f"⚠️ 动态标题初始化失败: {e}")
     
-    server.run(debug=True)
+    server.run(debug=serve_mode != PRODUCTION_MODE, serve_mode=serve_mode)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,31 @@
+"""
+pandas 写时复制(Copy-on-Write)模式 - 由服务器配置显式开启，缓存层按当前模式决定是否深拷贝
+Author: data_panel开发团队
+Date: 2025-08-12
+
+pandas 3.x 默认启用写时复制；2.x 中写时复制是实验特性，开启后链式赋值等写法的语义会改变，
+并且是进程级设置，因此只在自动更新配置 copy_on_write 为 true 时由服务器 run() 开启:
+    {"copy_on_write": true}
+BaseDataCache / MemoizedDataAccess 在每次读取时检查当前模式：已启用时返回零拷贝视图，否则深拷贝。
+"""
+import pandas as pd
+
+
+def copy_on_write_active() -> bool:
+    """当前进程是否启用了写时复制"""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    try:
+        return pd.options.mode.copy_on_write is True
+    except Exception:
+        return False
+
+
+def enable_copy_on_write() -> bool:
+    """开启写时复制（进程级设置），返回是否已启用"""
+    if not copy_on_write_active():
+        try:
+            pd.set_option('mode.copy_on_write', True)
+        except Exception:
+            return False
+    return copy_on_write_active()
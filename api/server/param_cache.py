@@ -0,0 +1,120 @@
+"""
+参数化结果缓存 - 按 端点 + 规范化参数 + 源数据版本 缓存带参数端点（板块、日期范围）的响应
+Author: data_panel开发团队
+Date: 2025-08-12
+
+启动缓存忽略请求参数，板块/日期范围类端点因此每次点击都重新计算。
+这里每个参数组合单独缓存，源数据版本变化或超过TTL时失效，总条目数和总字节数按LRU淘汰。
+
+在 components_config.json 中为组件配置（参数为组件 params 声明规范化后的参数，见 cache_params.py）:
+    "cache": {"strategy": "param_lru", "ttl": 0}
+    ttl 为0时只按源数据版本失效，盘中实时数据可设置秒级TTL
+    "stale_while_revalidate": true 时失效后先返回上一份响应（metadata.stale 为 true），后台重新计算
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from encoded_payload import EncodedPayload
+
+PARAM_LRU_STRATEGY = 'param_lru'
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ParamLRUCache:
+    """按参数缓存已编码响应的LRU缓存"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()  # key -> (version, payload, stored_at)
+        self._stale_payloads: Dict[str, EncodedPayload] = {}  # key -> 标记为过期的响应
+        self._bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'expired': 0, 'stale_served': 0,
+                      'evictions': 0, 'stores': 0}
+
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """缓存键：端点 + 排序后的参数"""
+        return f"{endpoint}:{json.dumps(params or {}, sort_keys=True, default=str)}"
+
+    @staticmethod
+    def _payload_size(payload: EncodedPayload) -> int:
+        return len(payload.body) + len(payload.gzip_body or b'') + len(payload.br_body or b'')
+
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]], version: str,
+            ttl: float = 0) -> Optional[EncodedPayload]:
+        """获取版本一致且未过期的响应，失效的条目保留到被新响应替换，供 get_stale 使用"""
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            cached_version, payload, stored_at = entry
+            if cached_version != version or (ttl and time.time() - stored_at > ttl):
+                self.stats['stale' if cached_version != version else 'expired'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return payload
+
+    def get_stale(self, endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[EncodedPayload]:
+        """获取上一份响应（不检查版本），metadata 中标记 stale，不存在时返回None"""
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stale = self._stale_payloads.get(key)
+            if stale is None:
+                stale = entry[1].mark_stale(entry[2])
+                self._stale_payloads[key] = stale
+            self._entries.move_to_end(key)
+            self.stats['stale_served'] += 1
+            return stale
+
+    def put(self, endpoint: str, params: Optional[Dict[str, Any]], version: str,
+            response_data: Any) -> Optional[EncodedPayload]:
+        """编码并保存响应，无法编码（非200等）时不缓存，返回None"""
+        payload = response_data if isinstance(response_data, EncodedPayload) else EncodedPayload.from_response(response_data)
+        if payload is None:
+            return None
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (version, payload, time.time())
+            self._bytes += self._payload_size(payload)
+            self.stats['stores'] += 1
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+        return payload
+
+    def _remove(self, key: str):
+        """移除条目（调用方持有锁）"""
+        entry = self._entries.pop(key, None)
+        self._stale_payloads.pop(key, None)
+        if entry is not None:
+            self._bytes -= self._payload_size(entry[1])
+
+    def clear(self) -> int:
+        """清空缓存，返回清除的条目数"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._stale_payloads.clear()
+            self._bytes = 0
+            return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            total = self.stats['hits'] + self.stats['misses'] + self.stats['stale'] + self.stats['expired']
+            return {**self.stats, 'entries': len(self._entries), 'bytes': self._bytes,
+                    'max_entries': self.max_entries, 'max_bytes': self.max_bytes,
+                    'hit_rate': round(self.stats['hits'] / total, 3) if total else 0}
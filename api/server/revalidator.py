@@ -0,0 +1,77 @@
+"""
+后台重新验证 - stale-while-revalidate 模式下在后台重新计算过期的缓存响应
+Author: data_panel开发团队
+Date: 2025-08-12
+
+数据文件更新后，请求立即得到上一份有效响应（metadata 标记为 stale），
+重新计算在后台线程中执行；相同缓存键同时只有一个重新计算任务。
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# 后台重新计算线程数
+DEFAULT_REVALIDATE_WORKERS = int(os.environ.get('DATA_PANEL_REVALIDATE_WORKERS', 2))
+
+
+class BackgroundRevalidator:
+    """后台重新计算器，按缓存键去重"""
+
+    def __init__(self, max_workers: int = DEFAULT_REVALIDATE_WORKERS, logger=None):
+        self.max_workers = max(1, max_workers)
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._pending: Dict[str, float] = {}  # 缓存键 -> 提交时间
+        self._executor = None
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0}
+
+    def submit(self, key: str, func: Callable[[], Any]) -> bool:
+        """提交后台重新计算，相同键的任务正在进行时忽略并返回False"""
+        with self._lock:
+            if key in self._pending:
+                self.stats['deduplicated'] += 1
+                return False
+            self._pending[key] = time.time()
+            self.stats['submitted'] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='revalidate')
+            executor = self._executor
+        executor.submit(self._run, key, func)
+        return True
+
+    def _run(self, key: str, func: Callable[[], Any]):
+        status = 'completed'
+        try:
+            func()
+        except Exception as e:
+            status = 'failed'
+            message = f"后台重新计算失败 {key}: {e}"
+            if self.logger:
+                self.logger.warning(message)
+            else:
+                print(message)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+                self.stats[status] += 1
+
+    def is_pending(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def wait_idle(self, timeout: float = 10) -> bool:
+        """等待所有后台任务完成（用于测试和关闭服务）"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if not self._pending:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取后台重新计算统计信息"""
+        with self._lock:
+            return {**self.stats, 'pending': len(self._pending), 'max_workers': self.max_workers}
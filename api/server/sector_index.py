@@ -0,0 +1,177 @@
+"""
+板块成员索引模块 - 板块↔股票映射只在数据刷新时构建一次，提供O(1)查询和子串模糊查询
+Author: data_panel开发团队
+Date: 2025-08-10
+"""
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+
+class SectorIndex:
+    """板块成员索引：板块→股票id、股票id→板块，以及板块名的二元字符(bigram)索引"""
+
+    def __init__(self, pairs: Iterable[Tuple[Any, str]] = ()):
+        self._sector_to_ids: Dict[str, List[Any]] = {}
+        self._id_to_sectors: Dict[Any, List[str]] = {}
+        self._grams: Dict[str, set] = {}
+        self._search_cache: Dict[Tuple[str, bool], List[Any]] = {}
+        for stock_id, sector in pairs:
+            self._add(stock_id, sector)
+        self._build_gram_index()
+
+    # ===== 构建 =====
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, id_col: str, sector_col: str) -> 'SectorIndex':
+        """从每行一个 (股票id, 板块名) 的DataFrame构建"""
+        if df is None or df.empty:
+            return cls()
+        pairs = df[[id_col, sector_col]].dropna()
+        return cls(zip(pairs[id_col].tolist(), pairs[sector_col].astype(str).tolist()))
+
+    @classmethod
+    def from_concept_frame(cls, concept_df: pd.DataFrame, name_col: str = 'concept_name',
+                           stocks_col: str = 'stocks', sep: str = ',') -> 'SectorIndex':
+        """从概念数据构建，每行一个板块，成分股为逗号分隔的代码字符串"""
+        if concept_df is None or concept_df.empty:
+            return cls()
+
+        def pairs():
+            for name, stocks in zip(concept_df[name_col].tolist(), concept_df[stocks_col].tolist()):
+                if pd.isna(stocks):
+                    continue
+                for stock in str(stocks).split(sep):
+                    stock = stock.strip()
+                    if stock.isdigit():
+                        yield int(stock), str(name)
+
+        return cls(pairs())
+
+    def _add(self, stock_id, sector: str):
+        sectors = self._id_to_sectors.setdefault(stock_id, [])
+        if sector in sectors:
+            return
+        sectors.append(sector)
+        self._sector_to_ids.setdefault(sector, []).append(stock_id)
+
+    def _build_gram_index(self):
+        """按板块名的小写单字和二元字符建立倒排索引"""
+        for sector in self._sector_to_ids:
+            for gram in self._name_grams(sector.lower()):
+                self._grams.setdefault(gram, set()).add(sector)
+
+    @staticmethod
+    def _name_grams(text: str) -> set:
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return grams
+
+    # ===== 查询 =====
+
+    def get_ids(self, sector: str) -> List[Any]:
+        """板块名精确匹配，返回成分股id列表"""
+        return list(self._sector_to_ids.get(sector, []))
+
+    def get_sectors(self, stock_id) -> List[str]:
+        """返回股票所属的板块列表"""
+        return list(self._id_to_sectors.get(stock_id, []))
+
+    def find_sectors(self, keyword: str, case: bool = False) -> List[str]:
+        """返回名称包含keyword的板块（子串匹配）"""
+        if not keyword:
+            return []
+        needle = keyword if case else keyword.lower()
+        grams = [needle[i:i + 2] for i in range(len(needle) - 1)] or [needle]
+        candidates = None
+        for gram in grams:
+            posting = self._grams.get(gram.lower(), set())
+            candidates = posting if candidates is None else candidates & posting
+            if not candidates:
+                return []
+        if case:
+            return [s for s in candidates if needle in s]
+        return [s for s in candidates if needle in s.lower()]
+
+    def search_ids(self, keyword: str, case: bool = False) -> List[Any]:
+        """返回名称包含keyword的所有板块的成分股id（去重）"""
+        cache_key = (keyword, case)
+        if cache_key not in self._search_cache:
+            ids = {}
+            for sector in sorted(self.find_sectors(keyword, case)):
+                ids.update(dict.fromkeys(self._sector_to_ids[sector]))
+            self._search_cache[cache_key] = list(ids)
+        return list(self._search_cache[cache_key])
+
+    def sector_id_map(self) -> Dict[str, List[Any]]:
+        """板块→股票id列表的字典（副本）"""
+        return {sector: list(ids) for sector, ids in self._sector_to_ids.items()}
+
+    @property
+    def sectors(self) -> List[str]:
+        return list(self._sector_to_ids)
+
+    def __len__(self):
+        return len(self._sector_to_ids)
+
+
+def _resolve(source):
+    """source 为函数时调用它获取数据"""
+    return source() if callable(source) else source
+
+
+class SectorIndexService:
+    """板块索引服务 - 按名称管理多个索引，刷新键变化时才重建"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Tuple[Any, SectorIndex]] = {}
+        self.stats = {'builds': 0, 'hits': 0}
+
+    def get(self, name: str, refresh_key: Any, builder: Callable[[], SectorIndex]) -> SectorIndex:
+        """
+        获取索引
+
+        Args:
+            name: 索引名称，如 'affinity'、'ths_concept'、'kpl_concept'
+            refresh_key: 刷新键（如数据指纹、交易日），变化时重建索引
+            builder: 构建索引的函数
+        """
+        with self._lock:
+            cached = self._indexes.get(name)
+            if cached is not None and cached[0] == refresh_key:
+                self.stats['hits'] += 1
+                return cached[1]
+
+        index = builder()
+        with self._lock:
+            self._indexes[name] = (refresh_key, index)
+            self.stats['builds'] += 1
+        print(f"🗂️ 已构建板块索引: {name} ({len(index)} 个板块)")
+        return index
+
+    def frame_index(self, name: str, refresh_key: Any, source, id_col: str, sector_col: str) -> SectorIndex:
+        """按 (股票id, 板块名) 行数据获取索引，source 可以是DataFrame或返回DataFrame的函数"""
+        return self.get(name, refresh_key,
+                        lambda: SectorIndex.from_frame(_resolve(source), id_col, sector_col))
+
+    def concept_index(self, name: str, refresh_key: Any, source, name_col: str = 'concept_name',
+                      stocks_col: str = 'stocks') -> SectorIndex:
+        """按概念数据（逗号分隔的成分股）获取索引，source 可以是DataFrame或返回DataFrame的函数"""
+        return self.get(name, refresh_key,
+                        lambda: SectorIndex.from_concept_frame(_resolve(source), name_col, stocks_col))
+
+    def peek(self, name: str) -> Optional[SectorIndex]:
+        """获取已构建的索引，不存在时返回None"""
+        cached = self._indexes.get(name)
+        return cached[1] if cached else None
+
+    def clear(self):
+        """清空所有索引"""
+        with self._lock:
+            self._indexes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        return {**self.stats, 'indexes': {name: len(index) for name, (_, index) in self._indexes.items()}}
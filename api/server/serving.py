@@ -0,0 +1,126 @@
+"""
+服务运行模式 - 开发模式使用Flask多线程开发服务器，生产模式使用gevent协程WSGI服务器
+Author: data_panel开发团队
+Date: 2025-08-10
+
+生产模式下每个SSE连接只占用一个协程（几KB内存），而不是一个系统线程，
+因此可以支撑数千个空闲的仪表盘连接。
+生产模式只有一个服务进程，CPU密集的pandas计算不会让出执行权，计算期间所有请求和SSE推送都会等待，
+因此生产模式下未配置 execution.mode 的组件默认在处理器进程池中计算（见 process_pool.py）。
+仍在服务进程中执行的部分（配置为 local 的组件、startup_once 预热、响应编码和SSE推送）不能并行，
+各工作进程也各自保存一份数据缓存。
+
+用法:
+    python api/server/market_review_server.py --production
+    或设置环境变量 DATA_PANEL_SERVE_MODE=production
+
+gevent 的 monkey patch 必须先于 queue/socket/flask 等模块的导入和模块级锁的创建，
+因此由入口模块在其他导入之前调用:
+    import serving
+    serving.patch_for_serve_mode()
+main() 中的 prepare_serve_mode() 只解析运行模式，不再打补丁；入口未提前启用时生产模式回退到多线程服务器。
+"""
+import os
+import sys
+from typing import List, Optional
+
+DEV_MODE = 'dev'
+PRODUCTION_MODE = 'production'
+
+# 生产模式下允许的最大SSE客户端数
+PRODUCTION_MAX_CLIENTS = int(os.environ.get('DATA_PANEL_PRODUCTION_MAX_CLIENTS', 5000))
+
+# 须在monkey patch之后导入的模块，在此之前已导入时不能再启用协程运行时
+PATCH_SENSITIVE_MODULES = ('queue', 'socket', 'ssl', 'select', 'concurrent.futures', 'werkzeug', 'flask')
+
+# 本模块导入时（导入gevent之前）已经加载的上述模块
+_imported_before_serving = [name for name in PATCH_SENSITIVE_MODULES if name in sys.modules]
+
+try:
+    import gevent  # noqa: F401
+    HAS_GEVENT = True
+except ImportError:
+    HAS_GEVENT = False
+
+
+def parse_serve_mode(argv: Optional[List[str]] = None) -> str:
+    """从命令行参数（--production / --serve=production）或环境变量获取运行模式"""
+    argv = sys.argv[1:] if argv is None else argv
+    if '--production' in argv:
+        return PRODUCTION_MODE
+    for arg in argv:
+        if arg.startswith('--serve='):
+            return PRODUCTION_MODE if arg.split('=', 1)[1] == PRODUCTION_MODE else DEV_MODE
+    return PRODUCTION_MODE if os.environ.get('DATA_PANEL_SERVE_MODE') == PRODUCTION_MODE else DEV_MODE
+
+
+def late_imported_modules() -> List[str]:
+    """在monkey patch之前已经导入的阻塞相关模块（gevent自身导入的除外）"""
+    late = list(_imported_before_serving)
+    late += [name for name in ('werkzeug', 'flask') if name in sys.modules and name not in late]
+    return late
+
+
+def enable_cooperative_runtime() -> bool:
+    """
+    启用gevent协程运行时（monkey patch），必须在入口模块导入 queue/socket/flask 等模块之前调用。
+    之后 queue.Queue.get、time.sleep、socket 等阻塞调用都会让出执行权而不是占用线程。
+    这些模块已经导入时不打补丁（部分补丁会导致模块级锁等对象失效），返回False
+    """
+    if is_cooperative():
+        return True
+    if not HAS_GEVENT:
+        print("⚠️ 未安装gevent，生产模式将回退到多线程服务器 (pip install gevent)")
+        return False
+    late = late_imported_modules()
+    if late:
+        print(f"⚠️ {', '.join(late)} 已在gevent monkey patch之前导入，生产模式将回退到多线程服务器")
+        return False
+    from gevent import monkey
+    monkey.patch_all()
+    print("🌿 已启用gevent协程运行时")
+    return True
+
+
+def patch_for_serve_mode(argv: Optional[List[str]] = None) -> str:
+    """入口模块在其他导入之前调用：解析运行模式，生产模式时启用协程运行时"""
+    serve_mode = parse_serve_mode(argv)
+    if serve_mode == PRODUCTION_MODE:
+        enable_cooperative_runtime()
+    return serve_mode
+
+
+def prepare_serve_mode(argv: Optional[List[str]] = None) -> str:
+    """
+    解析运行模式；在服务器main()的最开始调用。此时 flask 等模块早已导入，不再打补丁，
+    入口模块未通过 patch_for_serve_mode 提前启用协程运行时时生产模式回退到多线程服务器
+    """
+    serve_mode = parse_serve_mode(argv)
+    if serve_mode == PRODUCTION_MODE and HAS_GEVENT and not is_cooperative():
+        print("⚠️ 入口模块未在导入其他模块之前启用gevent协程运行时，生产模式将回退到多线程服务器")
+    return serve_mode
+
+
+def is_cooperative() -> bool:
+    """当前是否运行在协程运行时中（按gevent的补丁状态判断，入口以包内相对导入本模块时状态同样一致）"""
+    if not HAS_GEVENT:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('socket')
+
+
+def run_production_server(app, host: str, port: int, logger) -> bool:
+    """
+    使用gevent WSGI服务器运行应用
+
+    Returns:
+        bool: 是否已以生产模式运行（未安装gevent或入口未提前启用协程运行时时返回False，由调用方回退）
+    """
+    if not is_cooperative():
+        return False
+    from gevent.pywsgi import WSGIServer
+
+    logger.info(f"生产模式启动: gevent WSGIServer {host}:{port}")
+    # log=None 关闭逐请求访问日志，SSE长连接较多时避免日志刷屏
+    WSGIServer((host, port), app, log=None, error_log=logger).serve_forever()
+    return True
@@ -55,7 +55,6 @@ class StackedAreaDemoServer(BaseStockServer):
             "componentId": "stackedAreaChart1", 
             "timestamp": time.time()
         }
-        self.sse_clients = []
         self.message_queue = queue.Queue()
         
         # 初始化所有类型的演示数据
@@ -508,64 +507,6 @@ class StackedAreaDemoServer(BaseStockServer):
             "chart_type": chart_type
         })
 
-    def dashboard_updates(self):
-        """SSE事件流"""
-        def event_stream():
-            client_queue = queue.Queue()
-            client_id = f"stacked_client_{len(self.sse_clients)}_{time.time()}"
-            
-            try:
-                self.sse_clients.append(client_queue)
-                self.logger.info(f"堆叠图SSE客户端连接: {client_id}，当前总连接数: {len(self.sse_clients)}")
-                
-                connection_info = {
-                    "type": "connection_established",
-                    "client_id": client_id,
-                    "timestamp": time.time(),
-                    "server_status": "online"
-                }
-                yield f"data: {json.dumps(connection_info)}\n\n"
-                yield f"data: {json.dumps(self.latest_update)}\n\n"
-                
-                while True:
-                    try:
-                        message = client_queue.get(block=True, timeout=10)
-                        yield message
-                    except queue.Empty:
-                        heartbeat = {
-                            "type": "heartbeat",
-                            "client_id": client_id,
-                            "timestamp": time.time(),
-                            "server_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "active_connections": len(self.sse_clients),
-                            "stacked_status": "running"
-                        }
-                        yield f"data: {json.dumps(heartbeat)}\n\n"
-                        continue
-                    except GeneratorExit:
-                        self.logger.info(f"堆叠图SSE客户端主动断开: {client_id}")
-                        break
-                        
-            except Exception as e:
-                self.logger.error(f"堆叠图SSE连接异常 {client_id}: {e}")
-            finally:
-                if client_queue in self.sse_clients:
-                    self.sse_clients.remove(client_queue)
-                    self.logger.info(f"堆叠图SSE客户端清理: {client_id}，剩余连接数: {len(self.sse_clients)}")
-        
-        response = Response(event_stream(), mimetype="text/event-stream")
-        response.headers.update({
-            'Cache-Control': 'no-cache, no-store, must-revalidate',
-            'Pragma': 'no-cache',
-            'Expires': '0',
-            'X-Accel-Buffering': 'no',
-            'Connection': 'keep-alive',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Cache-Control',
-            'Keep-Alive': 'timeout=30, max=1000'
-        })
-        return response
-
     def regenerate_stacked_data(self):
         """重新生成堆叠数据"""
         try:
@@ -588,14 +529,6 @@ class StackedAreaDemoServer(BaseStockServer):
 
     # ===== 辅助方法 =====
     
-    def _send_update_to_clients(self, data):
-        """发送更新到所有SSE客户端"""
-        for client in list(self.sse_clients):
-            try:
-                client.put(f"data: {json.dumps(data)}\n\n")
-            except:
-                self.sse_clients.remove(client)
-
     def _generate_fund_flow_data(self):
         """生成资金流向基础数据"""
         time_segments = ["09:30", "10:00", "10:30", "11:00", "11:30", "14:00", "14:30", "15:00"]
@@ -88,7 +88,6 @@ class MultiPlateStockServer(BaseStockServer, SourceDataLogicMixin):
             "componentId": "chart2", 
             "timestamp": time.time()
         }
-        self.sse_clients = []
         self.message_queue = queue.Queue()
         
         # 初始化股票数据
@@ -312,66 +311,6 @@ class MultiPlateStockServer(BaseStockServer, SourceDataLogicMixin):
             "updated_titles": self.dynamic_titles
         })
 
-    def dashboard_updates(self):
-        """SSE事件流"""
-        def event_stream():
-            client_queue = queue.Queue()
-            client_id = f"client_{len(self.sse_clients)}_{time.time()}"
-            
-            try:
-                self.sse_clients.append(client_queue)
-                self.logger.info(f"SSE客户端连接: {client_id}，当前总连接数: {len(self.sse_clients)}")
-                
-                connection_info = {
-                    "type": "connection_established",
-                    "client_id": client_id,
-                    "timestamp": time.time(),
-                    "server_status": "online"
-                }
-                yield f"data: {json.dumps(connection_info)}\n\n"
-                
-                # 不再自动发送latest_update，避免无差别刷新
-                # 只在有实际更新时才发送
-                # yield f"data: {json.dumps(self.latest_update)}\n\n"
-                
-                while True:
-                    try:
-                        message = client_queue.get(block=True, timeout=10)
-                        yield message
-                    except queue.Empty:
-                        heartbeat = {
-                            "type": "heartbeat",
-                            "client_id": client_id,
-                            "timestamp": time.time(),
-                            "server_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "active_connections": len(self.sse_clients)
-                        }
-                        yield f"data: {json.dumps(heartbeat)}\n\n"
-                        continue
-                    except GeneratorExit:
-                        self.logger.info(f"SSE客户端主动断开: {client_id}")
-                        break
-                        
-            except Exception as e:
-                self.logger.error(f"SSE连接异常 {client_id}: {e}")
-            finally:
-                if client_queue in self.sse_clients:
-                    self.sse_clients.remove(client_queue)
-                    self.logger.info(f"SSE客户端清理: {client_id}，剩余连接数: {len(self.sse_clients)}")
-        
-        response = Response(event_stream(), mimetype="text/event-stream")
-        response.headers.update({
-            'Cache-Control': 'no-cache, no-store, must-revalidate',
-            'Pragma': 'no-cache',
-            'Expires': '0',
-            'X-Accel-Buffering': 'no',
-            'Connection': 'keep-alive',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Cache-Control',
-            'Keep-Alive': 'timeout=30, max=1000'
-        })
-        return response
-
     def notify_update(self):
         """接收更新通知并通过SSE广播"""
         data = request.json
@@ -412,14 +351,6 @@ class MultiPlateStockServer(BaseStockServer, SourceDataLogicMixin):
 
     # ===== 辅助方法 =====
     
-    def _send_update_to_clients(self, data):
-        """发送更新到所有SSE客户端"""
-        for client in list(self.sse_clients):
-            try:
-                client.put(f"data: {json.dumps(data)}\n\n")
-            except:
-                self.sse_clients.remove(client)
-
     def _get_dynamic_titles_list(self):
         """获取动态标题列表"""
         return list(self.dynamic_titles.values())
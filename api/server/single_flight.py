@@ -0,0 +1,67 @@
+"""
+请求合并模块 - 相同缓存键的并发请求只执行一次计算，其余请求等待并共享结果
+Author: data_panel开发团队
+Date: 2025-08-10
+"""
+import threading
+from typing import Any, Callable, Dict
+
+
+class _InFlightCall:
+    """正在执行中的计算"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """单飞(single-flight)请求合并器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'executions': 0, 'coalesced': 0}
+
+    def do(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """执行func；若相同key的计算正在进行，则等待其完成并返回同一结果"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['coalesced'] += 1
+                leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            print(f"⏳ 等待进行中的相同请求: {key}")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self) -> int:
+        """当前正在执行的计算数"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取请求合并统计信息"""
+        return {**self.stats, 'in_flight': self.in_flight()}
@@ -0,0 +1,207 @@
+"""
+列式快照存储模块 - 将CSV数据源转换为二进制列式快照，避免重复解析CSV
+Author: data_panel开发团队
+Date: 2025-08-10
+
+支持的后端:
+- feather: Arrow/Feather 格式（需要安装 pyarrow）
+- numpy:   每列一个 .npy 文件，数值列以内存映射(mmap)方式打开
+- none:    不使用快照，直接解析CSV
+"""
+import os
+import json
+import shutil
+import pickle
+import hashlib
+import tempfile
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    import pyarrow.feather as feather
+    HAS_PYARROW = True
+except ImportError:
+    feather = None
+    HAS_PYARROW = False
+
+
+# 快照默认目录，可通过环境变量覆盖，多个服务进程共享同一目录
+DEFAULT_SNAPSHOT_DIR = os.environ.get(
+    'DATA_PANEL_SNAPSHOT_DIR',
+    os.path.join(tempfile.gettempdir(), 'data_panel_snapshots')
+)
+DEFAULT_SNAPSHOT_BACKEND = os.environ.get('DATA_PANEL_SNAPSHOT_BACKEND', 'auto')
+
+
+class BaseSnapshotStore:
+    """快照存储基类 - 负责快照的有效性校验、读取与写入"""
+
+    backend_name = 'base'
+    meta_file = 'meta.json'
+
+    def __init__(self, snapshot_dir: Optional[str] = None):
+        self.snapshot_dir = snapshot_dir or DEFAULT_SNAPSHOT_DIR
+        self.stats = {'snapshot_hits': 0, 'csv_parses': 0, 'snapshot_errors': 0}
+
+    def _snapshot_path(self, file_key: str, file_path: str) -> str:
+        """快照目录路径，按源文件绝对路径区分"""
+        path_hash = hashlib.md5(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.snapshot_dir, f"{file_key}_{path_hash}.{self.backend_name}")
+
+    @staticmethod
+    def _source_signature(file_path: str) -> Dict[str, Any]:
+        """源文件签名 (mtime, size)"""
+        stat = os.stat(file_path)
+        return {'mtime': stat.st_mtime, 'size': stat.st_size}
+
+    def _read_meta(self, snapshot_path: str) -> Optional[Dict[str, Any]]:
+        """读取快照元数据"""
+        try:
+            with open(os.path.join(snapshot_path, self.meta_file), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_valid(self, file_key: str, file_path: str) -> bool:
+        """检查快照是否与源文件一致"""
+        meta = self._read_meta(self._snapshot_path(file_key, file_path))
+        if not meta:
+            return False
+        try:
+            return meta.get('source') == self._source_signature(file_path)
+        except OSError:
+            return False
+
+    def load(self, file_key: str, file_path: str) -> pd.DataFrame:
+        """加载数据：快照有效时读取快照，否则解析CSV并写入快照"""
+        snapshot_path = self._snapshot_path(file_key, file_path)
+        if self.is_valid(file_key, file_path):
+            try:
+                df = self._read_snapshot(snapshot_path)
+                self.stats['snapshot_hits'] += 1
+                return df
+            except Exception as e:
+                self.stats['snapshot_errors'] += 1
+                print(f"读取快照失败，回退到CSV {file_key}: {e}")
+
+        signature = self._source_signature(file_path)
+        df = pd.read_csv(file_path)
+        self.stats['csv_parses'] += 1
+        try:
+            self._write_atomic(snapshot_path, df, signature)
+        except Exception as e:
+            self.stats['snapshot_errors'] += 1
+            print(f"写入快照失败 {file_key}: {e}")
+        return df
+
+    def _write_atomic(self, snapshot_path: str, df: pd.DataFrame, signature: Dict[str, Any]):
+        """先写入临时目录再替换，避免其他进程读到半成品"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix='.tmp_', dir=self.snapshot_dir)
+        try:
+            self._write_snapshot(tmp_path, df)
+            with open(os.path.join(tmp_path, self.meta_file), 'w', encoding='utf-8') as f:
+                json.dump({'source': signature, 'rows': len(df), 'backend': self.backend_name}, f)
+            if os.path.exists(snapshot_path):
+                shutil.rmtree(snapshot_path, ignore_errors=True)
+            os.replace(tmp_path, snapshot_path)
+        finally:
+            if os.path.exists(tmp_path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def invalidate(self, file_key: str, file_path: str):
+        """删除某个数据源的快照"""
+        shutil.rmtree(self._snapshot_path(file_key, file_path), ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取快照统计信息"""
+        return {'backend': self.backend_name, 'snapshot_dir': self.snapshot_dir, **self.stats}
+
+    def _read_snapshot(self, snapshot_path: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def _write_snapshot(self, snapshot_path: str, df: pd.DataFrame):
+        raise NotImplementedError
+
+
+class FeatherSnapshotStore(BaseSnapshotStore):
+    """Arrow/Feather 快照存储"""
+
+    backend_name = 'feather'
+    data_file = 'data.feather'
+
+    def _read_snapshot(self, snapshot_path: str) -> pd.DataFrame:
+        return feather.read_feather(os.path.join(snapshot_path, self.data_file), memory_map=True)
+
+    def _write_snapshot(self, snapshot_path: str, df: pd.DataFrame):
+        # feather 要求默认索引和字符串列名
+        frame = df.reset_index(drop=True)
+        frame.columns = [str(c) for c in frame.columns]
+        feather.write_feather(frame, os.path.join(snapshot_path, self.data_file), compression='uncompressed')
+
+
+class NumpySnapshotStore(BaseSnapshotStore):
+    """NumPy 快照存储 - 数值列以 .npy 内存映射方式打开，其他列使用pickle"""
+
+    backend_name = 'numpy'
+    object_file = 'objects.pkl'
+
+    def _read_snapshot(self, snapshot_path: str) -> pd.DataFrame:
+        meta = self._read_meta(snapshot_path)
+        with open(os.path.join(snapshot_path, self.object_file), 'rb') as f:
+            objects = pickle.load(f)
+
+        data = {}
+        for i, column in enumerate(objects['columns']):
+            if i in objects['values']:
+                data[column] = objects['values'][i]
+            else:
+                # np.asarray 去掉memmap子类，底层仍为内存映射
+                data[column] = np.asarray(np.load(os.path.join(snapshot_path, f"{i}.npy"), mmap_mode='r'))
+        df = pd.DataFrame(data, columns=objects['columns'], copy=False)
+        if len(df) != meta.get('rows', len(df)):
+            raise ValueError("快照行数与元数据不一致")
+        return df
+
+    def _write_snapshot(self, snapshot_path: str, df: pd.DataFrame):
+        values = {}
+        for i, column in enumerate(df.columns):
+            series = df.iloc[:, i]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+                np.save(os.path.join(snapshot_path, f"{i}.npy"), series.to_numpy(), allow_pickle=False)
+            else:
+                values[i] = series.reset_index(drop=True)
+        with open(os.path.join(snapshot_path, self.object_file), 'wb') as f:
+            pickle.dump({'columns': list(df.columns), 'values': values}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def create_snapshot_store(backend: Optional[str] = None, snapshot_dir: Optional[str] = None) -> Optional[BaseSnapshotStore]:
+    """
+    创建快照存储实例
+
+    Args:
+        backend: 'auto' | 'feather' | 'numpy' | 'none'，auto时优先使用feather
+        snapshot_dir: 快照目录
+
+    Returns:
+        快照存储实例，backend为none时返回None
+    """
+    backend = (backend or DEFAULT_SNAPSHOT_BACKEND).lower()
+    if backend in ('none', 'off', 'csv'):
+        return None
+    if backend == 'feather' and not HAS_PYARROW:
+        print("警告: 未安装pyarrow，快照存储回退到numpy后端")
+        backend = 'numpy'
+    if backend == 'auto':
+        backend = 'feather' if HAS_PYARROW else 'numpy'
+
+    if backend == 'feather':
+        return FeatherSnapshotStore(snapshot_dir)
+    if backend == 'numpy':
+        return NumpySnapshotStore(snapshot_dir)
+
+    print(f"警告: 未知的快照后端 {backend}，不使用快照")
+    return None
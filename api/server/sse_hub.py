@@ -0,0 +1,269 @@
+"""
+SSE广播中心 - 每个事件只序列化一次，保存在有界环形缓冲区中，订阅者通过游标读取
+Author: data_panel开发团队
+Date: 2025-08-10
+
+- 广播时只做一次 json.dumps，与订阅者数量无关
+- 最近的事件保存在固定长度的环形缓冲区中，并分配递增的序号(SSE id)
+- 每个订阅者只保存一个游标，不再为每个客户端维护无界队列；
+  慢速客户端积压过多时按键合并（同一组件只保留最新事件），仍超出时丢弃最旧的事件
+- 支持 Last-Event-ID 断线续传，缺失的事件已被挤出缓冲区时发送重新同步事件
+- 订阅者可以只订阅部分组件，带 componentId 的事件只唤醒并投递给订阅了该组件的订阅者，
+  不带 componentId 的事件（如 reload_config）投递给所有订阅者
+"""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# 环形缓冲区保存的最近事件数
+DEFAULT_RING_SIZE = 256
+# 每个订阅者一次最多积压的事件数
+DEFAULT_MAX_PENDING = 32
+
+
+def encode_sse(data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """将数据编码为SSE消息"""
+    message = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return f"id: {event_id}\n{message}" if event_id is not None else message
+
+
+def _coalesce_key(data: Dict[str, Any]) -> Optional[str]:
+    """合并键：同一组件的更新、同一类型的动作只需保留最新一条"""
+    if data.get('componentId'):
+        return f"component:{data['componentId']}"
+    if data.get('action'):
+        return f"action:{data['action']}"
+    return None
+
+
+class SSEEvent:
+    """已编码的广播事件"""
+
+    __slots__ = ('seq', 'data', 'message', 'key', 'component_id')
+
+    def __init__(self, seq: int, data: Dict[str, Any]):
+        self.seq = seq
+        self.data = data
+        self.message = encode_sse(data, seq)
+        self.key = _coalesce_key(data)
+        self.component_id = data.get('componentId')
+
+
+class Subscriber:
+    """订阅者：只记录已读取到的事件序号"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, cursor: int, client_id: Optional[str] = None,
+                 components: Optional[Iterable[str]] = None):
+        self.id = next(self._ids)
+        self.client_id = client_id or f"client_{self.id}_{time.time()}"
+        self.cursor = cursor
+        # 订阅的组件ID集合，None 表示订阅全部
+        self.components = frozenset(components) if components else None
+        self.connected_at = time.time()
+        self.dropped = 0
+        self.closed = False
+        self.wakeup = threading.Event()
+
+    def wants(self, event: 'SSEEvent') -> bool:
+        """是否订阅了该事件"""
+        return self.components is None or event.component_id is None or event.component_id in self.components
+
+
+class BroadcastHub:
+    """SSE广播中心"""
+
+    def __init__(self, ring_size: int = DEFAULT_RING_SIZE, max_pending: int = DEFAULT_MAX_PENDING):
+        self._cond = threading.Condition()
+        self._ring = deque(maxlen=ring_size)
+        self._seq = 0
+        self._subscribers: Dict[int, Subscriber] = {}
+        self.max_pending = max_pending
+        self.stats = {'published': 0, 'delivered': 0, 'coalesced': 0, 'dropped': 0, 'resyncs': 0,
+                      'woken': 0}
+
+    # ===== 发布 =====
+
+    def publish(self, data: Dict[str, Any]) -> SSEEvent:
+        """发布事件（只编码一次）并唤醒所有等待中的订阅者"""
+        with self._cond:
+            self._seq += 1
+            event = SSEEvent(self._seq, data)
+            self._ring.append(event)
+            self.stats['published'] += 1
+            for subscriber in self._subscribers.values():
+                if subscriber.wants(event):
+                    subscriber.wakeup.set()
+                    self.stats['woken'] += 1
+        return event
+
+    # ===== 订阅 =====
+
+    def subscribe(self, last_event_id: Optional[str] = None, client_id: Optional[str] = None,
+                  components: Optional[Iterable[str]] = None) -> Subscriber:
+        """
+        新建订阅者
+
+        Args:
+            last_event_id: 浏览器重连时携带的 Last-Event-ID，从该事件之后继续推送
+            client_id: 客户端标识
+            components: 订阅的组件ID，为空时订阅全部
+        """
+        with self._cond:
+            cursor = self._seq
+            resume_from = self._parse_event_id(last_event_id)
+            if resume_from is not None:
+                cursor = resume_from
+            subscriber = Subscriber(cursor, client_id, components)
+            self._subscribers[subscriber.id] = subscriber
+            return subscriber
+
+    def update_subscription(self, client_id: str, components: Optional[Iterable[str]] = None,
+                            mode: str = 'set') -> Optional[Subscriber]:
+        """
+        修改订阅的组件
+
+        Args:
+            client_id: 客户端标识（连接建立时下发）
+            components: 组件ID列表
+            mode: set 替换、add 追加、remove 移除；set 且组件为空时订阅全部
+        """
+        with self._cond:
+            subscriber = next((s for s in self._subscribers.values() if s.client_id == client_id), None)
+            if subscriber is None:
+                return None
+            components = set(components or [])
+            if mode == 'add':
+                if subscriber.components is not None:
+                    subscriber.components = subscriber.components | components
+            elif mode == 'remove':
+                if subscriber.components is not None:
+                    subscriber.components = subscriber.components - components
+            else:
+                subscriber.components = frozenset(components) if components else None
+            return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """移除订阅者"""
+        with self._cond:
+            subscriber.closed = True
+            self._subscribers.pop(subscriber.id, None)
+            subscriber.wakeup.set()
+
+    @staticmethod
+    def _parse_event_id(last_event_id) -> Optional[int]:
+        try:
+            return int(last_event_id) if last_event_id not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
+
+    # ===== 读取 =====
+
+    def wait(self, subscriber: Subscriber, timeout: Optional[float] = None) -> List[str]:
+        """
+        等待并返回订阅者尚未读取的已编码消息，超时返回空列表
+
+        游标落后于缓冲区（事件已被挤出）或大于当前序号（服务重启）时，
+        返回一条重新同步消息，提示客户端重新加载配置
+        """
+        with self._cond:
+            messages = [] if subscriber.closed else self._collect(subscriber)
+            if messages or subscriber.closed:
+                return messages
+            subscriber.wakeup.clear()
+
+        # 只有发布了该订阅者关心的事件才会被唤醒
+        subscriber.wakeup.wait(timeout)
+        with self._cond:
+            return [] if subscriber.closed else self._collect(subscriber)
+
+    def _has_pending(self, subscriber: Subscriber) -> bool:
+        return subscriber.cursor != self._seq
+
+    def _collect(self, subscriber: Subscriber) -> List[str]:
+        """读取游标之后的事件，并应用合并/丢弃策略（调用方持有锁）"""
+        if not self._has_pending(subscriber):
+            return []
+
+        oldest = self._ring[0].seq if self._ring else self._seq + 1
+        messages = []
+        if subscriber.cursor > self._seq or subscriber.cursor < oldest - 1:
+            # 缺失的事件无法补发，通知客户端重新同步
+            self.stats['resyncs'] += 1
+            messages.append(encode_sse({"action": "reload_config", "reason": "resync",
+                                        "timestamp": time.time()}, self._seq))
+            subscriber.cursor = self._seq
+            return messages
+
+        pending = [event for event in self._ring if event.seq > subscriber.cursor and subscriber.wants(event)]
+        subscriber.cursor = self._seq
+
+        if len(pending) > self.max_pending:
+            pending = self._coalesce(pending)
+        if len(pending) > self.max_pending:
+            dropped = len(pending) - self.max_pending
+            pending = pending[dropped:]
+            subscriber.dropped += dropped
+            self.stats['dropped'] += dropped
+
+        self.stats['delivered'] += len(pending)
+        return [event.message for event in pending]
+
+    def _coalesce(self, events: List[SSEEvent]) -> List[SSEEvent]:
+        """同一合并键只保留最新的事件，保持原有顺序"""
+        latest = {}
+        for event in events:
+            if event.key is not None:
+                latest[event.key] = event.seq
+        result = [event for event in events if event.key is None or latest[event.key] == event.seq]
+        self.stats['coalesced'] += len(events) - len(result)
+        return result
+
+    # ===== 状态 =====
+
+    def subscriber_count(self) -> int:
+        """当前订阅者数"""
+        with self._cond:
+            return len(self._subscribers)
+
+    def subscribers(self) -> List[Subscriber]:
+        """当前订阅者列表（副本）"""
+        with self._cond:
+            return list(self._subscribers.values())
+
+    def last_event_id(self) -> int:
+        """最新事件序号"""
+        return self._seq
+
+    def trim_subscribers(self, max_subscribers: int) -> int:
+        """订阅者超过上限时关闭最早连接的订阅者，返回关闭的数量"""
+        with self._cond:
+            excess = len(self._subscribers) - max_subscribers
+            if excess <= 0:
+                return 0
+            for subscriber in sorted(self._subscribers.values(), key=lambda s: s.connected_at)[:excess]:
+                subscriber.closed = True
+                self._subscribers.pop(subscriber.id, None)
+                subscriber.wakeup.set()
+            return excess
+
+    def interested_components(self) -> Optional[Set[str]]:
+        """所有订阅者关心的组件ID并集；有订阅全部的订阅者时返回None"""
+        with self._cond:
+            components = set()
+            for subscriber in self._subscribers.values():
+                if subscriber.components is None:
+                    return None
+                components |= subscriber.components
+            return components
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取广播统计信息"""
+        with self._cond:
+            return {**self.stats, 'subscribers': len(self._subscribers), 'last_event_id': self._seq,
+                    'buffered_events': len(self._ring), 'ring_size': self._ring.maxlen,
+                    'max_pending': self.max_pending}
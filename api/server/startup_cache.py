@@ -2,12 +2,15 @@
 启动缓存模块 - 支持启动时只执行一次的缓存策略
 Author: data_panel开发团队
 Date: 2025-08-01
+
+缓存中保存预编码（含gzip/br压缩版本）的响应字节，命中时直接返回，不再解析和重新序列化JSON
 """
 import time
 import json
 import hashlib
 from typing import Dict, Any, Optional, Tuple
-from flask import jsonify
+
+from encoded_payload import EncodedPayload
 
 
 class StartupOnceCache:
@@ -30,24 +33,48 @@ class StartupOnceCache:
         
         if cached_data:
             print(f"🔒 使用启动时缓存: {endpoint}")
-            # 添加缓存标识
-            if hasattr(cached_data, 'json') and cached_data.json:
-                data = cached_data.json.copy()
-                if isinstance(data, dict) and 'metadata' in data:
-                    data['metadata']['cached'] = True
-                    data['metadata']['cache_type'] = 'startup_once'
-                    data['metadata']['cached_at'] = self.startup_time
-                return jsonify(data)
+            if isinstance(cached_data, EncodedPayload):
+                return cached_data.to_response()
         
         return cached_data
     
     def set_startup_cache(self, endpoint: str, params: Optional[Dict] = None, response_data=None):
-        """设置启动时缓存"""
+        """设置启动时缓存：添加缓存标识后编码一次，之后的命中直接返回字节"""
         cache_key = self._generate_startup_key(endpoint, params)
-        self.startup_cache[cache_key] = response_data
+        self.startup_cache[cache_key] = self._encode(response_data)
         self.startup_flags[cache_key] = True
         print(f"💾 已设置启动时缓存: {endpoint}")
     
+    def restore_startup_cache(self, endpoint: str, params: Optional[Dict] = None,
+                              payload: Optional[EncodedPayload] = None):
+        """恢复已编码的缓存条目（如从持久化缓存读取），不重新编码"""
+        cache_key = self._generate_startup_key(endpoint, params)
+        self.startup_cache[cache_key] = payload
+        self.startup_flags[cache_key] = True
+        print(f"♻️ 已恢复启动时缓存: {endpoint}")
+    
+    def get_payload(self, endpoint: str, params: Optional[Dict] = None) -> Optional[EncodedPayload]:
+        """获取已编码的缓存条目，未缓存或无法编码时返回None"""
+        cached_data = self.startup_cache.get(self._generate_startup_key(endpoint, params))
+        return cached_data if isinstance(cached_data, EncodedPayload) else None
+    
+    def _encode(self, response_data):
+        """将响应编码为不可变字节，无法编码（非200、非Flask响应）时原样保存"""
+        try:
+            data = response_data.get_json(silent=True) if hasattr(response_data, 'get_json') else None
+            if isinstance(data, dict) and isinstance(data.get('metadata'), dict):
+                # 添加缓存标识
+                data['metadata']['cached'] = True
+                data['metadata']['cache_type'] = 'startup_once'
+                data['metadata']['cached_at'] = self.startup_time
+                payload = EncodedPayload.from_json(data)
+            else:
+                payload = EncodedPayload.from_response(response_data)
+            return payload if payload is not None else response_data
+        except Exception as e:
+            print(f"编码启动缓存失败: {e}")
+            return response_data
+    
     def _generate_startup_key(self, endpoint: str, params: Optional[Dict] = None) -> str:
         """生成启动缓存键"""
         if params:
@@ -65,9 +92,13 @@ class StartupOnceCache:
     
     def get_startup_cache_stats(self) -> Dict[str, Any]:
         """获取启动缓存统计信息"""
+        payloads = [value for value in self.startup_cache.values() if isinstance(value, EncodedPayload)]
         return {
             'cached_endpoints': len(self.startup_cache),
             'startup_time': self.startup_time,
             'cache_age_seconds': time.time() - self.startup_time,
-            'cache_keys': list(self.startup_cache.keys())
+            'cache_keys': list(self.startup_cache.keys()),
+            'encoded_endpoints': len(payloads),
+            'encoded_bytes': sum(len(p.body) for p in payloads),
+            'gzip_bytes': sum(len(p.gzip_body or p.body) for p in payloads)
         }
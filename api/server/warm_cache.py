@@ -0,0 +1,153 @@
+"""
+持久化预热缓存 - 将启动缓存的已编码响应保存到SQLite文件，服务重启后直接恢复
+Author: data_panel开发团队
+Date: 2025-08-12
+
+- 缓存条目按 服务器 + 端点 + 参数 保存，并记录保存时的源数据指纹
+- 启动时指纹仍然一致的条目立即恢复到内存，只有失效的端点需要重新计算
+- 指纹必须跨进程稳定（数据文件mtime/大小、交易日），不能使用进程内的版本号
+
+配置:
+    环境变量 DATA_PANEL_WARM_CACHE 指定SQLite文件路径，设为 off 时禁用；
+    未设置时使用 api/cache/warm_start.sqlite3
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from encoded_payload import EncodedPayload
+
+DEFAULT_WARM_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                       'cache', 'warm_start.sqlite3')
+DISABLED_VALUES = ('', '0', 'off', 'false', 'none')
+
+
+def resolve_warm_cache_path(configured: Optional[str] = None) -> Optional[str]:
+    """解析持久化缓存文件路径，返回None表示禁用"""
+    path = configured if configured is not None else os.environ.get('DATA_PANEL_WARM_CACHE', DEFAULT_WARM_CACHE_PATH)
+    return None if str(path).strip().lower() in DISABLED_VALUES else path
+
+
+class WarmStartCache:
+    """SQLite持久化的预热缓存，文件在第一次写入时创建"""
+
+    def __init__(self, path: Optional[str], namespace: str = 'default'):
+        self.path = path
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.stats = {'restored': 0, 'stale': 0, 'missing': 0, 'saved': 0, 'errors': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    @staticmethod
+    def _make_key(endpoint: str, params: Optional[Dict] = None) -> str:
+        if params:
+            return f"{endpoint}:{json.dumps(params, sort_keys=True, default=str)}"
+        return endpoint
+
+    def _connect(self, create: bool = False) -> Optional[sqlite3.Connection]:
+        """打开数据库（调用方持有锁），文件不存在且不创建时返回None"""
+        if not create and not os.path.exists(self.path):
+            return None
+        if create:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS warm_cache (
+                    namespace TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    gzip_body BLOB,
+                    br_body BLOB,
+                    etag TEXT NOT NULL,
+                    mimetype TEXT NOT NULL,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, cache_key)
+                )
+            """)
+            self._initialized = True
+        return conn
+
+    def load(self, endpoint: str, params: Optional[Dict], fingerprint: str) -> Optional[EncodedPayload]:
+        """读取指纹一致的缓存条目，不存在或已失效时返回None"""
+        if not self.enabled or not fingerprint:
+            return None
+        try:
+            with self._lock:
+                conn = self._connect()
+                if conn is None:
+                    self.stats['missing'] += 1
+                    return None
+                with conn:
+                    row = conn.execute(
+                        "SELECT fingerprint, body, gzip_body, br_body, etag, mimetype, status, headers "
+                        "FROM warm_cache WHERE namespace = ? AND cache_key = ?",
+                        (self.namespace, self._make_key(endpoint, params))).fetchone()
+                conn.close()
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            print(f"读取持久化缓存失败 {endpoint}: {e}")
+            return None
+
+        if row is None:
+            self.stats['missing'] += 1
+            return None
+        if row[0] != fingerprint:
+            self.stats['stale'] += 1
+            return None
+        self.stats['restored'] += 1
+        return EncodedPayload.from_parts(row[1], row[2], row[3], row[4], row[5], row[6], json.loads(row[7]))
+
+    def save(self, endpoint: str, params: Optional[Dict], fingerprint: str, payload: EncodedPayload) -> bool:
+        """保存已编码响应及其源数据指纹"""
+        if not self.enabled or not fingerprint or payload is None:
+            return False
+        try:
+            with self._lock:
+                conn = self._connect(create=True)
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO warm_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (self.namespace, self._make_key(endpoint, params), fingerprint, payload.body,
+                         payload.gzip_body, payload.br_body, payload.etag, payload.mimetype, payload.status,
+                         json.dumps(payload.headers), time.time()))
+                conn.close()
+            self.stats['saved'] += 1
+            return True
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            print(f"保存持久化缓存失败 {endpoint}: {e}")
+            return False
+
+    def clear(self) -> int:
+        """清除当前服务器的所有持久化条目，返回清除的数量"""
+        if not self.enabled:
+            return 0
+        try:
+            with self._lock:
+                conn = self._connect()
+                if conn is None:
+                    return 0
+                with conn:
+                    cleared = conn.execute("DELETE FROM warm_cache WHERE namespace = ?", (self.namespace,)).rowcount
+                conn.close()
+            return cleared
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            print(f"清除持久化缓存失败: {e}")
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取持久化缓存统计信息"""
+        size = os.path.getsize(self.path) if self.enabled and os.path.exists(self.path) else 0
+        return {**self.stats, 'enabled': self.enabled, 'path': self.path, 'file_size': size}
@@ -0,0 +1,131 @@
+"""
+启动缓存预热调度器 - 按优先级并行预热端点，并记录每个端点的进度和耗时
+Author: data_panel开发团队
+Date: 2025-08-12
+
+- 先并行加载多个端点共用的输入数据，避免各端点重复读取
+- 端点按 components_config.json 中 cache.priority 从小到大排序（未配置时为100），
+  在线程池中并发执行，优先级高的端点最先可用
+- get_progress() 返回整体进度和每个端点的状态/耗时，供 /api/startup-cache/status 展示
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_PRIORITY = 100
+# 预热线程数
+DEFAULT_WARMUP_WORKERS = int(os.environ.get('DATA_PANEL_WARMUP_WORKERS', min(4, os.cpu_count() or 1)))
+
+PENDING, RUNNING, DONE, FAILED, SKIPPED = 'pending', 'running', 'done', 'failed', 'skipped'
+
+
+class WarmupScheduler:
+    """启动缓存预热调度器"""
+
+    def __init__(self, max_workers: int = DEFAULT_WARMUP_WORKERS, logger=None):
+        self.max_workers = max(1, max_workers)
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self.state = 'idle'
+        self.started_at = None
+        self.finished_at = None
+        self.shared_inputs: Dict[str, Dict[str, Any]] = {}
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def order(endpoint_configs: List[dict]) -> List[dict]:
+        """按优先级排序，相同优先级保持配置顺序"""
+        return sorted(endpoint_configs, key=lambda config: config.get('priority', DEFAULT_PRIORITY))
+
+    def run(self, endpoint_configs: List[dict], warm_func: Callable[[dict], Optional[str]],
+            shared_inputs: Optional[Dict[str, Callable[[], Any]]] = None) -> Dict[str, Any]:
+        """
+        执行一轮预热（同一时间只运行一轮）
+
+        Args:
+            endpoint_configs: 端点配置列表（endpoint, priority, ...）
+            warm_func: 预热单个端点，返回 'skipped' 表示无需计算（如已缓存）
+            shared_inputs: 共用输入数据 {名称: 加载函数}，在端点之前并行加载
+        """
+        if not self._run_lock.acquire(blocking=False):
+            self._log('info', "启动缓存预热正在进行，跳过本次请求")
+            return self.get_progress()
+        try:
+            ordered = self.order(endpoint_configs)
+            with self._lock:
+                self.state = 'running'
+                self.started_at, self.finished_at = time.time(), None
+                self.shared_inputs = {name: self._new_entry(name) for name in (shared_inputs or {})}
+                self.endpoints = {config['endpoint']: self._new_entry(config['endpoint'], config)
+                                  for config in ordered}
+
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='warmup') as executor:
+                if shared_inputs:
+                    wait([executor.submit(self._run_entry, self.shared_inputs[name], loader)
+                          for name, loader in shared_inputs.items()])
+                wait([executor.submit(self._run_entry, self.endpoints[config['endpoint']],
+                                      lambda config=config: warm_func(config))
+                      for config in ordered])
+
+            with self._lock:
+                self.state = 'done'
+                self.finished_at = time.time()
+            progress = self.get_progress()
+            self._log('info', f"🚀 启动缓存预热完成: {progress['completed']}/{progress['total']} 个端点，"
+                              f"失败 {progress['failed']} 个，耗时 {progress['elapsed']:.2f}秒")
+            return progress
+        finally:
+            self._run_lock.release()
+
+    @staticmethod
+    def _new_entry(name: str, config: Optional[dict] = None) -> Dict[str, Any]:
+        entry = {'name': name, 'status': PENDING, 'started_at': None, 'duration': None, 'error': None}
+        if config is not None:
+            entry['priority'] = config.get('priority', DEFAULT_PRIORITY)
+            entry['description'] = config.get('description')
+        return entry
+
+    def _run_entry(self, entry: Dict[str, Any], func: Callable[[], Any]):
+        with self._lock:
+            entry['status'] = RUNNING
+            entry['started_at'] = time.time()
+        status, error = DONE, None
+        try:
+            if func() == SKIPPED:
+                status = SKIPPED
+        except Exception as e:
+            status, error = FAILED, str(e)
+            self._log('warning', f"预热失败 {entry['name']}: {e}")
+        with self._lock:
+            entry['status'] = status
+            entry['error'] = error
+            entry['duration'] = round(time.time() - entry['started_at'], 3)
+
+    def _log(self, level: str, message: str):
+        if self.logger:
+            getattr(self.logger, level)(message)
+        else:
+            print(message)
+
+    def get_progress(self) -> Dict[str, Any]:
+        """获取预热进度"""
+        with self._lock:
+            entries = [dict(entry) for entry in self.endpoints.values()]
+            statuses = [entry['status'] for entry in entries]
+            end = self.finished_at or time.time()
+            return {
+                'state': self.state,
+                'max_workers': self.max_workers,
+                'total': len(entries),
+                'completed': sum(status in (DONE, SKIPPED) for status in statuses),
+                'failed': statuses.count(FAILED),
+                'running': statuses.count(RUNNING),
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'elapsed': round(end - self.started_at, 3) if self.started_at else 0,
+                'shared_inputs': [dict(entry) for entry in self.shared_inputs.values()],
+                'endpoints': entries,
+            }
@@ -3,6 +3,11 @@ import { createApp } from 'vue'
 import App from './App.vue'
 import router from './router'
 import store from './store'
+import axios from 'axios'
+import { componentVersionCache } from './utils/ComponentVersionCache'
+
+// 组件数据的条件请求：数据版本未变化时复用上次的响应
+componentVersionCache.install(axios)
 
 const app = createApp(App)
 app.use(router)
@@ -0,0 +1,94 @@
+/**
+ * 组件数据版本缓存 - 基于ETag的条件请求
+ *
+ * 后端为组件数据响应返回ETag（源数据版本），再次请求时携带 If-None-Match，
+ * 数据未变化时后端返回304且不执行计算，这里直接复用上次的响应数据。
+ * SSE自动更新事件携带组件的最新版本，版本未变化时无需发起请求。
+ */
+
+// 不影响响应内容的请求参数（与后端 cache_params.VOLATILE_PARAMS 保持一致）
+const VOLATILE_PARAMS = ['_t', '_refresh', 'auto_refresh'];
+
+export class ComponentVersionCache {
+  constructor(maxEntries = 100) {
+    this.maxEntries = maxEntries;
+    this.entries = new Map();            // 请求键 -> { etag, data }
+    this.componentVersions = new Map();  // 组件ID -> 最近一次响应的版本
+  }
+
+  /**
+   * 生成请求键：去掉防缓存参数并排序，相同内容的请求共享同一个键
+   * @param {string} url - 请求URL
+   * @returns {string|null} 请求键
+   */
+  getKey(url) {
+    try {
+      const urlObj = new URL(url, window.location.origin);
+      VOLATILE_PARAMS.forEach(param => urlObj.searchParams.delete(param));
+      urlObj.searchParams.sort();
+      return urlObj.toString();
+    } catch (error) {
+      return null;
+    }
+  }
+
+  /**
+   * 组件当前显示的数据是否已是指定版本
+   * @param {string} componentId - 组件ID
+   * @param {string} version - SSE事件携带的版本
+   * @returns {boolean}
+   */
+  isUpToDate(componentId, version) {
+    return !!version && this.componentVersions.get(componentId) === version;
+  }
+
+  store(key, etag, data, componentId) {
+    this.entries.delete(key);
+    this.entries.set(key, { etag, data });
+    if (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+    if (componentId) {
+      this.componentVersions.set(componentId, etag.replace(/^W\//, '').replace(/"/g, ''));
+    }
+  }
+
+  /**
+   * 为axios实例安装条件请求拦截器
+   * @param {Object} axiosInstance - axios 或 axios.create() 的实例
+   */
+  install(axiosInstance) {
+    axiosInstance.interceptors.request.use(config => {
+      if ((config.method || 'get').toLowerCase() === 'get' && config.url) {
+        const entry = this.entries.get(this.getKey(config.url));
+        if (entry) {
+          config.headers = config.headers || {};
+          config.headers['If-None-Match'] = entry.etag;
+        }
+      }
+      return config;
+    });
+
+    axiosInstance.interceptors.response.use(response => {
+      const etag = response.headers && response.headers.etag;
+      const key = etag && response.config && response.config.url ? this.getKey(response.config.url) : null;
+      if (key) {
+        const componentId = new URL(key).searchParams.get('componentId');
+        this.store(key, etag, response.data, componentId);
+      }
+      return response;
+    }, error => {
+      const response = error.response;
+      const entry = response && response.status === 304 && response.config
+        ? this.entries.get(this.getKey(response.config.url))
+        : null;
+      if (entry) {
+        // 数据未变化，复用上次的响应数据
+        return { ...response, status: 200, data: entry.data };
+      }
+      return Promise.reject(error);
+    });
+  }
+}
+
+export const componentVersionCache = new ComponentVersionCache();
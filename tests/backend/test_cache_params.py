@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 缓存参数规范化测试
+Backend Service Tests - Canonical Cache Parameter Tests
+"""
+
+import pickle
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from base_server import BaseResponseCache
+from cache_params import CacheParamNormalizer, coerce_param, normalize_date, parse_param_schema
+
+SCHEMAS = {
+    '/api/sector': parse_param_schema({
+        'sector': 'str',
+        'startDate': {'type': 'date', 'default': '2025-07-01'},
+        'endDate': 'date',
+        'limit': {'type': 'int', 'default': 20},
+    }),
+}
+
+
+class TestCoercion:
+    """测试参数类型转换"""
+
+    @pytest.mark.parametrize("value", ['2025-07-01', '20250701', '2025/07/01', ' 2025-07-01 '])
+    def test_dates_normalized(self, value):
+        """各种日期写法统一为YYYYMMDD"""
+        assert normalize_date(value) == '20250701'
+
+    def test_default_and_fallback(self):
+        """缺失或为空时使用默认值，无法转换时保留原值"""
+        spec = {'type': 'date', 'default': '2025-07-01'}
+        assert coerce_param(spec, None) == '20250701'
+        assert coerce_param(spec, '  ') == '20250701'
+        assert coerce_param(spec, 'latest') == 'latest'
+        assert coerce_param({'type': 'bool', 'default': None}, 'Yes') is True
+
+    def test_unknown_type_rejected(self):
+        """不支持的类型在解析配置时报错"""
+        with pytest.raises(ValueError):
+            parse_param_schema({'sector': 'sector_name'})
+
+
+class TestCacheParamNormalizer:
+    """测试缓存参数规范化"""
+
+    def test_equivalent_requests_share_params(self):
+        """防缓存参数、componentId、参数顺序和写法不同的请求得到相同的规范参数"""
+        normalizer = CacheParamNormalizer(SCHEMAS)
+        first = normalizer.normalize('/api/sector', {'sector': ' 银行 ', 'startDate': '2025-07-01',
+                                                     '_t': '1', 'componentId': 'a'})
+        second = normalizer.normalize('/api/sector', {'componentId': 'b', 'limit': '20', 'sector': '银行'})
+        assert first == second == {'sector': '银行', 'startDate': '20250701', 'limit': 20}
+
+    def test_undeclared_endpoint_drops_volatile_only(self):
+        """未声明参数的端点只去掉防缓存参数"""
+        normalizer = CacheParamNormalizer(SCHEMAS)
+        assert normalizer.normalize('/api/other', {'componentId': 'a', '_t': '1'}) == {'componentId': 'a'}
+
+    def test_schemas_from_components(self):
+        """从组件配置读取参数声明，组件配置未加载时稍后再读取"""
+        components = {}
+        normalizer = CacheParamNormalizer(components_loader=lambda: components or None)
+        assert normalizer.normalize('/api/a', {'x': '1', 'y': '2'}) == {'x': '1', 'y': '2'}
+
+        components['a'] = SimpleNamespace(api_path='/api/a', extra_config={'params': ['x']})
+        assert normalizer.normalize('/api/a', {'x': '1', 'y': '2'}) == {'x': '1'}
+
+    def test_picklable_for_workers(self):
+        """传给工作进程时保留已解析的参数声明"""
+        components = {'a': SimpleNamespace(api_path='/api/a', extra_config={'params': {'x': 'int'}})}
+        restored = pickle.loads(pickle.dumps(CacheParamNormalizer(components_loader=lambda: components)))
+        assert restored.normalize('/api/a', {'x': ' 3 ', 'y': '2'}) == {'x': 3}
+
+    def test_response_cache_hits_across_variants(self):
+        """响应缓存按规范参数命中"""
+        cache = BaseResponseCache()
+        cache.param_normalizer = CacheParamNormalizer(SCHEMAS)
+        params = cache.canonical_params('/api/sector', {'sector': '银行', '_t': '1'})
+        cache.store_response('/api/sector', params, None, {'rows': [1]})
+
+        variant = cache.canonical_params('/api/sector', {'_t': '2', 'startDate': '20250701', 'sector': '银行'})
+        assert cache.get_response('/api/sector', variant) == {'rows': [1]}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 组件数据版本与条件请求测试
+Backend Service Tests - Component Version / Conditional Request Tests
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from flask import jsonify
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from base_server import BaseStockServer
+
+
+class FakeComponentManager:
+    """只提供组件配置和默认源数据逻辑的组件管理器"""
+
+    def __init__(self, server):
+        self.server = server
+        self.components = {
+            'chart1': SimpleNamespace(id='chart1', api_path='/api/versioned', source_data_keys=['plate_df'],
+                                      source_data_logic=''),
+            'chart2': SimpleNamespace(id='chart2', api_path='/api/unversioned', source_data_keys=[],
+                                      source_data_logic=''),
+        }
+
+    def get_source_data_logic(self, endpoint, request_params):
+        return {'endpoint': endpoint, 'request_params': request_params,
+                'fingerprints': self.server.data_cache.get_fingerprints(['plate_df'])}
+
+
+class VersionedServer(BaseStockServer):
+    """测试用服务器"""
+
+    def __init__(self):
+        super().__init__(auto_update_config={'enabled': False})
+        self.component_manager = FakeComponentManager(self)
+        self.calls = 0
+        self.app.add_url_rule('/api/versioned', 'versioned', self.handle, methods=['GET'])
+        self.app.add_url_rule('/api/unversioned', 'unversioned', self.handle, methods=['GET'])
+
+    def handle(self):
+        self.calls += 1
+        return jsonify({'calls': self.calls})
+
+    def get_dashboard_config(self):
+        return {}
+
+    def get_data_sources(self):
+        return {}
+
+
+@pytest.fixture
+def server():
+    return VersionedServer()
+
+
+class TestConditionalRequest:
+    """测试 If-None-Match 条件请求"""
+
+    def test_not_modified_skips_handler(self, server):
+        """版本未变化时返回304且不执行处理函数"""
+        client = server.app.test_client()
+        first = client.get('/api/versioned?componentId=chart1&_t=1')
+        assert first.status_code == 200 and first.headers.get('ETag')
+
+        second = client.get('/api/versioned?componentId=chart1&_t=2',
+                            headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 304
+        assert second.data == b''
+        assert server.calls == 1
+
+    def test_data_change_returns_new_version(self, server):
+        """数据更新后版本变化，返回完整响应"""
+        client = server.app.test_client()
+        etag = client.get('/api/versioned').headers['ETag']
+        server.data_cache.update_data('plate_df', [1, 2, 3])
+        response = client.get('/api/versioned', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_component_without_source_data_not_versioned(self, server):
+        """没有声明源数据的组件不返回ETag"""
+        response = server.app.test_client().get('/api/unversioned')
+        assert response.status_code == 200
+        assert 'ETag' not in response.headers
+        assert server.get_component_version_by_id('chart2') is None
+
+    def test_event_version_matches_default_request(self, server):
+        """SSE事件携带的版本与前端默认请求的ETag一致"""
+        response = server.app.test_client().get('/api/versioned?componentId=chart1&auto_refresh=true')
+        assert response.headers['ETag'] == f'"{server.get_component_version_by_id("chart1")}"'
+
+
+
+def processor_inputs(processor_source: str, method: str) -> set:
+    """处理方法（含其调用的 self 方法）读取的数据键、stock_data 加载器和直接读取的CSV"""
+    starts = [(match.start(), match.group(1)) for match in re.finditer(r'\n    def (\w+)\(', processor_source)]
+    bodies = {name: processor_source[start:(starts[i + 1][0] if i + 1 < len(starts) else None)]
+              for i, (start, name) in enumerate(starts)}
+    inputs, pending, seen = set(), [method], set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in bodies:
+            continue
+        seen.add(name)
+        code = '\n'.join(line.split('#', 1)[0] for line in bodies[name].splitlines())
+        inputs |= set(re.findall(r"(?:load_data|query_data)\('(\w+)'", code))
+        inputs |= {f"loader:{loader}" for loader in re.findall(r'(?:load_history|load_panel)\((\w+)', code)}
+        inputs |= {f"loader:{loader}" for loader in re.findall(r'\b(\w+Data)\(\)', code)}
+        if 'read_csv' in code:
+            inputs.add('csv')
+        pending.extend(re.findall(r'self\.(\w+)', code))
+    return inputs
+
+
+class TestVersionedComponentConfig:
+    """测试组件配置：只有声明的源数据覆盖处理器全部输入的组件才按版本返回304"""
+
+    @pytest.mark.parametrize('server_type, processor', [
+        ('market_review', 'market_review_processor'),
+        ('market_realtime', 'market_realtime_processor'),
+        ('multiplate', 'multiplate_processor'),
+    ])
+    def test_declared_keys_cover_processor_inputs(self, server_type, processor):
+        """声明了源数据的组件，其处理器不读取未声明的数据文件、加载器或CSV"""
+        config = json.loads((project_root / "api" / "conf" / "components_config.json").read_text(encoding='utf-8'))
+        source = (project_root / "api" / "processors" / f"{processor}.py").read_text(encoding='utf-8')
+        undeclared = {}
+        for component_id, component in config[server_type].items():
+            if not isinstance(component, dict) or 'api_path' not in component:
+                continue
+            keys = [key for key in component.get('source_data_keys', []) if key]
+            if not keys and not component.get('source_data_logic'):
+                continue
+            extra = processor_inputs(source, f"process_{component['api_path'][5:]}") - set(keys)
+            if extra:
+                undeclared[component_id] = sorted(extra)
+        assert undeclared == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 并发加载测试
+Backend Service Tests - Concurrent Fetch Tests
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+sys.path.insert(0, str(project_root / "api"))
+
+from processors.concurrent_fetch import fetch_all
+
+
+class TestFetchAll:
+    """测试按依赖并发执行加载项"""
+
+    def test_independent_loads_overlap(self):
+        """相互独立的加载项并发执行，总耗时接近最慢的一项"""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def load(value):
+            barrier.wait()
+            time.sleep(0.05)
+            return value
+
+        start = time.time()
+        results = fetch_all({name: (lambda name=name: load(name)) for name in ('index', 'minute', 'concept')})
+        assert results == {'index': 'index', 'minute': 'minute', 'concept': 'concept'}
+        assert time.time() - start < 0.5
+
+    def test_dependency_receives_result(self):
+        """依赖的结果按顺序作为参数传入，依赖完成后才执行"""
+        order = []
+
+        def index():
+            time.sleep(0.02)
+            order.append('index')
+            return 20250708
+
+        def minute(latest_date, concept):
+            order.append('minute')
+            return (latest_date, concept)
+
+        results = fetch_all({
+            'index': index,
+            'concept': lambda: 'concept',
+            'minute': (minute, ['index', 'concept']),
+        })
+        assert results['minute'] == (20250708, 'concept')
+        assert order == ['index', 'minute']
+
+    def test_error_propagates(self):
+        """加载失败时抛出原异常"""
+        with pytest.raises(ZeroDivisionError):
+            fetch_all({'ok': lambda: 1, 'bad': lambda: 1 / 0})
+
+    def test_invalid_dependencies(self):
+        """未声明或循环依赖报错"""
+        with pytest.raises(ValueError):
+            fetch_all({'minute': (lambda index: index, ['index'])})
+        with pytest.raises(ValueError):
+            fetch_all({'a': (lambda b: b, ['b']), 'b': (lambda a: a, ['a'])})
+
+    def test_nested_fetch_runs_inline(self):
+        """加载项内部再次并发加载时不会占满线程池"""
+        def outer():
+            return fetch_all({'x': lambda: 1, 'y': lambda: 2})
+
+        results = fetch_all({name: outer for name in ('a', 'b', 'c')})
+        assert all(value == {'x': 1, 'y': 2} for value in results.values())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
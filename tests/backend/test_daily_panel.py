@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 日线面板测试
+Backend Service Tests - Daily Panel Tests
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from daily_panel import DailyPanelStore, StockPanel
+from data_access import MemoizedDataAccess
+
+DATES = ['20250701', '20250702', '20250703', '20250704', '20250707', '20250708', '20250709', '20250710']
+
+
+def make_daily(dates=DATES, ids=(1, 2, 3), seed=0):
+    """生成乱序、有缺失交易日和NaN的长表日线"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for stock_id in ids:
+        for position, trade_date in enumerate(dates):
+            # 2号股票停牌一天
+            if stock_id == 2 and position == 3:
+                continue
+            change = round(float(rng.uniform(-10, 10)), 2)
+            rows.append({'id': stock_id, 'trade_date': trade_date, 'stock_name': f'股票{stock_id}',
+                         'change': np.nan if (stock_id, position) == (3, 2) else change})
+    return pd.DataFrame(rows).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def panel_values(panel, values, frame, column):
+    """把长表按 (id, trade_date) 的值和面板单元格对齐比较"""
+    dates = pd.to_datetime(frame['trade_date'].astype(str))
+    rows = pd.Index(panel.ids).get_indexer(frame['id'])
+    cols = panel.dates.get_indexer(dates)
+    return values[rows, cols], frame[column].to_numpy(float)
+
+
+class TestStockPanel:
+    """测试股票×交易日面板的窗口运算"""
+
+    @pytest.mark.parametrize('name, expected, actual', [
+        ('shift-1', lambda g: g.shift(-1), lambda p: p.shift('change', -1)),
+        ('shift2', lambda g: g.shift(2), lambda p: p.shift('change', 2)),
+        ('diff5', lambda g: g.diff(5), lambda p: p.diff('change', 5)),
+        ('cumsum', lambda g: g.cumsum(), lambda p: p.cumsum('change')),
+        ('rolling_mean', lambda g: g.transform(lambda x: x.rolling(3, min_periods=1).mean()), lambda p: p.rolling('change', 3)),
+        ('rolling_sum', lambda g: g.transform(lambda x: x.rolling(3, min_periods=1).sum()), lambda p: p.rolling('change', 3, how='sum')),
+    ])
+    def test_window_ops_match_groupby(self, name, expected, actual):
+        """窗口运算与排序后的长表 groupby('id') 结果一致"""
+        frame = make_daily()
+        panel = StockPanel.from_frame(frame, ['change'])
+        ordered = frame.sort_values(['id', 'trade_date']).reset_index(drop=True)
+        ordered[name] = expected(ordered.groupby('id')['change'])
+        got, want = panel_values(panel, actual(panel), ordered, name)
+        np.testing.assert_allclose(got, want, equal_nan=True)
+
+    def test_slice_by_stock_and_date(self):
+        """按股票顺序和日期范围切片，范围外的股票和日期忽略"""
+        panel = StockPanel.from_frame(make_daily(), ['change', 'stock_name'])
+        sub = panel.slice([3, 1, 99], '2025-07-03', '20250708')
+        assert sub.ids == [3, 1]
+        assert sub.date_labels('%m/%d') == ['07/03', '07/04', '07/07', '07/08']
+        assert sub.first_value('stock_name').tolist() == ['股票3', '股票1']
+        suspended = panel.slice([2], '20250703', '20250708')
+        columns, _ = suspended.series(0, suspended.values['change'])
+        assert columns.tolist() == [0, 2, 3]
+
+    def test_missing_cells_absent(self):
+        """停牌日没有数据，series 跳过该列"""
+        panel = StockPanel.from_frame(make_daily(), ['change'])
+        row = panel.rows_of([2])[0]
+        columns, values = panel.series(row, panel.values['change'])
+        assert len(columns) == len(DATES) - 1 and 3 not in columns.tolist()
+        assert not np.isnan(values).any()
+
+
+class FakeStockDaily:
+    """记录查询范围的测试日线加载器"""
+
+    calls = []
+
+    def get_daily_data(self, start_date=None, end_date=None):
+        FakeStockDaily.calls.append((start_date, end_date))
+        frame = make_daily()
+        keep = (frame['trade_date'] >= (start_date or '')) & (frame['trade_date'] <= (end_date or '99999999'))
+        return frame[keep]
+
+
+class TestDailyPanelStore:
+    """测试日线面板存储的增量扩展"""
+
+    def setup_method(self):
+        FakeStockDaily.calls = []
+
+    def test_reuses_and_extends(self):
+        """同一范围直接切片，更早的日期和新字段增量补充"""
+        store = DailyPanelStore(MemoizedDataAccess(), refresh_interval=3600)
+        panel = store.get(FakeStockDaily, ['change'], '20250704')
+        assert panel.date_labels('%Y%m%d') == DATES[3:]
+
+        panel = store.get(FakeStockDaily, ['change'], '20250707', '20250709', [1])
+        assert panel.ids == [1] and panel.date_labels('%Y%m%d') == ['20250707', '20250708', '20250709']
+
+        panel = store.get(FakeStockDaily, ['change', 'stock_name'], '20250701')
+        assert panel.date_labels('%Y%m%d') == DATES
+        expected = make_daily().sort_values(['id', 'trade_date'])
+        got, want = panel_values(panel, panel.values['change'], expected, 'change')
+        np.testing.assert_allclose(got, want, equal_nan=True)
+
+        stats = store.get_stats()
+        assert stats['builds'] == 1 and stats['hits'] >= 1
+        assert stats['panels']['FakeStockDaily']['start'] == '20250701'
+
+    def test_unknown_field_raises_without_refetch(self):
+        """数据中没有的字段抛出KeyError，之后的请求不再为它重新读取"""
+        store = DailyPanelStore(MemoizedDataAccess(), refresh_interval=3600)
+        store.get(FakeStockDaily, ['change'], '20250701')
+        for _ in range(2):
+            with pytest.raises(KeyError, match='turnover'):
+                store.get(FakeStockDaily, ['change', 'turnover'], '20250701')
+        assert store.get_stats()['extensions'] == 1
+        assert store.get(FakeStockDaily, ['change'], '20250701').fields == ['change']
+
+    def test_slow_loader_does_not_block_others(self):
+        """一个加载器读取数据期间，其他加载器的面板照常读取"""
+        release = threading.Event()
+
+        class SlowStockDaily(FakeStockDaily):
+            def get_daily_data(self, start_date=None, end_date=None):
+                release.wait(5)
+                return super().get_daily_data(start_date, end_date)
+
+        store = DailyPanelStore(MemoizedDataAccess(), refresh_interval=3600)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            slow = executor.submit(store.get, SlowStockDaily, ['change'], '20250701')
+            time.sleep(0.05)
+            assert store.get(FakeStockDaily, ['change'], '20250701').shape == (3, len(DATES))
+            assert not slow.done()
+            release.set()
+            assert slow.result().shape == (3, len(DATES))
+
+    def test_invalidate(self):
+        """清除后重新构建"""
+        store = DailyPanelStore(MemoizedDataAccess(), refresh_interval=3600)
+        store.get(FakeStockDaily, ['change'], '20250701')
+        store.invalidate()
+        store.get(FakeStockDaily, ['change'], '20250701')
+        assert store.get_stats()['builds'] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
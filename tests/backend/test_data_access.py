@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 数据访问层测试
+Backend Service Tests - Memoized Data Access Tests
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from data_access import MemoizedDataAccess
+
+DATES = ['20250701', '20250702', '20250703', '20250704', '20250707', '20250708']
+
+
+class FakeDailyData:
+    """记录查询范围的测试加载器"""
+
+    instances = 0
+    calls = []
+
+    def __init__(self):
+        FakeDailyData.instances += 1
+
+    def get_daily_data(self, start_date=None, end_date=None):
+        FakeDailyData.calls.append((start_date, end_date))
+        dates = [d for d in DATES if (start_date is None or d >= start_date) and (end_date is None or d <= end_date)]
+        return pd.DataFrame({'trade_date': dates, 'close': [float(d[-2:]) for d in dates]})
+
+
+class FakeMinuteData:
+    """set_table_name 会修改实例状态的测试加载器，记录同时进行的查询"""
+
+    active = 0
+    max_active = 0
+    tables = []
+
+    def __init__(self):
+        self.table = 'stock_minute'
+
+    def set_table_name(self):
+        self.table = 'stock_minute_today'
+
+    def get_daily_data(self, start_date=None, end_date=None):
+        FakeMinuteData.active += 1
+        FakeMinuteData.max_active = max(FakeMinuteData.max_active, FakeMinuteData.active)
+        table = self.table
+        time.sleep(0.01)
+        FakeMinuteData.tables.append((table, self.table))
+        self.table = 'stock_minute'
+        FakeMinuteData.active -= 1
+        return pd.DataFrame({'trade_date': [start_date], 'close': [1.0]})
+
+
+@pytest.fixture(autouse=True)
+def reset_loader():
+    FakeDailyData.instances = 0
+    FakeDailyData.calls = []
+    FakeMinuteData.active = FakeMinuteData.max_active = 0
+    FakeMinuteData.tables = []
+
+
+class TestMemoizedDataAccess:
+    """测试按日期范围记忆的数据访问层"""
+
+    def test_cached_range_sliced(self):
+        """已缓存范围内的请求直接切片，不再查询"""
+        access = MemoizedDataAccess()
+        access.get_daily_data(FakeDailyData, '2025-07-01', '2025-07-08')
+        df = access.get_daily_data(FakeDailyData, '20250702', '20250704')
+        assert df['trade_date'].tolist() == ['20250702', '20250703', '20250704']
+        assert FakeDailyData.calls == [('20250701', '20250708')]
+        assert access.get_stats()['hits'] == 1
+
+    def test_extension_fetches_missing_only(self):
+        """范围扩大时只查询缺少的日期"""
+        access = MemoizedDataAccess()
+        access.get_daily_data(FakeDailyData, '20250702', '20250703')
+        df = access.get_daily_data(FakeDailyData, '20250701', '20250707')
+        assert df['trade_date'].tolist() == DATES[:5]
+        assert FakeDailyData.calls == [('20250702', '20250703'), ('20250701', '20250701'),
+                                       ('20250704', '20250707')]
+
+    def test_loader_instance_reused(self):
+        """每个加载器类只创建一个实例"""
+        access = MemoizedDataAccess()
+        access.get_daily_data(FakeDailyData, '20250701', '20250702')
+        access.fetch(FakeDailyData, start_date='20250701', setup=None)
+        assert FakeDailyData.instances == 1
+
+    def test_open_range_refreshes_tail(self):
+        """不限结束日期的数据过期后只重新查询最后一个交易日及之后的数据"""
+        access = MemoizedDataAccess(ttl=60)
+        access.get_daily_data(FakeDailyData, '20250701')
+        entry = next(iter(access._entries.values()))
+        entry.fetched_at = time.time() - 120
+        df = access.get_daily_data(FakeDailyData, '20250701')
+        assert FakeDailyData.calls[-1] == ('20250708', None)
+        assert df['trade_date'].tolist() == DATES
+        assert access.get_stats()['refreshes'] == 1
+
+    def test_closed_history_not_expired(self):
+        """已结束的历史区间不过期"""
+        access = MemoizedDataAccess(ttl=60)
+        access.get_daily_data(FakeDailyData, '20250701', '20250703')
+        next(iter(access._entries.values())).fetched_at = 0
+        access.get_daily_data(FakeDailyData, '20250701', '20250703')
+        assert len(FakeDailyData.calls) == 1
+
+    def test_caller_mutation_isolated(self):
+        """调用方修改返回的数据不影响缓存"""
+        access = MemoizedDataAccess()
+        df = access.get_daily_data(FakeDailyData, '20250701', '20250703')
+        df['close'] = 0.0
+        df['trade_date'] = pd.to_datetime(df['trade_date'])
+        again = access.get_daily_data(FakeDailyData, '20250701', '20250703')
+        assert again['close'].tolist() == [1.0, 2.0, 3.0] and again['trade_date'].iloc[0] == '20250701'
+
+    def test_invalidate(self):
+        """清除后重新查询"""
+        access = MemoizedDataAccess()
+        access.get_daily_data(FakeDailyData, '20250701', '20250703')
+        assert access.invalidate(FakeDailyData) == 1
+        access.get_daily_data(FakeDailyData, '20250701', '20250703')
+        assert len(FakeDailyData.calls) == 2
+
+
+    def test_shared_loader_calls_serialised(self):
+        """同一加载器实例上带 setup 和不带 setup 的查询并发时串行执行，setup 的状态不被其他查询打断"""
+        access = MemoizedDataAccess()
+        barrier = threading.Barrier(8)
+
+        def run(position):
+            barrier.wait()
+            day = DATES[position % len(DATES)]
+            return access.fetch(FakeMinuteData, start_date=day, end_date=day,
+                                setup='set_table_name' if position % 2 else None)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(run, range(8)))
+        assert FakeMinuteData.max_active == 1
+        assert all(before == after for before, after in FakeMinuteData.tables)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
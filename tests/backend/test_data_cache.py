@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 数据缓存测试
+Backend Service Tests - Data Cache Tests
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+sys.path.insert(0, str(project_root / "api"))
+
+from base_server import BaseDataCache, BaseStockServer
+from pandas_mode import copy_on_write_active
+from processors.processor_factory import SimplifiedProcessorManager
+from snapshot_store import NumpySnapshotStore, create_snapshot_store
+
+
+def _write_csv(path, rows):
+    """写入测试CSV文件"""
+    df = pd.DataFrame({
+        'id': list(range(rows)),
+        'name': [f"股票{i}" for i in range(rows)],
+        'change': [i * 0.5 for i in range(rows)],
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+def _touch_later(path):
+    """确保文件mtime前进"""
+    future = time.time() + 5
+    os.utime(path, (future, future))
+
+
+class TestSnapshotStore:
+    """测试列式快照存储"""
+
+    def test_numpy_snapshot_roundtrip(self, tmp_path):
+        """快照读取结果与CSV一致"""
+        csv_path = tmp_path / "stock_df.csv"
+        expected = _write_csv(csv_path, 10)
+        store = NumpySnapshotStore(str(tmp_path / "snapshots"))
+
+        first = store.load('stock_df', str(csv_path))
+        second = store.load('stock_df', str(csv_path))
+
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(second, expected)
+        assert store.stats['csv_parses'] == 1
+        assert store.stats['snapshot_hits'] == 1
+
+    def test_snapshot_invalidated_on_source_change(self, tmp_path):
+        """源文件变化后重新解析CSV"""
+        csv_path = tmp_path / "stock_df.csv"
+        _write_csv(csv_path, 5)
+        store = NumpySnapshotStore(str(tmp_path / "snapshots"))
+        store.load('stock_df', str(csv_path))
+
+        expected = _write_csv(csv_path, 8)
+        _touch_later(csv_path)
+
+        df = store.load('stock_df', str(csv_path))
+        pd.testing.assert_frame_equal(df, expected)
+        assert store.stats['csv_parses'] == 2
+
+    def test_create_snapshot_store_none(self):
+        """none后端不使用快照"""
+        assert create_snapshot_store('none') is None
+
+
+class TestBaseDataCache:
+    """测试数据文件缓存"""
+
+    def test_load_with_snapshot_store(self, tmp_path):
+        """配置快照存储时通过快照加载"""
+        csv_path = tmp_path / "plate_df.csv"
+        expected = _write_csv(csv_path, 6)
+        store = NumpySnapshotStore(str(tmp_path / "snapshots"))
+        cache = BaseDataCache({'plate_df': str(csv_path)}, store)
+
+        df = cache.load_data('plate_df')
+        pd.testing.assert_frame_equal(df, expected)
+        assert cache.get_snapshot_stats()['csv_parses'] == 1
+
+        # 新的缓存实例（模拟另一个服务进程）直接命中快照
+        other = BaseDataCache({'plate_df': str(csv_path)}, store)
+        pd.testing.assert_frame_equal(other.load_data('plate_df'), expected)
+        assert store.stats['snapshot_hits'] == 1
+
+    @pytest.mark.skipif(not copy_on_write_active(), reason="需要pandas写时复制")
+    def test_load_data_is_zero_copy_view(self, tmp_path):
+        """load_data返回零拷贝视图，修改不影响缓存"""
+        csv_path = tmp_path / "stock_df.csv"
+        expected = _write_csv(csv_path, 4)
+        cache = BaseDataCache({'stock_df': str(csv_path)})
+
+        first = cache.load_data('stock_df')
+        second = cache.load_data('stock_df')
+        assert np.shares_memory(first['change'].to_numpy(), second['change'].to_numpy())
+
+        first['change'] = 0.0
+        first.loc[0, 'id'] = 99
+        pd.testing.assert_frame_equal(cache.load_data('stock_df'), expected)
+
+    def test_load_data_mutable_is_independent(self, tmp_path):
+        """load_data_mutable返回独立副本"""
+        csv_path = tmp_path / "stock_df.csv"
+        expected = _write_csv(csv_path, 4)
+        cache = BaseDataCache({'stock_df': str(csv_path)})
+
+        mutable = cache.load_data_mutable('stock_df')
+        assert not np.shares_memory(mutable['change'].to_numpy(), cache.load_data('stock_df')['change'].to_numpy())
+        mutable.loc[0, 'change'] = 123.0
+        pd.testing.assert_frame_equal(cache.load_data('stock_df'), expected)
+
+    def test_fingerprint_changes_on_reload(self, tmp_path):
+        """文件变化后数据指纹变化，未变化时保持一致；指纹与是否已重新加载无关"""
+        csv_path = tmp_path / "plate_df.csv"
+        _write_csv(csv_path, 3)
+        cache = BaseDataCache({'plate_df': str(csv_path)})
+        before_load = cache.get_fingerprint('plate_df')
+        cache.load_data('plate_df')
+
+        first = cache.get_fingerprint('plate_df')
+        cache.load_data('plate_df')
+        assert cache.get_fingerprint('plate_df') == first == before_load
+
+        _write_csv(csv_path, 5)
+        _touch_later(csv_path)
+        changed = cache.get_fingerprint('plate_df')
+        assert changed != first
+        cache.load_data('plate_df')
+        assert cache.get_fingerprints(['plate_df'])['plate_df'] == changed
+
+        cache.update_data('plate_df', pd.DataFrame())
+        assert cache.get_fingerprint('plate_df') != changed
+
+    def test_missing_file_returns_empty(self, tmp_path):
+        """文件不存在时返回空DataFrame"""
+        cache = BaseDataCache({'missing': str(tmp_path / "missing.csv")})
+        assert cache.load_data('missing').empty
+
+
+class TestIncrementalLoad:
+    """测试只追加文件的增量读取"""
+
+    def _append(self, path, rows):
+        with open(path, 'a', encoding='utf-8') as f:
+            for i in rows:
+                f.write(f"{i},股票{i},{i * 0.5}\n")
+        _touch_later(path)
+
+    def test_appended_rows_are_parsed_incrementally(self, tmp_path):
+        """追加的行被增量解析并拼接"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        _write_csv(csv_path, 3)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)}, incremental_keys=['stock_minute_df'])
+        assert len(cache.load_data('stock_minute_df')) == 3
+
+        self._append(csv_path, [3, 4])
+        df = cache.load_data('stock_minute_df')
+
+        pd.testing.assert_frame_equal(df, pd.read_csv(csv_path))
+        assert cache.tail_stats == {'full_loads': 1, 'incremental_loads': 1, 'appended_rows': 2}
+
+    def test_partial_line_is_deferred(self, tmp_path):
+        """未写完的行留到下次读取"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        _write_csv(csv_path, 2)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)}, incremental_keys=['stock_minute_df'])
+        cache.load_data('stock_minute_df')
+
+        with open(csv_path, 'a', encoding='utf-8') as f:
+            f.write("2,股票2,")
+        _touch_later(csv_path)
+        assert len(cache.load_data('stock_minute_df')) == 2
+
+        with open(csv_path, 'a', encoding='utf-8') as f:
+            f.write("1.0\n")
+        future = time.time() + 10
+        os.utime(csv_path, (future, future))
+        df = cache.load_data('stock_minute_df')
+        assert len(df) == 3
+        assert df['change'].iloc[-1] == 1.0
+
+    def test_concurrent_reloads_append_once(self, tmp_path):
+        """多个线程同时发现文件变化时，追加的行只被解析一次"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        _write_csv(csv_path, 10)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)}, incremental_keys=['stock_minute_df'])
+        cache.load_data('stock_minute_df')
+        self._append(csv_path, range(10, 3010))
+
+        barrier = threading.Barrier(8)
+
+        def reload():
+            barrier.wait()
+            return len(cache.load_data('stock_minute_df'))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            lengths = list(executor.map(lambda _: reload(), range(8)))
+
+        assert lengths == [3010] * 8
+        assert cache.tail_stats == {'full_loads': 1, 'incremental_loads': 1, 'appended_rows': 3000}
+
+    def test_rewritten_file_triggers_full_reload(self, tmp_path):
+        """文件被重写时全量重载"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        _write_csv(csv_path, 5)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)}, incremental_keys=['stock_minute_df'])
+        cache.load_data('stock_minute_df')
+
+        pd.DataFrame({'id': [7], 'name': ['新股'], 'change': [1.5]}).to_csv(csv_path, index=False)
+        _touch_later(csv_path)
+        df = cache.load_data('stock_minute_df')
+
+        assert df['id'].tolist() == [7]
+        assert cache.tail_stats['full_loads'] == 2
+
+    def test_rewrite_keeping_head_and_length_triggers_full_reload(self, tmp_path):
+        """重写后开头相同、长度不变或更长时，按偏移之前的尾部签名识别为重写"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        _write_csv(csv_path, 1000)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)}, incremental_keys=['stock_minute_df'])
+        cache.load_data('stock_minute_df')
+
+        rewritten = _write_csv(csv_path, 1001)
+        rewritten.loc[999, 'name'] = "股票000"
+        rewritten.to_csv(csv_path, index=False)
+        _touch_later(csv_path)
+        df = cache.load_data('stock_minute_df')
+
+        pd.testing.assert_frame_equal(df, pd.read_csv(csv_path))
+        assert cache.tail_stats['full_loads'] == 2
+        assert cache.tail_stats['incremental_loads'] == 0
+
+    def test_replaced_file_triggers_full_reload(self, tmp_path):
+        """文件被替换（inode不同）时即使内容是追加关系也全量重载"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        _write_csv(csv_path, 5)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)}, incremental_keys=['stock_minute_df'])
+        cache.load_data('stock_minute_df')
+
+        replacement = tmp_path / "replacement.csv"
+        _write_csv(replacement, 6)
+        os.replace(replacement, csv_path)
+        _touch_later(csv_path)
+
+        assert len(cache.load_data('stock_minute_df')) == 6
+        assert cache.tail_stats['full_loads'] == 2
+
+    def test_appends_do_not_copy_existing_rows(self, tmp_path):
+        """追加写入预留的列数组，已有行不被重新拼接复制，之前返回的数据不变"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        _write_csv(csv_path, 3)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)}, incremental_keys=['stock_minute_df'])
+        cache.load_data('stock_minute_df')
+        self._append(csv_path, [3])
+        first = cache.load_data('stock_minute_df')
+
+        for i in range(4, 6):
+            self._append(csv_path, [i])
+            cache.load_data('stock_minute_df')
+        latest = cache.cache['stock_minute_df']
+
+        assert np.shares_memory(first['change'].to_numpy(), latest['change'].to_numpy())
+        assert len(first) == 4
+        pd.testing.assert_frame_equal(latest, pd.read_csv(csv_path))
+
+    def test_dtype_change_falls_back_to_concat(self, tmp_path):
+        """追加行的dtype与已有数据不一致时拼接重建，结果与全量读取相同"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        _write_csv(csv_path, 3)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)}, incremental_keys=['stock_minute_df'])
+        cache.load_data('stock_minute_df')
+
+        with open(csv_path, 'a', encoding='utf-8') as f:
+            f.write("3.5,股票3,\n")
+        _touch_later(csv_path)
+        df = cache.load_data('stock_minute_df')
+
+        pd.testing.assert_frame_equal(df, pd.read_csv(csv_path))
+        self._append(csv_path, [4])
+        pd.testing.assert_frame_equal(cache.load_data('stock_minute_df'), pd.read_csv(csv_path))
+
+
+
+class CopyOnWriteServer(BaseStockServer):
+    """配置了写时复制、使用演示处理器的测试服务器"""
+
+    def __init__(self, stock_path, copy_on_write=True):
+        self.stock_path = str(stock_path)
+        super().__init__(auto_update_config={'enabled': False, 'warm_cache_path': 'off',
+                                             'copy_on_write': copy_on_write})
+
+    def get_data_cache_file_paths(self):
+        return {'stock_df': self.stock_path}
+
+    def get_dashboard_config(self):
+        return {}
+
+    def get_data_sources(self):
+        return {}
+
+
+@pytest.fixture
+def restore_pandas_mode():
+    """测试中开启的写时复制是进程级设置，结束后恢复"""
+    previous = copy_on_write_active()
+    yield
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', previous)
+
+
+class TestCopyOnWriteMode:
+    """测试写时复制由服务器配置显式开启"""
+
+    def test_disabled_by_default(self, tmp_path):
+        """未配置时不修改pandas模式，工作进程也不设置"""
+        server = CopyOnWriteServer(tmp_path / "stock_df.csv", copy_on_write=False)
+        assert server.copy_on_write is False
+        assert server.get_pandas_mode_setup() is None
+        assert server.data_cache.copy_on_read == (not copy_on_write_active())
+
+    def test_processor_endpoint_under_copy_on_write(self, tmp_path, restore_pandas_mode):
+        """开启写时复制后处理器输出与源数据一致，缓存返回零拷贝视图且不被修改"""
+        csv_path = tmp_path / "stock_df.csv"
+        expected = _write_csv(csv_path, 30)
+        server = CopyOnWriteServer(csv_path)
+        assert server.apply_pandas_mode() is True
+        assert server.data_cache.copy_on_read is False
+
+        manager = SimplifiedProcessorManager('demo', server, server.data_cache, logging.getLogger("test_cow"))
+        with server.app.test_request_context('/api/demo_table_data'):
+            payload = manager.process('demo_table_data').get_json()
+        assert [row['name'] for row in payload['rows']] == expected['name'].head(20).tolist()
+        assert [row['change'] for row in payload['rows']] == expected['change'].head(20).round(2).tolist()
+
+        view = server.data_cache.load_data('stock_df')
+        view.loc[0, 'change'] = 99.0
+        pd.testing.assert_frame_equal(server.data_cache.load_data('stock_df'), expected)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
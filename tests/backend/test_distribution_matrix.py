@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 涨幅分布矩阵测试
+Backend Service Tests - Distribution Matrix Tests
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加处理器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "processors"))
+sys.path.insert(0, str(project_root / "api" / "server"))
+sys.path.insert(0, str(project_root / "api"))
+
+from base_server import BaseDataCache
+from distribution_matrix import DistributionMatrix
+from processors.base_processor import BaseDataProcessor
+
+
+def _tail_ratio_reference(number_string, n):
+    """服务器中原有的逐行计算逻辑，用于对比"""
+    try:
+        numbers = [float(x) for x in number_string.split('-')]
+        total_sum = sum(numbers)
+        tail_numbers = numbers[-n:] if n <= len(numbers) else numbers
+        if total_sum == 0:
+            return 0.0
+        return round(sum(tail_numbers) / total_sum, 2)
+    except:
+        return 0.0
+
+
+def _center_of_mass_reference(number_string):
+    """服务器中原有的重心计算逻辑，用于对比"""
+    try:
+        numbers = [float(x) for x in number_string.split('-')]
+        value_sum = sum(numbers)
+        if value_sum == 0:
+            return 0
+        return round(sum((i + 1) * v for i, v in enumerate(numbers)) / value_sum, 2)
+    except:
+        return 0
+
+
+@pytest.fixture
+def distributions():
+    """涨幅分布测试数据，包含不等长和无法解析的行"""
+    return pd.Series(['3-5-10-2-1', '1-2', '0-0-0', '7', 'x-1', '', None, '12-0-4-9-1-6-8-3'])
+
+
+class TestDistributionMatrix:
+    """测试涨幅分布矩阵"""
+
+    @pytest.mark.parametrize("n", [1, 3, 6])
+    def test_tail_ratio_matches_reference(self, distributions, n):
+        """红盘率与逐行计算一致"""
+        expected = [_tail_ratio_reference(x, n) for x in distributions]
+        np.testing.assert_allclose(DistributionMatrix(distributions).tail_ratio(n), expected)
+
+    def test_center_of_mass_matches_reference(self, distributions):
+        """重心位置与逐行计算一致"""
+        expected = [_center_of_mass_reference(x) for x in distributions]
+        np.testing.assert_allclose(DistributionMatrix(distributions).center_of_mass(), expected)
+
+    def test_last_values(self, distributions):
+        """近似涨停数取最后一个数，不含'-'时为0"""
+        assert DistributionMatrix(distributions).last_values().tolist() == [1, 2, 0, 0, 0, 0, 0, 3]
+
+    def test_subset_by_index_labels(self, distributions):
+        """按筛选后的行索引取子集"""
+        matrix = DistributionMatrix(distributions)
+        subset = matrix.subset(pd.Index([7, 0]))
+        np.testing.assert_allclose(subset.tail_ratio(6), [_tail_ratio_reference(distributions[7], 6),
+                                                          _tail_ratio_reference(distributions[0], 6)])
+        with pytest.raises(KeyError):
+            matrix.subset(pd.Index([99]))
+
+
+
+class TestProcessorDistributionMatrix:
+    """测试处理器按数据文件缓存的分布矩阵"""
+
+    def test_frame_loaded_before_reload(self, tmp_path):
+        """调用方的df在数据文件重写前读取时，结果仍对应df本身的内容"""
+        csv_path = tmp_path / "plate_df.csv"
+        pd.DataFrame({'板块名': ['a', 'b'], '涨幅分布': ['1-2-3', '4-5']}).to_csv(csv_path, index=False)
+        processor = SimpleNamespace(data_cache=BaseDataCache({'plate_df': str(csv_path)}), _distribution_cache={})
+        old_df = processor.data_cache.load_data('plate_df')
+
+        pd.DataFrame({'板块名': ['a', 'b'], '涨幅分布': ['9-0', '0-0-7']}).to_csv(csv_path, index=False)
+        future = time.time() + 5
+        os.utime(csv_path, (future, future))
+
+        matrix = BaseDataProcessor.get_distribution_matrix(processor, old_df)
+        expected = DistributionMatrix(old_df['涨幅分布'])
+        assert np.array_equal(matrix.values, expected.values)
+        current = processor.data_cache.load_data('plate_df')
+        matrix = BaseDataProcessor.get_distribution_matrix(processor, current.iloc[[1]])
+        assert matrix.last_values(1).tolist() == [7.0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 预编码响应缓存测试
+Backend Service Tests - Pre-encoded Payload Cache Tests
+"""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask, jsonify
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from base_server import BaseResponseCache
+from encoded_payload import EncodedPayload
+from startup_cache import StartupOnceCache
+
+LARGE_DATA = {"metadata": {}, "rows": [{"name": f"股票{i}", "value": i} for i in range(500)]}
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+class TestEncodedPayload:
+    """测试预编码响应"""
+
+    def test_gzip_negotiation(self, app):
+        """客户端支持gzip时返回压缩字节"""
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip, deflate'}):
+            payload = EncodedPayload.from_response(jsonify(LARGE_DATA))
+            response = payload.to_response()
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert 'Accept-Encoding' in response.headers['Vary']
+            assert json.loads(gzip.decompress(response.get_data())) == LARGE_DATA
+            assert len(payload.gzip_body) < len(payload.body)
+
+    def test_identity_without_accept_encoding(self, app):
+        """客户端不支持压缩时返回原始字节"""
+        with app.test_request_context():
+            payload = EncodedPayload.from_response(jsonify(LARGE_DATA))
+        with app.test_request_context(headers={'Accept-Encoding': 'identity'}):
+            response = payload.to_response()
+            assert 'Content-Encoding' not in response.headers
+            assert response.get_data() == payload.body
+
+    def test_if_none_match_returns_304(self, app):
+        """ETag命中时返回304"""
+        with app.test_request_context():
+            payload = EncodedPayload.from_response(jsonify({"a": 1}))
+        with app.test_request_context(headers={'If-None-Match': f'"{payload.etag}"'}):
+            assert payload.to_response().status_code == 304
+
+    def test_error_response_not_encoded(self, app):
+        """非200响应不编码"""
+        with app.test_request_context():
+            assert EncodedPayload.from_response((jsonify({"error": "x"}), 500)) is None
+
+
+class TestCachesStoreBytes:
+    """测试缓存保存不可变字节"""
+
+    def test_startup_cache_marks_cached(self, app):
+        """启动缓存在存入时添加缓存标识，命中时直接返回字节"""
+        cache = StartupOnceCache()
+        with app.test_request_context():
+            cache.set_startup_cache('/api/test', None, jsonify(LARGE_DATA))
+        assert isinstance(cache.startup_cache['startup:/api/test'], EncodedPayload)
+
+        with app.test_request_context():
+            data = cache.get_startup_cache('/api/test').get_json()
+        assert data['metadata']['cached'] is True
+        assert data['metadata']['cache_type'] == 'startup_once'
+        assert cache.get_startup_cache_stats()['encoded_endpoints'] == 1
+
+    def test_response_cache_hit_returns_encoded(self, app):
+        """响应缓存命中时按 Accept-Encoding 返回"""
+        cache = BaseResponseCache()
+        with app.test_request_context():
+            cache.store_response('/api/test', None, {"v": 1}, jsonify(LARGE_DATA))
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            hit, response = cache.should_use_cache('/api/test', None, {"v": 1})
+            assert hit
+            assert response.headers['Content-Encoding'] == 'gzip'
+            assert cache.get_response('/api/test').status_code == 200
+        assert cache.get_cache_stats()['encoded_entries'] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 数据帧二级索引测试
+Backend Service Tests - Frame Index Tests
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from base_server import BaseDataCache
+from frame_index import FrameIndex
+
+
+def make_minutes(rows=2000, seed=0):
+    """生成乱序的长表分钟线，包含空id"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2025-08-14 09:30', periods=120, freq='min').strftime('%Y-%m-%d %H:%M:%S')
+    df = pd.DataFrame({
+        'id': rng.integers(1, 40, rows).astype(float),
+        'time': rng.choice(times, rows),
+        'change': rng.uniform(-10, 10, rows).round(2),
+    })
+    df.loc[::50, 'id'] = np.nan
+    return df
+
+
+class TestFrameIndex:
+    """测试按id和时间列的查询与布尔筛选一致"""
+
+    def test_rows_match_boolean_filter(self):
+        """按id和时间范围取行，行顺序与原表相同"""
+        df = make_minutes()
+        index = FrameIndex(df, 'id', 'time')
+        ids = [5, 12, 999, 5]
+        start, end = '2025-08-14 10:00:00', '2025-08-14 10:30:00'
+
+        pd.testing.assert_frame_equal(index.rows(ids), df[df['id'].isin(ids)])
+        pd.testing.assert_frame_equal(index.between(start, end),
+                                      df[(df['time'] >= start) & (df['time'] <= end)])
+        pd.testing.assert_frame_equal(index.rows(ids, start, end),
+                                      df[df['id'].isin(ids) & (df['time'] >= start) & (df['time'] <= end)])
+
+    def test_groups_sorted_by_time(self):
+        """逐只股票的数据按时间排序，按给定顺序返回，没有数据的股票跳过"""
+        df = make_minutes()
+        index = FrameIndex(df, 'id', 'time')
+        groups = list(index.groups([7, 999, 3]))
+        assert [stock_id for stock_id, _ in groups] == [7, 3]
+        for stock_id, stock_data in groups:
+            expected = df[df['id'] == stock_id].sort_values(by='time', kind='stable')
+            pd.testing.assert_frame_equal(stock_data, expected)
+        assert index.group(999).empty
+
+    def test_range_requires_order_col(self):
+        """没有时间列时不能按范围查询"""
+        index = FrameIndex(make_minutes(), 'id')
+        assert len(index.rows([1, 2])) > 0
+        with pytest.raises(ValueError):
+            index.between('2025-08-14 10:00:00')
+
+    @pytest.mark.parametrize('order_col', ['time', None])
+    def test_extended_matches_full_build(self, order_col):
+        """追加行后扩展的索引与对整表重建的索引相同（含新id、空id和相同时间）"""
+        df = make_minutes(rows=2000)
+        appended = pd.concat([df, make_minutes(rows=300, seed=1).assign(id=lambda d: d['id'] + 20)],
+                             ignore_index=True)
+        extended = FrameIndex(df.iloc[:1500], 'id', order_col).extended(df).extended(appended)
+        rebuilt = FrameIndex(appended, 'id', order_col)
+
+        assert extended._code_of == rebuilt._code_of
+        np.testing.assert_array_equal(extended._order, rebuilt._order)
+        np.testing.assert_array_equal(extended._bounds, rebuilt._bounds)
+        if order_col is not None:
+            np.testing.assert_array_equal(extended._value_order, rebuilt._value_order)
+            pd.testing.assert_frame_equal(extended.rows([5, 45, 999], '2025-08-14 10:00:00', '2025-08-14 10:30:00'),
+                                          rebuilt.rows([5, 45, 999], '2025-08-14 10:00:00', '2025-08-14 10:30:00'))
+        pd.testing.assert_frame_equal(extended.group(45), rebuilt.group(45))
+
+
+class TestDataCacheIndex:
+    """测试数据缓存的二级索引"""
+
+    def test_index_reused_and_rebuilt_on_reload(self, tmp_path):
+        """数据未变化时复用索引，文件重新加载后重建"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        df = make_minutes(rows=200)
+        df.to_csv(csv_path, index=False)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)},
+                              index_specs={'stock_minute_df': {'id_col': 'id', 'order_col': 'time'}})
+
+        first = cache.query('stock_minute_df', [3, 4])
+        loaded = cache.load_data('stock_minute_df')
+        pd.testing.assert_frame_equal(first, loaded[loaded['id'].isin([3, 4])])
+        cache.query('stock_minute_df', start='2025-08-14 10:00:00')
+        assert cache.index_stats == {'builds': 1, 'extends': 0, 'hits': 1}
+
+        make_minutes(rows=300, seed=1).to_csv(csv_path, index=False)
+        future = time.time() + 5
+        os.utime(csv_path, (future, future))
+        assert len(cache.query('stock_minute_df')) == 300
+        assert cache.index_stats['builds'] == 2
+
+        cache.clear_cache()
+        assert cache.indexes == {}
+
+    def test_index_extended_after_incremental_append(self, tmp_path):
+        """增量追加的分钟线只把新行归并进已有索引，结果与布尔筛选一致"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        df = make_minutes(rows=300)
+        df.to_csv(csv_path, index=False)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)}, incremental_keys=['stock_minute_df'],
+                              index_specs={'stock_minute_df': {'id_col': 'id', 'order_col': 'time'}})
+        cache.query('stock_minute_df', [3])
+
+        make_minutes(rows=50, seed=1).to_csv(csv_path, mode='a', header=False, index=False)
+        future = time.time() + 5
+        os.utime(csv_path, (future, future))
+        result = cache.query('stock_minute_df', [3, 7], '2025-08-14 10:00:00')
+
+        loaded = cache.load_data('stock_minute_df')
+        assert len(loaded) == 350
+        pd.testing.assert_frame_equal(result, loaded[loaded['id'].isin([3, 7]) & (loaded['time'] >= '2025-08-14 10:00:00')])
+        assert cache.index_stats == {'builds': 1, 'extends': 1, 'hits': 0}
+
+    def test_concurrent_queries_build_once(self, tmp_path):
+        """并发请求同一数据键的索引时只建立一次"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        make_minutes(rows=5000).to_csv(csv_path, index=False)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)},
+                              index_specs={'stock_minute_df': {'id_col': 'id', 'order_col': 'time'}})
+        cache.load_data('stock_minute_df')
+        barrier = threading.Barrier(8)
+
+        def query(_):
+            barrier.wait()
+            return len(cache.query('stock_minute_df', [3]))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert len(set(executor.map(query, range(8)))) == 1
+        assert cache.index_stats['builds'] == 1
+
+    def test_query_result_independent(self, tmp_path):
+        """修改查询结果不影响缓存数据"""
+        csv_path = tmp_path / "stock_minute_df.csv"
+        make_minutes(rows=100).to_csv(csv_path, index=False)
+        cache = BaseDataCache({'stock_minute_df': str(csv_path)})
+        result = cache.query('stock_minute_df', [3])
+        result['change'] = 0.0
+        assert not (cache.load_data('stock_minute_df')['change'] == 0.0).all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
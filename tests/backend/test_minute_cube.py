@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 当日分钟立方体测试
+Backend Service Tests - Intraday Minute Cube Tests
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from minute_cube import IntradayCubeService, IntradayMinuteCube
+
+
+def make_bars(day='2025-08-14', times=('09:25', '09:30', '09:31', '09:32'), ids=(1, 2, 3), seed=0):
+    """生成长表分钟线"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for stock_id in ids:
+        pre_close = 10.0 + stock_id
+        for hhmm in times:
+            rows.append({'id': stock_id, 'time': f'{day} {hhmm}:00', 'trade_date': day.replace('-', ''),
+                         'close': round(pre_close * (1 + rng.uniform(-0.1, 0.1)), 2),
+                         'pre_close': pre_close, 'volume': float(rng.integers(100, 1000))})
+    return pd.DataFrame(rows)
+
+
+class TestIntradayMinuteCube:
+    """测试股票×分钟立方体"""
+
+    def test_slice_matches_long_frame(self):
+        """切片的涨幅、基准价涨幅和因子与原长表计算一致"""
+        bars = make_bars()
+        cube = IntradayMinuteCube()
+        assert cube.update(bars) == len(bars)
+
+        view = cube.slice([3, 1, 99], start='09:30')
+        assert view.ids.tolist() == [3, 1]
+        assert view.labels == ['0814_09:30', '0814_09:31', '0814_09:32']
+
+        df = bars[bars['id'].isin([3, 1])].copy()
+        df['time'] = pd.to_datetime(df['time'])
+        df = df[df['time'].dt.strftime('%H:%M') >= '09:30']
+        df['change'] = ((df['close'] - df['pre_close']) / df['pre_close'] * 100).round(2)
+        df['base'] = df.groupby('id')['close'].transform(lambda x: x.iloc[0])
+        df['change_diff'] = ((df['close'] - df['base']) / df['base'] * 100).round(2)
+        for row, stock_id in enumerate(view.ids.tolist()):
+            expected = df[df['id'] == stock_id]
+            assert view.series(row, view.change)[1] == expected['change'].tolist()
+            assert view.series(row, view.change_from_first())[1] == expected['change_diff'].tolist()
+
+        factor = df.groupby(df['time'].dt.strftime('%m%d_%H:%M'))['change'].agg(lambda x: (x > 2).sum() - (x < -2).sum())
+        counts = view.count_by_minute(view.change > 2) - view.count_by_minute(view.change < -2)
+        assert counts.tolist() == factor.tolist()
+
+    def test_incremental_update(self):
+        """新的分钟追加列，重复的分钟覆盖原值，新股票追加行"""
+        cube = IntradayMinuteCube()
+        cube.update(make_bars(times=('09:30', '09:31')))
+        latest = make_bars(times=('09:31', '09:32'), ids=(1, 4), seed=1)
+        cube.update(latest)
+
+        view = cube.slice([1, 4])
+        assert view.labels == ['0814_09:30', '0814_09:31', '0814_09:32']
+        assert view.close[0, 1:].tolist() == latest[latest['id'] == 1]['close'].tolist()
+        assert np.isnan(view.close[1, 0]) and view.series(1, view.close)[0] == ['0814_09:31', '0814_09:32']
+        assert cube.last_time == pd.Timestamp('2025-08-14 09:32')
+
+    def test_new_trade_date_resets(self):
+        """更晚交易日的数据到达时重建，更早的数据忽略"""
+        cube = IntradayMinuteCube()
+        cube.update(make_bars())
+        cube.update(make_bars(day='2025-08-15', times=('09:30',), ids=(5,)))
+        assert cube.stock_ids == [5] and cube.slice().labels == ['0815_09:30']
+        assert cube.update(make_bars(day='2025-08-14')) == 0
+
+
+class TestIntradayCubeService:
+    """测试立方体的增量刷新"""
+
+    def test_loads_from_last_minute(self):
+        """首次全量查询，之后从最后一分钟开始查询"""
+        calls = []
+
+        def loader(start_time):
+            calls.append(start_time)
+            return make_bars(times=('09:30', '09:31')) if start_time is None else make_bars(times=('09:31', '09:32'))
+
+        service = IntradayCubeService(refresh_interval=0)
+        service.get(loader)
+        cube = service.get(loader)
+        assert calls == [None, '2025-08-14 09:31:00']
+        assert cube.slice().labels[-1] == '0814_09:32'
+        assert service.get_stats()['incremental_loads'] == 1
+
+    def test_refresh_interval(self):
+        """刷新间隔内的请求不再查询"""
+        calls = []
+        service = IntradayCubeService(refresh_interval=60)
+        for _ in range(3):
+            service.get(lambda start_time: calls.append(start_time) or make_bars())
+        assert calls == [None] and service.get_stats()['skipped'] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
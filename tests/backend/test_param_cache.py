@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 参数化结果缓存测试
+Backend Service Tests - Parameter-aware Result Cache Tests
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from flask import jsonify, request
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+sys.path.insert(0, str(project_root / "api"))
+
+from base_server import BaseStockServer
+from encoded_payload import EncodedPayload
+from param_cache import ParamLRUCache
+from processors.processor_factory import ProcessorFactory, SimplifiedProcessorManager
+
+
+class TestParamLRUCache:
+    """测试参数化LRU缓存"""
+
+    def test_hit_per_params(self):
+        """相同参数命中，不同参数各自缓存"""
+        cache = ParamLRUCache()
+        cache.put('/api/a', {'sector': '银行'}, 'v1', EncodedPayload(b'{"sector": "bank"}'))
+        assert cache.get('/api/a', {'sector': '银行'}, 'v1').body == b'{"sector": "bank"}'
+        assert cache.get('/api/a', {'sector': '证券'}, 'v1') is None
+        assert cache.get_stats()['hits'] == 1 and cache.get_stats()['misses'] == 1
+
+    def test_version_and_ttl_invalidate(self):
+        """源数据版本变化或超过TTL时失效"""
+        cache = ParamLRUCache()
+        cache.put('/api/a', None, 'v1', EncodedPayload(b'{}'))
+        assert cache.get('/api/a', None, 'v2') is None
+        assert cache.get_stats()['stale'] == 1
+
+        cache.put('/api/a', None, 'v1', EncodedPayload(b'{}'))
+        time.sleep(0.02)
+        assert cache.get('/api/a', None, 'v1', ttl=0.01) is None
+        assert cache.get_stats()['expired'] == 1
+
+    def test_lru_eviction(self):
+        """超过条目数时淘汰最久未使用的条目"""
+        cache = ParamLRUCache(max_entries=2)
+        for sector in ('a', 'b'):
+            cache.put('/api/a', {'sector': sector}, 'v', EncodedPayload(b'{}'))
+        cache.get('/api/a', {'sector': 'a'}, 'v')
+        cache.put('/api/a', {'sector': 'c'}, 'v', EncodedPayload(b'{}'))
+        assert cache.get('/api/a', {'sector': 'a'}, 'v') is not None
+        assert cache.get('/api/a', {'sector': 'b'}, 'v') is None
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_error_response_not_cached(self, tmp_path):
+        """非200响应不缓存"""
+        server = ParamServer(tmp_path)
+        with server.app.test_request_context('/'):
+            response = jsonify({'error': '失败'})
+            response.status_code = 500
+            assert server.param_cache.put('/api/a', None, 'v', response) is None
+
+
+class SectorProcessor:
+    """按板块参数返回结果并记录计算次数的测试处理器"""
+
+    def __init__(self, server_instance):
+        self.server = server_instance
+        self.calls = 0
+
+    def process_sector_stocks(self):
+        self.calls += 1
+        return jsonify({'sector': request.args.get('sector'), 'rows': list(range(300))})
+
+
+class ParamServer(BaseStockServer):
+    """带一个参数化缓存端点的测试服务器"""
+
+    def __init__(self, tmp_path):
+        self.component_manager = SimpleNamespace(components={
+            'sector_stocks': SimpleNamespace(
+                api_path='/api/sector_stocks', source_data_keys=[], source_data_logic='',
+                extra_config={'params': {'sector': 'str', 'startDate': 'date'}, 'cache': {'strategy': 'param_lru'}}),
+        })
+        super().__init__(auto_update_config={'enabled': False, 'warm_cache_path': 'off'})
+        self.app.add_url_rule('/api/sector_stocks', 'sector_stocks',
+                              lambda: self.processor_manager.process('sector_stocks'), methods=['GET'])
+
+    def get_dashboard_config(self):
+        return {}
+
+    def get_data_sources(self):
+        return {}
+
+
+class TestProcessorParamCache:
+    """测试处理器管理器按参数缓存响应"""
+
+    @pytest.fixture
+    def server(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(ProcessorFactory._dynamic_processor_cache, 'param_test', SectorProcessor)
+        server = ParamServer(tmp_path)
+        server.processor_manager = SimplifiedProcessorManager(
+            'param_test', server, server.data_cache, logging.getLogger("test_param_cache"))
+        return server
+
+    def test_revisit_served_from_cache(self, server):
+        """切换回已查看过的板块时不重新计算，无关参数不影响命中"""
+        client = server.app.test_client()
+        first = client.get('/api/sector_stocks?sector=银行&_t=1')
+        client.get('/api/sector_stocks?sector=证券&_t=2')
+        again = client.get('/api/sector_stocks?sector=银行&_t=3')
+
+        assert server.processor_manager.processor.calls == 2
+        assert again.get_json() == first.get_json()
+        assert server.param_cache.get_stats()['hits'] == 1
+
+    def test_negotiated_requests_cached(self, server):
+        """浏览器请求（Accept-Encoding: gzip、If-None-Match）同样写入和命中缓存"""
+        client = server.app.test_client()
+        headers = {'Accept-Encoding': 'gzip, deflate, br'}
+        first = client.get('/api/sector_stocks?sector=bank', headers={'Accept-Encoding': 'gzip'})
+        assert first.headers.get('Content-Encoding') == 'gzip'
+        second = client.get('/api/sector_stocks?sector=bank', headers=headers)
+        not_modified = client.get('/api/sector_stocks?sector=bank',
+                                  headers={**headers, 'If-None-Match': first.headers['ETag']})
+        plain = client.get('/api/sector_stocks?sector=bank')
+
+        assert server.processor_manager.processor.calls == 1
+        assert second.status_code == 200 and not_modified.status_code == 304
+        assert plain.headers.get('Content-Encoding') is None and plain.get_json()['sector'] == 'bank'
+        assert server.param_cache.get_stats()['hits'] == 3
+
+    def test_unicode_params_preserved(self, server):
+        """合并计算时重建的请求上下文保留未转义的中文参数"""
+        client = server.app.test_client()
+        assert client.get('/api/sector_stocks?sector=银行').get_json()['sector'] == '银行'
+        assert client.get('/api/sector_stocks?sector=%E8%AF%81%E5%88%B8').get_json()['sector'] == '证券'
+
+    def test_clear_cache(self, server):
+        """清理缓存后重新计算"""
+        client = server.app.test_client()
+        client.get('/api/sector_stocks?sector=银行')
+        client.post('/api/cache/clear')
+        client.get('/api/sector_stocks?sector=银行')
+        assert server.processor_manager.processor.calls == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 处理器进程池测试
+Backend Service Tests - Processor Process Pool Tests
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from flask import jsonify, request
+
+# 添加服务器和处理器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+sys.path.insert(0, str(project_root / "api" / "processors"))
+sys.path.insert(0, str(project_root / "api"))
+
+from base_server import BaseDataCache, BaseResponseCache, BaseStockServer, PRODUCTION_MODE
+from process_pool import ProcessorPool
+from sector_index import SectorIndexService
+from processors.processor_factory import ProcessorFactory, SimplifiedProcessorManager
+
+
+class EchoProcessor:
+    """在工作进程中运行的测试处理器"""
+
+    def __init__(self, server_instance):
+        self.server = server_instance
+        self.data_cache = server_instance.data_cache
+
+    def process_echo(self):
+        df = self.data_cache.load_data('plate_df')
+        return jsonify({
+            'sector': request.args.get('sector'),
+            'rows': len(df),
+            'pid': os.getpid(),
+            'titles': self.server.dynamic_titles,
+        })
+
+    def process_fail(self):
+        return jsonify({"error": "失败"}), 500
+
+
+class _StubServer:
+    """只包含进程池所需属性的服务器"""
+
+    def __init__(self, csv_path):
+        self.name = "test_server"
+        self.logger = logging.getLogger("test_process_pool")
+        self.data_cache = BaseDataCache({'plate_df': str(csv_path)})
+        self.response_cache = BaseResponseCache()
+        self.sector_index = SectorIndexService()
+
+    def get_worker_attributes(self):
+        return {'dynamic_titles': {'table12': '标题'}}
+
+
+@pytest.fixture
+def pool(tmp_path):
+    csv_path = tmp_path / "plate_df.csv"
+    pd.DataFrame({'id': [1, 2, 3]}).to_csv(csv_path, index=False)
+    pool = ProcessorPool(_StubServer(csv_path), EchoProcessor, max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+class TestProcessorPool:
+    """测试处理器进程池"""
+
+    def test_runs_in_worker_with_request_args(self, pool):
+        """在工作进程中执行，并能读取请求参数和数据缓存"""
+        response = pool.run('echo', {'path': '/api/echo', 'query_string': 'sector=算力'})
+        data = response.get_json()
+
+        assert response.status_code == 200
+        assert data['sector'] == '算力'
+        assert data['rows'] == 3
+        assert data['titles'] == {'table12': '标题'}
+        assert data['pid'] != os.getpid()
+        assert pool.get_stats()['completed'] == 1
+
+    def test_status_code_is_preserved(self, pool):
+        """错误响应的状态码随结果返回"""
+        response = pool.run('fail', {'path': '/api/fail'})
+        assert response.status_code == 500
+        assert response.get_json() == {"error": "失败"}
+
+
+def _component(name, **extra_config):
+    return SimpleNamespace(api_path=f'/api/{name}', source_data_keys=[], source_data_logic='',
+                           extra_config=extra_config)
+
+
+class ModeServer(BaseStockServer):
+    """包含各种执行方式配置的测试服务器"""
+
+    def __init__(self, auto_update_config=None):
+        self.component_manager = SimpleNamespace(components={
+            'plain': _component('plain'),
+            'startup': _component('startup', cache={'strategy': 'startup_once'}),
+            'local': _component('local', execution={'mode': 'local'}),
+            'pooled': _component('pooled', execution={'mode': 'process_pool'}),
+        })
+        super().__init__(auto_update_config={'enabled': False, 'warm_cache_path': 'off',
+                                             **(auto_update_config or {})})
+
+    def get_dashboard_config(self):
+        return {}
+
+    def get_data_sources(self):
+        return {}
+
+
+class TestDefaultExecutionMode:
+    """测试生产模式下组件默认在进程池中执行"""
+
+    @pytest.fixture(autouse=True)
+    def processor(self, monkeypatch):
+        monkeypatch.setitem(ProcessorFactory._dynamic_processor_cache, 'mode_test', EchoProcessor)
+
+    def _pool_types(self, server):
+        manager = SimplifiedProcessorManager('mode_test', server, server.data_cache,
+                                             logging.getLogger("test_process_pool"))
+        return {name for name in ('plain', 'startup', 'local', 'pooled') if manager._uses_process_pool(name)}
+
+    def test_dev_mode_uses_explicit_config_only(self):
+        """开发模式只有显式配置 process_pool 的组件进入进程池"""
+        server = ModeServer()
+        assert server.get_default_execution_mode() == 'local'
+        assert self._pool_types(server) == {'pooled'}
+
+    def test_production_defaults_to_pool(self):
+        """生产模式下未配置的组件进入进程池，startup_once 和 local 组件仍在服务进程中执行"""
+        server = ModeServer()
+        server.serve_mode = PRODUCTION_MODE
+        assert server.get_default_execution_mode() == 'process_pool'
+        assert self._pool_types(server) == {'plain', 'pooled'}
+
+    def test_production_default_can_be_disabled(self):
+        """配置 production_process_pool 为 false 时生产模式不改变默认执行方式"""
+        server = ModeServer({'production_process_pool': False})
+        server.serve_mode = PRODUCTION_MODE
+        assert self._pool_types(server) == {'pooled'}
+
+
+
+# 工作进程中的服务器对象提供的属性（含 get_worker_attributes 导出的属性）
+WORKER_SERVER_ATTRIBUTES = {'data_cache', 'response_cache', 'sector_index', 'data_access',
+                            'daily_panels', 'minute_cube', 'logger', 'dynamic_titles'}
+
+
+def server_attributes(processor_source: str, method: str) -> set:
+    """处理方法（含其调用的 self 方法）读取的服务器属性和调用的启动缓存方法"""
+    starts = [(match.start(), match.group(1)) for match in re.finditer(r'\n    def (\w+)\(', processor_source)]
+    bodies = {name: processor_source[start:(starts[i + 1][0] if i + 1 < len(starts) else None)]
+              for i, (start, name) in enumerate(starts)}
+    attributes, pending, seen = set(), [method], set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in bodies:
+            continue
+        seen.add(name)
+        if name == '_process_with_startup_cache':
+            attributes.add(name)
+        code = '\n'.join(line.split('#', 1)[0] for line in bodies[name].splitlines())
+        attributes |= set(re.findall(r'self\.server\.(\w+)', code))
+        attributes |= set(re.findall(r"getattr\(self\.server,\s*'(\w+)'", code))
+        pending.extend(re.findall(r'self\.(\w+)', code))
+    return attributes
+
+
+class TestProductionPoolConfig:
+    """测试组件配置：生产模式下进入进程池的组件只使用工作进程提供的服务器属性"""
+
+    @pytest.mark.parametrize('server_type, processor', [
+        ('market_review', 'market_review_processor'),
+        ('market_realtime', 'market_realtime_processor'),
+        ('multiplate', 'multiplate_processor'),
+    ])
+    def test_pooled_components_use_worker_attributes(self, server_type, processor):
+        """依赖其他服务器属性的组件须配置 "execution": {"mode": "local"}"""
+        config = json.loads((project_root / "api" / "conf" / "components_config.json").read_text(encoding='utf-8'))
+        source = (project_root / "api" / "processors" / f"{processor}.py").read_text(encoding='utf-8')
+        source += (project_root / "api" / "processors" / "base_processor.py").read_text(encoding='utf-8')
+        unsupported = {}
+        for component_id, component in config[server_type].items():
+            if not isinstance(component, dict) or 'api_path' not in component:
+                continue
+            mode = component.get('execution', {}).get('mode')
+            if mode == 'local' or (mode is None and component.get('cache', {}).get('strategy') == 'startup_once'):
+                continue
+            extra = server_attributes(source, f"process_{component['api_path'][5:]}") - WORKER_SERVER_ATTRIBUTES
+            if extra:
+                unsupported[component_id] = sorted(extra)
+        assert unsupported == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 板块成员索引测试
+Backend Service Tests - Sector Index Tests
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+sys.path.insert(0, str(project_root / "api"))
+
+from data_access import MemoizedDataAccess
+from processors.base_processor import BaseDataProcessor
+from sector_index import SectorIndex, SectorIndexService
+
+
+@pytest.fixture
+def affinity_df():
+    """板块关联测试数据"""
+    return pd.DataFrame({
+        '股票id': [1, 2, 3, 4, 2, None],
+        '板块': ['人工智能', 'AI芯片', '人工智能应用', '银行', 'AI芯片', '银行'],
+    })
+
+
+class TestSectorIndex:
+    """测试板块成员索引"""
+
+    def test_exact_lookup_both_directions(self, affinity_df):
+        """板块→股票与股票→板块的精确查询"""
+        index = SectorIndex.from_frame(affinity_df, '股票id', '板块')
+        assert index.get_ids('人工智能') == [1]
+        assert index.get_ids('AI芯片') == [2]
+        assert index.get_sectors(2) == ['AI芯片']
+        assert index.get_ids('不存在') == []
+
+    def test_search_matches_substring_filter(self, affinity_df):
+        """子串查询结果与逐行 str.contains 过滤一致"""
+        index = SectorIndex.from_frame(affinity_df, '股票id', '板块')
+        for keyword in ['人工智能', 'ai', '芯', '银行', '不存在']:
+            mask = affinity_df['板块'].str.contains(keyword, na=False, case=False, regex=False)
+            expected = set(affinity_df.loc[mask, '股票id'].dropna().tolist())
+            assert set(index.search_ids(keyword)) == expected
+
+    def test_search_case_sensitive(self, affinity_df):
+        """区分大小写的子串查询"""
+        index = SectorIndex.from_frame(affinity_df, '股票id', '板块')
+        assert index.search_ids('ai', case=True) == []
+        assert index.search_ids('AI', case=True) == [2]
+
+    def test_concept_frame_parsing(self):
+        """解析逗号分隔的概念成分股，跳过非数字代码"""
+        concept_df = pd.DataFrame({
+            'concept_name': ['机器人', '算力'],
+            'stocks': ['600001,000002,abc', None],
+        })
+        index = SectorIndex.from_concept_frame(concept_df)
+        assert index.get_ids('机器人') == [600001, 2]
+        assert index.get_ids('算力') == []
+        assert index.get_sectors(2) == ['机器人']
+
+
+class TestSectorIndexService:
+    """测试板块索引服务"""
+
+    def test_rebuild_only_on_key_change(self, affinity_df):
+        """刷新键不变时复用索引"""
+        service = SectorIndexService()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return affinity_df
+
+        first = service.frame_index('affinity', 'v1', loader, '股票id', '板块')
+        second = service.frame_index('affinity', 'v1', loader, '股票id', '板块')
+        third = service.frame_index('affinity', 'v2', loader, '股票id', '板块')
+
+        assert first is second
+        assert third is not first
+        assert len(calls) == 2
+        assert service.get_stats()['builds'] == 2
+        assert service.get_stats()['hits'] == 1
+
+
+
+class ConceptProcessor(BaseDataProcessor):
+    """只使用板块索引的测试处理器"""
+
+    def __init__(self, data_access=None):
+        super().__init__(SimpleNamespace(data_cache=None, response_cache=None, logger=None,
+                                         sector_index=SectorIndexService(), data_access=data_access))
+
+    def process(self, *args, **kwargs):
+        pass
+
+
+class KplConceptData:
+    """返回开盘啦概念成员的测试加载器，members 可在测试中修改"""
+
+    members = {1: '机器人', 2: '机器人', 3: '芯片'}
+
+    def get_daily_data(self, start_date=None, end_date=None):
+        return pd.DataFrame({'trade_date': ['20250814'] * len(self.members),
+                             'id': list(self.members), 'sector_name': list(self.members.values())})
+
+
+class TestConceptRefreshKey:
+    """测试概念成员索引的刷新键"""
+
+    def test_membership_change_with_same_row_count_rebuilds(self):
+        """盘中成员变化但行数不变时重建索引，只有行顺序变化时不重建"""
+        processor = ConceptProcessor()
+        morning = pd.DataFrame({'id': [1, 2, 3], 'sector_name': ['机器人', '机器人', '芯片']})
+        afternoon = pd.DataFrame({'id': [1, 4, 3], 'sector_name': ['机器人', '机器人', '芯片']})
+
+        index = BaseDataProcessor.get_kpl_concept_index(processor, '20250814', morning)
+        assert index.get_ids('机器人') == [1, 2]
+        BaseDataProcessor.get_kpl_concept_index(processor, '20250814', morning.iloc[::-1])
+        index = BaseDataProcessor.get_kpl_concept_index(processor, '20250814', afternoon)
+        assert index.get_ids('机器人') == [1, 4]
+        assert processor.server.sector_index.get_stats()['builds'] == 2
+
+    def test_content_hashed_once_per_fetch_version(self, monkeypatch):
+        """数据访问层返回的数据（及其筛选结果）按获取版本记忆摘要，数据重新获取后才重新计算"""
+        hashes = []
+        content_key = BaseDataProcessor.content_key
+        monkeypatch.setattr(BaseDataProcessor, 'content_key',
+                            staticmethod(lambda df, columns: hashes.append(1) or content_key(df, columns)))
+        data_access = MemoizedDataAccess(ttl=0)
+        processor = ConceptProcessor(data_access)
+
+        def request():
+            df = processor.load_history(KplConceptData, start_date='20250801')
+            membership = df[df['trade_date'] == df['trade_date'].max()][['id', 'sector_name']]
+            return processor.get_kpl_concept_index('20250814', membership)
+
+        for _ in range(3):
+            assert request().get_ids('机器人') == [1, 2]
+        assert len(hashes) == 1
+
+        monkeypatch.setattr(KplConceptData, 'members', {1: '机器人', 4: '机器人', 3: '芯片'})
+        data_access.invalidate(KplConceptData)
+        assert request().get_ids('机器人') == [1, 4]
+        assert len(hashes) == 2
+        assert processor.server.sector_index.get_stats()['builds'] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
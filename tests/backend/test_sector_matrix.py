@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 板块成员矩阵测试
+Backend Service Tests - Sector Membership Matrix Tests
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# 添加处理器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "processors"))
+
+from sector_matrix import SectorMembershipMatrix
+
+
+def _set_intersection_reference(membership_df, minute_df):
+    """原有逐分钟逐板块集合求交的统计逻辑"""
+    sector_id_map = membership_df.groupby('sector_name')['id'].apply(list).to_dict()
+    time_id_map = minute_df.groupby('time_str')['id'].apply(list).to_dict()
+    result = {}
+    for time_str, id_list in time_id_map.items():
+        result[time_str] = {name: len(set(id_list) & set(ids)) for name, ids in sector_id_map.items()}
+    return pd.DataFrame.from_dict(result, orient='index')
+
+
+class TestSectorMembershipMatrix:
+    """测试板块成员矩阵统计"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.membership = pd.DataFrame({
+            'id': [1, 1, 2, 3, 3, 4, 4],
+            'sector_name': ['芯片', '军工', '芯片', '军工', '军工', '航运', '芯片'],
+        })
+        self.minutes = pd.DataFrame({
+            'time_str': ['0815_09:31', '0815_09:31', '0815_09:31', '0815_09:32', '0815_09:30', '0815_09:32'],
+            'id': [1, 2, 9, 4, 3, 4],
+        })
+
+    def test_matches_set_intersection(self):
+        """与集合求交的结果一致"""
+        matrix = SectorMembershipMatrix(self.membership)
+        counts = matrix.count_by_group(self.minutes['time_str'], self.minutes['id'])
+        expected = _set_intersection_reference(self.membership, self.minutes)
+        pd.testing.assert_frame_equal(counts, expected, check_dtype=False)
+
+    def test_unknown_stocks_keep_group_row(self):
+        """只有未知股票的分钟仍保留一行全零"""
+        matrix = SectorMembershipMatrix(self.membership)
+        counts = matrix.count_by_group(['0815_09:33'], [999])
+        assert counts.index.tolist() == ['0815_09:33']
+        assert counts.sum(axis=1).iloc[0] == 0
+
+    def test_shape(self):
+        """矩阵形状为 股票数×板块数"""
+        matrix = SectorMembershipMatrix(self.membership)
+        assert matrix.shape == (4, 3)
+        assert matrix.sectors == sorted(matrix.sectors)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
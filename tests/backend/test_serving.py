@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 服务运行模式测试
+Backend Service Tests - Serving Mode Tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+import serving
+from serving import DEV_MODE, PRODUCTION_MODE, parse_serve_mode
+
+
+class TestServeMode:
+    """测试运行模式解析"""
+
+    def test_default_is_dev(self, monkeypatch):
+        """默认使用开发模式"""
+        monkeypatch.delenv('DATA_PANEL_SERVE_MODE', raising=False)
+        assert parse_serve_mode([]) == DEV_MODE
+        assert parse_serve_mode(['5008']) == DEV_MODE
+
+    def test_production_flag(self, monkeypatch):
+        """--production 与 --serve=production 选择生产模式"""
+        monkeypatch.delenv('DATA_PANEL_SERVE_MODE', raising=False)
+        assert parse_serve_mode(['--production']) == PRODUCTION_MODE
+        assert parse_serve_mode(['5008', '--serve=production']) == PRODUCTION_MODE
+        assert parse_serve_mode(['--serve=dev']) == DEV_MODE
+
+    def test_environment_variable(self, monkeypatch):
+        """环境变量选择生产模式"""
+        monkeypatch.setenv('DATA_PANEL_SERVE_MODE', 'production')
+        assert parse_serve_mode([]) == PRODUCTION_MODE
+
+
+
+class TestCooperativeRuntime:
+    """测试协程运行时只在入口模块开头启用"""
+
+    def test_prepare_does_not_patch(self, monkeypatch):
+        """main() 中的 prepare_serve_mode 只解析模式，补丁由 patch_for_serve_mode 在导入前启用"""
+        calls = []
+        monkeypatch.setattr(serving, 'enable_cooperative_runtime', lambda: calls.append(1) or True)
+        assert serving.prepare_serve_mode(['--production']) == PRODUCTION_MODE
+        assert calls == []
+        assert serving.patch_for_serve_mode(['--production']) == PRODUCTION_MODE
+        assert calls == [1]
+        assert serving.patch_for_serve_mode(['--serve=dev']) == DEV_MODE
+        assert calls == [1]
+
+    def test_late_patch_refused(self, monkeypatch):
+        """flask 等模块已导入后不再打补丁，生产模式回退到多线程服务器"""
+        import flask  # noqa: F401
+        monkeypatch.setattr(serving, 'HAS_GEVENT', True)
+        monkeypatch.setattr(serving, 'is_cooperative', lambda: False)
+        assert 'flask' in serving.late_imported_modules()
+        assert serving.enable_cooperative_runtime() is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
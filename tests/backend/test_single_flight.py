@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 请求合并测试
+Backend Service Tests - Single-flight Tests
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from flask import jsonify
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from base_server import BaseStockServer
+from encoded_payload import EncodedPayload
+from single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """测试单飞请求合并"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """并发的相同请求只执行一次"""
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return {"value": 42}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('/api/chart', compute)))
+                   for _ in range(8)]
+        threads[0].start()
+        started.wait(1)
+        for t in threads[1:]:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert len(results) == 8
+        assert all(r is results[0] for r in results)
+        assert flight.get_stats() == {'executions': 1, 'coalesced': 7, 'in_flight': 0}
+
+    def test_sequential_calls_execute_again(self):
+        """前一次计算完成后，新请求重新执行"""
+        flight = SingleFlight()
+        assert flight.do('k', lambda: 1) == 1
+        assert flight.do('k', lambda: 2) == 2
+        assert flight.stats['executions'] == 2
+
+    def test_error_is_shared_with_waiters(self):
+        """计算失败时等待者收到同一异常"""
+        flight = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("计算失败")
+
+        def run():
+            try:
+                flight.do('k', failing)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=run)
+        leader.start()
+        started.wait(1)
+        follower = threading.Thread(target=run)
+        follower.start()
+        leader.join()
+        follower.join()
+
+        assert len(errors) == 2
+        assert flight.in_flight() == 0
+
+
+
+class CoalescingServer(BaseStockServer):
+    """用于请求合并测试的服务器"""
+
+    def __init__(self):
+        super().__init__(auto_update_config={'enabled': False, 'warm_cache_path': 'off'})
+
+    def get_dashboard_config(self):
+        return {}
+
+    def get_data_sources(self):
+        return {}
+
+
+class TestCoalescedResponses:
+    """测试合并的请求各自按请求头构建响应"""
+
+    def test_waiter_not_affected_by_leader_headers(self):
+        """领头请求带 If-None-Match / Accept-Encoding 时，等待的请求仍得到完整的未压缩响应"""
+        server = CoalescingServer()
+        payload = EncodedPayload(b'{"rows": []}' * 200)
+        gate = threading.Event()
+
+        def handler():
+            # 模拟处理器内部的缓存命中：按当前请求头构建响应
+            gate.wait(5)
+            return payload.to_response()
+
+        protected = server.with_cache_protection('/api/table', handler, stale_while_revalidate=False)
+        results = {}
+
+        def call(name, headers):
+            with server.app.test_request_context('/api/table', headers=headers):
+                response = protected()
+                results[name] = (response, response.status_code, response.get_data(),
+                                 response.headers.get('Content-Encoding'))
+
+        leader = threading.Thread(target=call, args=('leader', {'Accept-Encoding': 'gzip',
+                                                                'If-None-Match': f'"{payload.etag}"'}))
+        leader.start()
+        while server.single_flight.in_flight() == 0:
+            time.sleep(0.01)
+        waiter = threading.Thread(target=call, args=('waiter', {}))
+        waiter.start()
+        while server.single_flight.get_stats()['coalesced'] == 0:
+            time.sleep(0.01)
+        gate.set()
+        leader.join(5)
+        waiter.join(5)
+
+        assert results['leader'][1] == 304
+        assert results['waiter'][1:] == (200, payload.body, None)
+        assert results['leader'][0] is not results['waiter'][0]
+
+    def test_error_response_shared_without_etag(self):
+        """非200响应同样按请求构建新对象，不返回304"""
+        server = CoalescingServer()
+        with server.app.test_request_context('/api/table'):
+            shared = server.coalesce('k', lambda: (jsonify({'error': 'x'}), 500))
+            first, second = server.respond(shared), server.respond(shared)
+        assert first is not second and first.status_code == 500 and 'ETag' not in first.headers
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
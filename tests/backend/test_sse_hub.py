@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - SSE广播中心测试
+Backend Service Tests - SSE Broadcast Hub Tests
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from sse_hub import BroadcastHub, encode_sse
+
+
+def _payloads(messages):
+    """解析SSE消息中的data部分"""
+    return [json.loads(message.split("data: ", 1)[1]) for message in messages]
+
+
+class TestBroadcastHub:
+    """测试SSE广播中心"""
+
+    def test_event_encoded_once_for_all_subscribers(self):
+        """所有订阅者收到同一份编码结果"""
+        hub = BroadcastHub()
+        first, second = hub.subscribe(), hub.subscribe()
+        event = hub.publish({"componentId": "chart1"})
+
+        assert event.message == encode_sse({"componentId": "chart1"}, 1)
+        assert event.message.startswith("id: 1\ndata: ")
+        assert hub.wait(first, timeout=0)[0] is event.message
+        assert hub.wait(second, timeout=0)[0] is event.message
+
+    def test_wait_times_out_without_events(self):
+        """没有新事件时超时返回空列表"""
+        hub = BroadcastHub()
+        assert hub.wait(hub.subscribe(), timeout=0.05) == []
+
+    def test_wait_wakes_on_publish(self):
+        """发布事件唤醒等待中的订阅者"""
+        hub = BroadcastHub()
+        subscriber = hub.subscribe()
+        received = []
+        thread = threading.Thread(target=lambda: received.extend(hub.wait(subscriber, timeout=5)))
+        thread.start()
+        hub.publish({"componentId": "chart1"})
+        thread.join(timeout=5)
+        assert _payloads(received) == [{"componentId": "chart1"}]
+
+    def test_slow_consumer_coalesced_and_bounded(self):
+        """慢速订阅者的积压按组件合并，并且不超过上限"""
+        hub = BroadcastHub(ring_size=100, max_pending=3)
+        subscriber = hub.subscribe()
+        for i in range(10):
+            hub.publish({"componentId": f"chart{i % 2}", "n": i})
+        assert _payloads(hub.wait(subscriber, timeout=0)) == [{"componentId": "chart0", "n": 8},
+                                                              {"componentId": "chart1", "n": 9}]
+
+        for i in range(10):
+            hub.publish({"componentId": f"chart{i}"})
+        messages = hub.wait(subscriber, timeout=0)
+        assert len(messages) == 3
+        assert subscriber.dropped == 7
+
+    def test_resume_with_last_event_id(self):
+        """携带 Last-Event-ID 重连时补发之后的事件"""
+        hub = BroadcastHub()
+        for i in range(5):
+            hub.publish({"componentId": f"chart{i}"})
+        subscriber = hub.subscribe(last_event_id="3")
+        assert _payloads(hub.wait(subscriber, timeout=0)) == [{"componentId": "chart3"},
+                                                              {"componentId": "chart4"}]
+
+    def test_resync_when_events_evicted(self):
+        """缺失的事件已被挤出缓冲区时发送重新同步事件"""
+        hub = BroadcastHub(ring_size=2)
+        for i in range(5):
+            hub.publish({"componentId": f"chart{i}"})
+        subscriber = hub.subscribe(last_event_id="1")
+        payloads = _payloads(hub.wait(subscriber, timeout=0))
+        assert payloads[0]["action"] == "reload_config"
+        assert hub.get_stats()["resyncs"] == 1
+
+    def test_trim_closes_oldest_subscribers(self):
+        """超过上限时关闭最早的订阅者"""
+        hub = BroadcastHub()
+        subscribers = [hub.subscribe() for _ in range(4)]
+        assert hub.trim_subscribers(2) == 2
+        assert subscribers[0].closed and subscribers[1].closed
+        assert hub.subscriber_count() == 2
+        assert hub.wait(subscribers[0], timeout=0) == []
+
+
+class TestComponentSubscription:
+    """测试按组件订阅"""
+
+    def test_only_subscribed_components_delivered(self):
+        """只投递订阅组件的更新，不带组件ID的事件投递给所有订阅者"""
+        hub = BroadcastHub()
+        subscriber = hub.subscribe(components=["chart1"])
+        hub.publish({"componentId": "chart1"})
+        hub.publish({"componentId": "chart2"})
+        hub.publish({"action": "reload_config"})
+        assert _payloads(hub.wait(subscriber, timeout=0)) == [{"componentId": "chart1"},
+                                                              {"action": "reload_config"}]
+
+    def test_unrelated_publish_does_not_wake(self):
+        """其他组件的更新不会唤醒订阅者"""
+        hub = BroadcastHub()
+        subscriber = hub.subscribe(components=["chart1"])
+        received = []
+        thread = threading.Thread(target=lambda: received.extend(hub.wait(subscriber, timeout=0.3)))
+        thread.start()
+        hub.publish({"componentId": "chart2"})
+        thread.join(timeout=5)
+        assert received == []
+        assert hub.get_stats()["woken"] == 0
+
+    def test_update_subscription_modes(self):
+        """set/add/remove 修改订阅，set 为空时订阅全部"""
+        hub = BroadcastHub()
+        subscriber = hub.subscribe(client_id="c1", components=["chart1"])
+        hub.update_subscription("c1", ["chart2"], mode="add")
+        assert subscriber.components == {"chart1", "chart2"}
+        hub.update_subscription("c1", ["chart1"], mode="remove")
+        assert subscriber.components == {"chart2"}
+        hub.update_subscription("c1", [], mode="set")
+        assert subscriber.components is None
+        assert hub.update_subscription("missing", ["chart1"]) is None
+
+    def test_interested_components(self):
+        """汇总订阅者关心的组件，存在订阅全部的订阅者时返回None"""
+        hub = BroadcastHub()
+        hub.subscribe(components=["chart1"])
+        hub.subscribe(components=["chart2"])
+        assert hub.interested_components() == {"chart1", "chart2"}
+        hub.subscribe()
+        assert hub.interested_components() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
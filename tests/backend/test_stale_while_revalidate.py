@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - stale-while-revalidate 测试
+Backend Service Tests - Stale-while-revalidate Tests
+"""
+
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from flask import jsonify
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+sys.path.insert(0, str(project_root / "api"))
+
+from base_server import BaseStockServer
+from encoded_payload import STALE_WARNING, EncodedPayload
+from processors.processor_factory import ProcessorFactory, SimplifiedProcessorManager
+from revalidator import BackgroundRevalidator
+
+
+class TestBackgroundRevalidator:
+    """测试后台重新计算器"""
+
+    def test_deduplicates_same_key(self):
+        """相同键的任务进行中时不重复提交"""
+        release = threading.Event()
+        revalidator = BackgroundRevalidator(max_workers=2)
+        assert revalidator.submit('k', release.wait)
+        assert not revalidator.submit('k', release.wait)
+        release.set()
+        assert revalidator.wait_idle()
+        assert revalidator.submit('k', lambda: None)
+        assert revalidator.wait_idle()
+        stats = revalidator.get_stats()
+        assert stats['submitted'] == 2 and stats['deduplicated'] == 1 and stats['completed'] == 2
+
+    def test_failure_recorded(self):
+        """任务失败时记录并释放键"""
+        revalidator = BackgroundRevalidator()
+        revalidator.submit('k', lambda: 1 / 0)
+        assert revalidator.wait_idle()
+        assert revalidator.get_stats()['failed'] == 1 and not revalidator.is_pending('k')
+
+
+class TestStalePayload:
+    """测试过期响应标记"""
+
+    def test_mark_stale(self):
+        """JSON对象响应在metadata中标记stale，并带Warning头"""
+        payload = EncodedPayload(b'{"metadata": {"source": "plate"}, "rows": [1]}')
+        stale = payload.mark_stale(0)
+        assert b'"stale":true' in stale.body and b'"source":"plate"' in stale.body
+        assert stale.headers['Warning'] == STALE_WARNING
+        assert 'Warning' not in payload.headers
+
+    def test_non_object_body_unchanged(self):
+        """非JSON对象的响应只添加Warning头"""
+        stale = EncodedPayload(b'[1, 2]').mark_stale(0)
+        assert stale.body == b'[1, 2]' and stale.headers['Warning'] == STALE_WARNING
+
+
+class CountingProcessor:
+    """返回计算次数的测试处理器，计算可以被阻塞"""
+
+    def __init__(self, server_instance):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def process_plate_chart(self):
+        self.gate.wait(5)
+        self.calls += 1
+        return jsonify({'metadata': {}, 'calls': self.calls})
+
+
+class SWRServer(BaseStockServer):
+    """带一个 stale-while-revalidate 端点的测试服务器"""
+
+    def __init__(self, data_path):
+        self.data_path = str(data_path)
+        self.component_manager = SimpleNamespace(components={
+            'chart1': SimpleNamespace(
+                api_path='/api/plate_chart', source_data_keys=['plate_df'], source_data_logic='',
+                extra_config={'cache': {'strategy': 'param_lru', 'stale_while_revalidate': True}}),
+        })
+        super().__init__(auto_update_config={'enabled': False, 'warm_cache_path': 'off'})
+        self.app.add_url_rule('/api/plate_chart', 'plate_chart',
+                              lambda: self.processor_manager.process('plate_chart'), methods=['GET'])
+
+    def get_data_cache_file_paths(self):
+        return {'plate_df': self.data_path}
+
+    def get_dashboard_config(self):
+        return {}
+
+    def get_data_sources(self):
+        return {}
+
+
+def _touch(path, content, mtime):
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+
+
+class TestProcessorStaleWhileRevalidate:
+    """测试组件端点在数据变化后返回过期响应并后台重新计算"""
+
+    @pytest.fixture
+    def server(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(ProcessorFactory._dynamic_processor_cache, 'swr_test', CountingProcessor)
+        data_path = tmp_path / "plate.csv"
+        _touch(data_path, "a\n1\n", 1000)
+        server = SWRServer(data_path)
+        server.processor_manager = SimplifiedProcessorManager(
+            'swr_test', server, server.data_cache, logging.getLogger("test_swr"))
+        server.test_data_path = data_path
+        return server
+
+    def test_serves_stale_then_fresh(self, server):
+        """数据文件更新后立即返回上一份响应，后台计算完成后返回新响应"""
+        client = server.app.test_client()
+        processor = server.processor_manager.processor
+        assert client.get('/api/plate_chart').get_json()['calls'] == 1
+
+        _touch(server.test_data_path, "a\n1\n2\n", 2000)
+        processor.gate.clear()
+        stale = client.get('/api/plate_chart')
+        again = client.get('/api/plate_chart')
+        assert stale.get_json()['calls'] == 1 and stale.get_json()['metadata']['stale'] is True
+        assert stale.headers['Warning'] == STALE_WARNING
+        assert again.get_json()['metadata']['stale'] is True
+
+        processor.gate.set()
+        assert server.revalidator.wait_idle()
+        fresh = client.get('/api/plate_chart').get_json()
+        assert fresh['calls'] == 2 and 'stale' not in fresh['metadata']
+        assert server.revalidator.get_stats()['submitted'] == 1
+
+
+class TestCacheProtectionStaleWhileRevalidate:
+    """测试 with_cache_protection 的 stale-while-revalidate"""
+
+    def test_source_change_serves_stale(self, tmp_path):
+        """源数据变化后返回上一份响应，后台计算后更新缓存"""
+        server = SWRServer(tmp_path / "plate.csv")
+        source = {'version': 1}
+        calls = []
+
+        def handler():
+            calls.append(1)
+            return jsonify({'metadata': {}, 'version': source['version']})
+
+        protected = server.with_cache_protection('/api/table', handler, lambda: dict(source))
+        with server.app.test_request_context('/api/table'):
+            assert protected().get_json()['version'] == 1
+            source['version'] = 2
+            stale = protected()
+            assert stale.get_json()['version'] == 1 and stale.get_json()['metadata']['stale'] is True
+        assert server.revalidator.wait_idle()
+        with server.app.test_request_context('/api/table'):
+            assert protected().get_json()['version'] == 2
+        assert len(calls) == 2
+
+    def test_disabled(self, tmp_path):
+        """关闭时源数据变化后同步重新计算"""
+        server = SWRServer(tmp_path / "plate.csv")
+        source = {'version': 1}
+        protected = server.with_cache_protection(
+            '/api/table', lambda: jsonify({'version': source['version']}), lambda: dict(source),
+            stale_while_revalidate=False)
+        with server.app.test_request_context('/api/table'):
+            protected()
+            source['version'] = 2
+            assert protected().get_json()['version'] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
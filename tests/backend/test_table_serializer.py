@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 表格序列化测试
+Backend Service Tests - Table Serializer Tests
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 添加处理器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "processors"))
+sys.path.insert(0, str(project_root / "api" / "server"))
+sys.path.insert(0, str(project_root / "api"))
+
+from flask import Flask
+
+from base_server import BaseDataCache
+from processors.multiplate_processor import MultiPlateProcessor
+from table_serializer import serialize_rows, serialize_table
+
+
+def _iterrows_reference(df, columns):
+    """原有逐行构建逻辑，用于对比"""
+    rows = []
+    for _, row_data in df.iterrows():
+        row = {}
+        for col in columns:
+            value = row_data[col["field"]]
+            if isinstance(value, (float, np.float64, np.float32)):
+                value = round(value, 2)
+            row[col["field"]] = value
+        rows.append(row)
+    return rows
+
+
+class TestTableSerializer:
+    """测试按列批量序列化"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.df = pd.DataFrame({
+            '板块名': ['航运概念', '军工', '芯片'],
+            '板块涨幅': [1.23456, -0.5, 3.0],
+            '连板数': [1, 2, 3],
+        })
+
+    def test_matches_iterrows_output(self):
+        """与原有iterrows逻辑输出一致"""
+        columns = [{"field": "板块名", "header": "板块名"},
+                   {"field": "板块涨幅", "header": "板块涨幅", "backgroundColor": "redGreen"},
+                   {"field": "连板数", "header": "连板数"}]
+        assert serialize_rows(self.df, columns) == _iterrows_reference(self.df, columns)
+
+    def test_native_python_types(self):
+        """输出为原生Python类型，可直接JSON序列化"""
+        rows = serialize_rows(self.df, [{"field": "连板数"}, {"field": "板块涨幅"}])
+        assert type(rows[0]["连板数"]) is int
+        assert type(rows[0]["板块涨幅"]) is float
+        assert rows[0]["板块涨幅"] == 1.23
+
+    def test_format_source_default_and_limit(self):
+        """支持格式化、来源列、默认值和行数限制"""
+        rows = serialize_rows(self.df, [
+            {"field": "名称", "source": "板块名"},
+            {"field": "涨幅", "source": "板块涨幅", "format": "{:.2f}%"},
+            {"field": "板块", "source": "Sector", "default": ""},
+        ], limit=2)
+        assert rows == [{"名称": "航运概念", "涨幅": "1.23%", "板块": ""},
+                        {"名称": "军工", "涨幅": "-0.50%", "板块": ""}]
+
+    def test_serialize_table_drops_missing_columns(self):
+        """缺失列被丢弃，序列化专用键不输出"""
+        table = serialize_table(self.df, [
+            {"field": "板块名", "header": "板块名"},
+            {"field": "不存在", "header": "不存在"},
+            {"field": "板块涨幅", "header": "板块涨幅", "round": 1},
+        ])
+        assert table["columns"] == [{"field": "板块名", "header": "板块名"},
+                                    {"field": "板块涨幅", "header": "板块涨幅"}]
+        assert table["rows"][0] == {"板块名": "航运概念", "板块涨幅": 1.2}
+
+    def test_empty_frame(self):
+        """空数据返回空行"""
+        assert serialize_rows(self.df.iloc[0:0], [{"field": "板块名"}]) == []
+
+
+class TestTableEndpoints:
+    """测试表格端点通过 serialize_table 输出"""
+
+    def test_stocks_table_uses_serializer(self):
+        """缺失列补空字符串，columns 不包含序列化专用键，行数受限"""
+        data_cache = BaseDataCache()
+        data_cache.update_data('stock_df', pd.DataFrame({
+            'name': [f"股票{i}" for i in range(150)],
+            'change': [i * 0.123 for i in range(150)],
+        }))
+        processor = MultiPlateProcessor(SimpleNamespace(data_cache=data_cache, response_cache=None, logger=None))
+
+        with Flask(__name__).app_context():
+            table = processor.process_stocks_table_data().get_json()
+
+        assert [col["field"] for col in table["columns"]] == ["name", "change", "Sector", "speed_change_1min"]
+        assert all("default" not in col for col in table["columns"])
+        assert len(table["rows"]) == 100
+        assert table["rows"][1] == {"name": "股票1", "change": 0.12, "Sector": "", "speed_change_1min": ""}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
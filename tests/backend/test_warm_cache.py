@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 持久化预热缓存测试
+Backend Service Tests - Persistent Warm-start Cache Tests
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from flask import jsonify
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from base_server import BaseStockServer
+from encoded_payload import EncodedPayload
+from warm_cache import WarmStartCache, resolve_warm_cache_path
+
+
+class WarmServer(BaseStockServer):
+    """带一个启动缓存端点的测试服务器"""
+
+    def __init__(self, cache_path, data_path):
+        self.data_path = str(data_path)
+        self.component_manager = SimpleNamespace(components={
+            'chart1': SimpleNamespace(api_path='/api/daily', title='日线', source_data_keys=['daily_df'],
+                                      extra_config={'cache': {'strategy': 'startup_once'}}),
+        })
+        super().__init__(auto_update_config={'enabled': False, 'warm_cache_path': str(cache_path)})
+        self.calls = 0
+        self.app.add_url_rule('/api/daily', 'daily', self.handle, methods=['GET'])
+
+    def get_data_cache_file_paths(self):
+        return {'daily_df': self.data_path}
+
+    def handle(self):
+        if self.startup_cache.is_startup_cached('/api/daily'):
+            return self.startup_cache.get_startup_cache('/api/daily')
+        self.calls += 1
+        response = jsonify({'metadata': {}, 'rows': list(range(300))})
+        self.startup_cache.set_startup_cache('/api/daily', None, response)
+        return response
+
+    def get_dashboard_config(self):
+        return {}
+
+    def get_data_sources(self):
+        return {}
+
+
+class FakeDailyLoader:
+    """返回最近交易日数据的测试加载器，days 为入库的交易日数"""
+
+    days = 2
+
+    def get_daily_data(self, start_date=None, end_date=None):
+        dates = [(datetime.now() - timedelta(days=offset)).strftime('%Y%m%d') for offset in range(FakeDailyLoader.days)]
+        return pd.DataFrame({'trade_date': sorted(dates), 'close': 1.0})
+
+
+class LoaderWarmServer(WarmServer):
+    """启动缓存端点读取加载器（/api/daily）或未声明输入（/api/other）的测试服务器"""
+
+    def __init__(self, cache_path, data_path):
+        super().__init__(cache_path, data_path)
+        self.component_manager.components = {
+            'chart1': SimpleNamespace(api_path='/api/daily', title='日线', source_data_keys=[], source_data_logic='',
+                                      extra_config={'cache': {'strategy': 'startup_once',
+                                                              'source_loaders': ['FakeDailyLoader']}}),
+            'chart2': SimpleNamespace(api_path='/api/other', title='其他', source_data_keys=[], source_data_logic='',
+                                      extra_config={'cache': {'strategy': 'startup_once'}}),
+        }
+        self.app.add_url_rule('/api/other', 'other', lambda: jsonify({'metadata': {}}), methods=['GET'])
+
+    def get_warm_start_loaders(self):
+        return {'FakeDailyLoader': FakeDailyLoader}
+
+
+class TestWarmStartCache:
+    """测试持久化缓存存取"""
+
+    def test_save_and_load(self, tmp_path):
+        """指纹一致时恢复相同的字节，不一致时视为失效"""
+        cache = WarmStartCache(str(tmp_path / "warm.sqlite3"), namespace="test")
+        payload = EncodedPayload(b'{"rows": [1, 2, 3]}' * 100)
+        assert cache.save('/api/a', None, 'fp1', payload)
+
+        restored = cache.load('/api/a', None, 'fp1')
+        assert restored.body == payload.body
+        assert restored.gzip_body == payload.gzip_body
+        assert restored.etag == payload.etag
+        assert cache.load('/api/a', None, 'fp2') is None
+        assert cache.get_stats()['stale'] == 1
+
+    def test_missing_file_not_created(self, tmp_path):
+        """只读取时不创建数据库文件"""
+        path = tmp_path / "warm.sqlite3"
+        assert WarmStartCache(str(path)).load('/api/a', None, 'fp') is None
+        assert not path.exists()
+
+    def test_clear_only_own_namespace(self, tmp_path):
+        """清除只影响当前服务器的条目"""
+        path = str(tmp_path / "warm.sqlite3")
+        first, second = WarmStartCache(path, "first"), WarmStartCache(path, "second")
+        first.save('/api/a', None, 'fp', EncodedPayload(b'{}'))
+        second.save('/api/a', None, 'fp', EncodedPayload(b'{}'))
+        assert first.clear() == 1
+        assert second.load('/api/a', None, 'fp') is not None
+
+    def test_disable(self):
+        """设置为off时禁用"""
+        assert resolve_warm_cache_path('off') is None
+        assert not WarmStartCache(None).enabled
+
+
+class TestServerWarmStart:
+    """测试服务器重启后从持久化缓存恢复"""
+
+    def test_restart_restores_without_recompute(self, tmp_path):
+        """重启后指纹未变化的端点直接恢复，数据文件变化后重新计算"""
+        cache_path, data_path = tmp_path / "warm.sqlite3", tmp_path / "daily.csv"
+        data_path.write_text("a\n1\n")
+
+        first = WarmServer(cache_path, data_path)
+        first._warmup_startup_cache()
+        assert first.calls == 1
+
+        second = WarmServer(cache_path, data_path)
+        assert second._restore_warm_start_cache() == 1
+        second._warmup_startup_cache()
+        assert second.calls == 0
+        response = second.app.test_client().get('/api/daily')
+        assert response.get_json()['metadata']['cached'] is True
+
+        data_path.write_text("a\n1\n2\n")
+        os.utime(data_path, (1, 1))
+        third = WarmServer(cache_path, data_path)
+        assert third._restore_warm_start_cache() == 0
+        third._warmup_startup_cache()
+        assert third.calls == 1
+
+
+    def test_loader_version_invalidates(self, tmp_path):
+        """加载器有新交易日入库后不恢复，未声明输入的端点不持久化"""
+        cache_path, data_path = tmp_path / "warm.sqlite3", tmp_path / "daily.csv"
+        data_path.write_text("a\n1\n")
+        FakeDailyLoader.days = 2
+
+        first = LoaderWarmServer(cache_path, data_path)
+        first._warmup_startup_cache()
+        assert first.warm_cache.get_stats()['saved'] == 1
+
+        assert LoaderWarmServer(cache_path, data_path)._restore_warm_start_cache() == 1
+
+        FakeDailyLoader.days = 3
+        third = LoaderWarmServer(cache_path, data_path)
+        assert third._restore_warm_start_cache() == 0
+        third._warmup_startup_cache()
+        assert third.calls == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端服务测试 - 启动缓存预热调度器测试
+Backend Service Tests - Startup Warmup Scheduler Tests
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# 添加服务器目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "api" / "server"))
+
+from warmup_scheduler import SKIPPED, WarmupScheduler
+
+
+class TestWarmupScheduler:
+    """测试预热调度器"""
+
+    def test_priority_order(self):
+        """单线程时按优先级顺序执行，未配置优先级的排在最后"""
+        order = []
+        configs = [{'endpoint': '/api/c'}, {'endpoint': '/api/b', 'priority': 20},
+                   {'endpoint': '/api/a', 'priority': 10}]
+        WarmupScheduler(max_workers=1).run(configs, lambda config: order.append(config['endpoint']))
+        assert order == ['/api/a', '/api/b', '/api/c']
+
+    def test_shared_inputs_loaded_first(self):
+        """共用输入在所有端点之前加载"""
+        events = []
+        shared = {'stock_daily': lambda: events.append('shared')}
+        WarmupScheduler(max_workers=2).run([{'endpoint': '/api/a'}, {'endpoint': '/api/b'}],
+                                           lambda config: events.append(config['endpoint']), shared)
+        assert events[0] == 'shared'
+
+    def test_endpoints_run_concurrently(self):
+        """多个端点并行执行"""
+        barrier = threading.Barrier(3, timeout=5)
+        configs = [{'endpoint': f'/api/{i}'} for i in range(3)]
+        progress = WarmupScheduler(max_workers=3).run(configs, lambda config: barrier.wait())
+        assert progress['completed'] == 3 and progress['failed'] == 0
+
+    def test_progress_records_status_and_timing(self):
+        """记录每个端点的状态、耗时和错误"""
+        def warm(config):
+            if config['endpoint'] == '/api/bad':
+                raise RuntimeError("boom")
+            if config['endpoint'] == '/api/cached':
+                return SKIPPED
+            time.sleep(0.01)
+
+        configs = [{'endpoint': '/api/ok'}, {'endpoint': '/api/bad'}, {'endpoint': '/api/cached'}]
+        progress = WarmupScheduler(max_workers=2).run(configs, warm)
+        endpoints = {entry['name']: entry for entry in progress['endpoints']}
+
+        assert progress['state'] == 'done'
+        assert progress['total'] == 3 and progress['completed'] == 2 and progress['failed'] == 1
+        assert endpoints['/api/ok']['status'] == 'done' and endpoints['/api/ok']['duration'] >= 0.01
+        assert endpoints['/api/bad']['error'] == 'boom'
+        assert endpoints['/api/cached']['status'] == 'skipped'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])